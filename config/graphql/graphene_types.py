@@ -334,9 +334,34 @@ class DocumentRelationshipType(AnnotatePermissionsForReadMixin, DjangoObjectType
             return queryset
 
 
+class CompactAnnotationType(graphene.ObjectType):
+    """
+    Lightweight annotation payload served from the per-page annotation index.
+    Token refs are packed as a flat ``[pageIndex, tokenIndex, ...]`` int list.
+    """
+
+    id = graphene.ID()
+    label_id = graphene.ID()
+    page = graphene.Int()
+    annotation_type = graphene.String()
+    structural = graphene.Boolean()
+    bounds = GenericScalar()
+    tokens = graphene.List(graphene.Int)
+    span = graphene.List(graphene.Int)
+
+    def resolve_id(self, info):
+        return to_global_id("AnnotationType", self["id"])
+
+    def resolve_label_id(self, info):
+        if self["label_id"] is None:
+            return None
+        return to_global_id("AnnotationLabelType", self["label_id"])
+
+
 class PageAwareAnnotationType(graphene.ObjectType):
     pdf_page_info = graphene.Field(PdfPageInfoType)
     page_annotations = graphene.List(AnnotationType)
+    compact_annotations = graphene.List(CompactAnnotationType)
 
 
 class AnnotationLabelType(AnnotatePermissionsForReadMixin, DjangoObjectType):
@@ -911,7 +936,7 @@ class BulkDocumentUploadStatusType(graphene.ObjectType):
 
 class UserImportType(AnnotatePermissionsForReadMixin, DjangoObjectType):
     def resolve_zip(self, info):
-        return "" if not self.file else info.context.build_absolute_uri(self.zip.url)
+        return "" if not self.zip else info.context.build_absolute_uri(self.zip.url)
 
     class Meta:
         model = UserImport
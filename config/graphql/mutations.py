@@ -38,6 +38,7 @@ from config.graphql.graphene_types import (
     RelationshipType,
     UserExportType,
     UserFeedbackType,
+    UserImportType,
     UserType,
 )
 from config.graphql.serializers import (
@@ -91,7 +92,8 @@ from opencontractserver.types.enums import (
     LabelType,
     PermissionTypes,
 )
-from opencontractserver.users.models import UserExport
+from opencontractserver.users.models import UserExport, UserImport
+from opencontractserver.utils.document_dedup import file_sha256
 from opencontractserver.utils.etl import is_dict_instance_of_typed_dict
 from opencontractserver.utils.files import is_plaintext_content
 from opencontractserver.utils.permissioning import (
@@ -923,6 +925,9 @@ class UploadCorpusImportZip(graphene.Mutation):
     ok = graphene.Boolean()
     message = graphene.String()
     corpus = graphene.Field(CorpusType)
+    user_import = graphene.Field(
+        UserImportType, description="Job tracking the import's progress and errors"
+    )
 
     @login_required
     def mutate(root, info, base_64_file_string):
@@ -964,11 +969,18 @@ class UploadCorpusImportZip(graphene.Mutation):
                 temporary_file.save()
                 logger.info("UploadCorpusImportZip.mutate() - temporary file created.")
 
+                user_import = UserImport.objects.create(
+                    name=f"Corpus import {corpus_obj.id}",
+                    creator=info.context.user,
+                    corpus=corpus_obj,
+                )
+
             transaction.on_commit(
-                lambda: chain(
-                    import_corpus.s(
-                        temporary_file.id, info.context.user.id, corpus_obj.id
-                    )
+                lambda: import_corpus.s(
+                    temporary_file.id,
+                    info.context.user.id,
+                    corpus_obj.id,
+                    user_import.id,
                 ).apply_async()
             )
             logger.info("UploadCorpusImportZip.mutate() - Async task launched...")
@@ -983,9 +995,12 @@ class UploadCorpusImportZip(graphene.Mutation):
                 f"UploadCorpusImportZip() - could not start load job due to error: {e}"
             )
             corpus_obj = None
+            user_import = None
             logger.error(message)
 
-        return UploadCorpusImportZip(message=message, ok=ok, corpus=corpus_obj)
+        return UploadCorpusImportZip(
+            message=message, ok=ok, corpus=corpus_obj, user_import=user_import
+        )
 
 
 class UploadDocument(graphene.Mutation):
@@ -1016,6 +1031,12 @@ class UploadDocument(graphene.Mutation):
             description="If True, document is immediately public. "
             "Defaults to False.",
         )
+        reuse_existing_parse = graphene.Boolean(
+            required=False,
+            default_value=True,
+            description="If True (default) and you can see an identical, already processed file, "
+            "its parse is reused instead of parsing the upload again.",
+        )
 
     ok = graphene.Boolean()
     message = graphene.String()
@@ -1033,6 +1054,7 @@ class UploadDocument(graphene.Mutation):
         make_public,
         add_to_corpus_id=None,
         add_to_extract_id=None,
+        reuse_existing_parse=True,
     ):
         if add_to_corpus_id is not None and add_to_extract_id is not None:
             return UploadDocument(
@@ -1080,6 +1102,7 @@ class UploadDocument(graphene.Mutation):
                 )
 
             user = info.context.user
+            sha256 = file_sha256(file_bytes)
 
             if kind in [
                 "application/pdf",
@@ -1094,10 +1117,12 @@ class UploadDocument(graphene.Mutation):
                     description=description,
                     custom_meta=custom_meta,
                     pdf_file=pdf_file,
+                    file_sha256=sha256,
                     backend_lock=True,
                     is_public=make_public,
                     file_type=kind,  # Store filetype
                 )
+                document.reuse_existing_parse = reuse_existing_parse
                 document.save()
             elif kind in ["text/plain", "application/txt"]:
                 txt_extract_file = ContentFile(file_bytes, name=filename)
@@ -1107,10 +1132,12 @@ class UploadDocument(graphene.Mutation):
                     description=description,
                     custom_meta=custom_meta,
                     txt_extract_file=txt_extract_file,
+                    file_sha256=sha256,
                     backend_lock=True,
                     is_public=make_public,
                     file_type=kind,
                 )
+                document.reuse_existing_parse = reuse_existing_parse
                 document.save()
 
             set_permissions_for_obj_to_user(user, document, [PermissionTypes.CRUD])
@@ -1173,6 +1200,12 @@ class UploadDocumentsZip(graphene.Mutation):
             required=True,
             description="If True, documents are immediately public. Defaults to False.",
         )
+        reuse_existing_parse = graphene.Boolean(
+            required=False,
+            default_value=True,
+            description="If True (default), files identical to an already processed document "
+            "you can see reuse its parse instead of being parsed again.",
+        )
 
     ok = graphene.Boolean()
     message = graphene.String()
@@ -1188,6 +1221,7 @@ class UploadDocumentsZip(graphene.Mutation):
         description=None,
         custom_meta=None,
         add_to_corpus_id=None,
+        reuse_existing_parse=True,
     ):
         # Was going to user a user_passes_test decorator, but I wanted a custom error message
         # that could be easily reflected to user in the GUI.
@@ -1241,34 +1275,24 @@ class UploadDocumentsZip(graphene.Mutation):
                             job_id=job_id,
                         )
 
-            # Launch async task to process the zip file
+            # Launch async task to process the zip file. Its task id is the job id
+            # the bulk_document_upload_status query looks the job up by.
+            process_zip_task = process_documents_zip.s(
+                temporary_file.id,
+                info.context.user.id,
+                job_id,
+                title_prefix,
+                description,
+                custom_meta,
+                make_public,
+                corpus_id,
+                reuse_existing_parse,
+            )
             if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
-                chain(
-                    process_documents_zip.s(
-                        temporary_file.id,
-                        info.context.user.id,
-                        job_id,
-                        title_prefix,
-                        description,
-                        custom_meta,
-                        make_public,
-                        corpus_id,
-                    )
-                ).apply_async()
+                process_zip_task.apply_async(task_id=job_id)
             else:
                 transaction.on_commit(
-                    lambda: chain(
-                        process_documents_zip.s(
-                            temporary_file.id,
-                            info.context.user.id,
-                            job_id,
-                            title_prefix,
-                            description,
-                            custom_meta,
-                            make_public,
-                            corpus_id,
-                        )
-                    ).apply_async()
+                    lambda: process_zip_task.apply_async(task_id=job_id)
                 )
             logger.info("UploadDocumentsZip.mutate() - Async task launched...")
 
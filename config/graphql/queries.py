@@ -88,9 +88,15 @@ from opencontractserver.pipeline.utils import (
     get_components_by_mimetype,
     get_metadata_for_component,
 )
-from opencontractserver.shared.resolvers import resolve_oc_model_queryset
+from opencontractserver.shared.resolvers import (
+    resolve_bulk_doc_annotations_queryset,
+    resolve_bulk_doc_relationships_queryset,
+    resolve_oc_model_queryset,
+)
 from opencontractserver.types.enums import LabelType
 from opencontractserver.users.models import Assignment, UserExport, UserImport
+from opencontractserver.utils.job_progress import get_job_progress
+from opencontractserver.utils.page_index import get_page_entries
 
 logger = logging.getLogger(__name__)
 
@@ -307,24 +313,14 @@ class Query(graphene.ObjectType):
     )
 
     def resolve_bulk_doc_relationships_in_corpus(self, info, corpus_id, document_id):
-        # Get the base queryset first (only stuff given user CAN see)
-        if info.context.user.is_superuser:
-            queryset = Relationship.objects.all().order_by("created")
-        # Otherwise, if user is anonymous, try easy query
-        elif info.context.user.is_anonymous:
-            queryset = Relationship.objects.filter(Q(is_public=True))
-        # Finally, in all other cases, actually do the hard work
-        else:
-            queryset = Relationship.objects.filter(
-                Q(creator=info.context.user) | Q(is_public=True)
-            )
-
         doc_django_pk = from_global_id(document_id)[1]
         corpus_django_pk = from_global_id(corpus_id)[1]
 
-        queryset = queryset.filter(
-            corpus_id=corpus_django_pk, document_id=doc_django_pk
-        )  # Existing filter
+        queryset = resolve_bulk_doc_relationships_queryset(
+            info.context.user, corpus_django_pk, doc_django_pk
+        )
+        if info.context.user.is_superuser:
+            queryset = queryset.order_by("created")
         queryset = queryset.select_related(
             "relationship_label",
             "corpus",
@@ -350,22 +346,8 @@ class Query(graphene.ObjectType):
 
         corpus_django_pk = from_global_id(corpus_id)[1]
 
-        # Get the base queryset first (only stuff given user CAN see)
-        if info.context.user.is_superuser:
-            queryset = Annotation.objects.all().order_by("page")
-        elif info.context.user.is_anonymous:
-            queryset = Annotation.objects.filter(Q(is_public=True))
-        else:
-            queryset = Annotation.objects.filter(
-                Q(creator=info.context.user) | Q(is_public=True)
-            )
-
-        # Now build query to stuff they want to see (filter to annotations in this corpus or with NO corpus FK, which
-        # travel with document.
-        q_objects = Q(corpus_id=corpus_django_pk) | Q(corpus_id__isnull=True)
-
-        # If for_analysis_ids is passed in, only show annotations from those analyses, otherwise only show human
-        # annotations.
+        # If for_analysis_ids is passed in, only show annotations from those analyses
+        analysis_pks = None
         for_analysis_ids = kwargs.get("for_analysis_ids", None)
         if for_analysis_ids is not None and len(for_analysis_ids) > 0:
             logger.info(
@@ -378,24 +360,19 @@ class Query(graphene.ObjectType):
                 )
             ]
             logger.info(f"resolve_bulk_doc_annotations - Analysis pks: {analysis_pks}")
-            q_objects.add(Q(analysis_id__in=analysis_pks), Q.AND)
-        # else:
-        #     q_objects.add(Q(analysis__isnull=True), Q.AND)
-
-        label_type = kwargs.get("label_type", None)
-        if label_type is not None:
-            q_objects.add(Q(annotation_label__label_type=label_type), Q.AND)
 
         document_id = kwargs.get("document_id", None)
-        if document_id is not None:
-            doc_pk = from_global_id(document_id)[1]
-            q_objects.add(Q(document_id=doc_pk), Q.AND)
-
-        logger.info(f"Filter queryset {queryset} bulk annotations: {q_objects}")
+        doc_pk = from_global_id(document_id)[1] if document_id is not None else None
+
+        queryset = resolve_bulk_doc_annotations_queryset(
+            info.context.user,
+            corpus_django_pk,
+            document_pk=doc_pk,
+            analysis_pks=analysis_pks,
+            label_type=kwargs.get("label_type", None),
+        )
 
-        final_queryset = queryset.filter(q_objects).order_by(
-            "created", "page"
-        )  # Existing filter/order
+        final_queryset = queryset.order_by("created", "page")
         final_queryset = final_queryset.select_related(
             "annotation_label",
             "creator",
@@ -416,6 +393,11 @@ class Query(graphene.ObjectType):
         document_id=graphene.ID(required=True),
         for_analysis_ids=graphene.String(required=False),
         label_type=graphene.Argument(label_type_enum),
+        compact=graphene.Boolean(
+            required=False,
+            description="Return compactAnnotations (ids, bounds, packed token refs) "
+            "instead of full pageAnnotations objects.",
+        ),
     )
 
     def resolve_page_annotations(self, info, document_id, corpus_id=None, **kwargs):
@@ -433,36 +415,13 @@ class Query(graphene.ObjectType):
             logger.error(f"Document with pk {doc_django_pk} not found.")
             return None  # Or raise appropriate GraphQL error
 
-        # Get the base queryset first (only stuff given user CAN see)
-        if info.context.user.is_superuser:
-            queryset = Annotation.objects.all()  # Base queryset, ordering later
-        elif info.context.user.is_anonymous:
-            queryset = Annotation.objects.filter(Q(is_public=True))
-        else:
-            queryset = Annotation.objects.filter(
-                Q(creator=info.context.user) | Q(is_public=True)
-            )
-
-        # Apply select_related EARLY to the base queryset
-        queryset = queryset.select_related(
-            "annotation_label",
-            "creator",
-            "document",  # Document already fetched, but good practice if base queryset reused
-            "corpus",
-            "analysis",
-            "analysis__analyzer",
-        )
-
-        # Now build query filters
-        q_objects = Q(document_id=doc_django_pk)
-        if corpus_id is not None:
-            corpus_pk = from_global_id(corpus_id)[
-                1
-            ]  # Get corpus_pk only if corpus_id is present
-            q_objects.add(Q(corpus_id=corpus_pk), Q.AND)
+        # Resolve the filters that key the cached per-page index. Visibility
+        # (creator / is_public) is applied per request against the index entries.
+        corpus_pk = from_global_id(corpus_id)[1] if corpus_id is not None else None
 
         # If for_analysis_ids is passed in, only show annotations from those analyses
         for_analysis_ids = kwargs.get("for_analysis_ids", None)
+        analysis_pks = None
         if for_analysis_ids is not None:
             analysis_pks = [
                 int(from_global_id(value)[1])
@@ -474,7 +433,6 @@ class Query(graphene.ObjectType):
                 logger.info(
                     f"resolve_page_annotations - Filtering by Analysis pks: {analysis_pks}"
                 )
-                q_objects.add(Q(analysis_id__in=analysis_pks), Q.AND)
             else:
                 # Handle case maybe? Or assume UI prevents empty string if filter applied
                 logger.warning(
@@ -484,18 +442,12 @@ class Query(graphene.ObjectType):
             logger.info(
                 "resolve_page_annotations - for_analysis_ids is None, filtering for analysis__isnull=True"
             )
-            q_objects.add(Q(analysis__isnull=True), Q.AND)
 
         label_type = kwargs.get("label_type", None)
         if label_type is not None:
             logger.info(
                 f"resolve_page_annotations - Filtering by label_type: {label_type}"
             )
-            q_objects.add(Q(annotation_label__label_type=label_type), Q.AND)
-
-        # Apply filters to the optimized base queryset
-        # Order by page first for potential pagination logic, then created
-        all_pages_annotations = queryset.filter(q_objects).order_by("page", "created")
 
         # --- Determine the current page ---
         page_containing_annotation_with_id = kwargs.get(
@@ -557,23 +509,47 @@ class Query(graphene.ObjectType):
         # Convert 1-indexed current page to 0-indexed for DB filtering
         current_page_zero_indexed = max(0, current_page - 1)  # Ensure it's not negative
 
-        # --- Filter annotations for the specific page(s) ---
+        # --- Look up annotations for the specific page(s) in the page index ---
         if page_number_list is not None and re.search(
             r"^(?:\d+,)*\d+$", page_number_list
         ):
             # Use validated page list from earlier
             pages_zero_indexed = [max(0, page - 1) for page in pages]
-            page_annotations = all_pages_annotations.filter(
-                page__in=pages_zero_indexed
-            )  # Order already applied
         else:
-            page_annotations = all_pages_annotations.filter(
-                page=current_page_zero_indexed
-            )  # Order already applied
+            pages_zero_indexed = [current_page_zero_indexed]
+
+        page_entries = get_page_entries(
+            document_id=doc_django_pk,
+            pages=pages_zero_indexed,
+            user=info.context.user,
+            corpus_id=corpus_pk,
+            analysis_ids=analysis_pks,
+            label_type=label_type,
+        )
 
         logger.info(
-            f"resolve_page_annotations - final page annotations count: {page_annotations.count()}"
-        )  # Use .count() carefully if queryset is large
+            f"resolve_page_annotations - final page annotations count: {len(page_entries)}"
+        )
+
+        if kwargs.get("compact", False):
+            page_annotations = None
+            compact_annotations = page_entries
+        else:
+            compact_annotations = None
+            page_annotations = (
+                Annotation.objects.filter(
+                    id__in=[entry["id"] for entry in page_entries]
+                )
+                .select_related(
+                    "annotation_label",
+                    "creator",
+                    "document",
+                    "corpus",
+                    "analysis",
+                    "analysis__analyzer",
+                )
+                .order_by("page", "created")
+            )
 
         pdf_page_info = PdfPageInfoType(
             page_count=document.page_count,
@@ -587,7 +563,9 @@ class Query(graphene.ObjectType):
         )
 
         return PageAwareAnnotationType(
-            page_annotations=page_annotations, pdf_page_info=pdf_page_info
+            page_annotations=page_annotations,
+            compact_annotations=compact_annotations,
+            pdf_page_info=pdf_page_info,
         )
 
     annotation = relay.Node.Field(AnnotationType)
@@ -1549,7 +1527,8 @@ class Query(graphene.ObjectType):
         Resolver for the bulk_document_upload_status query.
 
         This queries Redis for the status of a bulk document upload job.
-        The status is stored as a result in Celery's backend.
+        The status is stored as a result in Celery's backend; while the job
+        runs, its file counters come from its progress counters (job_progress).
 
         Args:
             info: GraphQL execution info
@@ -1619,11 +1598,16 @@ class Query(graphene.ObjectType):
                         errors=["Task failed with an exception"],
                     )
             else:
-                # Task is still running
+                # Task is still running; report the counters its chunks keep
+                progress = get_job_progress(job_id) or {}
                 return BulkDocumentUploadStatusType(
                     job_id=job_id,
                     success=False,
                     completed=False,
+                    total_files=progress.get("total_files", 0),
+                    processed_files=progress.get("processed_files", 0),
+                    skipped_files=progress.get("skipped_files", 0),
+                    error_files=progress.get("error_files", 0),
                     errors=["Task is still running"],
                 )
 
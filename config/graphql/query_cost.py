@@ -0,0 +1,302 @@
+"""
+Static query cost analysis and a per-request SQL budget for the GraphQL API.
+
+``QueryCostMiddleware`` sits in the graphene middleware stack next to
+``PermissionAnnotatingMiddleware``. The first time a root field resolves it walks
+the operation's AST (fragments included) against the schema and computes:
+
+* depth - nesting of fields, not counting relay ``edges`` / ``node`` wrappers
+* breadth - the widest single selection set
+* cost - the sum of per-field weights (``GRAPHQL_FIELD_COST_WEIGHTS``, keyed
+  ``"TypeName.fieldName"``, default 1), each multiplied by the page size of
+  every enclosing connection (``first`` / ``last`` or the relay max limit) or
+  ``GRAPHQL_LIST_COST_MULTIPLIER`` for plain lists.
+
+Operations over ``GRAPHQL_MAX_QUERY_DEPTH`` / ``GRAPHQL_MAX_QUERY_BREADTH`` /
+``GRAPHQL_MAX_QUERY_COST`` are rejected before any resolver runs (or only logged
+if ``GRAPHQL_QUERY_COST_ENFORCE`` is off).
+
+``SQLBudget`` is installed around execution by ``OpenContractsGraphQLView`` via
+``connection.execute_wrapper``. It counts and times every SQL statement issued
+while a request executes; once ``GRAPHQL_SQL_QUERY_BUDGET`` or
+``GRAPHQL_SQL_TIME_BUDGET_MS`` is exceeded the request is logged and, when
+``GRAPHQL_SQL_BUDGET_ACTION == "abort"``, further statements raise.
+
+With ``GRAPHQL_QUERY_COST_DEBUG`` on, the response carries an ``extensions``
+object with the computed cost, the SQL totals and per-resolver timings.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SQLBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class QueryCost:
+    depth: int = 0
+    breadth: int = 0
+    cost: int = 0
+
+    def violations(self) -> list[str]:
+        limits = (
+            ("depth", self.depth, getattr(settings, "GRAPHQL_MAX_QUERY_DEPTH", 12)),
+            (
+                "breadth",
+                self.breadth,
+                getattr(settings, "GRAPHQL_MAX_QUERY_BREADTH", 100),
+            ),
+            ("cost", self.cost, getattr(settings, "GRAPHQL_MAX_QUERY_COST", 100000)),
+        )
+        return [
+            f"Query {name} {value} exceeds the maximum of {limit}"
+            for name, value, limit in limits
+            if limit and value > limit
+        ]
+
+
+def _is_connection_wrapper(parent_type) -> bool:
+    return parent_type.name.endswith(("Connection", "Edge"))
+
+
+def _int_argument(node: FieldNode, names: tuple[str, ...], variables: dict):
+    for argument in node.arguments or []:
+        if argument.name.value not in names:
+            continue
+        if isinstance(argument.value, IntValueNode):
+            return int(argument.value.value)
+        if isinstance(argument.value, VariableNode):
+            value = variables.get(argument.value.name.value)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def _list_multiplier(node: FieldNode, field_type, variables: dict) -> int:
+    named_type = get_named_type(field_type)
+    if named_type.name.endswith("Connection"):
+        max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT or 100
+        requested = _int_argument(node, ("first", "last"), variables)
+        return max(1, min(requested or max_limit, max_limit))
+    if is_list_type(get_nullable_type(field_type)):
+        return getattr(settings, "GRAPHQL_LIST_COST_MULTIPLIER", 10)
+    return 1
+
+
+def _flatten_fields(selection_set, fragments, visited) -> list[FieldNode]:
+    fields = []
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields.append(selection)
+        elif isinstance(selection, InlineFragmentNode):
+            fields.extend(_flatten_fields(selection.selection_set, fragments, visited))
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            if name in visited or name not in fragments:
+                continue
+            fields.extend(
+                _flatten_fields(
+                    fragments[name].selection_set, fragments, visited | {name}
+                )
+            )
+    return fields
+
+
+def analyze_query_cost(
+    operation, schema, fragments: dict, variables: Optional[dict] = None
+) -> QueryCost:
+    """Compute depth / breadth / cost for an operation definition node."""
+    weights = getattr(settings, "GRAPHQL_FIELD_COST_WEIGHTS", {})
+    variables = variables or {}
+    result = QueryCost()
+
+    root_type = schema.get_root_type(operation.operation)
+
+    def visit(selection_set, parent_type, depth, multiplier):
+        fields = _flatten_fields(selection_set, fragments, frozenset())
+        result.breadth = max(result.breadth, len(fields))
+        for node in fields:
+            name = node.name.value
+            # Introspection is served from the schema, not the database
+            if name.startswith("__"):
+                continue
+            field_def = getattr(parent_type, "fields", {}).get(name)
+            if field_def is None:
+                continue
+
+            # edges / node / cursor are free; the connection field itself is charged
+            if _is_connection_wrapper(parent_type):
+                field_depth = depth
+            else:
+                field_depth = depth + 1
+                result.cost += weights.get(f"{parent_type.name}.{name}", 1) * multiplier
+            result.depth = max(result.depth, field_depth)
+
+            if node.selection_set is not None:
+                child_multiplier = multiplier
+                if not _is_connection_wrapper(parent_type):
+                    child_multiplier *= _list_multiplier(
+                        node, field_def.type, variables
+                    )
+                visit(
+                    node.selection_set,
+                    get_named_type(field_def.type),
+                    field_depth,
+                    child_multiplier,
+                )
+
+    visit(operation.selection_set, root_type, 0, 1)
+    return result
+
+
+@dataclass
+class SQLBudget:
+    """``connection.execute_wrapper`` that counts and times SQL for one request."""
+
+    max_queries: Optional[int] = None
+    max_time_ms: Optional[float] = None
+    abort: bool = False
+    query_count: int = 0
+    time_ms: float = 0.0
+    exceeded: bool = False
+
+    @classmethod
+    def from_settings(cls) -> SQLBudget:
+        return cls(
+            max_queries=getattr(settings, "GRAPHQL_SQL_QUERY_BUDGET", None),
+            max_time_ms=getattr(settings, "GRAPHQL_SQL_TIME_BUDGET_MS", None),
+            abort=getattr(settings, "GRAPHQL_SQL_BUDGET_ACTION", "log") == "abort",
+        )
+
+    def _over_budget(self) -> bool:
+        return bool(
+            (self.max_queries and self.query_count > self.max_queries)
+            or (self.max_time_ms and self.time_ms > self.max_time_ms)
+        )
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.exceeded and self.abort:
+            raise SQLBudgetExceeded(
+                f"Request exceeded its SQL budget ({self.query_count} queries, "
+                f"{self.time_ms:.0f} ms)"
+            )
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.time_ms += (time.perf_counter() - start) * 1000
+            if not self.exceeded and self._over_budget():
+                self.exceeded = True
+
+
+@dataclass
+class ResolverTimings:
+    calls: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    total_ms: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    sql: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def as_list(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "field": key,
+                "calls": self.calls[key],
+                "totalMs": round(self.total_ms[key], 3),
+                "sqlQueries": self.sql[key],
+            }
+            for key in sorted(self.total_ms, key=self.total_ms.get, reverse=True)
+        ]
+
+
+def query_cost_debug_enabled() -> bool:
+    return getattr(settings, "GRAPHQL_QUERY_COST_DEBUG", False)
+
+
+def build_debug_extensions(context) -> Optional[dict[str, Any]]:
+    """Collect what the middleware / budget recorded on the request context."""
+    if not query_cost_debug_enabled():
+        return None
+    extensions: dict[str, Any] = {}
+    cost = getattr(context, "query_cost", None)
+    if cost is not None:
+        extensions["cost"] = {
+            "depth": cost.depth,
+            "breadth": cost.breadth,
+            "cost": cost.cost,
+        }
+    budget = getattr(context, "sql_budget", None)
+    if budget is not None:
+        extensions["sql"] = {
+            "queries": budget.query_count,
+            "timeMs": round(budget.time_ms, 3),
+            "budgetExceeded": budget.exceeded,
+        }
+    timings = getattr(context, "resolver_timings", None)
+    if timings is not None:
+        extensions["resolvers"] = timings.as_list()
+    return extensions or None
+
+
+class QueryCostMiddleware:
+    def resolve(self, next, root, info, **kwargs):
+        context = info.context
+
+        # Root fields: analyse the whole operation once per request
+        if info.path.prev is None and getattr(context, "query_cost", None) is None:
+            cost = analyze_query_cost(
+                info.operation, info.schema, info.fragments, info.variable_values
+            )
+            context.query_cost = cost
+            violations = cost.violations()
+            if violations:
+                logger.warning(
+                    f"QueryCostMiddleware - rejecting operation "
+                    f"{info.operation.name.value if info.operation.name else '<anonymous>'}: "
+                    f"{'; '.join(violations)}"
+                )
+                if getattr(settings, "GRAPHQL_QUERY_COST_ENFORCE", True):
+                    context.query_cost_violations = violations
+        violations = getattr(context, "query_cost_violations", None)
+        if violations and info.path.prev is None:
+            raise GraphQLError("; ".join(violations))
+
+        if not query_cost_debug_enabled():
+            return next(root, info, **kwargs)
+
+        timings = getattr(context, "resolver_timings", None)
+        if timings is None:
+            timings = context.resolver_timings = ResolverTimings()
+        budget = getattr(context, "sql_budget", None)
+        queries_before = budget.query_count if budget else 0
+        key = f"{info.parent_type.name}.{info.field_name}"
+        start = time.perf_counter()
+        try:
+            return next(root, info, **kwargs)
+        finally:
+            timings.calls[key] += 1
+            timings.total_ms[key] += (time.perf_counter() - start) * 1000
+            if budget:
+                timings.sql[key] += budget.query_count - queries_before
@@ -0,0 +1,305 @@
+"""
+Response cache and automatic persisted queries (APQ) for anonymous GraphQL traffic.
+
+Anonymous visitors browsing public corpora send the same handful of queries
+(``corpuses``, ``documents``, ``pageAnnotations``...) over and over, and each one
+recomputes the ``is_public`` filters and permission annotations. For anonymous
+requests whose root fields are all listed in ``ROOT_FIELD_TAGS`` we cache the
+execution result, keyed by (query hash, operation name, variables, viewer class).
+
+Invalidation is tag based: every tag (``Corpus``, ``Document``, ``Annotation``,
+``LabelSet``) has a version stored in the cache. A cached response remembers the
+versions of its tags when it was stored and is treated as a miss once any of them
+moves on. Saving or deleting a *public* object (or flipping one from public to
+private) bumps its tag - private objects never reach anonymous responses, so
+their churn leaves the cache alone. Nested data that is not covered by a tag
+(notes, analyses...) is bounded by ``GRAPHQL_RESPONSE_CACHE_TIMEOUT``.
+
+Hit / miss / bypass counters live in the cache too; see
+:func:`get_response_cache_stats`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import uuid
+from functools import lru_cache
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import OperationType, parse
+from graphql.language import FieldNode
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "graphql_response_cache"
+ANONYMOUS_VIEWER = "anonymous"
+
+CORPUS_TAG = "Corpus"
+DOCUMENT_TAG = "Document"
+ANNOTATION_TAG = "Annotation"
+LABELSET_TAG = "LabelSet"
+
+# Root query fields that may be served from the cache, and the tags they depend on.
+ROOT_FIELD_TAGS: dict[str, tuple[str, ...]] = {
+    "corpuses": (CORPUS_TAG, DOCUMENT_TAG, LABELSET_TAG),
+    "corpus": (CORPUS_TAG, DOCUMENT_TAG, LABELSET_TAG, ANNOTATION_TAG),
+    "corpusStats": (CORPUS_TAG, DOCUMENT_TAG, ANNOTATION_TAG),
+    "documents": (DOCUMENT_TAG, CORPUS_TAG),
+    "document": (DOCUMENT_TAG, CORPUS_TAG, ANNOTATION_TAG),
+    "annotations": (ANNOTATION_TAG, DOCUMENT_TAG, LABELSET_TAG),
+    "pageAnnotations": (ANNOTATION_TAG, DOCUMENT_TAG, LABELSET_TAG),
+    "bulkDocAnnotationsInCorpus": (ANNOTATION_TAG, LABELSET_TAG),
+    "labelsets": (LABELSET_TAG,),
+    "labelset": (LABELSET_TAG,),
+}
+
+# Model label -> tag bumped when a public instance changes.
+MODEL_TAGS: dict[str, str] = {
+    "corpuses.corpus": CORPUS_TAG,
+    "documents.document": DOCUMENT_TAG,
+    "annotations.annotation": ANNOTATION_TAG,
+    "annotations.labelset": LABELSET_TAG,
+    "annotations.annotationlabel": LABELSET_TAG,
+}
+
+
+def response_cache_enabled() -> bool:
+    return getattr(settings, "GRAPHQL_RESPONSE_CACHE_ENABLED", False)
+
+
+def _response_cache_timeout() -> int:
+    return getattr(settings, "GRAPHQL_RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Persisted queries
+# ---------------------------------------------------------------------------
+
+
+def get_persisted_query(query_hash: str) -> Optional[str]:
+    return cache.get(f"{CACHE_PREFIX}:apq:{query_hash}")
+
+
+def store_persisted_query(query_hash: str, query: str) -> bool:
+    """Register ``query`` under ``query_hash``. Returns False if the hash mismatches."""
+    if hash_query(query) != query_hash:
+        return False
+    cache.set(
+        f"{CACHE_PREFIX}:apq:{query_hash}",
+        query,
+        timeout=getattr(settings, "GRAPHQL_PERSISTED_QUERY_TIMEOUT", 60 * 60 * 24 * 7),
+    )
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Cacheability + keys
+# ---------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=512)
+def get_cacheable_tags(
+    query: str, operation_name: Optional[str] = None
+) -> Optional[tuple[str, ...]]:
+    """
+    Return the sorted tags a query depends on, or None if it must not be cached
+    (mutations, introspection, fragments at the root, unknown root fields...).
+    """
+    try:
+        document = parse(query)
+    except Exception:
+        return None
+
+    operations = [
+        definition
+        for definition in document.definitions
+        if getattr(definition, "operation", None) is not None
+    ]
+    if operation_name:
+        operations = [
+            op for op in operations if op.name and op.name.value == operation_name
+        ]
+    if len(operations) != 1 or operations[0].operation != OperationType.QUERY:
+        return None
+
+    tags: set[str] = set()
+    for selection in operations[0].selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return None
+        field_tags = ROOT_FIELD_TAGS.get(selection.name.value)
+        if field_tags is None:
+            return None
+        tags.update(field_tags)
+    return tuple(sorted(tags)) or None
+
+
+def build_response_cache_key(
+    query: str,
+    variables: Optional[dict[str, Any]],
+    operation_name: Optional[str],
+    viewer_class: str,
+) -> str:
+    variables_json = json.dumps(variables or {}, sort_keys=True, default=str)
+    digest = hashlib.sha256(
+        "|".join(
+            [hash_query(query), operation_name or "", variables_json, viewer_class]
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"{CACHE_PREFIX}:response:{digest}"
+
+
+# ---------------------------------------------------------------------------
+# Tag versions
+# ---------------------------------------------------------------------------
+
+
+def _tag_key(tag: str) -> str:
+    return f"{CACHE_PREFIX}:tag:{tag}"
+
+
+def get_tag_versions(tags: tuple[str, ...]) -> dict[str, str]:
+    keys = {tag: _tag_key(tag) for tag in tags}
+    stored = cache.get_many(list(keys.values()))
+    versions = {}
+    missing = {}
+    for tag, key in keys.items():
+        if key in stored:
+            versions[tag] = stored[key]
+        else:
+            missing[key] = versions[tag] = uuid.uuid4().hex
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+def invalidate_response_cache_tags(*tags: str) -> None:
+    """Move the given tags to a new version, orphaning every response that used them."""
+    if tags:
+        cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def get_cached_response(cache_key: str, tags: tuple[str, ...]) -> Optional[Any]:
+    entry = cache.get(cache_key)
+    if entry is None or entry["tags"] != get_tag_versions(tags):
+        return None
+    return entry["data"]
+
+
+def set_cached_response(
+    cache_key: str, tag_versions: dict[str, str], data: Any
+) -> None:
+    """Store ``data`` against the tag versions read *before* the query executed."""
+    cache.set(
+        cache_key,
+        {"tags": tag_versions, "data": data},
+        timeout=_response_cache_timeout(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+METRICS = ("hit", "miss", "bypass")
+
+
+def record_response_cache_event(event: str) -> None:
+    key = f"{CACHE_PREFIX}:metrics:{event}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_response_cache_stats() -> dict[str, int]:
+    stored = cache.get_many([f"{CACHE_PREFIX}:metrics:{event}" for event in METRICS])
+    return {
+        event: stored.get(f"{CACHE_PREFIX}:metrics:{event}", 0) for event in METRICS
+    }
+
+
+# ---------------------------------------------------------------------------
+# Signal handlers
+# ---------------------------------------------------------------------------
+
+
+def _model_tag(sender) -> Optional[str]:
+    return MODEL_TAGS.get(sender._meta.label_lower)
+
+
+def remember_public_state(sender, instance, **kwargs):
+    """pre_save: note whether a soon-to-be-private instance is public right now."""
+    if not response_cache_enabled() or instance.pk is None:
+        return
+    if not getattr(instance, "is_public", False):
+        instance._response_cache_was_public = sender._default_manager.filter(
+            pk=instance.pk, is_public=True
+        ).exists()
+
+
+def invalidate_response_cache_on_change(sender, instance, **kwargs):
+    """post_save / post_delete: bump the model's tag if anonymous users could see it."""
+    if not response_cache_enabled():
+        return
+    tag = _model_tag(sender)
+    if tag is None:
+        return
+    if getattr(instance, "is_public", False) or getattr(
+        instance, "_response_cache_was_public", False
+    ):
+        logger.debug(
+            f"Invalidating GraphQL response cache tag {tag} ({sender.__name__} {instance.pk})"
+        )
+        invalidate_response_cache_tags(tag)
+
+
+def invalidate_response_cache_on_corpus_documents_change(
+    sender, instance, action, **kwargs
+):
+    """m2m_changed on Corpus.documents: public corpus membership changed."""
+    if not response_cache_enabled() or not action.startswith("post_"):
+        return
+    if getattr(instance, "is_public", False):
+        invalidate_response_cache_tags(CORPUS_TAG, DOCUMENT_TAG)
+
+
+def connect_response_cache_signals():
+    from django.apps import apps
+    from django.db.models.signals import (
+        m2m_changed,
+        post_delete,
+        post_save,
+        pre_save,
+    )
+
+    for model_label in MODEL_TAGS:
+        model = apps.get_model(model_label)
+        pre_save.connect(
+            remember_public_state,
+            sender=model,
+            dispatch_uid=f"{CACHE_PREFIX}:pre_save:{model_label}",
+        )
+        post_save.connect(
+            invalidate_response_cache_on_change,
+            sender=model,
+            dispatch_uid=f"{CACHE_PREFIX}:post_save:{model_label}",
+        )
+        post_delete.connect(
+            invalidate_response_cache_on_change,
+            sender=model,
+            dispatch_uid=f"{CACHE_PREFIX}:post_delete:{model_label}",
+        )
+
+    m2m_changed.connect(
+        invalidate_response_cache_on_corpus_documents_change,
+        sender=apps.get_model("corpuses.corpus").documents.through,
+        dispatch_uid=f"{CACHE_PREFIX}:m2m:corpus_documents",
+    )
@@ -0,0 +1,137 @@
+import json
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult
+
+from config.graphql.query_cost import SQLBudget, build_debug_extensions
+from config.graphql.response_cache import (
+    ANONYMOUS_VIEWER,
+    build_response_cache_key,
+    get_cacheable_tags,
+    get_cached_response,
+    get_persisted_query,
+    get_tag_versions,
+    record_response_cache_event,
+    response_cache_enabled,
+    set_cached_response,
+    store_persisted_query,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATUS_HEADER = "X-GraphQL-Cache"
+
+
+def _persisted_query_error(message: str) -> HttpError:
+    # Apollo clients look for this exact message and retry with the full query.
+    return HttpError(HttpResponse(status=200), message)
+
+
+class OpenContractsGraphQLView(GraphQLView):
+    """
+    GraphQLView with automatic persisted queries and a response cache for
+    anonymous, read-only traffic. See ``config.graphql.response_cache``.
+    """
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                extensions = None
+
+        persisted = (extensions or {}).get("persistedQuery")
+        query_hash = persisted.get("sha256Hash") if persisted else None
+        if query_hash:
+            if query:
+                if not store_persisted_query(query_hash, query):
+                    raise _persisted_query_error("provided sha does not match query")
+            else:
+                query = get_persisted_query(query_hash)
+                if query is None:
+                    raise _persisted_query_error("PersistedQueryNotFound")
+
+        return query, variables, operation_name, id
+
+    @staticmethod
+    def _is_anonymous(request) -> bool:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return False
+        # JWT / API key auth is resolved by graphene middleware *during*
+        # execution, so an auth header means this isn't an anonymous request.
+        api_key_header = "HTTP_" + getattr(settings, "API_TOKEN_HEADER_NAME", "")
+        return not (
+            request.META.get("HTTP_AUTHORIZATION") or request.META.get(api_key_header)
+        )
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        tags = None
+        if response_cache_enabled() and query and not show_graphiql:
+            tags = get_cacheable_tags(query, operation_name)
+            if tags is None or not self._is_anonymous(request):
+                tags = None
+                record_response_cache_event("bypass")
+
+        if tags is None:
+            return self._execute_within_sql_budget(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        cache_key = build_response_cache_key(
+            query, variables, operation_name, ANONYMOUS_VIEWER
+        )
+        cached = get_cached_response(cache_key, tags)
+        if cached is not None:
+            record_response_cache_event("hit")
+            request._graphql_cache_status = "HIT"
+            return ExecutionResult(data=cached)
+
+        tag_versions = get_tag_versions(tags)
+        result = self._execute_within_sql_budget(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        record_response_cache_event("miss")
+        request._graphql_cache_status = "MISS"
+        if result is not None and not result.errors and result.data is not None:
+            set_cached_response(cache_key, tag_versions, result.data)
+        return result
+
+    def _execute_within_sql_budget(
+        self, request, data, query, variables, operation_name, show_graphiql
+    ):
+        budget = request.sql_budget = SQLBudget.from_settings()
+        with connection.execute_wrapper(budget):
+            result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        if budget.exceeded:
+            logger.warning(
+                f"GraphQL operation {operation_name or '<anonymous>'} exceeded its SQL "
+                f"budget: {budget.query_count} queries in {budget.time_ms:.0f} ms "
+                f"(limits {budget.max_queries} queries / {budget.max_time_ms} ms)"
+            )
+        return result
+
+    def json_encode(self, request, d, pretty=False):
+        if isinstance(d, dict) and "extensions" not in d:
+            extensions = build_debug_extensions(request)
+            if extensions:
+                d = {**d, "extensions": extensions}
+        return super().json_encode(request, d, pretty)
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        status = getattr(request, "_graphql_cache_status", None)
+        if status:
+            response[CACHE_STATUS_HEADER] = status
+        return response
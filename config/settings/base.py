@@ -452,6 +452,38 @@ CELERY_WORKER_MAX_MEMORY_PER_CHILD = 14240000  # 14 GB (thousands of kilobytes)
 CELERY_MAX_TASKS_PER_CHILD = 4
 CELERY_PREFETCH_MULTIPLIER = 1
 CELERY_RESULT_BACKEND_MAX_RETRIES = 10
+# Task queues (opencontractserver/tasks/routing.py). A task goes to the queue of
+# the first TASK_QUEUE_ROUTES pattern matching its name, else to the default
+# queue. Tasks sent while running a task from a bulk queue use the
+# BULK_TASK_QUEUES variant of their queue. Workers pick queues with
+# CELERY_WORKER_QUEUES (see compose/*/django/celery/worker/start).
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+CELERY_TASK_ROUTES = ("opencontractserver.tasks.routing.route_task",)
+TASK_QUEUE_ROUTES = {
+    # Interactive ingest of a single upload
+    "opencontractserver.tasks.doc_tasks.extract_thumbnail": "ingest",
+    "opencontractserver.tasks.doc_tasks.ingest_doc": "ingest",
+    "opencontractserver.tasks.doc_tasks.parse_doc_shard": "ingest",
+    "opencontractserver.tasks.doc_tasks.merge_doc_shards": "ingest",
+    "opencontractserver.tasks.doc_tasks.reuse_document_parse": "ingest",
+    "opencontractserver.tasks.doc_tasks.build_doc_page_index": "ingest",
+    "opencontractserver.tasks.doc_tasks.set_doc_lock_state": "ingest",
+    "opencontractserver.tasks.embeddings_task.*": "embeddings",
+    # Bulk operations; everything they spawn follows them to the bulk queues
+    "opencontractserver.tasks.import_tasks.*": "ingest_bulk",
+    "opencontractserver.tasks.fork_tasks.*": "ingest_bulk",
+    # LLM / analyzer / extract work
+    "opencontractserver.tasks.data_extract_tasks.*": "llm",
+    "opencontractserver.tasks.extract_orchestrator_tasks.*": "llm",
+    "opencontractserver.tasks.doc_analysis_tasks.*": "llm",
+    "opencontractserver.tasks.analyzer_tasks.*": "llm",
+    "opencontractserver.tasks.corpus_tasks.*": "llm",
+    # Exports
+    "opencontractserver.tasks.export_tasks.*": "export",
+    "opencontractserver.tasks.doc_tasks.burn_doc_annotations": "export",
+    "opencontractserver.tasks.doc_tasks.convert_doc_to_funsd": "export",
+}
+BULK_TASK_QUEUES = {"ingest": "ingest_bulk", "embeddings": "embeddings_bulk"}
 # django-rest-framework
 # -------------------------------------------------------------------------------
 # django-rest-framework - https://www.django-rest-framework.org/api-guide/settings/
@@ -474,6 +506,7 @@ MODEL_PATH = pathlib.Path(BASE_PATH, "model")
 # Start with the base middleware that we always want
 GRAPHENE_MIDDLEWARE = [
     "config.graphql.permissioning.permission_annotator.middleware.PermissionAnnotatingMiddleware",
+    "config.graphql.query_cost.QueryCostMiddleware",
 ]
 
 # Add JWT middleware if using Auth0
@@ -497,6 +530,47 @@ GRAPHENE = {
     "RELAY_CONNECTION_MAX_LIMIT": 10,
 }
 
+# Query cost limits + SQL budget. See config/graphql/query_cost.py
+GRAPHQL_MAX_QUERY_DEPTH = env.int("GRAPHQL_MAX_QUERY_DEPTH", default=12)
+GRAPHQL_MAX_QUERY_BREADTH = env.int("GRAPHQL_MAX_QUERY_BREADTH", default=100)
+GRAPHQL_MAX_QUERY_COST = env.int("GRAPHQL_MAX_QUERY_COST", default=100000)
+# If False, over-limit operations are only logged
+GRAPHQL_QUERY_COST_ENFORCE = env.bool("GRAPHQL_QUERY_COST_ENFORCE", default=True)
+# Assumed size of plain (non-connection) list fields
+GRAPHQL_LIST_COST_MULTIPLIER = env.int("GRAPHQL_LIST_COST_MULTIPLIER", default=10)
+# "TypeName.fieldName" -> cost of resolving that field once (default 1)
+GRAPHQL_FIELD_COST_WEIGHTS = {
+    "DocumentType.allAnnotations": 20,
+    "DocumentType.allStructuralAnnotations": 20,
+    "DocumentType.allRelationships": 20,
+    "DocumentType.allDocRelationships": 20,
+    "DocumentType.allNotes": 5,
+    "DocumentType.pdfFile": 2,
+    "CorpusType.allAnnotationSummaries": 20,
+    "AnnotationType.fullTree": 10,
+    "NoteType.fullTree": 10,
+}
+GRAPHQL_SQL_QUERY_BUDGET = env.int("GRAPHQL_SQL_QUERY_BUDGET", default=500)
+GRAPHQL_SQL_TIME_BUDGET_MS = env.int("GRAPHQL_SQL_TIME_BUDGET_MS", default=5000)
+# "log" or "abort" (further SQL in the request raises)
+GRAPHQL_SQL_BUDGET_ACTION = env("GRAPHQL_SQL_BUDGET_ACTION", default="log")
+# Add cost, SQL totals and per-resolver timings to the response "extensions"
+GRAPHQL_QUERY_COST_DEBUG = env.bool(
+    "GRAPHQL_QUERY_COST_DEBUG", default=ALLOW_GRAPHQL_DEBUG
+)
+
+# Cache execution results of read-only queries made by anonymous users (public
+# corpus browsing). Invalidated when public corpuses / documents / annotations /
+# labelsets change. See config/graphql/response_cache.py
+GRAPHQL_RESPONSE_CACHE_ENABLED = env.bool(
+    "GRAPHQL_RESPONSE_CACHE_ENABLED", default=False
+)
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = env.int("GRAPHQL_RESPONSE_CACHE_TIMEOUT", default=300)
+# Automatic persisted queries (Apollo APQ) - how long a registered query hash lives
+GRAPHQL_PERSISTED_QUERY_TIMEOUT = env.int(
+    "GRAPHQL_PERSISTED_QUERY_TIMEOUT", default=60 * 60 * 24 * 7
+)
+
 GRAPHQL_JWT = {
     "JWT_AUTH_HEADER_PREFIX": "Bearer",
     "JWT_VERIFY_EXPIRATION": True,
@@ -627,6 +701,8 @@ PARSER_KWARGS = {
         "endpoint": "http://nlm-ingestor:5001",
         "api_key": "",
         "use_ocr": True,
+        # Also OCR PDFs that have a text layer but some scanned pages
+        "ocr_mixed_pages": env.bool("NLM_INGEST_OCR_MIXED_PAGES", False),
     },
 }
 
@@ -659,3 +735,149 @@ PIPELINE_SETTINGS = {
 }
 
 LLMS_DEFAULT_AGENT_FRAMEWORK = "pydantic_ai"
+
+# Per-process pool of prebuilt document / corpus agents (see
+# opencontractserver/llms/agents/agent_pool.py). Idle skeletons expire after
+# LLMS_AGENT_POOL_TTL seconds; at most LLMS_AGENT_POOL_MAX_SIZE are kept.
+LLMS_AGENT_POOL_ENABLED = env.bool("LLMS_AGENT_POOL_ENABLED", default=True)
+LLMS_AGENT_POOL_TTL = env.int("LLMS_AGENT_POOL_TTL", default=600)
+LLMS_AGENT_POOL_MAX_SIZE = env.int("LLMS_AGENT_POOL_MAX_SIZE", default=64)
+
+# Record / replay cache for LLM responses (see opencontractserver/llms/response_cache.py).
+# "off" | "record" (read-through, misses call the model and are stored) |
+# "replay" (misses are answered by an offline stub model, no network calls).
+# Entries go to the LLM_RESPONSE_CACHE_ALIAS Django cache - point it at a
+# DatabaseCache alias to keep them in Postgres instead of Redis.
+LLM_RESPONSE_CACHE_MODE = env.str("LLM_RESPONSE_CACHE_MODE", default="off")
+LLM_RESPONSE_CACHE_ALIAS = env.str("LLM_RESPONSE_CACHE_ALIAS", default="default")
+LLM_RESPONSE_CACHE_TIMEOUT = env.int(
+    "LLM_RESPONSE_CACHE_TIMEOUT", default=60 * 60 * 24 * 30
+)
+LLM_STUB_RESPONSE_TEXT = env.str("LLM_STUB_RESPONSE_TEXT", default=None)
+
+# Token counting for LLM tools / history windows (opencontractserver/llms/tokenizers.py).
+# LLM_TOKENIZER_DIR holds <encoding>.tiktoken files (e.g. o200k_base.tiktoken);
+# nothing is downloaded. Leave it unset, or the file absent, for whitespace
+# counts. A failed load is retried after LLM_TOKENIZER_RETRY_SECONDS.
+LLM_TOKENIZER_DIR = env.str("LLM_TOKENIZER_DIR", default=None)
+LLM_TOKENIZER_MODEL = env.str("LLM_TOKENIZER_MODEL", default="gpt-4o-mini")
+LLM_TOKENIZER_DEFAULT_ENCODING = env.str(
+    "LLM_TOKENIZER_DEFAULT_ENCODING", default="o200k_base"
+)
+LLM_TOKEN_COUNT_CACHE_SIZE = env.int("LLM_TOKEN_COUNT_CACHE_SIZE", default=4096)
+LLM_TOKENIZER_RETRY_SECONDS = env.int("LLM_TOKENIZER_RETRY_SECONDS", default=300)
+
+# Document text cache for agent tools (opencontractserver/llms/tools/document_text_cache.py).
+# In-process LRU bounded by bytes, plus an optional shared tier: "redis" (uses the
+# Redis behind LLM_DOC_TEXT_CACHE_REDIS_ALIAS) or "disk" (LLM_DOC_TEXT_CACHE_DIR).
+LLM_DOC_TEXT_CACHE_MAX_BYTES = env.int(
+    "LLM_DOC_TEXT_CACHE_MAX_BYTES", default=64 * 1024 * 1024
+)
+LLM_DOC_TEXT_CACHE_SHARED = env.str("LLM_DOC_TEXT_CACHE_SHARED", default="")
+LLM_DOC_TEXT_CACHE_REDIS_ALIAS = env.str(
+    "LLM_DOC_TEXT_CACHE_REDIS_ALIAS", default="default"
+)
+LLM_DOC_TEXT_CACHE_DIR = env.str("LLM_DOC_TEXT_CACHE_DIR", default=None)
+LLM_DOC_TEXT_CACHE_TIMEOUT = env.int("LLM_DOC_TEXT_CACHE_TIMEOUT", default=60 * 60 * 24)
+
+# Streaming agent answers over websockets (config/websocket/utils/stream_coalescer.py).
+# ASYNC_CONTENT deltas are merged for up to WEBSOCKET_STREAM_COALESCE_MS (0 = one
+# frame per token) or WEBSOCKET_STREAM_MAX_CHARS; at most
+# WEBSOCKET_STREAM_MAX_PENDING_FRAMES frames queue for a slow client before the
+# agent stream is paused. Partial answers are written to the DB at most every
+# LLM_STREAM_PERSIST_INTERVAL_MS, and always on completion.
+WEBSOCKET_STREAM_COALESCE_MS = env.int("WEBSOCKET_STREAM_COALESCE_MS", default=50)
+WEBSOCKET_STREAM_MAX_CHARS = env.int("WEBSOCKET_STREAM_MAX_CHARS", default=2048)
+WEBSOCKET_STREAM_MAX_PENDING_FRAMES = env.int(
+    "WEBSOCKET_STREAM_MAX_PENDING_FRAMES", default=32
+)
+LLM_STREAM_PERSIST_INTERVAL_MS = env.int("LLM_STREAM_PERSIST_INTERVAL_MS", default=1000)
+
+# Extracts: answer all of a document's doc_extract_query_task columns with one
+# structured LLM call and shared retrieval (doc_extract_fieldset_task). Columns
+# that fail validation are retried individually.
+EXTRACT_GROUP_FIELDSET_COLUMNS = env.bool(
+    "EXTRACT_GROUP_FIELDSET_COLUMNS", default=False
+)
+
+# Shared LLM rate limiting (opencontractserver/llms/rate_limiter.py). Maps
+# "provider:model", "provider" or "default" to requests_per_minute and/or
+# tokens_per_minute, e.g. {"openai": {"requests_per_minute": 500,
+# "tokens_per_minute": 200000}}. A provider limit also covers bare model
+# names such as "gpt-4o-mini". Empty = no limiting. Buckets are shared
+# through Redis ("redis") or kept per process ("local").
+LLM_RATE_LIMITS = env.json("LLM_RATE_LIMITS", default={})
+LLM_RATE_LIMIT_BACKEND = env.str("LLM_RATE_LIMIT_BACKEND", default="redis")
+LLM_RATE_LIMIT_REDIS_ALIAS = env.str("LLM_RATE_LIMIT_REDIS_ALIAS", default="default")
+LLM_RATE_LIMIT_MAX_RETRIES = env.int("LLM_RATE_LIMIT_MAX_RETRIES", default=5)
+LLM_RATE_LIMIT_BACKOFF_BASE = env.float("LLM_RATE_LIMIT_BACKOFF_BASE", default=1.0)
+LLM_RATE_LIMIT_BACKOFF_MAX = env.float("LLM_RATE_LIMIT_BACKOFF_MAX", default=60.0)
+
+# Run extract cells in batches of EXTRACT_ASYNC_BATCH_SIZE per Celery task, up
+# to EXTRACT_ASYNC_CONCURRENCY at a time on the worker's event loop.
+EXTRACT_ASYNC_EXECUTOR = env.bool("EXTRACT_ASYNC_EXECUTOR", default=False)
+EXTRACT_ASYNC_BATCH_SIZE = env.int("EXTRACT_ASYNC_BATCH_SIZE", default=50)
+EXTRACT_ASYNC_CONCURRENCY = env.int("EXTRACT_ASYNC_CONCURRENCY", default=16)
+
+# Cross-process concurrency caps (opencontractserver/utils/concurrency.py):
+# slots are leases in Redis ("redis") or held per process ("local").
+CONCURRENCY_LIMIT_BACKEND = env.str("CONCURRENCY_LIMIT_BACKEND", default="redis")
+CONCURRENCY_LIMIT_REDIS_ALIAS = env.str(
+    "CONCURRENCY_LIMIT_REDIS_ALIAS", default="default"
+)
+
+# Docling parser uploads. "json" streams the service's base64 JSON payload,
+# "multipart" streams the raw PDF as multipart/form-data (the service must
+# accept it). At most DOCLING_PARSER_MAX_IN_FLIGHT parse requests run at once
+# across all workers (0 = no cap); a worker waits up to DOCLING_PARSER_SLOT_WAIT
+# seconds for a slot. Each worker process keeps DOCLING_PARSER_POOL_SIZE
+# keep-alive connections to the service.
+DOCLING_PARSER_UPLOAD_MODE = env.str("DOCLING_PARSER_UPLOAD_MODE", default="json")
+DOCLING_PARSER_POOL_SIZE = env.int("DOCLING_PARSER_POOL_SIZE", default=4)
+DOCLING_PARSER_MAX_IN_FLIGHT = env.int("DOCLING_PARSER_MAX_IN_FLIGHT", default=4)
+DOCLING_PARSER_SLOT_LEASE = env.int("DOCLING_PARSER_SLOT_LEASE", default=1800)
+DOCLING_PARSER_SLOT_WAIT = env.int("DOCLING_PARSER_SLOT_WAIT", default=3600)
+
+# PDFs with more than PARSER_PAGE_SHARD_THRESHOLD pages are parsed in shards of
+# PARSER_PAGE_SHARD_SIZE pages in parallel (parsers with supports_page_shards;
+# 0 = never shard). Override per parser with "page_shard_threshold" /
+# "page_shard_size" in its PIPELINE_SETTINGS.
+PARSER_PAGE_SHARD_THRESHOLD = env.int("PARSER_PAGE_SHARD_THRESHOLD", default=400)
+PARSER_PAGE_SHARD_SIZE = env.int("PARSER_PAGE_SHARD_SIZE", default=100)
+
+# Uploads record the sha256 of their file. A new upload identical to an already
+# processed document its uploader can see copies that document's parse instead
+# of being thumbnailed, parsed and embedded again (uploads can opt out).
+DOCUMENT_DEDUP_ENABLED = env.bool("DOCUMENT_DEDUP_ENABLED", default=True)
+
+# Parser output cache (opencontractserver/utils/parser_cache.py): exports are
+# stored per (file sha256, parser, parser settings, parser version) and
+# replayed when the same file is ingested again with the same configuration.
+# evict_parser_cache_task / "manage.py parser_cache evict" drop entries older
+# than PARSER_CACHE_MAX_AGE_DAYS, then the oldest beyond PARSER_CACHE_MAX_BYTES
+# (0 = no limit).
+PARSER_CACHE_ENABLED = env.bool("PARSER_CACHE_ENABLED", default=True)
+PARSER_CACHE_MAX_AGE_DAYS = env.int("PARSER_CACHE_MAX_AGE_DAYS", default=90)
+PARSER_CACHE_MAX_BYTES = env.int("PARSER_CACHE_MAX_BYTES", default=20 * 1024**3)
+
+# Document zip uploads (process_documents_zip) are imported in chunks of
+# ZIP_IMPORT_CHUNK_SIZE files by parallel tasks. Job progress counters
+# (opencontractserver/utils/job_progress.py) live in the cache for
+# JOB_PROGRESS_TIMEOUT seconds.
+ZIP_IMPORT_CHUNK_SIZE = env.int("ZIP_IMPORT_CHUNK_SIZE", default=250)
+JOB_PROGRESS_TIMEOUT = env.int("JOB_PROGRESS_TIMEOUT", default=60 * 60 * 24)
+
+# split_pdf_into_images renders PDF_IMAGE_RENDER_BATCH_SIZE pages at a time
+# and stores them with PDF_IMAGE_UPLOAD_WORKERS threads while the next batch
+# renders.
+PDF_IMAGE_RENDER_BATCH_SIZE = env.int("PDF_IMAGE_RENDER_BATCH_SIZE", default=8)
+PDF_IMAGE_UPLOAD_WORKERS = env.int("PDF_IMAGE_UPLOAD_WORKERS", default=4)
+
+# check_if_pdf_needs_ocr looks at no more than OCR_CHECK_MAX_PAGES evenly
+# spaced pages of a PDF (0 = all pages).
+OCR_CHECK_MAX_PAGES = env.int("OCR_CHECK_MAX_PAGES", default=50)
+
+# Corpus export imports (import_corpus) create the corpus and its labels once,
+# then import its documents in chunks of CORPUS_IMPORT_CHUNK_SIZE by parallel
+# tasks.
+CORPUS_IMPORT_CHUNK_SIZE = env.int("CORPUS_IMPORT_CHUNK_SIZE", default=50)
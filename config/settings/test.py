@@ -86,3 +86,6 @@ aws_s3_domain = AWS_S3_CUSTOM_DOMAIN or f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws
 
 # Test redis setup
 CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+# Tests reuse the same fixture files with stubbed parsers; never replay parses
+PARSER_CACHE_ENABLED = False
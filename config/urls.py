@@ -7,9 +7,10 @@ from django.http import HttpResponseRedirect
 from django.urls import include, path
 from django.views import defaults as default_views
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
 
+from config.graphql.views import OpenContractsGraphQLView
 from opencontractserver.analyzer.views import AnalysisCallbackView
+from opencontractserver.annotations.views import stream_document_annotations
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,15 @@ def home_redirect(request):
 urlpatterns = [
     path("", home_redirect, name="home_redirect"),  # Root URL redirect to port 3000
     path(settings.ADMIN_URL, admin.site.urls),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=settings.DEBUG))),
+    path(
+        "graphql/",
+        csrf_exempt(OpenContractsGraphQLView.as_view(graphiql=settings.DEBUG)),
+    ),
+    path(
+        "api/documents/<str:document_id>/annotations/stream/",
+        stream_document_annotations,
+        name="stream_document_annotations",
+    ),
     *(
         []
         if not settings.USE_ANALYZER
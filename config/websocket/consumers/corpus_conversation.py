@@ -27,6 +27,7 @@ from django.conf import settings
 from graphql_relay import from_global_id
 
 from config.websocket.utils.extract_ids import extract_websocket_path_id
+from config.websocket.utils.stream_coalescer import StreamCoalescer
 from opencontractserver.conversations.models import MessageType
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.llms import agents
@@ -91,6 +92,9 @@ class CorpusQueryConsumer(AsyncWebsocketConsumer):
         logger.debug(
             "[Session %s] WebSocket disconnected.  Code=%s", self.session_id, close_code
         )
+        if getattr(self, "agent", None) is not None:
+            # Hand the agent back to the pool so the next socket skips the rebuild
+            agents.release(self.agent)
         self.agent = None  # allow GC
 
     # --------------------------------------------------------------------- #
@@ -198,113 +202,74 @@ class CorpusQueryConsumer(AsyncWebsocketConsumer):
                 ThoughtEvent,
             )
 
-            async for event in self.agent.stream(user_query):
-                # Ensure START message once we have IDs
-                if getattr(event, "user_message_id", None) is not None and not hasattr(
-                    self, "_sent_start"
-                ):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_START",
-                        data={"message_id": event.llm_message_id},
-                    )
-                    self._sent_start = True
-
-                if isinstance(event, ThoughtEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_THOUGHT",
-                        content=event.thought,
-                        data={"message_id": event.llm_message_id, **event.metadata},
-                    )
-
-                elif isinstance(event, ContentEvent):
-                    if event.content:
-                        await self.send_standard_message(
-                            msg_type="ASYNC_CONTENT",
-                            content=event.content,
+            async with StreamCoalescer(self.send_standard_message) as stream:
+                async for event in self.agent.stream(user_query):
+                    # Ensure START message once we have IDs
+                    if getattr(
+                        event, "user_message_id", None
+                    ) is not None and not hasattr(self, "_sent_start"):
+                        await stream.send(
+                            msg_type="ASYNC_START",
                             data={"message_id": event.llm_message_id},
                         )
+                        self._sent_start = True
+
+                    if isinstance(event, ThoughtEvent):
+                        await stream.send(
+                            msg_type="ASYNC_THOUGHT",
+                            content=event.thought,
+                            data={"message_id": event.llm_message_id, **event.metadata},
+                        )
 
-                elif isinstance(event, SourceEvent):
-                    if event.sources:
-                        await self.send_standard_message(
-                            msg_type="ASYNC_SOURCES",
+                    elif isinstance(event, ContentEvent):
+                        if event.content:
+                            await stream.send(
+                                msg_type="ASYNC_CONTENT",
+                                content=event.content,
+                                data={"message_id": event.llm_message_id},
+                            )
+
+                    elif isinstance(event, SourceEvent):
+                        if event.sources:
+                            await stream.send(
+                                msg_type="ASYNC_SOURCES",
+                                content="",
+                                data={
+                                    "message_id": event.llm_message_id,
+                                    "sources": [s.to_dict() for s in event.sources],
+                                },
+                            )
+
+                    elif isinstance(event, ApprovalNeededEvent):
+                        await stream.send(
+                            msg_type="ASYNC_APPROVAL_NEEDED",
                             content="",
                             data={
                                 "message_id": event.llm_message_id,
-                                "sources": [s.to_dict() for s in event.sources],
+                                "pending_tool_call": event.pending_tool_call,
                             },
                         )
 
-                elif isinstance(event, ApprovalNeededEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_APPROVAL_NEEDED",
-                        content="",
-                        data={
-                            "message_id": event.llm_message_id,
-                            "pending_tool_call": event.pending_tool_call,
-                        },
-                    )
-
-                elif isinstance(event, ErrorEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_ERROR",
-                        content="",
-                        data={
-                            "error": event.error or "Unknown error",
-                            "message_id": event.llm_message_id,
-                            "metadata": event.metadata,
-                        },
-                    )
-                    # Reset flag
-                    if hasattr(self, "_sent_start"):
-                        delattr(self, "_sent_start")
-
-                elif isinstance(event, FinalEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_FINISH",
-                        content=event.accumulated_content or event.content,
-                        data={
-                            "sources": [s.to_dict() for s in event.sources],
-                            "message_id": event.llm_message_id,
-                            "timeline": (
-                                event.metadata.get("timeline", [])
-                                if isinstance(event.metadata, dict)
-                                else []
-                            ),
-                        },
-                    )
-
-                    if hasattr(self, "_sent_start"):
-                        delattr(self, "_sent_start")
-
-                else:
-                    # ------------------------------------------------------------------
-                    # Legacy path: some adapters (e.g. llama-index) still yield the
-                    # unified *response objects* directly instead of the granular
-                    # ThoughtEvent / ContentEvent / FinalEvent hierarchy.  To maintain
-                    # backward-compatibility we treat those objects similarly to the
-                    # document consumer: every delta with ``content`` becomes an
-                    # ASYNC_CONTENT frame and when ``is_complete`` flips to ``True`` we
-                    # dispatch the mandatory ASYNC_FINISH so the front-end can close
-                    # the stream gracefully. NOTE - removed LlamaIndex adapters but leaving this.
-                    # ------------------------------------------------------------------
-                    if hasattr(event, "content") and event.content:
-                        await self.send_standard_message(
-                            msg_type="ASYNC_CONTENT",
-                            content=str(event.content),
-                            data={"message_id": event.llm_message_id},
+                    elif isinstance(event, ErrorEvent):
+                        await stream.send(
+                            msg_type="ASYNC_ERROR",
+                            content="",
+                            data={
+                                "error": event.error or "Unknown error",
+                                "message_id": event.llm_message_id,
+                                "metadata": event.metadata,
+                            },
                         )
+                        # Reset flag
+                        if hasattr(self, "_sent_start"):
+                            delattr(self, "_sent_start")
 
-                    if getattr(event, "is_complete", False):
-                        sources_payload: list[dict[str, Any]] = []
-                        if hasattr(event, "sources") and event.sources:
-                            sources_payload = [s.to_dict() for s in event.sources]
-
-                        await self.send_standard_message(
+                    elif isinstance(event, FinalEvent):
+                        await stream.send(
                             msg_type="ASYNC_FINISH",
-                            content=getattr(event, "accumulated_content", ""),
+                            content=event.accumulated_content or event.content,
                             data={
-                                "sources": sources_payload,
+                                "sources": [s.to_dict() for s in event.sources],
                                 "message_id": event.llm_message_id,
                                 "timeline": (
                                     event.metadata.get("timeline", [])
@@ -317,6 +282,46 @@ class CorpusQueryConsumer(AsyncWebsocketConsumer):
                         if hasattr(self, "_sent_start"):
                             delattr(self, "_sent_start")
 
+                    else:
+                        # ------------------------------------------------------------------
+                        # Legacy path: some adapters (e.g. llama-index) still yield the
+                        # unified *response objects* directly instead of the granular
+                        # ThoughtEvent / ContentEvent / FinalEvent hierarchy.  To maintain
+                        # backward-compatibility we treat those objects similarly to the
+                        # document consumer: every delta with ``content`` becomes an
+                        # ASYNC_CONTENT frame and when ``is_complete`` flips to ``True`` we
+                        # dispatch the mandatory ASYNC_FINISH so the front-end can close
+                        # the stream gracefully. NOTE - removed LlamaIndex adapters but leaving this.
+                        # ------------------------------------------------------------------
+                        if hasattr(event, "content") and event.content:
+                            await stream.send(
+                                msg_type="ASYNC_CONTENT",
+                                content=str(event.content),
+                                data={"message_id": event.llm_message_id},
+                            )
+
+                        if getattr(event, "is_complete", False):
+                            sources_payload: list[dict[str, Any]] = []
+                            if hasattr(event, "sources") and event.sources:
+                                sources_payload = [s.to_dict() for s in event.sources]
+
+                            await stream.send(
+                                msg_type="ASYNC_FINISH",
+                                content=getattr(event, "accumulated_content", ""),
+                                data={
+                                    "sources": sources_payload,
+                                    "message_id": event.llm_message_id,
+                                    "timeline": (
+                                        event.metadata.get("timeline", [])
+                                        if isinstance(event.metadata, dict)
+                                        else []
+                                    ),
+                                },
+                            )
+
+                            if hasattr(self, "_sent_start"):
+                                delattr(self, "_sent_start")
+
             logger.debug("[Session %s] Streaming complete.", self.session_id)
 
         except Exception as llm_err:  # noqa: BLE001
@@ -22,6 +22,7 @@ from django.conf import settings
 from graphql_relay import from_global_id
 
 from config.websocket.utils.extract_ids import extract_websocket_path_id
+from config.websocket.utils.stream_coalescer import StreamCoalescer
 from opencontractserver.conversations.models import MessageType
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.documents.models import Document
@@ -170,6 +171,9 @@ class DocumentQueryConsumer(AsyncWebsocketConsumer):
         logger.debug(
             f"[Consumer {self.consumer_id} | Session {self.session_id}] disconnect() called."
         )
+        if getattr(self, "agent", None) is not None:
+            # Hand the agent back to the pool so the next socket skips the rebuild
+            agents.release(self.agent)
         self.agent = None
 
     async def send_standard_message(
@@ -380,131 +384,100 @@ class DocumentQueryConsumer(AsyncWebsocketConsumer):
 
             try:
                 # Stream the response
-                async for event in self.agent.stream(user_query):
-                    # Ensure start message once we have IDs (present on all event types now)
-                    if getattr(
-                        event, "user_message_id", None
-                    ) is not None and not hasattr(self, "_sent_start"):
-                        await self.send_standard_message(
-                            msg_type="ASYNC_START",
-                            content="",
-                            data={"message_id": event.llm_message_id},
-                        )
-                        self._sent_start = True
-
-                    if isinstance(event, ThoughtEvent):
-                        await self.send_standard_message(
-                            msg_type="ASYNC_THOUGHT",
-                            content=event.thought,
-                            data={"message_id": event.llm_message_id, **event.metadata},
-                        )
-
-                    elif isinstance(event, ContentEvent):
-                        if event.content:
-                            await self.send_standard_message(
-                                msg_type="ASYNC_CONTENT",
-                                content=event.content,
+                async with StreamCoalescer(self.send_standard_message) as stream:
+                    async for event in self.agent.stream(user_query):
+                        # Ensure start message once we have IDs (present on all event types now)
+                        if getattr(
+                            event, "user_message_id", None
+                        ) is not None and not hasattr(self, "_sent_start"):
+                            await stream.send(
+                                msg_type="ASYNC_START",
+                                content="",
                                 data={"message_id": event.llm_message_id},
                             )
+                            self._sent_start = True
 
-                    elif isinstance(event, SourceEvent):
-                        if event.sources:
-                            await self.send_standard_message(
-                                msg_type="ASYNC_SOURCES",
-                                content="",  # no textual content
+                        if isinstance(event, ThoughtEvent):
+                            await stream.send(
+                                msg_type="ASYNC_THOUGHT",
+                                content=event.thought,
                                 data={
                                     "message_id": event.llm_message_id,
-                                    "sources": [s.to_dict() for s in event.sources],
+                                    **event.metadata,
                                 },
                             )
 
-                    elif isinstance(event, ApprovalNeededEvent):
-                        # Tell front-end we are paused waiting for approval
-                        await self.send_standard_message(
-                            msg_type="ASYNC_APPROVAL_NEEDED",
-                            content="",
-                            data={
-                                "message_id": event.llm_message_id,
-                                "pending_tool_call": event.pending_tool_call,
-                            },
-                        )
-
-                    elif isinstance(event, ApprovalResultEvent):
-                        await self.send_standard_message(
-                            msg_type="ASYNC_APPROVAL_RESULT",
-                            content="",
-                            data={
-                                "message_id": event.llm_message_id,
-                                "decision": event.decision,
-                                "pending_tool_call": event.pending_tool_call,
-                            },
-                        )
-
-                    elif isinstance(event, ResumeEvent):
-                        await self.send_standard_message(
-                            msg_type="ASYNC_RESUME",
-                            content="",
-                            data={
-                                "message_id": event.llm_message_id,
-                            },
-                        )
-
-                    elif isinstance(event, ErrorEvent):
-                        # Handle error events
-                        await self.send_standard_message(
-                            msg_type="ASYNC_ERROR",
-                            content="",
-                            data={
-                                "error": event.error or "Unknown error",
-                                "message_id": event.llm_message_id,
-                                "metadata": event.metadata,
-                            },
-                        )
-                        # Reset flag
-                        if hasattr(self, "_sent_start"):
-                            delattr(self, "_sent_start")
+                        elif isinstance(event, ContentEvent):
+                            if event.content:
+                                await stream.send(
+                                    msg_type="ASYNC_CONTENT",
+                                    content=event.content,
+                                    data={"message_id": event.llm_message_id},
+                                )
+
+                        elif isinstance(event, SourceEvent):
+                            if event.sources:
+                                await stream.send(
+                                    msg_type="ASYNC_SOURCES",
+                                    content="",  # no textual content
+                                    data={
+                                        "message_id": event.llm_message_id,
+                                        "sources": [s.to_dict() for s in event.sources],
+                                    },
+                                )
+
+                        elif isinstance(event, ApprovalNeededEvent):
+                            # Tell front-end we are paused waiting for approval
+                            await stream.send(
+                                msg_type="ASYNC_APPROVAL_NEEDED",
+                                content="",
+                                data={
+                                    "message_id": event.llm_message_id,
+                                    "pending_tool_call": event.pending_tool_call,
+                                },
+                            )
 
-                    elif isinstance(event, FinalEvent):
-                        # Prepare sources data (if not already sent)
-                        sources_payload = [s.to_dict() for s in event.sources]
-                        await self.send_standard_message(
-                            msg_type="ASYNC_FINISH",
-                            content=event.accumulated_content or event.content,
-                            data={
-                                "sources": sources_payload,
-                                "message_id": event.llm_message_id,
-                                "timeline": (
-                                    event.metadata.get("timeline", [])
-                                    if isinstance(event.metadata, dict)
-                                    else []
-                                ),
-                            },
-                        )
+                        elif isinstance(event, ApprovalResultEvent):
+                            await stream.send(
+                                msg_type="ASYNC_APPROVAL_RESULT",
+                                content="",
+                                data={
+                                    "message_id": event.llm_message_id,
+                                    "decision": event.decision,
+                                    "pending_tool_call": event.pending_tool_call,
+                                },
+                            )
 
-                        # Reset flag
-                        if hasattr(self, "_sent_start"):
-                            delattr(self, "_sent_start")
-
-                    else:
-                        # ------------------------------------------------------------------
-                        # Legacy path: llama-index still yields UnifiedStreamResponse.
-                        # Treat it as a content event / final event analogue.
-                        # ------------------------------------------------------------------
-                        if hasattr(event, "content") and event.content:
-                            await self.send_standard_message(
-                                msg_type="ASYNC_CONTENT",
-                                content=str(event.content),
-                                data={"message_id": event.llm_message_id},
+                        elif isinstance(event, ResumeEvent):
+                            await stream.send(
+                                msg_type="ASYNC_RESUME",
+                                content="",
+                                data={
+                                    "message_id": event.llm_message_id,
+                                },
                             )
 
-                        if getattr(event, "is_complete", False):
-                            sources_payload = []
-                            if hasattr(event, "sources") and event.sources:
-                                sources_payload = [s.to_dict() for s in event.sources]
+                        elif isinstance(event, ErrorEvent):
+                            # Handle error events
+                            await stream.send(
+                                msg_type="ASYNC_ERROR",
+                                content="",
+                                data={
+                                    "error": event.error or "Unknown error",
+                                    "message_id": event.llm_message_id,
+                                    "metadata": event.metadata,
+                                },
+                            )
+                            # Reset flag
+                            if hasattr(self, "_sent_start"):
+                                delattr(self, "_sent_start")
 
-                            await self.send_standard_message(
+                        elif isinstance(event, FinalEvent):
+                            # Prepare sources data (if not already sent)
+                            sources_payload = [s.to_dict() for s in event.sources]
+                            await stream.send(
                                 msg_type="ASYNC_FINISH",
-                                content=getattr(event, "accumulated_content", ""),
+                                content=event.accumulated_content or event.content,
                                 data={
                                     "sources": sources_payload,
                                     "message_id": event.llm_message_id,
@@ -516,9 +489,46 @@ class DocumentQueryConsumer(AsyncWebsocketConsumer):
                                 },
                             )
 
+                            # Reset flag
                             if hasattr(self, "_sent_start"):
                                 delattr(self, "_sent_start")
 
+                        else:
+                            # ------------------------------------------------------------------
+                            # Legacy path: llama-index still yields UnifiedStreamResponse.
+                            # Treat it as a content event / final event analogue.
+                            # ------------------------------------------------------------------
+                            if hasattr(event, "content") and event.content:
+                                await stream.send(
+                                    msg_type="ASYNC_CONTENT",
+                                    content=str(event.content),
+                                    data={"message_id": event.llm_message_id},
+                                )
+
+                            if getattr(event, "is_complete", False):
+                                sources_payload = []
+                                if hasattr(event, "sources") and event.sources:
+                                    sources_payload = [
+                                        s.to_dict() for s in event.sources
+                                    ]
+
+                                await stream.send(
+                                    msg_type="ASYNC_FINISH",
+                                    content=getattr(event, "accumulated_content", ""),
+                                    data={
+                                        "sources": sources_payload,
+                                        "message_id": event.llm_message_id,
+                                        "timeline": (
+                                            event.metadata.get("timeline", [])
+                                            if isinstance(event.metadata, dict)
+                                            else []
+                                        ),
+                                    },
+                                )
+
+                                if hasattr(self, "_sent_start"):
+                                    delattr(self, "_sent_start")
+
                 logger.debug(
                     f"[Session {self.session_id}] Completed streaming response"
                 )
@@ -576,42 +586,43 @@ class DocumentQueryConsumer(AsyncWebsocketConsumer):
 
         try:
             # Stream the resumed answer so UX stays consistent
-            async for event in self.agent.resume_with_approval(
-                llm_msg_id, approved, stream=True
-            ):
-                # Re-use the same event → websocket mapping logic
-                if isinstance(event, ThoughtEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_THOUGHT",
-                        content=event.thought,
-                        data={"message_id": event.llm_message_id, **event.metadata},
-                    )
-                elif isinstance(event, ContentEvent):
-                    if event.content:
-                        await self.send_standard_message(
-                            msg_type="ASYNC_CONTENT",
-                            content=event.content,
-                            data={"message_id": event.llm_message_id},
+            async with StreamCoalescer(self.send_standard_message) as stream:
+                async for event in self.agent.resume_with_approval(
+                    llm_msg_id, approved, stream=True
+                ):
+                    # Re-use the same event → websocket mapping logic
+                    if isinstance(event, ThoughtEvent):
+                        await stream.send(
+                            msg_type="ASYNC_THOUGHT",
+                            content=event.thought,
+                            data={"message_id": event.llm_message_id, **event.metadata},
+                        )
+                    elif isinstance(event, ContentEvent):
+                        if event.content:
+                            await stream.send(
+                                msg_type="ASYNC_CONTENT",
+                                content=event.content,
+                                data={"message_id": event.llm_message_id},
+                            )
+                    elif isinstance(event, SourceEvent):
+                        await stream.send(
+                            msg_type="ASYNC_SOURCES",
+                            content="",
+                            data={
+                                "message_id": event.llm_message_id,
+                                "sources": [s.to_dict() for s in event.sources],
+                            },
+                        )
+                    elif isinstance(event, FinalEvent):
+                        await stream.send(
+                            msg_type="ASYNC_FINISH",
+                            content=event.accumulated_content or event.content,
+                            data={
+                                "sources": [s.to_dict() for s in event.sources],
+                                "message_id": event.llm_message_id,
+                                "timeline": event.metadata.get("timeline", []),
+                            },
                         )
-                elif isinstance(event, SourceEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_SOURCES",
-                        content="",
-                        data={
-                            "message_id": event.llm_message_id,
-                            "sources": [s.to_dict() for s in event.sources],
-                        },
-                    )
-                elif isinstance(event, FinalEvent):
-                    await self.send_standard_message(
-                        msg_type="ASYNC_FINISH",
-                        content=event.accumulated_content or event.content,
-                        data={
-                            "sources": [s.to_dict() for s in event.sources],
-                            "message_id": event.llm_message_id,
-                            "timeline": event.metadata.get("timeline", []),
-                        },
-                    )
 
         except Exception as e:
             logger.error("Approval resume error: %s", e, exc_info=True)
@@ -0,0 +1,183 @@
+"""
+Coalescing, back-pressured sender for streamed agent answers.
+
+Models emit one ``ContentEvent`` per token, and sending each as its own
+``ASYNC_CONTENT`` frame costs thousands of tiny websocket writes per answer.
+``StreamCoalescer`` sits between the agent stream and the consumer's
+``send_standard_message``:
+
+* ``ASYNC_CONTENT`` deltas for the same message are merged and sent once
+  ``WEBSOCKET_STREAM_COALESCE_MS`` has passed or ``WEBSOCKET_STREAM_MAX_CHARS``
+  characters are buffered, whichever comes first.
+* Every other frame flushes the buffered content first, so clients always see
+  frames in the order the agent produced them.
+* Frames are written by a single writer task through a queue of at most
+  ``WEBSOCKET_STREAM_MAX_PENDING_FRAMES`` frames. While the client is slow the
+  queue stays busy, deltas keep merging into a larger frame, and once the
+  queue is full the agent stream itself is paused until the client catches up.
+
+A window of ``0`` turns coalescing off and sends every frame directly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_MESSAGE_TYPE = "ASYNC_CONTENT"
+
+SendCallable = Callable[..., Awaitable[None]]
+
+_STOP = object()
+
+
+class StreamCoalescer:
+    """Async context manager wrapping a consumer's ``send_standard_message``."""
+
+    def __init__(
+        self,
+        send: SendCallable,
+        window_ms: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self._send = send
+        if window_ms is None:
+            window_ms = getattr(settings, "WEBSOCKET_STREAM_COALESCE_MS", 50)
+        self.window = window_ms / 1000
+        self.max_chars = max_chars or getattr(
+            settings, "WEBSOCKET_STREAM_MAX_CHARS", 2048
+        )
+        self.max_pending = max_pending or getattr(
+            settings, "WEBSOCKET_STREAM_MAX_PENDING_FRAMES", 32
+        )
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._failed = False
+
+        # Content buffered for the message currently streaming
+        self._message_id: Any = None
+        self._parts: list[str] = []
+        self._buffered_chars = 0
+        self._buffered_since = 0.0
+
+        self.stats = {"events": 0, "frames": 0, "content_events": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def __aenter__(self) -> StreamCoalescer:
+        if self.enabled:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._writer = asyncio.create_task(self._write_frames())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    # ------------------------------------------------------------------ #
+    # Producer side                                                      #
+    # ------------------------------------------------------------------ #
+    async def send(
+        self,
+        msg_type: str,
+        content: str = "",
+        data: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Drop-in replacement for ``send_standard_message``."""
+        self.stats["events"] += 1
+        if not self.enabled:
+            await self._write(msg_type, content, data)
+            return
+
+        if msg_type == CONTENT_MESSAGE_TYPE:
+            self.stats["content_events"] += 1
+            await self._buffer_content(content, data)
+            return
+
+        await self._enqueue_buffered()
+        await self._queue.put((msg_type, content, data))
+
+    async def _buffer_content(self, content: str, data: Optional[dict]) -> None:
+        message_id = (data or {}).get("message_id")
+        if self._parts and message_id != self._message_id:
+            await self._enqueue_buffered()
+        if not self._parts:
+            self._message_id = message_id
+            self._buffered_since = time.monotonic()
+        self._parts.append(content)
+        self._buffered_chars += len(content)
+
+        if self._buffered_chars >= self.max_chars or (
+            self._queue.empty()
+            and time.monotonic() - self._buffered_since >= self.window
+        ):
+            # Blocks while the queue is full - this is the back-pressure point
+            await self._enqueue_buffered()
+
+    def _take_buffered(self) -> Optional[tuple]:
+        if not self._parts:
+            return None
+        frame = (
+            CONTENT_MESSAGE_TYPE,
+            "".join(self._parts),
+            {"message_id": self._message_id},
+        )
+        self._parts = []
+        self._buffered_chars = 0
+        return frame
+
+    async def _enqueue_buffered(self) -> None:
+        frame = self._take_buffered()
+        if frame is not None:
+            await self._queue.put(frame)
+
+    async def close(self) -> None:
+        """Flush buffered content and wait until every frame is written."""
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        try:
+            await self._enqueue_buffered()
+            await self._queue.put(_STOP)
+            await writer
+        finally:
+            # The consumer may be cancelled mid-answer (socket closed)
+            if not writer.done():
+                writer.cancel()
+
+    # ------------------------------------------------------------------ #
+    # Writer side                                                        #
+    # ------------------------------------------------------------------ #
+    async def _write(self, msg_type: str, content: str, data: Optional[dict]) -> None:
+        if self._failed:
+            return
+        try:
+            await self._send(msg_type=msg_type, content=content, data=data)
+            self.stats["frames"] += 1
+        except Exception as e:
+            # Keep draining so the producer never blocks on a dead socket
+            logger.warning(f"Dropping streamed frames after send failure: {e}")
+            self._failed = True
+
+    async def _write_frames(self) -> None:
+        while True:
+            try:
+                frame = await asyncio.wait_for(self._queue.get(), timeout=self.window)
+            except asyncio.TimeoutError:
+                # The model paused mid-answer: ship what has been buffered
+                frame = self._take_buffered()
+                if frame is None:
+                    continue
+            if frame is _STOP:
+                return
+            await self._write(*frame)
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -14,7 +14,10 @@ class AnnotationsConfig(AppConfig):
             from opencontractserver.annotations.models import Annotation, Note
             from opencontractserver.annotations.signals import (
                 ANNOT_CREATE_UID,
+                ANNOT_PAGE_INDEX_DELETE_UID,
+                ANNOT_PAGE_INDEX_SAVE_UID,
                 NOTE_CREATE_UID,
+                invalidate_annot_page_index,
                 process_annot_on_create_atomic,
                 process_note_on_create_atomic,
             )
@@ -24,6 +27,16 @@ class AnnotationsConfig(AppConfig):
                 sender=Annotation,
                 dispatch_uid=ANNOT_CREATE_UID,
             )
+            post_save.connect(
+                invalidate_annot_page_index,
+                sender=Annotation,
+                dispatch_uid=ANNOT_PAGE_INDEX_SAVE_UID,
+            )
+            post_delete.connect(
+                invalidate_annot_page_index,
+                sender=Annotation,
+                dispatch_uid=ANNOT_PAGE_INDEX_DELETE_UID,
+            )
             post_save.connect(
                 process_note_on_create_atomic,
                 sender=Note,
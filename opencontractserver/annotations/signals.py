@@ -1,4 +1,6 @@
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from django.apps import apps
 from django.conf import settings
@@ -8,6 +10,7 @@ from opencontractserver.tasks.embeddings_task import (
     calculate_embedding_for_annotation_text,
     calculate_embedding_for_note_text,
 )
+from opencontractserver.utils.page_index import invalidate_page_index
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,23 @@ ANNOT_CREATE_UID = (
     "process_annot_on_create_atomic_uid_v1"  # Added _v1 for potential future changes
 )
 NOTE_CREATE_UID = "process_note_on_create_atomic_uid_v1"  # Added _v1
+ANNOT_PAGE_INDEX_SAVE_UID = "invalidate_annot_page_index_on_save_uid_v1"
+ANNOT_PAGE_INDEX_DELETE_UID = "invalidate_annot_page_index_on_delete_uid_v1"
+
+# Set while the ingest graph saves a parse: its embed stage embeds the
+# structural annotations in one batch instead of one task per annotation.
+_defer_structural_embeddings: ContextVar[bool] = ContextVar(
+    "defer_structural_embeddings", default=False
+)
+
+
+@contextmanager
+def defer_structural_annotation_embeddings(defer: bool = True):
+    token = _defer_structural_embeddings.set(defer)
+    try:
+        yield
+    finally:
+        _defer_structural_embeddings.reset(token)
 
 
 def process_annot_on_create_atomic(sender, instance, created, **kwargs):
@@ -24,7 +44,8 @@ def process_annot_on_create_atomic(sender, instance, created, **kwargs):
     Queues tasks to calculate embeddings for the annotation.
 
     If the annotation is structural, also ensures it has embeddings for all corpuses
-    its document belongs to.
+    its document belongs to (unless created inside
+    defer_structural_annotation_embeddings, i.e. by the ingest graph).
 
     Args:
         sender: The model class.
@@ -32,6 +53,9 @@ def process_annot_on_create_atomic(sender, instance, created, **kwargs):
         created (bool): True if a new record was created.
         **kwargs: Additional keyword arguments.
     """
+    if instance.structural and _defer_structural_embeddings.get():
+        return
+
     # When a new annotation is created *AND* no embeddings are present at creation,
     # hit the embeddings microservice. Since embeddings can be an array, need to test for None
     if created and instance.embedding is None:
@@ -52,6 +76,16 @@ def process_annot_on_create_atomic(sender, instance, created, **kwargs):
             process_structural_annotation_for_corpuses(instance)
 
 
+def invalidate_annot_page_index(sender, instance, **kwargs):
+    """
+    Signal handler (post_save / post_delete) that drops the cached per-page
+    annotation index of the annotation's document so the viewer never serves
+    stale pages.
+    """
+    if instance.document_id is not None:
+        invalidate_page_index(instance.document_id)
+
+
 def process_note_on_create_atomic(sender, instance, created, **kwargs):
     """
     Signal handler to process a note after it is created.
@@ -0,0 +1,398 @@
+"""
+Streaming bulk annotation endpoint for the document viewer.
+
+``bulkDocAnnotationsInCorpus`` materialises every annotation of a document and lets
+graphene serialise them into a single JSON response. For large documents that is
+slow to produce and slow to parse, and nothing renders until the whole payload has
+arrived. This endpoint instead streams annotations (then relationships) as they are
+read from the database, either as newline-delimited JSON or as a msgpack stream,
+optionally compressed with gzip or brotli.
+
+Each frame is an object with a ``type`` key:
+
+* ``{"type": "meta", ...}`` - first frame, echoes the resolved request.
+* ``{"type": "annotation", "data": {...}}``
+* ``{"type": "relationship", "data": {...}}``
+* ``{"type": "end", "annotationCount": n, "relationshipCount": m}`` - last frame.
+
+Visibility rules are shared with the GraphQL bulk resolvers via
+``opencontractserver.shared.resolvers``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any, Callable, Optional
+
+import msgpack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from graphql_relay import from_global_id, to_global_id
+
+from opencontractserver.annotations.models import Relationship
+from opencontractserver.documents.models import Document
+from opencontractserver.shared.resolvers import (
+    resolve_bulk_doc_annotations_queryset,
+    resolve_bulk_doc_relationships_queryset,
+)
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+
+ANNOTATION_STREAM_FIELDS = (
+    "id",
+    "page",
+    "raw_text",
+    "json",
+    "annotation_type",
+    "annotation_label_id",
+    "parent_id",
+    "structural",
+    "analysis_id",
+    "corpus_id",
+    "creator_id",
+    "is_public",
+)
+
+
+def _stream_batch_size() -> int:
+    return getattr(settings, "ANNOTATION_STREAM_BATCH_SIZE", 500)
+
+
+def _annotation_frame(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "type": "annotation",
+        "data": {
+            "id": to_global_id("AnnotationType", row["id"]),
+            "page": row["page"],
+            "rawText": row["raw_text"],
+            "json": row["json"],
+            "annotationType": row["annotation_type"],
+            "annotationLabelId": (
+                to_global_id("AnnotationLabelType", row["annotation_label_id"])
+                if row["annotation_label_id"] is not None
+                else None
+            ),
+            "parentId": (
+                to_global_id("AnnotationType", row["parent_id"])
+                if row["parent_id"] is not None
+                else None
+            ),
+            "structural": row["structural"],
+            "analysisId": (
+                to_global_id("AnalysisType", row["analysis_id"])
+                if row["analysis_id"] is not None
+                else None
+            ),
+            "corpusId": (
+                to_global_id("CorpusType", row["corpus_id"])
+                if row["corpus_id"] is not None
+                else None
+            ),
+            "creatorId": to_global_id("UserType", row["creator_id"]),
+            "isPublic": row["is_public"],
+        },
+    }
+
+
+def _fetch_annotation_batch(
+    queryset, after: Optional[tuple[int, int]], batch_size: int
+) -> list[dict[str, Any]]:
+    """Keyset-paginate on (page, id) so the viewer gets early pages first."""
+    if after is not None:
+        page, pk = after
+        queryset = queryset.filter(Q(page__gt=page) | Q(page=page, id__gt=pk))
+    return list(
+        queryset.order_by("page", "id").values(*ANNOTATION_STREAM_FIELDS)[:batch_size]
+    )
+
+
+def _fetch_relationship_batch(
+    queryset, after: Optional[int], batch_size: int
+) -> tuple[list[dict[str, Any]], Optional[int]]:
+    """Return the relationship frames of one batch and the last relationship pk."""
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(
+        queryset.order_by("id").values(
+            "id", "relationship_label_id", "structural", "analysis_id", "is_public"
+        )[:batch_size]
+    )
+    if not rows:
+        return [], None
+
+    # Read both M2M through tables once per batch instead of prefetching objects.
+    relationship_ids = [row["id"] for row in rows]
+    sources: dict[int, list[str]] = {pk: [] for pk in relationship_ids}
+    targets: dict[int, list[str]] = {pk: [] for pk in relationship_ids}
+    for through, bucket in (
+        (Relationship.source_annotations.through, sources),
+        (Relationship.target_annotations.through, targets),
+    ):
+        for relationship_id, annotation_id in through.objects.filter(
+            relationship_id__in=relationship_ids
+        ).values_list("relationship_id", "annotation_id"):
+            bucket[relationship_id].append(
+                to_global_id("AnnotationType", annotation_id)
+            )
+
+    frames = [
+        {
+            "type": "relationship",
+            "data": {
+                "id": to_global_id("RelationshipType", row["id"]),
+                "relationshipLabelId": (
+                    to_global_id("AnnotationLabelType", row["relationship_label_id"])
+                    if row["relationship_label_id"] is not None
+                    else None
+                ),
+                "sourceAnnotationIds": sources[row["id"]],
+                "targetAnnotationIds": targets[row["id"]],
+                "structural": row["structural"],
+                "analysisId": (
+                    to_global_id("AnalysisType", row["analysis_id"])
+                    if row["analysis_id"] is not None
+                    else None
+                ),
+                "isPublic": row["is_public"],
+            },
+        }
+        for row in rows
+    ]
+    return frames, rows[-1]["id"]
+
+
+async def iterate_document_annotation_frames(
+    user,
+    document_pk: int | str,
+    corpus_pk: int | str,
+    analysis_pks: Optional[list[int]] = None,
+    label_type: Optional[str] = None,
+    include_relationships: bool = True,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Yield meta, annotation, relationship and end frames for a document, reading the
+    database in keyset-paginated batches so memory stays flat for huge documents.
+    """
+    batch_size = _stream_batch_size()
+
+    yield {
+        "type": "meta",
+        "documentId": to_global_id("DocumentType", document_pk),
+        "corpusId": to_global_id("CorpusType", corpus_pk),
+        "labelType": label_type,
+    }
+
+    annotation_queryset = resolve_bulk_doc_annotations_queryset(
+        user,
+        corpus_pk,
+        document_pk=document_pk,
+        analysis_pks=analysis_pks,
+        label_type=label_type,
+    )
+    annotation_count = 0
+    after: Optional[tuple[int, int]] = None
+    while True:
+        rows = await sync_to_async(_fetch_annotation_batch)(
+            annotation_queryset, after, batch_size
+        )
+        for row in rows:
+            yield _annotation_frame(row)
+        annotation_count += len(rows)
+        if len(rows) < batch_size:
+            break
+        after = (rows[-1]["page"], rows[-1]["id"])
+
+    relationship_count = 0
+    if include_relationships:
+        relationship_queryset = resolve_bulk_doc_relationships_queryset(
+            user, corpus_pk, document_pk
+        )
+        relationship_after: Optional[int] = None
+        while True:
+            frames, relationship_after = await sync_to_async(_fetch_relationship_batch)(
+                relationship_queryset, relationship_after, batch_size
+            )
+            for frame in frames:
+                yield frame
+            relationship_count += len(frames)
+            if len(frames) < batch_size:
+                break
+
+    yield {
+        "type": "end",
+        "annotationCount": annotation_count,
+        "relationshipCount": relationship_count,
+    }
+
+
+def _encode_ndjson(frame: dict[str, Any]) -> bytes:
+    return (json.dumps(frame, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _encode_msgpack(frame: dict[str, Any]) -> bytes:
+    return msgpack.packb(frame, use_bin_type=True)
+
+
+def _select_content_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if part.strip() and not part.strip().endswith(";q=0")
+    }
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _make_compressor(
+    content_encoding: Optional[str],
+) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Return ``(compress_chunk, flush)`` for the negotiated encoding."""
+    if content_encoding == "br":
+        compressor = brotli.Compressor()
+        return compressor.process, compressor.finish
+    if content_encoding == "gzip":
+        # wbits=31 -> gzip container; Z_SYNC_FLUSH lets each chunk reach the client.
+        compressor = zlib.compressobj(wbits=31)
+        return (
+            lambda data: compressor.compress(data)
+            + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+    return (lambda data: data), (lambda: b"")
+
+
+async def _encode_stream(
+    frames: AsyncIterator[dict[str, Any]],
+    encode: Callable[[dict[str, Any]], bytes],
+    content_encoding: Optional[str],
+    chunk_bytes: int,
+) -> AsyncIterator[bytes]:
+    """Encode frames, coalescing them into ``chunk_bytes`` sized body chunks."""
+    compress, flush = _make_compressor(content_encoding)
+    buffer = bytearray()
+    async for frame in frames:
+        buffer += encode(frame)
+        if len(buffer) >= chunk_bytes:
+            yield compress(bytes(buffer))
+            buffer.clear()
+    tail = compress(bytes(buffer)) + flush()
+    if tail:
+        yield tail
+
+
+def _resolve_request_user(request: HttpRequest):
+    """
+    Use the session user when present, otherwise run the configured auth backends
+    (JWT / Auth0 / API key) against the request headers, as GraphQL does.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    return authenticate(request=request) or AnonymousUser()
+
+
+# Read-only, and ATOMIC_REQUESTS cannot wrap async views.
+@transaction.non_atomic_requests
+async def stream_document_annotations(
+    request: HttpRequest, document_id: str
+) -> HttpResponse:
+    """
+    Stream every visible annotation (and relationship) of a document in a corpus.
+
+    Query params:
+        corpus_id (required): Corpus global id.
+        for_analysis_ids: Comma separated analysis global ids.
+        label_type: Restrict to one annotation label type.
+        relationships: ``false`` to skip relationships.
+        format: ``ndjson`` (default) or ``msgpack``. ``Accept: application/x-msgpack``
+            is honoured too.
+    """
+    if request.method != "GET":
+        return HttpResponse(status=405)
+
+    user = await sync_to_async(_resolve_request_user)(request)
+
+    corpus_id = request.GET.get("corpus_id")
+    if not corpus_id:
+        return HttpResponse("corpus_id is required", status=400)
+
+    try:
+        document_pk = int(from_global_id(document_id)[1])
+        corpus_pk = int(from_global_id(corpus_id)[1])
+        analysis_pks = None
+        for_analysis_ids = request.GET.get("for_analysis_ids")
+        if for_analysis_ids:
+            analysis_pks = [
+                int(from_global_id(raw_id)[1])
+                for raw_id in for_analysis_ids.split(",")
+                if raw_id
+            ]
+    except (ValueError, TypeError):
+        return HttpResponse("Malformed id", status=400)
+
+    visible = await sync_to_async(
+        Document.objects.visible_to_user(user).filter(id=document_pk).exists
+    )()
+    if not visible:
+        return HttpResponse(status=404)
+
+    output_format = request.GET.get("format")
+    if output_format is None:
+        output_format = (
+            "msgpack"
+            if MSGPACK_CONTENT_TYPE in request.headers.get("Accept", "")
+            else "ndjson"
+        )
+    if output_format not in ("ndjson", "msgpack"):
+        return HttpResponse(f"Unsupported format '{output_format}'", status=400)
+
+    content_encoding = _select_content_encoding(
+        request.headers.get("Accept-Encoding", "")
+    )
+
+    frames = iterate_document_annotation_frames(
+        user,
+        document_pk,
+        corpus_pk,
+        analysis_pks=analysis_pks,
+        label_type=request.GET.get("label_type") or None,
+        include_relationships=request.GET.get("relationships", "true").lower()
+        != "false",
+    )
+
+    response = StreamingHttpResponse(
+        _encode_stream(
+            frames,
+            _encode_msgpack if output_format == "msgpack" else _encode_ndjson,
+            content_encoding,
+            getattr(settings, "ANNOTATION_STREAM_CHUNK_BYTES", 64 * 1024),
+        ),
+        content_type=(
+            MSGPACK_CONTENT_TYPE if output_format == "msgpack" else NDJSON_CONTENT_TYPE
+        ),
+    )
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    response["Vary"] = "Accept, Accept-Encoding, Authorization"
+    response["Cache-Control"] = "no-store"
+    # Tell reverse proxies (nginx / traefik) not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.20 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("conversations", "0003_chatmessage_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="history_summary",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="Rolling summary of older messages that no longer fit the agent's history window",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="history_summary_through_id",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="ID of the newest ChatMessage folded into history_summary",
+                null=True,
+            ),
+        ),
+    ]
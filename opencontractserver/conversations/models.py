@@ -89,6 +89,16 @@ class Conversation(BaseOCModel):
         blank=True,
         null=True,
     )
+    history_summary = models.TextField(
+        blank=True,
+        default="",
+        help_text="Rolling summary of older messages that no longer fit the agent's history window",
+    )
+    history_summary_through_id = models.PositiveBigIntegerField(
+        blank=True,
+        null=True,
+        help_text="ID of the newest ChatMessage folded into history_summary",
+    )
 
     class Meta:
         constraints = [
@@ -10,7 +10,18 @@ class CorpusesConfig(AppConfig):
 
     def ready(self):
         try:
-            pass
+            from config.graphql.response_cache import connect_response_cache_signals
+
+            # Anonymous GraphQL response cache invalidation (corpus, document,
+            # annotation and labelset changes)
+            connect_response_cache_signals()
+
+            from opencontractserver.llms.agents.agent_pool import (
+                connect_agent_pool_signals,
+            )
+
+            # Drop pooled agent skeletons when their document / corpus changes
+            connect_agent_pool_signals()
 
         except ImportError:
             pass
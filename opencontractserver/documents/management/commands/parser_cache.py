@@ -0,0 +1,126 @@
+"""
+Manage the parser output cache (see opencontractserver/utils/parser_cache.py).
+
+    manage.py parser_cache warm [--corpus-id ID] [--document-ids 1 2 ...]
+    manage.py parser_cache purge [--parser DoclingParser] [--older-than-days N]
+    manage.py parser_cache evict [--max-age-days N] [--max-bytes N]
+    manage.py parser_cache stats
+"""
+
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from opencontractserver.documents.models import Document
+from opencontractserver.pipeline.utils import get_component_by_name
+from opencontractserver.utils.parser_cache import (
+    evict_parser_cache,
+    iter_cache_entries,
+    parser_cache_enabled,
+    purge_parser_cache,
+)
+
+
+class Command(BaseCommand):
+    help = "Warm, purge, evict or inspect the parser output cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["warm", "purge", "evict", "stats"])
+        parser.add_argument(
+            "--corpus-id", type=int, help="warm: only documents in this corpus"
+        )
+        parser.add_argument(
+            "--document-ids", type=int, nargs="+", help="warm: only these documents"
+        )
+        parser.add_argument(
+            "--parser", help="purge: only entries of this parser (class name or path)"
+        )
+        parser.add_argument(
+            "--older-than-days", type=int, help="purge: only entries older than this"
+        )
+        parser.add_argument(
+            "--max-age-days", type=int, help="evict: override PARSER_CACHE_MAX_AGE_DAYS"
+        )
+        parser.add_argument(
+            "--max-bytes", type=int, help="evict: override PARSER_CACHE_MAX_BYTES"
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_warm(self, options) -> None:
+        """Parses documents without a cached export, without touching the documents."""
+        if not parser_cache_enabled():
+            raise CommandError("PARSER_CACHE_ENABLED is off; nothing would be cached.")
+
+        documents = Document.objects.all().order_by("id")
+        if options["corpus_id"]:
+            documents = documents.filter(corpus=options["corpus_id"])
+        if options["document_ids"]:
+            documents = documents.filter(pk__in=options["document_ids"])
+
+        preferred_parsers = getattr(settings, "PREFERRED_PARSERS", {})
+        parser_kwargs = getattr(settings, "PARSER_KWARGS", {})
+        parsers = {}
+        counts = Counter()
+        for document in documents.iterator():
+            parser_name = preferred_parsers.get(document.file_type)
+            if not parser_name:
+                counts["skipped"] += 1
+                continue
+            if parser_name not in parsers:
+                parsers[parser_name] = get_component_by_name(parser_name)()
+            parser = parsers[parser_name]
+            kwargs = parser_kwargs.get(parser_name, {})
+
+            if parser.has_cached_parse(document.id, **kwargs):
+                counts["cached"] += 1
+                continue
+            try:
+                parsed = parser.parse_document(
+                    document.creator_id, document.id, **kwargs
+                )
+            except Exception as e:
+                self.stderr.write(f"Document {document.id}: parse failed: {e}")
+                parsed = None
+            if parsed is None:
+                counts["failed"] += 1
+                continue
+            parser.cache_parse(document.id, parsed, **kwargs)
+            counts["warmed"] += 1
+            self.stdout.write(f"Cached parse of document {document.id}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {counts['warmed']}, already cached {counts['cached']}, "
+                f"failed {counts['failed']}, no parser {counts['skipped']}"
+            )
+        )
+
+    def handle_purge(self, options) -> None:
+        older_than = None
+        if options["older_than_days"] is not None:
+            older_than = datetime.timedelta(days=options["older_than_days"])
+        deleted = purge_parser_cache(options["parser"], older_than)
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} cache entries"))
+
+    def handle_evict(self, options) -> None:
+        deleted = evict_parser_cache(options["max_age_days"], options["max_bytes"])
+        self.stdout.write(self.style.SUCCESS(f"Evicted {deleted} cache entries"))
+
+    def handle_stats(self, options) -> None:
+        entries = Counter()
+        sizes = Counter()
+        for entry in iter_cache_entries():
+            entries[entry.parser] += 1
+            sizes[entry.parser] += entry.size
+        for parser_name in sorted(entries):
+            self.stdout.write(
+                f"{parser_name}: {entries[parser_name]} entries, "
+                f"{sizes[parser_name]} bytes"
+            )
+        self.stdout.write(
+            f"Total: {sum(entries.values())} entries, {sum(sizes.values())} bytes"
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0017_alter_documentsummaryrevision_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="file_sha256",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["file_sha256"], name="documents_d_file_sh_89edb4_idx"
+            ),
+        ),
+    ]
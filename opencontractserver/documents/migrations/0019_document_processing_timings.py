@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-18 22:50
+
+from django.db import migrations
+import opencontractserver.shared.defaults
+import opencontractserver.shared.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0018_document_file_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="processing_timings",
+            field=opencontractserver.shared.fields.NullableJSONField(
+                blank=True,
+                default=opencontractserver.shared.defaults.jsonfield_default_value,
+                null=True,
+            ),
+        ),
+    ]
@@ -73,12 +73,23 @@ class Document(BaseOCModel, HasEmbeddingMixin):
         null=True,
     )
 
+    # sha256 of the uploaded source file, used to reuse the parse of identical uploads
+    file_sha256 = django.db.models.CharField(max_length=64, null=True, blank=True)
+
     processing_started = django.db.models.DateTimeField(null=True)
     processing_finished = django.db.models.DateTimeField(null=True)
+    # Start time and duration of each ingest stage (see utils/ingest_timings.py)
+    processing_timings = NullableJSONField(
+        default=jsonfield_default_value, null=True, blank=True
+    )
 
     # Vector for vector search
     embedding = VectorField(dimensions=384, null=True, blank=True)
 
+    # Not a field: set False on a new instance before its first save to have it
+    # parsed from scratch even if an identical file was already processed.
+    reuse_existing_parse = True
+
     class Meta:
         permissions = (
             ("permission_document", "permission document"),
@@ -91,6 +102,7 @@ class Document(BaseOCModel, HasEmbeddingMixin):
         indexes = [
             django.db.models.Index(fields=["title"]),
             django.db.models.Index(fields=["page_count"]),
+            django.db.models.Index(fields=["file_sha256"]),
             django.db.models.Index(fields=["creator"]),
             django.db.models.Index(fields=["created"]),
             django.db.models.Index(fields=["modified"]),
@@ -1,18 +1,12 @@
 import logging
 
-from celery import chain
 from django.apps import apps
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Exists, OuterRef
 from django.db.models.signals import m2m_changed
-from django.utils import timezone
 
-from opencontractserver.tasks.doc_tasks import (
-    extract_thumbnail,
-    ingest_doc,
-    set_doc_lock_state,
-)
+from opencontractserver.tasks.doc_tasks import start_document_ingest
 from opencontractserver.tasks.embeddings_task import (
     calculate_embedding_for_annotation_text,
     calculate_embedding_for_doc_text,
@@ -22,12 +16,15 @@ logger = logging.getLogger(__name__)
 
 
 # Kicks off document processing pipeline - including thumbnail extraction, ingestion,
-# and unlocking the document
+# embedding of structural annotations and unlocking the document
 def process_doc_on_create_atomic(sender, instance, created, **kwargs):
     """
     Signal handler to process a document after it is created.
-    Initiates a chain of tasks to extract a thumbnail, ingest the document,
-    and unlock the document.
+    Starts the ingest graph (see build_ingest_graph): thumbnail extraction and
+    parsing in parallel, then embedding of the structural annotations and the
+    page index, then unlocking the document. If the creator can see an
+    identical, processed document (same file_sha256), its parse is copied
+    instead of extracting the thumbnail and parsing.
 
     Args:
         sender: The model class.
@@ -36,32 +33,7 @@ def process_doc_on_create_atomic(sender, instance, created, **kwargs):
         **kwargs: Additional keyword arguments.
     """
     if created and not instance.processing_started:
-
-        ingest_tasks = []
-
-        # Add the thumbnail extraction task
-        ingest_tasks.append(extract_thumbnail.si(doc_id=instance.id))
-
-        # Add the ingestion task
-        ingest_tasks.append(
-            ingest_doc.si(
-                user_id=instance.creator.id,
-                doc_id=instance.id,
-            )
-        )
-
-        # Removed embedding calculation from document creation
-        # Embeddings will now be calculated only when document is linked to a corpus
-
-        # Add the task to unlock the document
-        ingest_tasks.append(set_doc_lock_state.si(locked=False, doc_id=instance.id))
-
-        # Update the processing_started timestamp
-        instance.processing_started = timezone.now()
-        instance.save()
-
-        # Send tasks to Celery for asynchronous execution
-        transaction.on_commit(lambda: chain(*ingest_tasks).apply_async())
+        start_document_ingest([instance])
 
 
 def process_doc_on_corpus_add(sender, instance, action, pk_set, **kwargs):
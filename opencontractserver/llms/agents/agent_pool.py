@@ -0,0 +1,442 @@
+"""
+Per-process pool of prebuilt document / corpus agents.
+
+Building an agent is comparatively expensive: ``create_context`` loads the
+document / corpus (for corpus agents every document in it), the embedder is
+resolved, the vector store is constructed and every tool is wrapped for the
+framework again. None of that depends on *who* is asking or *which*
+conversation they are in, so ``AgentAPI.for_document`` / ``for_corpus`` lease
+prebuilt skeletons from this pool and only rebind the per-request state (user,
+conversation, persistence flags, stream observer) via ``rebind_agent``.
+
+Skeletons are leased exclusively - an agent checked out of the pool is never
+handed to another caller until ``AgentAPI.release`` gives it back - because the
+framework tool closures read the agent's (mutable) config when they run.
+
+Idle skeletons expire after ``LLMS_AGENT_POOL_TTL`` seconds and at most
+``LLMS_AGENT_POOL_MAX_SIZE`` are kept. Saving or deleting a document / corpus
+(or changing a corpus' documents) drops matching skeletons in this process and
+bumps a version counter in the Django cache, so skeletons held by *other*
+processes are discarded the next time they would be leased.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_PREFIX = "llm_agent_pool:version"
+
+DOCUMENT_AGENT = "document"
+CORPUS_AGENT = "corpus"
+
+# Options that only affect a single request; they are applied by
+# ``rebind_agent`` instead of being part of the skeleton key.
+REBINDABLE_OPTIONS = frozenset(
+    {
+        "user_id",
+        "conversation",
+        "conversation_id",
+        "loaded_messages",
+        "stream_observer",
+        "store_user_messages",
+        "store_llm_messages",
+    }
+)
+
+
+@dataclass(frozen=True)
+class AgentPoolKey:
+    kind: str
+    framework: str
+    object_id: int
+    corpus_id: Optional[int]
+    options: tuple
+
+    def version_names(self) -> list[str]:
+        names = []
+        if self.kind == DOCUMENT_AGENT:
+            names.append(f"{DOCUMENT_AGENT}:{self.object_id}")
+        if self.corpus_id is not None:
+            names.append(f"{CORPUS_AGENT}:{self.corpus_id}")
+        return names
+
+
+@dataclass
+class _Lease:
+    key: AgentPoolKey
+    versions: dict[str, Any]
+    document_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass
+class _PoolEntry:
+    agent: Any
+    lease: _Lease
+    expires_at: float
+
+
+def agent_pool_enabled() -> bool:
+    return getattr(settings, "LLMS_AGENT_POOL_ENABLED", False)
+
+
+def _object_id(obj: Any) -> Optional[int]:
+    if obj is None:
+        return None
+    if hasattr(obj, "pk"):
+        return obj.pk
+    try:
+        return int(obj)
+    except (TypeError, ValueError):
+        return None
+
+
+def _tool_signature(tools: Optional[list[Any]]) -> Optional[tuple]:
+    """Hashable description of a tool list, or ``None`` if it can't be pooled.
+
+    Closures (``<locals>`` in the qualified name) may capture per-request state
+    so an agent built with them is never shared.
+    """
+    signature = []
+    for tool in tools or []:
+        func = getattr(tool, "function", tool)
+        if isinstance(func, str):
+            signature.append((func,))
+            continue
+        qualname = getattr(func, "__qualname__", None)
+        if qualname is None or "<locals>" in qualname:
+            return None
+        signature.append(
+            (
+                getattr(tool, "name", qualname),
+                f"{getattr(func, '__module__', '')}.{qualname}",
+                getattr(tool, "requires_approval", False),
+                getattr(tool, "requires_corpus", False),
+            )
+        )
+    return tuple(signature)
+
+
+def build_pool_key(
+    kind: str,
+    framework: Any,
+    obj: Any,
+    corpus: Any = None,
+    *,
+    tools: Optional[list[Any]] = None,
+    **options: Any,
+) -> Optional[AgentPoolKey]:
+    """Return the skeleton key for an agent request, or ``None`` if it can't be pooled."""
+    if not agent_pool_enabled():
+        return None
+
+    object_id = _object_id(obj)
+    if object_id is None:
+        return None
+    corpus_id = object_id if kind == CORPUS_AGENT else _object_id(corpus)
+    if corpus is not None and corpus_id is None:
+        return None
+
+    tool_signature = _tool_signature(tools)
+    if tool_signature is None:
+        return None
+
+    key_options = tuple(
+        sorted(
+            (name, value)
+            for name, value in options.items()
+            if name not in REBINDABLE_OPTIONS
+        )
+    )
+    key = AgentPoolKey(
+        kind=kind,
+        framework=getattr(framework, "value", str(framework)),
+        object_id=object_id,
+        corpus_id=corpus_id,
+        options=key_options + (("tools", tool_signature),),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+async def aget_versions(key: AgentPoolKey) -> dict[str, Any]:
+    names = key.version_names()
+    current = await cache.aget_many(
+        [f"{VERSION_CACHE_PREFIX}:{name}" for name in names]
+    )
+    return {name: current.get(f"{VERSION_CACHE_PREFIX}:{name}") for name in names}
+
+
+def bump_version(kind: str, object_id: int) -> None:
+    cache.set(f"{VERSION_CACHE_PREFIX}:{kind}:{object_id}", time.time_ns(), None)
+
+
+def _bind_user(agent: Any, user_id: Optional[int]) -> None:
+    deps = getattr(agent, "agent_deps", None)
+    context = getattr(agent, "context", None)
+    if deps is not None:
+        deps.user_id = user_id
+    for vector_store in (
+        getattr(deps, "vector_store", None),
+        getattr(context, "vector_store", None),
+    ):
+        if vector_store is None:
+            continue
+        vector_store.user_id = user_id
+        core_store = getattr(vector_store, "core_store", None)
+        if core_store is not None:
+            core_store.user_id = user_id
+
+
+def _reset_bindings(agent: Any) -> None:
+    """Drop every per-request reference before an agent goes back into the pool."""
+    config = agent.config
+    config.user_id = None
+    config.conversation = None
+    config.conversation_id = None
+    config.loaded_messages = None
+    config.stream_observer = None
+    _bind_user(agent, None)
+
+
+async def rebind_agent(
+    agent: Any,
+    *,
+    user_id: Optional[int] = None,
+    conversation: Any = None,
+    conversation_id: Optional[int] = None,
+    loaded_messages: Optional[list[Any]] = None,
+    stream_observer: Any = None,
+    store_user_messages: Optional[bool] = None,
+    store_llm_messages: Optional[bool] = None,
+) -> Any:
+    """Bind a pooled skeleton to a user and conversation.
+
+    Performs the same access check and conversation resolution as a fresh build;
+    everything else (context, embedder, vector store, wrapped tools) is reused.
+    """
+    from opencontractserver.llms.agents.core_agents import (
+        CoreConversationManager,
+        _assert_access,
+    )
+
+    context = agent.context
+    document = getattr(context, "document", None)
+    if context.corpus is not None:
+        _assert_access(context.corpus, user_id)
+    if document is not None:
+        _assert_access(document, user_id)
+
+    config = agent.config
+    config.user_id = user_id
+    config.conversation = conversation
+    config.conversation_id = conversation_id
+    config.loaded_messages = loaded_messages
+    config.stream_observer = stream_observer
+    config.store_user_messages = (
+        True if store_user_messages is None else store_user_messages
+    )
+    config.store_llm_messages = (
+        True if store_llm_messages is None else store_llm_messages
+    )
+
+    if document is not None:
+        manager = await CoreConversationManager.create_for_document(
+            context.corpus,
+            document,
+            user_id=user_id,
+            config=config,
+            override_conversation=conversation,
+        )
+    else:
+        manager = await CoreConversationManager.create_for_corpus(
+            context.corpus,
+            user_id=user_id,
+            config=config,
+            override_conversation=conversation,
+        )
+    config.conversation = manager.conversation
+    agent.conversation_manager = manager
+    _bind_user(agent, user_id)
+    return agent
+
+
+class AgentPool:
+    """Idle agent skeletons grouped by ``AgentPoolKey``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: dict[AgentPoolKey, list[_PoolEntry]] = defaultdict(list)
+        self._leases: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.stats = defaultdict(int)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._idle.values())
+
+    def register(self, agent: Any, key: AgentPoolKey, versions: dict[str, Any]):
+        """Mark a freshly built agent as belonging to the pool (leased)."""
+        context = getattr(agent, "context", None)
+        documents = getattr(context, "documents", None) or []
+        self._leases[agent] = _Lease(
+            key=key,
+            versions=versions,
+            document_ids=frozenset(doc.id for doc in documents),
+        )
+        self.stats["built"] += 1
+
+    def release(self, agent: Any) -> bool:
+        """Return a leased agent to the pool. Unknown agents are ignored."""
+        lease = self._leases.get(agent)
+        if lease is None or not agent_pool_enabled():
+            return False
+        _reset_bindings(agent)
+
+        now = time.monotonic()
+        entry = _PoolEntry(
+            agent=agent,
+            lease=lease,
+            expires_at=now + getattr(settings, "LLMS_AGENT_POOL_TTL", 600),
+        )
+        max_size = getattr(settings, "LLMS_AGENT_POOL_MAX_SIZE", 64)
+        with self._lock:
+            self._idle[lease.key].append(entry)
+            self._evict(now, max_size)
+        return True
+
+    async def acquire(self, key: AgentPoolKey) -> Optional[Any]:
+        """Check out an idle, up-to-date skeleton for *key* if there is one."""
+        current_versions = None
+        while True:
+            with self._lock:
+                self._evict(time.monotonic())
+                entries = self._idle.get(key)
+                entry = entries.pop() if entries else None
+            if entry is None:
+                self.stats["miss"] += 1
+                return None
+
+            if current_versions is None:
+                current_versions = await aget_versions(key)
+            if entry.lease.versions == current_versions:
+                self.stats["hit"] += 1
+                return entry.agent
+            self.stats["stale"] += 1
+
+    def invalidate(self, kind: str, object_id: int) -> None:
+        """Drop idle skeletons built from the given document / corpus."""
+
+        def affected(entry: _PoolEntry) -> bool:
+            key = entry.lease.key
+            if kind == CORPUS_AGENT:
+                return key.corpus_id == object_id
+            return (
+                key.kind == DOCUMENT_AGENT and key.object_id == object_id
+            ) or object_id in entry.lease.document_ids
+
+        with self._lock:
+            for key in list(self._idle):
+                kept = [entry for entry in self._idle[key] if not affected(entry)]
+                self.stats["invalidated"] += len(self._idle[key]) - len(kept)
+                if kept:
+                    self._idle[key] = kept
+                else:
+                    del self._idle[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+            self.stats.clear()
+
+    def _evict(self, now: float, max_size: Optional[int] = None) -> None:
+        # Caller holds the lock
+        for key in list(self._idle):
+            live = [entry for entry in self._idle[key] if entry.expires_at > now]
+            self.stats["expired"] += len(self._idle[key]) - len(live)
+            if live:
+                self._idle[key] = live
+            else:
+                del self._idle[key]
+
+        if max_size is None:
+            return
+        entries = sorted(
+            (entry for entries in self._idle.values() for entry in entries),
+            key=lambda entry: entry.expires_at,
+        )
+        for entry in entries[: max(0, len(entries) - max_size)]:
+            self._idle[entry.lease.key].remove(entry)
+            if not self._idle[entry.lease.key]:
+                del self._idle[entry.lease.key]
+            self.stats["evicted"] += 1
+
+
+agent_pool = AgentPool()
+
+
+def invalidate_agent_pool(kind: str, object_id: Optional[int]) -> None:
+    if object_id is None:
+        return
+    bump_version(kind, object_id)
+    agent_pool.invalidate(kind, object_id)
+
+
+def invalidate_agent_pool_on_document_change(sender, instance, **kwargs):
+    invalidate_agent_pool(DOCUMENT_AGENT, instance.pk)
+
+
+def invalidate_agent_pool_on_corpus_change(sender, instance, **kwargs):
+    invalidate_agent_pool(CORPUS_AGENT, instance.pk)
+
+
+def invalidate_agent_pool_on_corpus_documents_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_agent_pool(CORPUS_AGENT, instance.pk)
+        return
+    # instance is a Document; pk_set holds the affected corpus ids
+    invalidate_agent_pool(DOCUMENT_AGENT, instance.pk)
+    for corpus_id in pk_set or ():
+        invalidate_agent_pool(CORPUS_AGENT, corpus_id)
+
+
+def connect_agent_pool_signals():
+    from opencontractserver.corpuses.models import Corpus
+    from opencontractserver.documents.models import Document
+
+    for model, handler in (
+        (Document, invalidate_agent_pool_on_document_change),
+        (Corpus, invalidate_agent_pool_on_corpus_change),
+    ):
+        post_save.connect(
+            handler,
+            sender=model,
+            dispatch_uid=f"llm_agent_pool:post_save:{model._meta.label_lower}",
+        )
+        post_delete.connect(
+            handler,
+            sender=model,
+            dispatch_uid=f"llm_agent_pool:post_delete:{model._meta.label_lower}",
+        )
+    m2m_changed.connect(
+        invalidate_agent_pool_on_corpus_documents_change,
+        sender=Corpus.documents.through,
+        dispatch_uid="llm_agent_pool:m2m:corpus_documents",
+    )
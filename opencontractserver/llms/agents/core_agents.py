@@ -1,6 +1,7 @@
 """Core agent functionality independent of any specific agent framework."""
 
 import logging
+import time
 from abc import ABC
 from collections.abc import AsyncGenerator, Awaitable
 from dataclasses import dataclass, field
@@ -25,6 +26,7 @@ from opencontractserver.conversations.models import (
 )
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.documents.models import Document
+from opencontractserver.llms.tools.core_tools import _token_count
 from opencontractserver.llms.tools.tool_factory import CoreTool
 from opencontractserver.llms.vector_stores.core_vector_stores import (
     CoreAnnotationVectorStore,
@@ -243,11 +245,17 @@ class AgentConfig:
     max_tokens: Optional[int] = None
     # NEW ➜ frequency (in tokens) for interim DB updates during streaming
     stream_update_freq: int = 50
+    # ...and never more often than this; the final content is always written
+    # when the stream completes.
+    stream_update_interval_ms: int = 1000
 
     # Optional callback – every emitted UnifiedStreamEvent will also be
     # forwarded here.  Useful for bubbling nested streams up to the
     # WebSocket layer while a tool call blocks the parent LLM.
     stream_observer: Optional[Callable[[Any], Awaitable[None]]] = None
+    # Upper bound on document sub-agents the corpus agent's ``ask_documents``
+    # tool runs at the same time.
+    max_concurrent_document_agents: int = 4
 
     # Enhanced conversation management
     conversation: Optional[Conversation] = None
@@ -255,11 +263,55 @@ class AgentConfig:
     loaded_messages: Optional[list[ChatMessage]] = None
     store_user_messages: bool = True
     store_llm_messages: bool = True
+    # History windowing – only the most recent messages that fit in
+    # ``history_token_budget`` are replayed to the model; older ones are folded
+    # into a rolling summary persisted on the Conversation.
+    history_token_budget: int = 6000
+    history_summary_token_budget: int = 800
+    history_max_messages: int = 200
 
     # Tool configuration
     tools: list[Any] = field(default_factory=list)
 
 
+@dataclass
+class ConversationHistoryWindow:
+    """The slice of a conversation replayed to the model on a given turn.
+
+    ``messages`` are the most recent ChatMessages (oldest first) that fit the
+    token budget, including empty placeholders so callers can also use the
+    window to locate the current turn's rows. ``summary`` covers everything
+    older than ``messages``.
+    """
+
+    messages: list[ChatMessage] = field(default_factory=list)
+    summary: str = ""
+
+
+def _summarise_messages(
+    previous_summary: str, messages: list[ChatMessage], token_budget: int
+) -> str:
+    """Extractive rolling summary: one clipped line per folded message.
+
+    Cheap and deterministic (no model call). When the summary outgrows
+    ``token_budget`` the oldest lines are dropped first.
+    """
+    lines = [line for line in previous_summary.splitlines() if line.strip()]
+    for msg in messages:
+        content = " ".join(msg.content.split())
+        if not content:
+            continue
+        speaker = "User" if msg.msg_type.upper() == "HUMAN" else "Assistant"
+        words = content.split(" ")
+        if len(words) > 60:
+            content = " ".join(words[:60]) + " …"
+        lines.append(f"{speaker}: {content}")
+
+    while lines and _token_count("\n".join(lines)) > token_budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
 @dataclass
 class DocumentAgentContext:
     """Context for document-specific agents."""
@@ -759,6 +811,8 @@ class CoreAgentBase(ABC):
         accumulated_content: str = ""
         accumulated_sources: list[SourceNode] = []
         token_counter = 0
+        persisted_tokens = 0
+        persisted_at = time.monotonic()
 
         try:
             async for evt in self._stream_raw(message, **kwargs):
@@ -786,15 +840,20 @@ class CoreAgentBase(ABC):
                     accumulated_content += evt.content
                     token_counter += 1
 
-                # Periodic DB update
+                # Periodic DB update, throttled by token count and wall clock
                 if (
                     llm_msg_id
-                    and token_counter % self.config.stream_update_freq == 0
                     and accumulated_content
+                    and token_counter - persisted_tokens
+                    >= self.config.stream_update_freq
+                    and (time.monotonic() - persisted_at) * 1000
+                    >= self.config.stream_update_interval_ms
                 ):
                     await self.conversation_manager.update_message_content(
                         llm_msg_id, accumulated_content
                     )
+                    persisted_tokens = token_counter
+                    persisted_at = time.monotonic()
 
                 # Side-channel: forward to observer if configured.
                 await self._emit_observer_event(evt)
@@ -1207,6 +1266,78 @@ class CoreConversationManager:
             ).order_by("created")
         ]
 
+    async def get_history_window(self) -> ConversationHistoryWindow:
+        """Return the token-budgeted tail of the conversation plus its summary.
+
+        Only messages newer than the persisted summary are read, newest first
+        with a keyset query capped at ``history_max_messages``. Messages that
+        fall outside ``history_token_budget`` are folded into
+        ``Conversation.history_summary`` so later turns never read them again.
+        """
+        if not self.conversation:
+            return ConversationHistoryWindow()
+
+        conversation = self.conversation
+        through_id = conversation.history_summary_through_id
+        summary = conversation.history_summary or ""
+
+        tail_qs = ChatMessage.objects.filter(conversation_id=conversation.id)
+        if through_id is not None:
+            tail_qs = tail_qs.filter(id__gt=through_id)
+        newest_first = [
+            msg
+            async for msg in tail_qs.only("id", "msg_type", "content").order_by("-id")[
+                : self.config.history_max_messages
+            ]
+        ]
+
+        model = self.config.model_name
+        budget = max(self.config.history_token_budget - _token_count(summary, model), 0)
+        kept: list[ChatMessage] = []
+        used = 0
+        for msg in newest_first:
+            cost = _token_count(msg.content, model)
+            # Always keep the newest non-empty message, even if it alone busts
+            # the budget (empty placeholders cost nothing)
+            if used and used + cost > budget:
+                break
+            kept.append(msg)
+            used += cost
+        kept.reverse()
+
+        window_truncated = (
+            len(kept) < len(newest_first)
+            or len(newest_first) == self.config.history_max_messages
+        )
+        if kept and window_truncated:
+            # Everything between the old summary pointer and the window start –
+            # including rows beyond ``history_max_messages`` – gets folded in.
+            folded = [
+                msg
+                async for msg in tail_qs.filter(id__lt=kept[0].id)
+                .only("id", "msg_type", "content")
+                .order_by("id")
+            ]
+            if folded:
+                summary = _summarise_messages(
+                    summary, folded, self.config.history_summary_token_budget
+                )
+                conversation.history_summary = summary
+                conversation.history_summary_through_id = folded[-1].id
+                await conversation.asave(
+                    update_fields=[
+                        "history_summary",
+                        "history_summary_through_id",
+                        "modified",
+                    ]
+                )
+                logger.debug(
+                    f"Conversation {conversation.id}: folded {len(folded)} messages "
+                    f"into rolling summary (through id {folded[-1].id})"
+                )
+
+        return ConversationHistoryWindow(messages=kept, summary=summary)
+
     async def create_placeholder_message(self, msg_type: str = "LLM") -> int:
         """Create a placeholder message with state tracking."""
         # For anonymous conversations, don't store messages
@@ -1236,10 +1367,10 @@ class CoreConversationManager:
         if not self.conversation or message_id == 0:
             return
 
-        message = await ChatMessage.objects.aget(id=message_id)
-        message.content = content
-        message.state = MessageState.COMPLETED
-        await message.asave(update_fields=["content", "state"])
+        # Single UPDATE - this runs repeatedly while an answer streams
+        await ChatMessage.objects.filter(id=message_id).aupdate(
+            content=content, state=MessageState.COMPLETED
+        )
 
     async def complete_message(
         self,
@@ -1400,6 +1531,9 @@ def get_default_config(**overrides) -> AgentConfig:
         "streaming": True,
         "verbose": True,
         "temperature": 0.7,
+        "stream_update_interval_ms": getattr(
+            settings, "LLM_STREAM_PERSIST_INTERVAL_MS", 1000
+        ),
     }
     defaults.update(overrides)
     return AgentConfig(**defaults)
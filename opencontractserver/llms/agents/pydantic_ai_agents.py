@@ -1,5 +1,6 @@
 """Clean PydanticAI implementation following PydanticAI patterns."""
 
+import asyncio
 import dataclasses
 import json
 import logging
@@ -37,6 +38,7 @@ from opencontractserver.llms.agents.core_agents import (
     ApprovalNeededEvent,
     ApprovalResultEvent,
     ContentEvent,
+    ConversationHistoryWindow,
     CoreAgentBase,
     CoreConversationManager,
     CoreCorpusAgentFactory,
@@ -55,6 +57,7 @@ from opencontractserver.llms.agents.core_agents import (
 )
 from opencontractserver.llms.agents.timeline_stream_mixin import TimelineStreamMixin
 from opencontractserver.llms.exceptions import ToolConfirmationRequired
+from opencontractserver.llms.response_cache import get_pydantic_ai_model
 from opencontractserver.llms.tools.core_tools import (
     aadd_annotations_from_exact_strings,
     aadd_document_note,
@@ -362,20 +365,41 @@ class PydanticAICoreAgent(CoreAgentBase, TimelineStreamMixin):
             metadata={"usage": usage, "framework": "pydantic_ai", "timeline": timeline},
         )
 
-    async def _get_message_history(self) -> Optional[list[ModelMessage]]:
+    async def _get_message_history(
+        self, window: Optional[ConversationHistoryWindow] = None
+    ) -> Optional[list[ModelMessage]]:
         """
-        Convert OpenContracts `ChatMessage` history to the Pydantic-AI
+        Convert the conversation's history window to the Pydantic-AI
         `ModelMessage` format.
 
+        Only the token-budgeted tail is replayed (see
+        `CoreConversationManager.get_history_window`); anything older reaches
+        the model as a rolling summary in a leading system prompt.
+
         `UserPrompt` does **not** exist in Pydantic-AI's public API, so we map
         both human and LLM messages to plain `ModelMessage` instances instead.
         """
-        raw_messages = await self.conversation_manager.get_conversation_messages()
-        if not raw_messages:
+        if window is None:
+            window = await self.conversation_manager.get_history_window()
+        if not window.messages and not window.summary:
             return None
 
         history: list[ModelMessage] = []
-        for msg in raw_messages:
+        if window.summary:
+            history.append(
+                ModelRequest(
+                    parts=[
+                        SystemPromptPart(
+                            content=(
+                                "Summary of earlier messages in this conversation:\n"
+                                f"{window.summary}"
+                            )
+                        )
+                    ]
+                )
+            )
+
+        for msg in window.messages:
             msg_type_upper = msg.msg_type.upper()
             content = msg.content
 
@@ -443,9 +467,13 @@ class PydanticAICoreAgent(CoreAgentBase, TimelineStreamMixin):
         # ------------------------------------------------------------------
         # Deduplicate message persistence
         # ------------------------------------------------------------------
+        # The history window is read once per turn and serves both the
+        # placeholder lookup below and the model's message history.
+        window = await self.conversation_manager.get_history_window()
+
         if self.conversation_manager.conversation and llm_msg_id is None:
             # Check if CoreAgentBase.stream() already created the placeholder
-            history = await self.conversation_manager.get_conversation_messages()
+            history = window.messages
             if (
                 history
                 and history[-1].msg_type.upper() == "LLM"
@@ -461,13 +489,14 @@ class PydanticAICoreAgent(CoreAgentBase, TimelineStreamMixin):
             # If still none – fall back to helper that creates fresh rows
             if llm_msg_id is None:
                 user_msg_id, llm_msg_id = await self._initialise_llm_message(message)
+                window = await self.conversation_manager.get_history_window()
 
         accumulated_content: str = ""
         accumulated_sources: list[SourceNode] = []
         final_usage_data: dict[str, Any] | None = None
 
         # Re-hydrate the historical context for Pydantic-AI, if any exists.
-        message_history = await self._get_message_history()
+        message_history = await self._get_message_history(window)
 
         stream_kwargs: dict[str, Any] = {"deps": self.agent_deps}
         if message_history:
@@ -953,7 +982,7 @@ class PydanticAICoreAgent(CoreAgentBase, TimelineStreamMixin):
 
             # Create a temporary agent with structured output
             structured_agent = PydanticAIAgent(
-                model=model or self.config.model_name,
+                model=get_pydantic_ai_model(model or self.config.model_name),
                 result_type=target_type,
                 system_prompt=final_system_prompt,
                 model_settings=model_settings,
@@ -1789,7 +1818,7 @@ class PydanticAIDocumentAgent(PydanticAICoreAgent):
 
         logger.info(f"Created pydantic ai agent with context {config.system_prompt}")
         pydantic_ai_agent_instance = PydanticAIAgent(
-            model=config.model_name,
+            model=get_pydantic_ai_model(config.model_name),
             system_prompt=config.system_prompt,
             deps_type=PydanticAIDependencies,
             tools=effective_tools,
@@ -1966,43 +1995,30 @@ class PydanticAICorpusAgent(PydanticAICoreAgent):
                 for doc in context.documents
             ]
 
-        async def ask_document_tool(document_id: int, question: str) -> dict[str, Any]:
-            """Ask a question to a **document-specific** agent inside this corpus.
-
-            The call transparently streams the document agent so we can capture
-            its *full* reasoning timeline (tool calls, vector-search citations…)
-            and surface that back to the coordinator LLM.
-
-            Args:
-                document_id: ID of the target document (must belong to this corpus).
-                question:   The natural-language question to forward.
-
-            Returns:
-                An object with keys:
-                    answer (str)   – final assistant answer
-                    sources (list) – flattened source dicts
-                    timeline (list) – detailed reasoning/events emitted by the sub-agent
-            """
+        from pydantic import BaseModel, Field
 
-            from pydantic import BaseModel, Field
+        class DocAnswer(BaseModel):
+            """Structured result returned by the `ask_document` tool."""
 
-            class DocAnswer(BaseModel):
-                """Structured result returned by the `ask_document` tool."""
+            answer: str = Field(description="The document agent's final answer")
+            sources: list[dict] = Field(
+                default_factory=list,
+                description="Flattened citation objects produced by the document agent",
+            )
+            timeline: list[dict] = Field(
+                default_factory=list,
+                description="Event timeline (thoughts, tool calls, etc.) from the document agent run",
+            )
 
-                answer: str = Field(description="The document agent's final answer")
-                sources: list[dict] = Field(
-                    default_factory=list,
-                    description="Flattened citation objects produced by the document agent",
-                )
-                timeline: list[dict] = Field(
-                    default_factory=list,
-                    description="Event timeline (thoughts, tool calls, etc.) from the document agent run",
-                )
+        corpus_document_ids = {d.id for d in context.documents}
 
-            # Guard against cross-corpus leakage
-            if document_id not in {d.id for d in context.documents}:
-                raise ValueError("Document does not belong to current corpus")
+        async def _run_document_agent(document_id: int, question: str) -> DocAnswer:
+            """Stream a document agent to completion, forwarding its events.
 
+            Every event is passed on to ``config.stream_observer`` (set by the
+            WebSocket layer) with ``metadata["document_id"]`` so consumers can
+            tell concurrent sub-agent streams apart.
+            """
             doc_agent = await _agents_api.for_document(
                 document=document_id,
                 corpus=context.corpus.id,
@@ -2024,9 +2040,13 @@ class PydanticAICorpusAgent(PydanticAICoreAgent):
                 if getattr(ev, "type", "") == "content":
                     accumulated_answer += getattr(ev, "content", "")
 
-                # Forward raw event upstream (side-channel)
+                # Forward raw event upstream (side-channel), tagged with its document
                 if callable(observer_cb):
                     try:
+                        ev.metadata = {
+                            **(ev.metadata or {}),
+                            "document_id": document_id,
+                        }
                         await observer_cb(ev)
                     except Exception:
                         logger.exception("stream_observer raised during ask_document")
@@ -2057,7 +2077,98 @@ class PydanticAICorpusAgent(PydanticAICoreAgent):
                 answer=accumulated_answer,
                 sources=captured_sources,
                 timeline=captured_timeline,
-            ).model_dump()
+            )
+
+        async def ask_document_tool(document_id: int, question: str) -> dict[str, Any]:
+            """Ask a question to a **document-specific** agent inside this corpus.
+
+            The call transparently streams the document agent so we can capture
+            its *full* reasoning timeline (tool calls, vector-search citations…)
+            and surface that back to the coordinator LLM.
+
+            Args:
+                document_id: ID of the target document (must belong to this corpus).
+                question:   The natural-language question to forward.
+
+            Returns:
+                An object with keys:
+                    answer (str)   – final assistant answer
+                    sources (list) – flattened source dicts
+                    timeline (list) – detailed reasoning/events emitted by the sub-agent
+            """
+            # Guard against cross-corpus leakage
+            if document_id not in corpus_document_ids:
+                raise ValueError("Document does not belong to current corpus")
+
+            return (await _run_document_agent(document_id, question)).model_dump()
+
+        async def ask_documents_tool(
+            document_ids: list[int], question: str
+        ) -> dict[str, Any]:
+            """Ask the same question to several document agents concurrently.
+
+            Sub-agents run in parallel, at most ``config.max_concurrent_document_agents``
+            at a time. Results, sources and timelines are merged in the order of
+            ``document_ids`` regardless of which agent finishes first; a failing
+            document yields an ``error`` entry instead of failing the batch.
+
+            Returns:
+                An object with keys:
+                    results (list)  – per document: document_id, answer, sources,
+                                      timeline and error (None on success)
+                    sources (list)  – all sources, each tagged with document_id
+                    timeline (list) – all timeline entries, tagged with document_id
+            """
+            # Stable, de-duplicated order
+            document_ids = list(dict.fromkeys(document_ids))
+            foreign = [d for d in document_ids if d not in corpus_document_ids]
+            if foreign:
+                raise ValueError(f"Documents {foreign} do not belong to current corpus")
+
+            semaphore = asyncio.Semaphore(max(1, config.max_concurrent_document_agents))
+
+            async def _bounded(document_id: int) -> DocAnswer:
+                async with semaphore:
+                    return await _run_document_agent(document_id, question)
+
+            outcomes = await asyncio.gather(
+                *(_bounded(document_id) for document_id in document_ids),
+                return_exceptions=True,
+            )
+
+            results: list[dict[str, Any]] = []
+            merged_sources: list[dict] = []
+            merged_timeline: list[dict] = []
+            for document_id, outcome in zip(document_ids, outcomes):
+                if isinstance(outcome, BaseException):
+                    logger.warning(
+                        f"ask_documents - document {document_id} failed: {outcome}"
+                    )
+                    results.append(
+                        {
+                            "document_id": document_id,
+                            "answer": "",
+                            "sources": [],
+                            "timeline": [],
+                            "error": str(outcome),
+                        }
+                    )
+                    continue
+                results.append(
+                    {"document_id": document_id, **outcome.model_dump(), "error": None}
+                )
+                merged_sources.extend(
+                    {**source, "document_id": document_id} for source in outcome.sources
+                )
+                merged_timeline.extend(
+                    {**entry, "document_id": document_id} for entry in outcome.timeline
+                )
+
+            return {
+                "results": results,
+                "sources": merged_sources,
+                "timeline": merged_timeline,
+            }
 
         list_docs_tool_wrapped = PydanticAIToolFactory.from_function(
             list_documents_tool,
@@ -2077,6 +2188,20 @@ class PydanticAICorpusAgent(PydanticAICoreAgent):
             requires_corpus=True,
         )
 
+        ask_docs_tool_wrapped = PydanticAIToolFactory.from_function(
+            ask_documents_tool,
+            name="ask_documents",
+            description=(
+                "Ask the same question to several document-specific agents in "
+                "parallel and return each answer plus merged sources."
+            ),
+            parameter_descriptions={
+                "document_ids": "IDs of the documents to query (must be in this corpus)",
+                "question": "The natural-language question to ask every document agent",
+            },
+            requires_corpus=True,
+        )
+
         # Merge caller-supplied tools (if any) after the default ones so callers can
         # override behaviour/order if desired.
         effective_tools: list[Callable] = [
@@ -2085,12 +2210,13 @@ class PydanticAICorpusAgent(PydanticAICoreAgent):
             update_corpus_desc_tool_wrapped,
             list_docs_tool_wrapped,
             ask_doc_tool_wrapped,
+            ask_docs_tool_wrapped,
         ]
         if tools:
             effective_tools.extend(tools)
 
         pydantic_ai_agent_instance = PydanticAIAgent(
-            model=config.model_name,
+            model=get_pydantic_ai_model(config.model_name),
             system_prompt=config.system_prompt,
             deps_type=PydanticAIDependencies,
             tools=effective_tools,
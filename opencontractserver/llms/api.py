@@ -12,6 +12,7 @@ from django.conf import settings
 from opencontractserver.conversations.models import ChatMessage, Conversation
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.documents.models import Document
+from opencontractserver.llms.agents import agent_pool as pool
 from opencontractserver.llms.agents.agent_factory import UnifiedAgentFactory
 from opencontractserver.llms.agents.core_agents import CoreAgent
 from opencontractserver.llms.tools.tool_factory import CoreTool, create_document_tools
@@ -129,7 +130,35 @@ class AgentAPI:
                 "store_llm_messages": False,
             }
 
-        return await UnifiedAgentFactory.create_document_agent(
+        bindings = {
+            "user_id": user_id,
+            "conversation": conversation,
+            "conversation_id": conversation_id,
+            "loaded_messages": messages,
+            **persistence_overrides,
+            **kwargs,
+        }
+        pool_key = pool.build_pool_key(
+            pool.DOCUMENT_AGENT,
+            framework,
+            document,
+            corpus,
+            tools=resolved_tools,
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=streaming,
+            embedder=embedder,
+            verbose=verbose,
+            **kwargs,
+        )
+        agent = await _lease_pooled_agent(pool_key, bindings)
+        if agent is not None:
+            return agent
+        versions = await pool.aget_versions(pool_key) if pool_key else None
+
+        agent = await UnifiedAgentFactory.create_document_agent(
             document,
             corpus,
             framework=framework,
@@ -148,6 +177,9 @@ class AgentAPI:
             **persistence_overrides,
             **kwargs,
         )
+        if pool_key is not None:
+            pool.agent_pool.register(agent, pool_key, versions)
+        return agent
 
     @staticmethod
     async def for_corpus(
@@ -241,7 +273,34 @@ class AgentAPI:
                 "store_llm_messages": False,
             }
 
-        return await UnifiedAgentFactory.create_corpus_agent(
+        bindings = {
+            "user_id": user_id,
+            "conversation": conversation,
+            "conversation_id": conversation_id,
+            "loaded_messages": messages,
+            **persistence_overrides,
+            **kwargs,
+        }
+        pool_key = pool.build_pool_key(
+            pool.CORPUS_AGENT,
+            framework,
+            corpus,
+            tools=resolved_tools,
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            streaming=streaming,
+            embedder=embedder,
+            verbose=verbose,
+            **kwargs,
+        )
+        agent = await _lease_pooled_agent(pool_key, bindings)
+        if agent is not None:
+            return agent
+        versions = await pool.aget_versions(pool_key) if pool_key else None
+
+        agent = await UnifiedAgentFactory.create_corpus_agent(
             corpus,
             framework=framework,
             user_id=user_id,
@@ -259,6 +318,24 @@ class AgentAPI:
             **persistence_overrides,
             **kwargs,
         )
+        if pool_key is not None:
+            pool.agent_pool.register(agent, pool_key, versions)
+        return agent
+
+    @staticmethod
+    def release(agent: CoreAgent) -> bool:
+        """
+        Hand an agent obtained from ``for_document`` / ``for_corpus`` back to the
+        per-process agent pool so a later request for the same document / corpus
+        and configuration can reuse it instead of rebuilding.
+
+        The agent must not be used by the caller afterwards. Agents that weren't
+        built through the pool are ignored.
+
+        Returns:
+            bool: True if the agent was pooled
+        """
+        return pool.agent_pool.release(agent)
 
     @staticmethod
     async def get_structured_response_from_document(
@@ -612,6 +689,29 @@ class VectorStoreAPI:
         )
 
 
+async def _lease_pooled_agent(
+    pool_key: Optional["pool.AgentPoolKey"], bindings: dict[str, Any]
+) -> Optional[CoreAgent]:
+    """Check out a pooled skeleton for *pool_key* and rebind it, if one is idle."""
+    if pool_key is None:
+        return None
+    agent = await pool.agent_pool.acquire(pool_key)
+    if agent is None:
+        return None
+    try:
+        return await pool.rebind_agent(
+            agent,
+            **{
+                name: value
+                for name, value in bindings.items()
+                if name in pool.REBINDABLE_OPTIONS
+            },
+        )
+    except Exception:
+        pool.agent_pool.release(agent)
+        raise
+
+
 def _resolve_tools(tools: list[ToolType]) -> list[CoreTool]:
     """Convert tool specifications to CoreTool instances."""
     resolved = []
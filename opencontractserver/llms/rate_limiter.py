@@ -0,0 +1,419 @@
+"""
+Shared token-bucket rate limiting for LLM calls.
+
+``LLM_RATE_LIMITS`` maps a model (``"openai:gpt-4o-mini"``), a provider
+(``"openai"``, which also covers bare names like ``"gpt-4o-mini"``) or
+``"default"`` to ``requests_per_minute`` and/or ``tokens_per_minute``. Every
+request made through ``get_pydantic_ai_model`` - chat / stream agents,
+``structured_response`` and therefore extracts - first takes one request and
+its estimated tokens from the matching buckets, waiting (with jitter) until
+both have capacity. Once the response is in, the token bucket is corrected
+with the provider's reported usage.
+
+Buckets live in Redis (``LLM_RATE_LIMIT_BACKEND="redis"``, the Redis behind
+``LLM_RATE_LIMIT_REDIS_ALIAS``) so every worker and ASGI process shares them,
+or in process memory with ``"local"``.
+
+HTTP 429 responses are retried up to ``LLM_RATE_LIMIT_MAX_RETRIES`` times with
+full-jitter exponential backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional, Protocol, Union
+
+from django.conf import settings
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import (
+    Model,
+    ModelRequestParameters,
+    StreamedResponse,
+    infer_model,
+)
+from pydantic_ai.settings import ModelSettings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm_rate"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+# Providers of bare model names (e.g. "gpt-4o-mini"), by name prefix, named
+# like pydantic-ai's ``Model.system``
+MODEL_NAME_PROVIDERS = {
+    "gpt-": "openai",
+    "chatgpt-": "openai",
+    "o1": "openai",
+    "o3": "openai",
+    "o4": "openai",
+    "text-embedding-": "openai",
+    "claude": "anthropic",
+    "gemini": "google-gla",
+    "mistral": "mistral",
+    "codestral": "mistral",
+    "command": "cohere",
+}
+
+
+def model_provider(model: Union[Model, str]) -> Optional[str]:
+    """Provider of *model*: its ``system``, its "provider:" prefix or its name."""
+    if isinstance(model, Model):
+        return model.system
+    if ":" in model:
+        return model.split(":", 1)[0]
+    for prefix, provider in MODEL_NAME_PROVIDERS.items():
+        if model.startswith(prefix):
+            return provider
+    return None
+
+
+def rate_limit_for(model: Union[Model, str]) -> tuple[str, Optional[RateLimit]]:
+    """Return (bucket scope, limit) configured for *model*."""
+    limits = getattr(settings, "LLM_RATE_LIMITS", None) or {}
+    model_name = model.model_name if isinstance(model, Model) else model
+    for scope in (model_name, model_provider(model), "default"):
+        if scope and scope in limits:
+            return scope, RateLimit(**limits[scope])
+    return model_name, None
+
+
+# --------------------------------------------------------------------------- #
+# Bucket backends                                                             #
+# --------------------------------------------------------------------------- #
+# A bucket spec is (key, capacity, refill per second, amount). ``take`` either
+# debits every bucket and returns 0, or debits nothing and returns how many
+# seconds to wait. ``force`` debits unconditionally (negative amounts refund).
+
+
+class BucketBackend(Protocol):
+    def take(
+        self, specs: list[tuple[str, float, float, float]], force: bool
+    ) -> float: ...
+
+
+class LocalBucketBackend:
+    """Buckets in process memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def take(self, specs, force: bool = False) -> float:
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for key, capacity, rate, amount in specs:
+                level, updated = self._buckets.get(key, (capacity, now))
+                level = min(capacity, level + (now - updated) * rate)
+                levels[key] = level
+                if level < amount:
+                    wait = max(wait, (amount - level) / rate)
+            if wait and not force:
+                return wait
+            for key, capacity, _, amount in specs:
+                self._buckets[key] = (min(capacity, levels[key] - amount), now)
+            return 0.0
+
+
+# Same algorithm as LocalBucketBackend, atomic across processes.
+TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local force = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local amount = tonumber(ARGV[i * 3 + 1])
+    local state = redis.call('HMGET', key, 'level', 'updated')
+    local level = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - updated) * rate)
+    levels[i] = level
+    if level < amount then
+        wait = math.max(wait, (amount - level) / rate)
+    end
+end
+if wait > 0 and force == 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local amount = tonumber(ARGV[i * 3 + 1])
+    redis.call('HSET', key, 'level', math.min(capacity, levels[i] - amount), 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+end
+return '0'
+"""
+
+
+class RedisBucketBackend:
+    """Buckets in Redis, updated by a Lua script."""
+
+    def __init__(self, alias: str):
+        from django_redis import get_redis_connection
+
+        self.client = get_redis_connection(alias)
+        self.script = self.client.register_script(TAKE_SCRIPT)
+
+    def take(self, specs, force: bool = False) -> float:
+        args = [1 if force else 0]
+        for _, capacity, rate, amount in specs:
+            args.extend([capacity, rate, amount])
+        result = self.script(keys=[spec[0] for spec in specs], args=args)
+        return float(result)
+
+
+# --------------------------------------------------------------------------- #
+# Limiter                                                                     #
+# --------------------------------------------------------------------------- #
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry *attempt* (1-based)."""
+    base = getattr(settings, "LLM_RATE_LIMIT_BACKOFF_BASE", 1.0)
+    cap = getattr(settings, "LLM_RATE_LIMIT_BACKOFF_MAX", 60.0)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class LLMRateLimiter:
+    def __init__(self):
+        self._backend: Optional[BucketBackend] = None
+        self._backend_config = None
+
+    @property
+    def backend(self) -> BucketBackend:
+        config = (
+            getattr(settings, "LLM_RATE_LIMIT_BACKEND", "redis"),
+            getattr(settings, "LLM_RATE_LIMIT_REDIS_ALIAS", "default"),
+        )
+        if config != self._backend_config:
+            self._backend_config = config
+            self._backend = self._build_backend(*config)
+        return self._backend
+
+    @staticmethod
+    def _build_backend(kind: str, alias: str) -> BucketBackend:
+        if kind == "redis":
+            try:
+                return RedisBucketBackend(alias)
+            except Exception as e:
+                logger.warning(
+                    f"Redis rate limit buckets unavailable, limiting per process: {e}"
+                )
+        return LocalBucketBackend()
+
+    def is_limited(self, model: Union[Model, str]) -> bool:
+        return rate_limit_for(model)[1] is not None
+
+    @staticmethod
+    def _specs(model: Union[Model, str], tokens: float, requests: float = 1):
+        scope, limit = rate_limit_for(model)
+        specs = []
+        if limit is None:
+            return specs
+        if limit.requests_per_minute and requests:
+            capacity = limit.requests_per_minute
+            specs.append(
+                (
+                    f"{KEY_PREFIX}:{scope}:requests",
+                    capacity,
+                    capacity / 60,
+                    min(requests, capacity),
+                )
+            )
+        if limit.tokens_per_minute and tokens:
+            capacity = limit.tokens_per_minute
+            specs.append(
+                (
+                    f"{KEY_PREFIX}:{scope}:tokens",
+                    capacity,
+                    capacity / 60,
+                    # A single oversized request must still be able to run
+                    min(tokens, capacity),
+                )
+            )
+        return specs
+
+    async def acquire(self, model: Union[Model, str], tokens: int = 0) -> float:
+        """Wait until one request of *tokens* tokens fits; return seconds waited."""
+        specs = self._specs(model, tokens)
+        if not specs:
+            return 0.0
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.backend.take, specs, False)
+            if not wait:
+                return waited
+            # Jitter so waiting callers don't all retry at the same instant
+            wait *= random.uniform(1.0, 1.25)
+            logger.debug(f"Rate limited on {specs[0][0]}; waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def adjust_tokens(self, model: Union[Model, str], tokens: int) -> None:
+        """Debit (or refund, if negative) *tokens* after the fact."""
+        specs = [
+            spec
+            for spec in self._specs(model, abs(tokens), requests=0)
+            if spec[0].endswith(":tokens")
+        ]
+        if specs:
+            key, capacity, rate, amount = specs[0]
+            amount = amount if tokens > 0 else -amount
+            await asyncio.to_thread(
+                self.backend.take, [(key, capacity, rate, amount)], True
+            )
+
+
+rate_limiter = LLMRateLimiter()
+
+
+def estimate_request_tokens(
+    messages: list[ModelMessage], model_settings: Optional[ModelSettings]
+) -> int:
+    """Prompt tokens of *messages* plus the completion budget."""
+    from opencontractserver.llms.tokenizers import count_tokens
+
+    total = 0
+    for message in messages:
+        for part in message.parts:
+            content = getattr(part, "content", None)
+            if isinstance(content, str):
+                total += count_tokens(content)
+            args = getattr(part, "args", None)
+            if args:
+                total += count_tokens(str(args))
+    return total + int((model_settings or {}).get("max_tokens") or 0)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return isinstance(error, ModelHTTPError) and error.status_code == 429
+
+
+class RateLimitedModel(Model):
+    """Pydantic-AI model that goes through the shared rate limiter.
+
+    Like ``CachedModel`` the real model is resolved lazily, on first use.
+    """
+
+    def __init__(self, model: Union[Model, str]):
+        self._model = model
+
+    @cached_property
+    def wrapped(self) -> Model:
+        return infer_model(self._model)
+
+    @property
+    def model_name(self) -> str:
+        if isinstance(self._model, Model):
+            return self._model.model_name
+        return self._model
+
+    @property
+    def system(self) -> str:
+        return self.wrapped.system
+
+    @cached_property
+    def profile(self):
+        return self.wrapped.profile
+
+    def customize_request_parameters(
+        self, model_request_parameters: ModelRequestParameters
+    ) -> ModelRequestParameters:
+        return self.wrapped.customize_request_parameters(model_request_parameters)
+
+    async def _retry_after_429(self, attempt: int, error: Exception) -> None:
+        max_retries = getattr(settings, "LLM_RATE_LIMIT_MAX_RETRIES", 5)
+        if not is_rate_limit_error(error) or attempt > max_retries:
+            raise error
+        delay = backoff_delay(attempt)
+        logger.warning(
+            f"{self.model_name} returned 429; retry {attempt}/{max_retries} "
+            f"in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+    async def _record_usage(self, estimate: int, response: ModelResponse) -> None:
+        actual = response.usage.total_tokens
+        if actual:
+            await rate_limiter.adjust_tokens(self._model, actual - estimate)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        estimate = estimate_request_tokens(messages, model_settings)
+        attempt = 0
+        while True:
+            await rate_limiter.acquire(self._model, estimate)
+            try:
+                response = await self.wrapped.request(
+                    messages, model_settings, model_request_parameters
+                )
+            except Exception as e:
+                attempt += 1
+                await self._retry_after_429(attempt, e)
+                continue
+            await self._record_usage(estimate, response)
+            return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        estimate = estimate_request_tokens(messages, model_settings)
+        attempt = 0
+        while True:
+            await rate_limiter.acquire(self._model, estimate)
+            stream_context = self.wrapped.request_stream(
+                messages, model_settings, model_request_parameters
+            )
+            # 429s surface when the stream is opened - nothing has been
+            # yielded to the caller yet, so it is safe to retry here.
+            try:
+                stream = await stream_context.__aenter__()
+            except Exception as e:
+                attempt += 1
+                await self._retry_after_429(attempt, e)
+                continue
+            break
+
+        try:
+            yield stream
+        except BaseException as e:
+            if not await stream_context.__aexit__(type(e), e, e.__traceback__):
+                raise
+        else:
+            await stream_context.__aexit__(None, None, None)
+            await self._record_usage(estimate, stream.get())
+
+
+def rate_limited(model: Union[Model, str]) -> Union[Model, str]:
+    """Wrap *model* in ``RateLimitedModel`` if a limit applies to it."""
+    if not isinstance(model, (Model, str)) or not rate_limiter.is_limited(model):
+        return model
+    return RateLimitedModel(model)
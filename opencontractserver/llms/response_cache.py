@@ -0,0 +1,269 @@
+"""
+Content-addressed record / replay cache for LLM responses.
+
+Every model request made by our Pydantic-AI agents (document / corpus agents,
+``get_structured_response_from_*`` and therefore ``doc_extract_query_task``) is
+keyed on the full request payload: model name, message history (prompts,
+document text and tool outputs, minus timestamps), model settings and the tool /
+output schemas. ``LLM_RESPONSE_CACHE_MODE`` controls what happens:
+
+* ``"off"`` (default) - models are used directly, nothing is cached.
+* ``"record"`` - cached responses are served; misses go to the real model and
+  are stored, so re-running a failed extract only pays for the new calls.
+* ``"replay"`` - cached responses are served; misses are answered by a local
+  stub model (canned text / schema-valid structured output) and never reach the
+  network. Useful for offline benchmarks of agents and extracts.
+
+Entries live in the Django cache named by ``LLM_RESPONSE_CACHE_ALIAS`` - Redis in
+production, or Postgres by pointing the alias at a ``DatabaseCache``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from functools import cached_property
+from typing import Any, Optional, Union
+
+from django.conf import settings
+from django.core.cache import caches
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelResponse,
+)
+from pydantic_ai.models import (
+    Model,
+    ModelRequestParameters,
+    StreamedResponse,
+    infer_model,
+)
+from pydantic_ai.models.test import TestModel, TestStreamedResponse
+from pydantic_ai.settings import ModelSettings
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "llm_response:v1"
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+
+def response_cache_mode() -> str:
+    return getattr(settings, "LLM_RESPONSE_CACHE_MODE", OFF) or OFF
+
+
+def _strip_timestamps(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _strip_timestamps(item)
+            for key, item in value.items()
+            if key != "timestamp"
+        }
+    if isinstance(value, list):
+        return [_strip_timestamps(item) for item in value]
+    return value
+
+
+def build_request_key(
+    model_name: str,
+    messages: list[ModelMessage],
+    model_settings: Optional[ModelSettings],
+    model_request_parameters: ModelRequestParameters,
+) -> str:
+    """sha256 over a canonical JSON rendering of the whole model request."""
+    payload = {
+        "model": model_name,
+        "messages": _strip_timestamps(
+            ModelMessagesTypeAdapter.dump_python(messages, mode="json")
+        ),
+        "settings": dict(model_settings or {}),
+        "parameters": asdict(model_request_parameters),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return f"{CACHE_KEY_PREFIX}:{hashlib.sha256(encoded).hexdigest()}"
+
+
+def _cache():
+    return caches[getattr(settings, "LLM_RESPONSE_CACHE_ALIAS", "default")]
+
+
+async def get_cached_response(key: str) -> Optional[ModelResponse]:
+    raw = await _cache().aget(key)
+    if raw is None:
+        return None
+    try:
+        return ModelMessagesTypeAdapter.validate_json(raw)[0]
+    except Exception:
+        logger.warning(f"Discarding unreadable LLM cache entry {key}")
+        return None
+
+
+async def store_response(key: str, response: ModelResponse) -> None:
+    await _cache().aset(
+        key,
+        ModelMessagesTypeAdapter.dump_json([response]),
+        getattr(settings, "LLM_RESPONSE_CACHE_TIMEOUT", None),
+    )
+
+
+class StubModel(TestModel):
+    """Offline stand-in for a real model.
+
+    Never calls tools (the agents' tools can write to the database); answers
+    plain-text runs with ``custom_output_text`` and structured-output runs with
+    schema-valid generated data.
+    """
+
+    def _for(self, model_request_parameters: ModelRequestParameters) -> TestModel:
+        if model_request_parameters.allow_text_output:
+            return self
+        return TestModel(call_tools=[], seed=self.seed)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        model = self._for(model_request_parameters)
+        if model is self:
+            return await super().request(
+                messages, model_settings, model_request_parameters
+            )
+        return await model.request(messages, model_settings, model_request_parameters)
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        model = self._for(model_request_parameters)
+        stream_context = (
+            super().request_stream if model is self else model.request_stream
+        )
+        async with stream_context(
+            messages, model_settings, model_request_parameters
+        ) as stream:
+            yield stream
+
+
+def build_stub_model() -> StubModel:
+    return StubModel(
+        call_tools=[],
+        custom_output_text=getattr(settings, "LLM_STUB_RESPONSE_TEXT", None),
+    )
+
+
+class CachedModel(Model):
+    """Pydantic-AI model that serves requests from the LLM response cache.
+
+    The real model is only resolved (and its API key required) the first time
+    a cache miss has to be forwarded to it.
+    """
+
+    def __init__(self, model: Union[Model, str], mode: str = RECORD):
+        self._model = model
+        self.mode = mode
+
+    @cached_property
+    def wrapped(self) -> Model:
+        if self.mode == REPLAY:
+            return build_stub_model()
+        return infer_model(self._model)
+
+    @property
+    def model_name(self) -> str:
+        if isinstance(self._model, Model):
+            return self._model.model_name
+        return self._model
+
+    @property
+    def system(self) -> str:
+        return self.wrapped.system
+
+    @cached_property
+    def profile(self):
+        return self.wrapped.profile
+
+    def customize_request_parameters(
+        self, model_request_parameters: ModelRequestParameters
+    ) -> ModelRequestParameters:
+        return self.wrapped.customize_request_parameters(model_request_parameters)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        key = build_request_key(
+            self.model_name, messages, model_settings, model_request_parameters
+        )
+        cached = await get_cached_response(key)
+        if cached is not None:
+            logger.debug(f"LLM response cache hit {key}")
+            return cached
+
+        response = await self.wrapped.request(
+            messages, model_settings, model_request_parameters
+        )
+        if self.mode == RECORD:
+            await store_response(key, response)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        key = build_request_key(
+            self.model_name, messages, model_settings, model_request_parameters
+        )
+        cached = await get_cached_response(key)
+        if cached is not None:
+            logger.debug(f"LLM response cache hit {key} (streamed)")
+            yield TestStreamedResponse(
+                _model_name=cached.model_name or self.model_name,
+                _structured_response=cached,
+                _messages=messages,
+            )
+            return
+
+        async with self.wrapped.request_stream(
+            messages, model_settings, model_request_parameters
+        ) as stream:
+            yield stream
+            if self.mode == RECORD:
+                # Consumers may stop reading once they have what they need;
+                # drain the rest so we never record a truncated response.
+                async for _ in stream:
+                    pass
+                await store_response(key, stream.get())
+
+
+def get_pydantic_ai_model(model: Union[Model, str]) -> Union[Model, str]:
+    """Return *model*, wrapped in ``CachedModel`` unless the cache is off.
+
+    Calls that reach the real model also go through the shared rate limiter
+    (see ``opencontractserver.llms.rate_limiter``); cache hits don't.
+    """
+    from opencontractserver.llms.rate_limiter import rate_limited
+
+    model = rate_limited(model)
+    mode = response_cache_mode()
+    if mode == OFF:
+        return model
+    if mode not in (RECORD, REPLAY):
+        logger.warning(f"Unknown LLM_RESPONSE_CACHE_MODE {mode!r}; caching disabled")
+        return model
+    return CachedModel(model, mode=mode)
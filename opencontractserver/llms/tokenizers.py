@@ -0,0 +1,187 @@
+"""
+Token counting for the LLM tools and context-window checks.
+
+``get_tokenizer(model)`` returns a tiktoken BPE tokenizer for the model when
+``LLM_TOKENIZER_DIR`` is set. The encoding's ranks are read from
+``{LLM_TOKENIZER_DIR}/{encoding}.tiktoken`` (e.g. ``o200k_base.tiktoken``,
+copied from the URL in ``tiktoken_ext.openai_public`` at image build time);
+nothing is ever downloaded. Without the setting, or while the file is absent
+or unreadable, the whitespace counter is used, and a failed load is retried
+after ``LLM_TOKENIZER_RETRY_SECONDS``.
+
+``count_tokens`` memoises counts by a digest of the text, so the same summary,
+note revision or chat message is only tokenized once per process.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import logging
+import threading
+import time
+import types
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Protocol
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+class WhitespaceTokenizer:
+    """Naive fallback: one token per whitespace-separated word."""
+
+    name = "whitespace"
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+
+class TiktokenTokenizer:
+    """Wraps a ``tiktoken.Encoding``."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = f"tiktoken:{encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def _encoding_name_for_model(model: Optional[str]) -> str:
+    import tiktoken
+
+    if model:
+        # "openai:gpt-4o-mini" -> "gpt-4o-mini"
+        model = model.split(":", 1)[-1]
+        try:
+            return tiktoken.encoding_name_for_model(model)
+        except KeyError:
+            pass
+    return getattr(settings, "LLM_TOKENIZER_DEFAULT_ENCODING", DEFAULT_ENCODING)
+
+
+@lru_cache(maxsize=8)
+def _load_tiktoken_tokenizer(
+    encoding_name: str, tokenizer_dir: str
+) -> TiktokenTokenizer:
+    # Failures raise, so only successfully loaded encodings are cached
+    import tiktoken
+    from tiktoken_ext.openai_public import ENCODING_CONSTRUCTORS
+
+    path = Path(tokenizer_dir) / f"{encoding_name}.tiktoken"
+    constructor = ENCODING_CONSTRUCTORS.get(encoding_name)
+    if constructor is None or "load_tiktoken_bpe" not in constructor.__code__.co_names:
+        raise ValueError(f"No local .tiktoken loader for encoding {encoding_name!r}")
+
+    def load_local_bpe(*args, **kwargs) -> dict[bytes, int]:
+        ranks = {}
+        for line in path.read_bytes().splitlines():
+            if line:
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+        return ranks
+
+    # tiktoken's own definition of the encoding (split pattern, special
+    # tokens), with the ranks it would download read from the local file
+    local_constructor = types.FunctionType(
+        constructor.__code__,
+        {**constructor.__globals__, "load_tiktoken_bpe": load_local_bpe},
+    )
+    return TiktokenTokenizer(tiktoken.Encoding(**local_constructor()))
+
+
+# Encoding name -> time.monotonic() of its last failed load
+_failed_encodings: dict[str, float] = {}
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Return the tokenizer for *model* (``LLM_TOKENIZER_MODEL`` by default)."""
+    tokenizer_dir = getattr(settings, "LLM_TOKENIZER_DIR", None)
+    if not tokenizer_dir:
+        return WhitespaceTokenizer()
+
+    model = model or getattr(settings, "LLM_TOKENIZER_MODEL", None)
+    encoding_name = None
+    try:
+        encoding_name = _encoding_name_for_model(model)
+
+        failed_at = _failed_encodings.get(encoding_name)
+        retry_seconds = getattr(settings, "LLM_TOKENIZER_RETRY_SECONDS", 300)
+        if failed_at is not None and time.monotonic() - failed_at < retry_seconds:
+            return WhitespaceTokenizer()
+
+        tokenizer = _load_tiktoken_tokenizer(encoding_name, tokenizer_dir)
+    except Exception as e:
+        if encoding_name is not None:
+            _failed_encodings[encoding_name] = time.monotonic()
+        logger.warning(
+            f"Could not load a tiktoken encoding for model {model!r} from "
+            f"{tokenizer_dir}; falling back to whitespace token counts: {e}"
+        )
+        return WhitespaceTokenizer()
+
+    _failed_encodings.pop(encoding_name, None)
+    return tokenizer
+
+
+class _CountCache:
+    """Small thread-safe LRU of token counts keyed by (tokenizer, text digest)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def set(self, key, count: int) -> None:
+        max_size = getattr(settings, "LLM_TOKEN_COUNT_CACHE_SIZE", 4096)
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > max_size:
+                self._counts.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_count_cache = _CountCache()
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    tokenizer = get_tokenizer(model)
+    key = (
+        tokenizer.name,
+        hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(),
+    )
+    count = _count_cache.get(key)
+    if count is None:
+        count = tokenizer.count(text)
+        _count_cache.set(key, count)
+    return count
+
+
+def reset_tokenizer_caches() -> None:
+    _load_tiktoken_tokenizer.cache_clear()
+    _failed_encodings.clear()
+    _count_cache.clear()
@@ -1,30 +1,47 @@
 """Framework-agnostic core tool functions for document and note operations."""
 
 import logging
-from datetime import datetime
 from functools import partial
 from typing import Any, Optional
-from uuid import uuid4
+
+from django.core.cache import cache
 
 from opencontractserver.annotations.models import Note, NoteRevision
 from opencontractserver.corpuses.models import Corpus, CorpusDescriptionRevision
 from opencontractserver.documents.models import Document
+from opencontractserver.llms.tokenizers import count_tokens, get_tokenizer
+from opencontractserver.llms.tools.document_text_cache import document_text_cache
 
 logger = logging.getLogger(__name__)
 
+# Summary token counts are cached by (document, modified) so the summary file
+# isn't re-read from storage on every tool call.
+TOKEN_COUNT_CACHE_PREFIX = "token_count"
+TOKEN_COUNT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
 
-def _token_count(text: str) -> int:
+def _token_count(text: str, model: Optional[str] = None) -> int:
     """
-    Naive token counting function. Splits on whitespace.
-    Replace or augment with more robust tokenization if needed.
+    Count tokens with the configured tokenizer (tiktoken BPE when
+    ``LLM_TOKENIZER_DIR`` is set, whitespace split otherwise). Counts are
+    memoised per text, so repeated calls for the same content are free.
 
     Args:
         text: The text to count tokens for
+        model: Optional model name to pick the matching encoding
 
     Returns:
-        Number of tokens (whitespace-separated words)
+        Number of tokens
     """
-    return len(text.split())
+    return count_tokens(text, model)
+
+
+def _md_summary_cache_key(doc: Document) -> str:
+    modified = doc.modified.timestamp() if doc.modified else ""
+    return (
+        f"{TOKEN_COUNT_CACHE_PREFIX}:{get_tokenizer().name}:md_summary:"
+        f"{doc.pk}:{modified}"
+    )
 
 
 def load_document_md_summary(
@@ -77,7 +94,7 @@ def load_document_md_summary(
 def get_md_summary_token_length(document_id: int) -> int:
     """
     Calculate the approximate token length of a Document's md_summary_file.
-    Uses a naive whitespace-based split for tokenization.
+    Uses the configured tokenizer (see ``_token_count``).
 
     Args:
         document_id: The primary key (ID) of the Document
@@ -96,10 +113,14 @@ def get_md_summary_token_length(document_id: int) -> int:
     if not doc.md_summary_file:
         return 0
 
-    with doc.md_summary_file.open("r") as file_obj:
-        content = file_obj.read()
-
-    return _token_count(content)
+    cache_key = _md_summary_cache_key(doc)
+    count = cache.get(cache_key)
+    if count is None:
+        with doc.md_summary_file.open("r") as file_obj:
+            content = file_obj.read()
+        count = _token_count(content)
+        cache.set(cache_key, count, TOKEN_COUNT_CACHE_TIMEOUT)
+    return count
 
 
 def get_notes_for_document_corpus(
@@ -154,7 +175,7 @@ def get_notes_for_document_corpus(
 
 def get_note_content_token_length(note_id: int) -> int:
     """
-    Calculate the approximate token length of a Note's content using naive whitespace-based split.
+    Calculate the approximate token length of a Note's content (see ``_token_count``).
 
     Args:
         note_id: The primary key (ID) of the Note
@@ -210,7 +231,7 @@ def get_partial_note_content(
 async def aget_md_summary_token_length(document_id: int) -> int:
     """
     Async version: Calculate the approximate token length of a Document's md_summary_file.
-    Uses a naive whitespace-based split for tokenization.
+    Uses the configured tokenizer (see ``_token_count``).
 
     Args:
         document_id: The primary key (ID) of the Document
@@ -231,10 +252,14 @@ async def aget_md_summary_token_length(document_id: int) -> int:
     if not doc.md_summary_file:
         return 0
 
-    with doc.md_summary_file.open("r") as file_obj:
-        content = file_obj.read()
-
-    return _token_count(content)
+    cache_key = _md_summary_cache_key(doc)
+    count = await cache.aget(cache_key)
+    if count is None:
+        with doc.md_summary_file.open("r") as file_obj:
+            content = file_obj.read()
+        count = _token_count(content)
+        await cache.aset(cache_key, count, TOKEN_COUNT_CACHE_TIMEOUT)
+    return count
 
 
 async def aload_document_md_summary(
@@ -353,10 +378,6 @@ except ModuleNotFoundError:  # Channels not installed – fall back gracefully
 # Plain-text extract helpers                                                  #
 # --------------------------------------------------------------------------- #
 
-# Cache now stores a tuple of (last_modified timestamp, file contents) so we can
-# transparently invalidate entries when the underlying file changes.
-_DOC_TXT_CACHE: dict[int, tuple["datetime", str]] = {}
-
 
 def load_document_txt_extract(
     document_id: int,
@@ -409,36 +430,13 @@ def load_document_txt_extract(
     if not doc.txt_extract_file:
         raise ValueError("No txt_extract_file attached to this document.")
 
-    # Decide whether to use the cached value.
-    use_cache = False
-    if not refresh and document_id in _DOC_TXT_CACHE:
-        cached_ts, _ = _DOC_TXT_CACHE[document_id]
-        use_cache = cached_ts == doc.modified
-
-    if not use_cache:
-        # (Re)load from storage.
-        content_bytes = doc.txt_extract_file.read()  # type: ignore[arg-type]
-        content_str = content_bytes.decode("utf-8")
-        _DOC_TXT_CACHE[document_id] = (doc.modified, content_str)
-
-        logger.debug(
-            "(Re)cached txt_extract_file for document %s (%d characters, ts=%s)",
-            document_id,
-            len(content_str),
-            doc.modified,
-        )
-
-    # Unpack cached tuple.
-    content = _DOC_TXT_CACHE[document_id][1]
-
-    # Normalise indices.
     start_idx = 0 if start is None else max(0, start)
-    end_idx = len(content) if end is None else end
-
-    if end_idx < start_idx:
+    if end is not None and end < start_idx:
         raise ValueError("End index must be greater than or equal to start index.")
 
-    return content[start_idx:end_idx]
+    if refresh:
+        document_text_cache.invalidate(doc)
+    return document_text_cache.get_slice(doc, start_idx, end)
 
 
 async def aload_document_txt_extract(
@@ -451,17 +449,12 @@ async def aload_document_txt_extract(
     """Asynchronously load a slice of a document's ``txt_extract_file``.
 
     This implementation avoids the thread-pool wrapper by relying on Django's
-    native async ORM utilities (``aget`` et al.). Only file IO remains
-    synchronous which is acceptable given the typically small size of the
-    text-extract payload.
+    native async ORM utilities (``aget`` et al.). Text is served from
+    ``document_text_cache``; only a cache miss reads the file synchronously.
     """
 
     from opencontractserver.documents.models import Document  # local import
 
-    # Hard timestamp-aware cache validation.
-    if refresh and document_id in _DOC_TXT_CACHE:
-        _DOC_TXT_CACHE.pop(document_id, None)
-
     try:
         doc = await Document.objects.aget(pk=document_id)
     except Document.DoesNotExist as exc:
@@ -470,32 +463,13 @@ async def aload_document_txt_extract(
     if not doc.txt_extract_file:
         raise ValueError("No txt_extract_file attached to this document.")
 
-    use_cache = False
-    if not refresh and document_id in _DOC_TXT_CACHE:
-        cached_ts, _ = _DOC_TXT_CACHE[document_id]
-        use_cache = cached_ts == doc.modified
-
-    if not use_cache:
-        content_str = doc.txt_extract_file.read().decode("utf-8")  # type: ignore[arg-type]
-        _DOC_TXT_CACHE[document_id] = (doc.modified, content_str)
-
-        logger.debug(
-            "(Re)cached txt_extract_file for document %s (%d characters, ts=%s)",
-            document_id,
-            len(content_str),
-            doc.modified,
-        )
-
-    content = _DOC_TXT_CACHE[document_id][1]
-
-    # Normalise indices and slice.
     start_idx = 0 if start is None else max(0, start)
-    end_idx = len(content) if end is None else end
-
-    if end_idx < start_idx:
+    if end is not None and end < start_idx:
         raise ValueError("End index must be greater than or equal to start index.")
 
-    return content[start_idx:end_idx]
+    if refresh:
+        document_text_cache.invalidate(doc)
+    return document_text_cache.get_slice(doc, start_idx, end)
 
 
 # --------------------------------------------------------------------------- #
@@ -1382,6 +1356,74 @@ async def aduplicate_annotations_with_label(
 # --------------------------------------------------------------------------- #
 
 
+class _PdfTokenIndex:
+    """
+    Character offsets of a PAWLS translation layer's tokens, sorted, so each
+    matched span is mapped to its tokens by bisection instead of a scan of the
+    layer's token DataFrame per span.
+
+    Produces the same per-page ``bounds`` / ``rawText`` / ``tokensJsons`` JSON
+    as ``PdfDataLayer.create_opencontract_annotation_from_span``.
+    """
+
+    def __init__(self, pdf_layer):
+        self.page_tokens = pdf_layer.page_tokens
+        # (page, token index on page, char start, char end)
+        self.rows = list(pdf_layer.tokens_dataframe.itertuples(index=False, name=None))
+        self.ends = [row[3] for row in self.rows]
+
+    def annotation_json(
+        self,
+        start: int,
+        end: int,
+        padding: float = 0.1,
+        max_vertical_margin: float = 1,
+        max_horizontal_margin: float = 5,
+    ) -> tuple[int, dict]:
+        """Return ``(first page, annotation json)`` for the span [start, end)."""
+        from bisect import bisect_right
+
+        first = bisect_right(self.ends, start)
+        by_page: dict[int, list] = {}
+        index = first
+        while index < len(self.rows) and self.rows[index][2] < end:
+            page, token_index = self.rows[index][:2]
+            by_page.setdefault(page, []).append(
+                (token_index, self.page_tokens[page][token_index])
+            )
+            index += 1
+
+        annotation_json = {}
+        for page, tokens in by_page.items():
+            top = min(token["y"] for _, token in tokens)
+            bottom = max(token["y"] + token["height"] for _, token in tokens)
+            left = min(token["x"] for _, token in tokens)
+            right = max(token["x"] + token["width"] for _, token in tokens)
+            vertical = min(padding * (bottom - top) / 2, max_vertical_margin)
+            horizontal = min(padding * (right - left) / 2, max_horizontal_margin)
+            annotation_json[page] = {
+                "bounds": {
+                    "top": top - vertical,
+                    "bottom": bottom + vertical,
+                    "left": left - horizontal,
+                    "right": right + horizontal,
+                },
+                "rawText": " ".join(token["text"] for _, token in tokens),
+                "tokensJsons": [
+                    {"pageIndex": page, "tokenIndex": token_index}
+                    for token_index, _ in tokens
+                ],
+            }
+
+        if by_page:
+            first_page = next(iter(by_page))
+        else:
+            first_page = (
+                self.rows[min(first, len(self.rows) - 1)][0] if self.rows else 0
+            )
+        return first_page, annotation_json
+
+
 def add_annotations_from_exact_strings(
     items: list[tuple[str, str, int, int]],
     *,
@@ -1395,14 +1437,20 @@ def add_annotations_from_exact_strings(
     • Plain-text (application/txt, text/plain): builds span annotations (SPAN_LABEL).
 
     Other file types raise ``ValueError``.
+
+    All search strings for a document are matched in one pass over its text
+    (Aho–Corasick); each string still yields its non-overlapping occurrences,
+    left to right. The annotations are written with ``bulk_create``, the
+    creator gets their permissions in bulk and embeddings are queued in
+    batches once the transaction commits.
     """
 
     import json
     from collections import defaultdict
 
+    from django.conf import settings
     from django.db import transaction
     from plasmapdf.models.PdfDataLayer import build_translation_layer
-    from plasmapdf.models.types import SpanAnnotation, TextSpan
 
     from opencontractserver.annotations.models import (
         SPAN_LABEL,
@@ -1411,12 +1459,20 @@ def add_annotations_from_exact_strings(
     )
     from opencontractserver.corpuses.models import Corpus
     from opencontractserver.documents.models import Document
+    from opencontractserver.tasks.embeddings_task import queue_annotation_embeddings
+    from opencontractserver.types.enums import PermissionTypes
+    from opencontractserver.utils.page_index import invalidate_page_index
+    from opencontractserver.utils.permissioning import (
+        grant_permissions_for_new_objs_to_user,
+    )
+    from opencontractserver.utils.text_search import MultiPatternMatcher
 
     # Group items by (doc_id, corpus_id) to avoid loading the same PAWLS layer multiple times.
     grouped: dict[tuple[int, int], list[tuple[str, str]]] = defaultdict(list)
     for label_text, exact_str, doc_id, corpus_id in items:
         grouped[(doc_id, corpus_id)].append((label_text, exact_str))
 
+    validate_json = getattr(settings, "VALIDATE_ANNOTATION_JSON", settings.DEBUG)
     created_ids: list[int] = []
 
     for (doc_id, corpus_id), tuples in grouped.items():
@@ -1452,25 +1508,17 @@ def add_annotations_from_exact_strings(
                 doc.pawls_parse_file.close()
 
             pdf_layer = build_translation_layer(pawls_tokens)
+            token_index = _PdfTokenIndex(pdf_layer)
             doc_text = pdf_layer.doc_text
 
             label_type_const = TOKEN_LABEL
 
             def _create_annotation(pos: int, end_idx: int, label_obj):
-                span = TextSpan(
-                    id=str(uuid4()), start=pos, end=end_idx, text=doc_text[pos:end_idx]
-                )
-                span_annotation = SpanAnnotation(
-                    span=span, annotation_label=label_obj.text
-                )
-                oc_ann = pdf_layer.create_opencontract_annotation_from_span(
-                    span_annotation
-                )
-
+                page, annotation_json = token_index.annotation_json(pos, end_idx)
                 return Annotation(
-                    raw_text=oc_ann["rawText"],
-                    page=oc_ann.get("page", 1),
-                    json=oc_ann["annotation_json"],
+                    raw_text=doc_text[pos:end_idx],
+                    page=page,
+                    json=annotation_json,
                     annotation_label=label_obj,
                     document=doc,
                     corpus=corpus,
@@ -1484,11 +1532,7 @@ def add_annotations_from_exact_strings(
                 raise ValueError(
                     f"Text document id={doc_id} lacks txt_extract_file; cannot annotate."
                 )
-            doc.txt_extract_file.open("r")
-            try:
-                doc_text = doc.txt_extract_file.read()
-            finally:
-                doc.txt_extract_file.close()
+            doc_text = document_text_cache.get_text(doc)
 
             label_type_const = SPAN_LABEL
 
@@ -1510,29 +1554,42 @@ def add_annotations_from_exact_strings(
                 f"Unsupported file_type {doc.file_type} for document id={doc_id}"
             )
 
+        matches = MultiPatternMatcher(exact_str for _, exact_str in tuples).find_all(
+            doc_text
+        )
+
         # Common creation loop (works for both PDF and text).
         with transaction.atomic():
+            labels = {}
+            new_annotations = []
             for label_text, exact_str in tuples:
-                label_obj = corpus.ensure_label_and_labelset(
-                    label_text=label_text,
-                    creator_id=creator_id,
-                    label_type=label_type_const,
-                )
-
-                start_idx = 0
-                while True:
-                    pos = doc_text.find(exact_str, start_idx)
-                    if pos == -1:
-                        break
-
-                    end_idx = pos + len(exact_str)
-
-                    annot_obj = _create_annotation(pos, end_idx, label_obj)
-                    annot_obj.save()
+                if label_text not in labels:
+                    labels[label_text] = corpus.ensure_label_and_labelset(
+                        label_text=label_text,
+                        creator_id=creator_id,
+                        label_type=label_type_const,
+                    )
 
-                    created_ids.append(annot_obj.pk)
+                for pos, end_idx in matches.get(exact_str, []):
+                    annot_obj = _create_annotation(pos, end_idx, labels[label_text])
+                    if validate_json:
+                        annot_obj.clean()
+                    new_annotations.append(annot_obj)
+
+            if not new_annotations:
+                continue
+
+            # bulk_create skips post_save, so permissions, embeddings and the
+            # page index are handled here for the whole batch.
+            Annotation.objects.bulk_create(new_annotations, batch_size=500)
+            new_ids = [annot_obj.pk for annot_obj in new_annotations]
+            grant_permissions_for_new_objs_to_user(
+                creator_id, new_annotations, [PermissionTypes.ALL]
+            )
+            transaction.on_commit(partial(queue_annotation_embeddings, new_ids))
 
-                    start_idx = end_idx
+        invalidate_page_index(doc_id)
+        created_ids.extend(new_ids)
 
     return created_ids
 
@@ -0,0 +1,314 @@
+"""
+Two-tier cache for documents' ``txt_extract_file`` contents used by agent tools.
+
+* In process: an LRU bounded by ``LLM_DOC_TEXT_CACHE_MAX_BYTES`` (UTF-8 size of
+  the cached texts), so a long-lived worker serving many corpora stays bounded.
+* Shared (optional, ``LLM_DOC_TEXT_CACHE_SHARED``): ``"redis"`` stores texts in
+  the Redis behind the ``LLM_DOC_TEXT_CACHE_REDIS_ALIAS`` cache, ``"disk"``
+  under ``LLM_DOC_TEXT_CACHE_DIR``. Workers then read storage (S3) once per
+  document version instead of once each.
+
+Entries are keyed by (document id, modified), so a re-extracted document is
+never served stale. Shared entries carry a small character -> byte offset index
+so ``start`` / ``end`` slices are served with a ranged read instead of pulling
+the whole text into the process.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Optional, Protocol
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Characters between two entries of the char -> byte offset index
+OFFSET_INDEX_STRIDE = 4096
+
+
+def build_offset_index(text: str, stride: Optional[int] = None) -> dict:
+    """UTF-8 byte offset of every *stride*-th character of *text*."""
+    stride = stride or OFFSET_INDEX_STRIDE
+    offsets = []
+    position = 0
+    for index in range(0, len(text), stride):
+        offsets.append(position)
+        position += len(text[index : index + stride].encode("utf-8"))
+    return {"chars": len(text), "bytes": position, "stride": stride, "offsets": offsets}
+
+
+def byte_range_for(meta: dict, start: int, end: int) -> tuple[int, int, int]:
+    """Return (first byte, end byte exclusive, chars to skip) covering [start, end)."""
+    stride = meta["stride"]
+    offsets = meta["offsets"]
+    first_block = start // stride
+    last_block = -(-end // stride)  # ceil
+    first_byte = offsets[first_block] if first_block < len(offsets) else meta["bytes"]
+    end_byte = offsets[last_block] if last_block < len(offsets) else meta["bytes"]
+    return first_byte, end_byte, start - first_block * stride
+
+
+class SharedTextTier(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def get_range(self, key: str, start: int, end: Optional[int]) -> Optional[str]: ...
+
+    def set(self, key: str, text: str) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+def _normalise_range(meta: dict, start: int, end: Optional[int]) -> tuple[int, int]:
+    end = meta["chars"] if end is None else min(end, meta["chars"])
+    return min(start, end), end
+
+
+class RedisTextTier:
+    """Raw UTF-8 strings in Redis, read with GETRANGE for slices."""
+
+    def __init__(self, alias: str, timeout: Optional[int]):
+        from django_redis import get_redis_connection
+
+        self.client = get_redis_connection(alias)
+        self.timeout = timeout
+
+    def _meta(self, key: str) -> Optional[dict]:
+        raw = self.client.get(f"{key}:meta")
+        return json.loads(raw) if raw else None
+
+    def get(self, key: str) -> Optional[str]:
+        raw = self.client.get(key)
+        return raw.decode("utf-8") if raw is not None else None
+
+    def get_range(self, key: str, start: int, end: Optional[int]) -> Optional[str]:
+        meta = self._meta(key)
+        if meta is None:
+            return None
+        start, end = _normalise_range(meta, start, end)
+        if start == end:
+            return ""
+        first_byte, end_byte, skip = byte_range_for(meta, start, end)
+        raw = self.client.getrange(key, first_byte, end_byte - 1)
+        return raw.decode("utf-8")[skip : skip + end - start]
+
+    def set(self, key: str, text: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(key, text.encode("utf-8"), ex=self.timeout)
+        pipe.set(f"{key}:meta", json.dumps(build_offset_index(text)), ex=self.timeout)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key, f"{key}:meta")
+
+
+class DiskTextTier:
+    """UTF-8 files plus a JSON offset index, read with seek() for slices."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        name = key.replace(":", "-")
+        return self.directory / f"{name}.txt", self.directory / f"{name}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        text_path, _ = self._paths(key)
+        try:
+            return text_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def get_range(self, key: str, start: int, end: Optional[int]) -> Optional[str]:
+        text_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+            start, end = _normalise_range(meta, start, end)
+            if start == end:
+                return ""
+            first_byte, end_byte, skip = byte_range_for(meta, start, end)
+            with text_path.open("rb") as file_obj:
+                file_obj.seek(first_byte)
+                raw = file_obj.read(end_byte - first_byte)
+        except FileNotFoundError:
+            return None
+        return raw.decode("utf-8")[skip : skip + end - start]
+
+    def set(self, key: str, text: str) -> None:
+        text_path, meta_path = self._paths(key)
+        # Older versions of the same document are dead weight
+        document_prefix = text_path.name.rsplit("-", 1)[0]
+        for stale in self.directory.glob(f"{document_prefix}-*"):
+            # Other writers' in-flight temp files are theirs to rename
+            if stale.suffix != ".tmp" and stale not in (text_path, meta_path):
+                stale.unlink(missing_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        for path, payload in (
+            (text_path, text),
+            (meta_path, json.dumps(build_offset_index(text))),
+        ):
+            tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(path)
+
+    def delete(self, key: str) -> None:
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+
+class DocumentTextCache:
+    """Byte-bounded in-process LRU in front of an optional shared tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._texts: OrderedDict[str, str] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._document_keys: dict[int, str] = {}
+        self.current_bytes = 0
+        self.stats = defaultdict(int)
+        self._shared: Optional[SharedTextTier] = None
+        self._shared_config = None
+
+    @staticmethod
+    def key_for(document) -> str:
+        modified = document.modified.timestamp() if document.modified else 0
+        return f"doc_txt:{document.pk}:{modified}"
+
+    @property
+    def shared(self) -> Optional[SharedTextTier]:
+        config = (
+            getattr(settings, "LLM_DOC_TEXT_CACHE_SHARED", None),
+            getattr(settings, "LLM_DOC_TEXT_CACHE_REDIS_ALIAS", "default"),
+            getattr(settings, "LLM_DOC_TEXT_CACHE_DIR", None),
+        )
+        if config != self._shared_config:
+            self._shared_config = config
+            self._shared = self._build_shared_tier(*config)
+        return self._shared
+
+    @staticmethod
+    def _build_shared_tier(kind, alias, directory) -> Optional[SharedTextTier]:
+        try:
+            if kind == "redis":
+                return RedisTextTier(
+                    alias, getattr(settings, "LLM_DOC_TEXT_CACHE_TIMEOUT", None)
+                )
+            if kind == "disk" and directory:
+                return DiskTextTier(directory)
+        except Exception as e:
+            logger.warning(f"Shared document text cache ({kind}) unavailable: {e}")
+            return None
+        if kind:
+            logger.warning(f"Unknown LLM_DOC_TEXT_CACHE_SHARED value {kind!r}")
+        return None
+
+    # ------------------------------------------------------------------ #
+    # In-process tier                                                    #
+    # ------------------------------------------------------------------ #
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._texts.get(key)
+            if text is not None:
+                self._texts.move_to_end(key)
+            return text
+
+    def _local_set(self, document_id: int, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        max_bytes = getattr(settings, "LLM_DOC_TEXT_CACHE_MAX_BYTES", 64 * 1024**2)
+        if size > max_bytes:
+            return
+        with self._lock:
+            # Drop any older version of this document first
+            previous = self._document_keys.get(document_id)
+            if previous is not None:
+                self._local_drop(previous)
+            self._texts[key] = text
+            self._sizes[key] = size
+            self._document_keys[document_id] = key
+            self.current_bytes += size
+            while self.current_bytes > max_bytes:
+                oldest = next(iter(self._texts))
+                self._local_drop(oldest)
+                self.stats["evictions"] += 1
+
+    def _local_drop(self, key: str) -> None:
+        # Caller holds the lock
+        if key in self._texts:
+            del self._texts[key]
+            self.current_bytes -= self._sizes.pop(key)
+        document_id = int(key.split(":")[1])
+        if self._document_keys.get(document_id) == key:
+            del self._document_keys[document_id]
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                         #
+    # ------------------------------------------------------------------ #
+    def invalidate(self, document) -> None:
+        key = self.key_for(document)
+        with self._lock:
+            self._local_drop(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def get_text(self, document) -> str:
+        """Full text of *document*'s ``txt_extract_file``."""
+        key = self.key_for(document)
+        text = self._local_get(key)
+        if text is not None:
+            self.stats["local_hits"] += 1
+            return text
+
+        shared = self.shared
+        text = shared.get(key) if shared is not None else None
+        if text is not None:
+            self.stats["shared_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            text = document.txt_extract_file.read().decode("utf-8")
+            if shared is not None:
+                shared.set(key, text)
+            logger.debug(
+                "Cached txt_extract_file for document %s (%d characters, key=%s)",
+                document.pk,
+                len(text),
+                key,
+            )
+        self._local_set(document.pk, key, text)
+        return text
+
+    def get_slice(self, document, start: int, end: Optional[int]) -> str:
+        """``text[start:end]`` without pulling a remotely cached text in whole."""
+        key = self.key_for(document)
+        text = self._local_get(key)
+        if text is not None:
+            self.stats["local_hits"] += 1
+            return text[start:end]
+
+        if self.shared is not None:
+            sliced = self.shared.get_range(key, start, end)
+            if sliced is not None:
+                self.stats["shared_range_hits"] += 1
+                return sliced
+        return self.get_text(document)[start:end]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._texts)
+        return {**self.stats, "entries": entries, "bytes": self.current_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+            self._sizes.clear()
+            self._document_keys.clear()
+            self.current_bytes = 0
+        self.stats.clear()
+
+
+document_text_cache = DocumentTextCache()
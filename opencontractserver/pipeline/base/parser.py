@@ -17,6 +17,14 @@ from opencontractserver.utils.importing import (
     import_relationships,
     load_or_create_labels,
 )
+from opencontractserver.utils.parser_cache import (
+    document_source_sha256,
+    has_cached_export,
+    load_cached_export,
+    parser_cache_enabled,
+    parser_cache_key,
+    store_cached_export,
+)
 
 from .base_component import PipelineComponentBase
 
@@ -37,6 +45,12 @@ class BaseParser(PipelineComponentBase, ABC):
     input_schema: Mapping = (
         {}
     )  # If you want user to provide inputs, define a jsonschema here
+    # Parsers that accept a "pdf_path" kwarg (a page range of the document
+    # saved as its own PDF) can have large PDFs parsed in parallel shards.
+    supports_page_shards: bool = False
+    # Part of the parser output cache key: bump it when a change makes the
+    # parser return something different for the same file and settings.
+    parser_version: str = "1"
 
     def __init__(self, **kwargs):
         """
@@ -45,6 +59,26 @@ class BaseParser(PipelineComponentBase, ABC):
         """
         super().__init__(**kwargs)
 
+    def get_page_shard_settings(self) -> tuple[int, int]:
+        """
+        Returns (threshold, shard size) in pages: PDFs with more pages than the
+        threshold are parsed in shards of that many pages. Set per parser with
+        "page_shard_threshold" / "page_shard_size" in its PIPELINE_SETTINGS,
+        falling back to PARSER_PAGE_SHARD_THRESHOLD / PARSER_PAGE_SHARD_SIZE.
+        A threshold of 0 (always for parsers without shard support) disables it.
+        """
+        if not self.supports_page_shards:
+            return 0, 0
+        component_settings = self.get_component_settings()
+        threshold = component_settings.get(
+            "page_shard_threshold",
+            getattr(settings, "PARSER_PAGE_SHARD_THRESHOLD", 0),
+        )
+        size = component_settings.get(
+            "page_shard_size", getattr(settings, "PARSER_PAGE_SHARD_SIZE", 100)
+        )
+        return int(threshold), int(size)
+
     @abstractmethod
     def _parse_document_impl(
         self, user_id: int, doc_id: int, **all_kwargs
@@ -64,6 +98,49 @@ class BaseParser(PipelineComponentBase, ABC):
         """
         pass
 
+    @property
+    def parser_path(self) -> str:
+        return f"{self.__class__.__module__}.{self.__class__.__name__}"
+
+    def _parse_cache_key(self, doc_id: int, direct_kwargs: dict) -> Optional[str]:
+        """
+        Key of this document's export in the parser output cache, or None when
+        the cache is off or the document has no source file.
+        """
+        if not parser_cache_enabled():
+            return None
+        try:
+            file_sha256 = document_source_sha256(Document.objects.get(pk=doc_id))
+        except Exception as e:
+            logger.warning(f"Could not hash document {doc_id} for the parse cache: {e}")
+            return None
+        if file_sha256 is None:
+            return None
+        merged_kwargs = {**self.get_component_settings(), **direct_kwargs}
+        return parser_cache_key(
+            self.parser_path, self.parser_version, file_sha256, merged_kwargs
+        )
+
+    def has_cached_parse(self, doc_id: int, **direct_kwargs) -> bool:
+        key = self._parse_cache_key(doc_id, direct_kwargs)
+        return key is not None and has_cached_export(self.parser_path, key)
+
+    def get_cached_parse(
+        self, doc_id: int, **direct_kwargs
+    ) -> Optional[OpenContractDocExport]:
+        """The cached export of a previous parse with the same file and settings."""
+        key = self._parse_cache_key(doc_id, direct_kwargs)
+        if key is None:
+            return None
+        return load_cached_export(self.parser_path, key)
+
+    def cache_parse(
+        self, doc_id: int, parsed_data: OpenContractDocExport, **direct_kwargs
+    ) -> None:
+        key = self._parse_cache_key(doc_id, direct_kwargs)
+        if key is not None:
+            store_cached_export(self.parser_path, self.parser_version, key, parsed_data)
+
     def parse_document(
         self, user_id: int, doc_id: int, **direct_kwargs
     ) -> Optional[OpenContractDocExport]:
@@ -132,26 +209,37 @@ class BaseParser(PipelineComponentBase, ABC):
         # Save content to txt_extract_file
         txt_content = open_contracts_data.get("content", "")
         txt_file = ContentFile(txt_content.encode("utf-8"))
-        document.txt_extract_file.save(f"doc_{doc_id}.txt", txt_file)
+        document.txt_extract_file.save(f"doc_{doc_id}.txt", txt_file, save=False)
 
         # Handle PAWLS content if any
         pawls_file_content = open_contracts_data.get("pawls_file_content")
         if pawls_file_content:
             pawls_string = json.dumps(pawls_file_content)
             pawls_file = ContentFile(pawls_string.encode("utf-8"))
-            document.pawls_parse_file.save(f"doc_{doc_id}.pawls", pawls_file)
+            document.pawls_parse_file.save(
+                f"doc_{doc_id}.pawls", pawls_file, save=False
+            )
 
             # Create text layer from PAWLS tokens
             span_translation_layer = build_translation_layer(json.loads(pawls_string))
             # Optionally overwrite txt_extract_file with text from PAWLS
             txt_file = ContentFile(span_translation_layer.doc_text.encode("utf-8"))
-            document.txt_extract_file.save(f"doc_{doc_id}.txt", txt_file)
+            document.txt_extract_file.save(f"doc_{doc_id}.txt", txt_file, save=False)
             document.page_count = len(pawls_file_content)
         else:
             # Handle cases without PAWLS content
             document.page_count = open_contracts_data.get("page_count", 1)
 
-        document.save()
+        # Only write the parse's own fields: the thumbnail stage saves the same
+        # row concurrently and ingest timings are merged into it under a lock.
+        document.save(
+            update_fields=[
+                "txt_extract_file",
+                "pawls_parse_file",
+                "page_count",
+                "modified",
+            ]
+        )
 
         # Determine fallback label type (for annotations) if annotation types aren't specified in data
         logger.info(
@@ -250,6 +338,8 @@ class BaseParser(PipelineComponentBase, ABC):
         """
         Process a document by parsing it and then saving the parsed data.
         This method calls parse_document(...) and then save_parsed_data(...).
+        If the parser output cache holds an export for the same file, parser
+        and settings, it is saved instead of calling parse_document(...).
 
         Args:
             user_id (int): ID of the user.
@@ -264,7 +354,14 @@ class BaseParser(PipelineComponentBase, ABC):
             f"Processing document {doc_id} with possible parser kwargs: {kwargs}"
         )
 
-        parsed_data = self.parse_document(user_id, doc_id, **kwargs)
+        parsed_data = self.get_cached_parse(doc_id, **kwargs)
+        if parsed_data is not None:
+            logger.info(f"Replaying cached parse of document {doc_id}.")
+        else:
+            parsed_data = self.parse_document(user_id, doc_id, **kwargs)
+            if parsed_data is not None:
+                self.cache_parse(doc_id, parsed_data, **kwargs)
+
         if parsed_data is not None:
             self.save_parsed_data(user_id, doc_id, parsed_data)
             logger.info(f"Document {doc_id} processed successfully.")
@@ -105,8 +105,10 @@ class BaseThumbnailGenerator(PipelineComponentBase, ABC):
                 thumbnail_file = ContentFile(thumbnail_bytes)
                 thumb_filename = f"thumbnail_{doc_id}.{extension}"
                 # Save thumbnail to document's icon field
-                document.icon.save(thumb_filename, thumbnail_file)
-                document.save()
+                document.icon.save(thumb_filename, thumbnail_file, save=False)
+                # The parse stage saves the same row concurrently, so only the
+                # icon is written back.
+                document.save(update_fields=["icon", "modified"])
                 return thumbnail_file
 
             # If no thumbnail generated
@@ -1,19 +1,102 @@
 import base64
+import json
 import logging
-from typing import Any, Optional
+import os
+import threading
+import uuid
+from collections.abc import Iterator
+from typing import IO, Any, Optional
 
 import requests
 from django.conf import settings
 from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, RequestException, Timeout
 
 from opencontractserver.documents.models import Document
 from opencontractserver.pipeline.base.file_types import FileTypeEnum
 from opencontractserver.pipeline.base.parser import BaseParser
 from opencontractserver.types.dicts import OpenContractDocExport
+from opencontractserver.utils.concurrency import DistributedSemaphore, SlotUnavailable
 
 logger = logging.getLogger(__name__)
 
+# Bytes read from storage per upload chunk. A multiple of 3, so each chunk
+# base64-encodes on its own and the encoded chunks concatenate cleanly.
+UPLOAD_CHUNK_SIZE = 3 * 64 * 1024
+
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_session_key = None
+
+
+def get_docling_session() -> requests.Session:
+    """
+    Per-process ``requests`` session with a pool of keep-alive connections to
+    the parser service (``DOCLING_PARSER_POOL_SIZE``). Rebuilt after a fork,
+    so prefork Celery children never share sockets.
+    """
+    global _session, _session_key
+
+    pool_size = getattr(settings, "DOCLING_PARSER_POOL_SIZE", 4)
+    key = (os.getpid(), pool_size)
+    with _session_lock:
+        if _session_key != key:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_key = session, key
+        return _session
+
+
+def _read_chunks(stream: IO[bytes], size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield exactly *size*-byte chunks (the last may be shorter)."""
+    pending = b""
+    while True:
+        data = stream.read(size - len(pending))
+        if not data:
+            break
+        pending += data
+        if len(pending) == size:
+            yield pending
+            pending = b""
+    if pending:
+        yield pending
+
+
+def stream_json_body(stream: IO[bytes], fields: dict[str, Any]) -> Iterator[bytes]:
+    """
+    The service's JSON request (``fields`` plus ``pdf_base64``), generated
+    chunk by chunk so neither the PDF nor its base64 text is ever held whole.
+    """
+    header = json.dumps(fields)[:-1]
+    yield (header + (", " if fields else "") + '"pdf_base64": "').encode()
+    for chunk in _read_chunks(stream):
+        yield base64.b64encode(chunk)
+    yield b'"}'
+
+
+def stream_multipart_body(
+    stream: IO[bytes], filename: str, fields: dict[str, Any], boundary: str
+) -> Iterator[bytes]:
+    """``multipart/form-data`` request with the raw PDF as the ``file`` part."""
+    for name, value in fields.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    yield from _read_chunks(stream)
+    yield f"\r\n--{boundary}--\r\n".encode()
+
 
 class DoclingParser(BaseParser):
     """
@@ -27,6 +110,7 @@ class DoclingParser(BaseParser):
     author = "OpenContracts Team"
     dependencies = ["requests"]
     supported_file_types = [FileTypeEnum.PDF]
+    supports_page_shards = True
 
     def __init__(self):
         """Initialize the Docling REST parser with service URL from settings."""
@@ -39,6 +123,14 @@ class DoclingParser(BaseParser):
         self.request_timeout = getattr(
             settings, "DOCLING_PARSER_TIMEOUT", 300
         )  # 5 minutes default
+        # "json" (base64 inside the JSON body) or "multipart" (raw binary)
+        self.upload_mode = getattr(settings, "DOCLING_PARSER_UPLOAD_MODE", "json")
+        self.in_flight = DistributedSemaphore(
+            "docling_parser",
+            limit=getattr(settings, "DOCLING_PARSER_MAX_IN_FLIGHT", 4),
+            lease_seconds=getattr(settings, "DOCLING_PARSER_SLOT_LEASE", 1800),
+        )
+        self.slot_wait = getattr(settings, "DOCLING_PARSER_SLOT_WAIT", 3600)
         logger.info(f"DoclingParser initialized with service URL: {self.service_url}")
 
     def _parse_document_impl(
@@ -55,6 +147,8 @@ class DoclingParser(BaseParser):
                 - force_ocr (bool): Force OCR processing even if text is detectable
                 - roll_up_groups (bool): Roll up items under the same heading into single relationships
                 - llm_enhanced_hierarchy (bool): Apply experimental LLM-based hierarchy enhancement
+                - pdf_path (str): Storage path of the PDF to send instead of the document's
+                  own file (a page-range shard of it)
 
         Returns:
             Optional[OpenContractDocExport]: A dictionary containing the doc metadata,
@@ -65,7 +159,7 @@ class DoclingParser(BaseParser):
         )
 
         document = Document.objects.get(pk=doc_id)
-        doc_path = document.pdf_file.name
+        doc_path = all_kwargs.get("pdf_path") or document.pdf_file.name
 
         # Get settings from all_kwargs (which includes PIPELINE_SETTINGS and direct_kwargs)
         force_ocr = all_kwargs.get("force_ocr", False)
@@ -80,34 +174,75 @@ class DoclingParser(BaseParser):
                 "We normally try to intelligently determine if OCR is needed."
             )
 
-        # Read the PDF file from storage
+        # Extract filename from path (the document's, also when sending a shard)
+        filename = document.pdf_file.name.split("/")[-1]
+        fields = {
+            "force_ocr": force_ocr,
+            "roll_up_groups": roll_up_groups,
+            "llm_enhanced_hierarchy": llm_enhanced_hierarchy,
+        }
+
         try:
-            with default_storage.open(doc_path, "rb") as pdf_file:
-                pdf_bytes = pdf_file.read()
+            # Hold one of the DOCLING_PARSER_MAX_IN_FLIGHT slots shared by all
+            # workers, so a large upload batch can't swamp the parser container
+            with self.in_flight.slot(timeout=self.slot_wait):
+                result = self._post_document(doc_path, filename, fields)
+            if result is None:
+                return None
 
-            # Convert PDF bytes to base64 for JSON request
-            pdf_base64 = base64.b64encode(pdf_bytes).decode("utf-8")
+            # Handle potential differences in field names (snake_case vs camelCase)
+            normalized_result = self._normalize_response(result)
 
-            # Extract filename from path
-            filename = doc_path.split("/")[-1]
+            logger.info(
+                f"Successfully processed document {doc_id} through Docling parser service"
+            )
+            return normalized_result
 
-            # Prepare the request payload
-            payload = {
-                "filename": filename,
-                "pdf_base64": pdf_base64,
-                "force_ocr": force_ocr,
-                "roll_up_groups": roll_up_groups,
-                "llm_enhanced_hierarchy": llm_enhanced_hierarchy,
-            }
+        except SlotUnavailable as e:
+            logger.error(f"Docling parser service is saturated: {e}")
+            return None
+
+        except Exception as e:
+            import traceback
+
+            stacktrace = traceback.format_exc()
+            logger.error(f"Docling REST parser failed: {e}\n{stacktrace}")
+            return None
+
+    def _post_document(
+        self, doc_path: str, filename: str, fields: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Stream the PDF from storage to the service and decode the JSON reply.
+
+        ``DOCLING_PARSER_UPLOAD_MODE`` picks the request body: ``"json"`` sends
+        the service's JSON payload with the PDF base64-encoded on the fly,
+        ``"multipart"`` sends the raw PDF as ``multipart/form-data`` (no base64
+        overhead; the service must accept multipart uploads). Either way the
+        body is sent with chunked transfer encoding, and the (gzip) response is
+        decompressed as it is read.
+        """
+        with default_storage.open(doc_path, "rb") as pdf_file:
+            if self.upload_mode == "multipart":
+                boundary = uuid.uuid4().hex
+                body = stream_multipart_body(pdf_file, filename, fields, boundary)
+                content_type = f"multipart/form-data; boundary={boundary}"
+            else:
+                body = stream_json_body(pdf_file, {"filename": filename, **fields})
+                content_type = "application/json"
 
             # Send request to the microservice
             logger.info(f"Sending PDF to Docling parser service: {self.service_url}")
             try:
-                response = requests.post(
+                response = get_docling_session().post(
                     self.service_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
+                    data=body,
+                    headers={
+                        "Content-Type": content_type,
+                        "Accept-Encoding": "gzip",
+                    },
                     timeout=self.request_timeout,
+                    stream=True,
                 )
                 response.raise_for_status()  # Raise exception for 4XX/5XX responses
             except Timeout:
@@ -126,23 +261,12 @@ class DoclingParser(BaseParser):
                     logger.error(f"Response content: {e.response.text}")
                 return None
 
-            # Parse the response
-            result = response.json()
-
-            # Handle potential differences in field names (snake_case vs camelCase)
-            normalized_result = self._normalize_response(result)
-
-            logger.info(
-                f"Successfully processed document {doc_id} through Docling parser service"
-            )
-            return normalized_result
-
-        except Exception as e:
-            import traceback
-
-            stacktrace = traceback.format_exc()
-            logger.error(f"Docling REST parser failed: {e}\n{stacktrace}")
-            return None
+        # Parse the response straight off the (decompressing) socket stream
+        try:
+            response.raw.decode_content = True
+            return json.load(response.raw)
+        finally:
+            response.close()
 
     def _normalize_response(self, response_data: dict[str, Any]) -> dict[str, Any]:
         """
@@ -9,7 +9,10 @@ from opencontractserver.documents.models import Document
 from opencontractserver.pipeline.base.file_types import FileTypeEnum
 from opencontractserver.pipeline.base.parser import BaseParser
 from opencontractserver.types.dicts import OpenContractDocExport
-from opencontractserver.utils.files import check_if_pdf_needs_ocr
+from opencontractserver.utils.files import (
+    check_if_pdf_needs_ocr,
+    get_pdf_text_layer_status,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,7 @@ class NLMIngestParser(BaseParser):
     author = "Your Name"
     dependencies = []
     supported_file_types = [FileTypeEnum.PDF]
+    supports_page_shards = True
 
     def __init__(self, **kwargs):
         """Initializes the NLMIngestParser."""
@@ -43,6 +47,9 @@ class NLMIngestParser(BaseParser):
             user_id (int): ID of the user.
             doc_id (int): ID of the document to parse.
             **all_kwargs: Parser configuration arguments such as 'endpoint', 'api_key', and 'use_ocr'.
+                With 'ocr_mixed_pages', a PDF with a text layer is still OCRed when some
+                of its pages are scanned (this reads the text of every page).
+                A 'pdf_path' parses that PDF (a page-range shard) instead of the document's own file.
 
         Returns:
             Optional[OpenContractDocExport]: The parsed document data,
@@ -59,15 +66,32 @@ class NLMIngestParser(BaseParser):
         use_ocr_config = all_kwargs.get(
             "use_ocr", True
         )  # Default was True in PARSER_KWARGS
+        ocr_mixed_pages = all_kwargs.get("ocr_mixed_pages", False)
 
         # Retrieve the document
         document = Document.objects.get(pk=doc_id)
-        doc_path = document.pdf_file.name
+        doc_path = all_kwargs.get("pdf_path") or document.pdf_file.name
 
         # Open the document file
         with default_storage.open(doc_path, "rb") as doc_file:
             # Check if OCR is needed
             needs_ocr = check_if_pdf_needs_ocr(doc_file)
+            if not needs_ocr and use_ocr_config and ocr_mixed_pages:
+                # nlm-ingestor can only OCR the whole file, so any scanned page
+                # among the text pages means OCRing all of it
+                scanned_pages = [
+                    index
+                    for index, has_text_layer in enumerate(
+                        get_pdf_text_layer_status(doc_file)
+                    )
+                    if not has_text_layer
+                ]
+                if scanned_pages:
+                    logger.info(
+                        f"Document {doc_id} has scanned pages {scanned_pages} "
+                        f"among its text pages"
+                    )
+                    needs_ocr = True
             logger.debug(f"Document {doc_id} needs OCR: {needs_ocr}")
 
             # Prepare request headers
@@ -199,3 +199,62 @@ def resolve_single_oc_model_from_id(
         # raise PermissionDenied(f"Access denied or object not found for {model_type.__name__} ID: {graphql_id}")
 
     return obj
+
+
+def resolve_bulk_doc_annotations_queryset(
+    user: AnonymousUser | User,
+    corpus_pk: int | str,
+    document_pk: int | str | None = None,
+    analysis_pks: list[int] | None = None,
+    label_type: str | None = None,
+) -> QuerySet:
+    """
+    Base queryset behind bulk (non-paginated) annotation fetches for a document in a
+    corpus. Shared by the GraphQL ``bulkDocAnnotationsInCorpus`` resolver and the
+    streaming annotation endpoint so both apply identical visibility rules.
+
+    Annotations with no corpus FK travel with the document and are always included.
+    """
+    from opencontractserver.annotations.models import Annotation
+
+    # Get the base queryset first (only stuff given user CAN see)
+    if user.is_superuser:
+        queryset = Annotation.objects.all()
+    elif user.is_anonymous:
+        queryset = Annotation.objects.filter(Q(is_public=True))
+    else:
+        queryset = Annotation.objects.filter(Q(creator=user) | Q(is_public=True))
+
+    q_objects = Q(corpus_id=corpus_pk) | Q(corpus_id__isnull=True)
+
+    if analysis_pks is not None:
+        q_objects.add(Q(analysis_id__in=analysis_pks), Q.AND)
+
+    if label_type is not None:
+        q_objects.add(Q(annotation_label__label_type=label_type), Q.AND)
+
+    if document_pk is not None:
+        q_objects.add(Q(document_id=document_pk), Q.AND)
+
+    return queryset.filter(q_objects)
+
+
+def resolve_bulk_doc_relationships_queryset(
+    user: AnonymousUser | User,
+    corpus_pk: int | str,
+    document_pk: int | str,
+) -> QuerySet:
+    """
+    Base queryset of relationships for a document in a corpus visible to ``user``.
+    Shared by ``bulkDocRelationshipsInCorpus`` and the streaming annotation endpoint.
+    """
+    from opencontractserver.annotations.models import Relationship
+
+    if user.is_superuser:
+        queryset = Relationship.objects.all()
+    elif user.is_anonymous:
+        queryset = Relationship.objects.filter(Q(is_public=True))
+    else:
+        queryset = Relationship.objects.filter(Q(creator=user) | Q(is_public=True))
+
+    return queryset.filter(corpus_id=corpus_pk, document_id=document_pk)
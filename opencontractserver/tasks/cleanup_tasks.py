@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 
 from config import celery_app
 from opencontractserver.utils.cleanup import delete_analysis_and_annotations
+from opencontractserver.utils.parser_cache import evict_parser_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -19,3 +20,9 @@ def delete_analysis_and_annotations_task(analysis_pk: int | str = -1) -> bool:
     return delete_analysis_and_annotations(
         analysis_pk=analysis_pk,
     )
+
+
+@celery_app.task()
+def evict_parser_cache_task() -> int:
+    """Applies the parser output cache's age and size limits (schedule via beat)."""
+    return evict_parser_cache()
@@ -91,6 +91,143 @@ def get_column_extraction_params(datacell):
     )
 
 
+DOC_EXTRACT_QUERY_TASK = (
+    "opencontractserver.tasks.data_extract_tasks.doc_extract_query_task"
+)
+
+EXTRACTION_SYSTEM_PROMPT = [
+    "You are a precise data extraction agent.",
+    "Extract ONLY the requested information from the document.",
+    "If the information is not present, return None rather than guessing.",
+]
+
+
+def column_can_be_grouped(column) -> bool:
+    """Whether *column* can be answered by ``doc_extract_fieldset_task``."""
+    return column.task_name == DOC_EXTRACT_QUERY_TASK and bool(
+        column.query or column.match_text
+    )
+
+
+class InvalidColumnValue:
+    """Placeholder for a column whose part of a grouped answer failed validation."""
+
+    def __init__(self, raw, error: str):
+        self.raw = raw
+        self.error = error
+
+
+def _keep_invalid(value, handler):
+    from pydantic import ValidationError
+
+    try:
+        return handler(value)
+    except ValidationError as e:
+        return InvalidColumnValue(value, str(e))
+
+
+def _column_field_name(column) -> str:
+    return f"column_{column.id}"
+
+
+def _column_description(column) -> str:
+    parts = [column.query or column.match_text]
+    if column.instructions:
+        parts.append(f"Additional instructions: {column.instructions}")
+    if column.match_text and "|||" in column.match_text:
+        examples = [ex.strip() for ex in column.match_text.split("|||") if ex.strip()]
+        parts.append("Example values: " + "; ".join(examples))
+    if column.must_contain_text:
+        parts.append(
+            f"Only use passages containing the text: '{column.must_contain_text}'"
+        )
+    if column.limit_to_label:
+        parts.append(f"Only use annotations labeled as: '{column.limit_to_label}'")
+    return "\n".join(parts)
+
+
+def build_fieldset_output_model(columns):
+    """
+    Build one structured-output schema answering every column in *columns*.
+
+    Each column becomes an optional ``{value, sources}`` object. A column whose
+    object fails validation is replaced by an ``InvalidColumnValue`` instead of
+    failing the whole answer, so only that column needs a second call.
+    """
+    from typing import Annotated, Optional, get_origin
+
+    from pydantic import Field, WrapValidator, create_model
+
+    from opencontractserver.utils.etl import parse_model_or_primitive
+
+    fields = {}
+    for column in columns:
+        output_type = parse_model_or_primitive(column.output_type)
+        if column.extract_is_list and get_origin(output_type) is not list:
+            output_type = list[output_type]
+
+        column_model = create_model(
+            f"Column{column.id}Answer",
+            value=(
+                Optional[output_type],
+                Field(None, description=_column_description(column)),
+            ),
+            sources=(
+                list[int],
+                Field(
+                    default_factory=list,
+                    description="IDs of the passages the value was taken from",
+                ),
+            ),
+        )
+        fields[_column_field_name(column)] = (
+            Annotated[Optional[column_model], WrapValidator(_keep_invalid)],
+            Field(None, title=column.name),
+        )
+    return create_model("FieldsetAnswer", **fields)
+
+
+def _datacell_data(result) -> dict:
+    from pydantic import BaseModel
+
+    if isinstance(result, BaseModel):
+        return {"data": result.model_dump()}
+    if isinstance(result, list) and result and isinstance(result[0], BaseModel):
+        return {"data": [item.model_dump() for item in result]}
+    return {"data": result}
+
+
+async def _retrieve_shared_passages(
+    document, corpus_id, user_id, queries, similarity_top_k
+) -> dict:
+    """One vector search per distinct column query, deduplicated by annotation."""
+    from opencontractserver.llms.vector_stores.core_vector_stores import (
+        CoreAnnotationVectorStore,
+        VectorSearchQuery,
+    )
+
+    passages = {}
+    try:
+        store = CoreAnnotationVectorStore(
+            user_id=user_id,
+            corpus_id=corpus_id,
+            document_id=document.id,
+            embedder_path=None if corpus_id else settings.DEFAULT_EMBEDDER,
+        )
+        for query in dict.fromkeys(queries):
+            results = await store.async_search(
+                VectorSearchQuery(query_text=query, similarity_top_k=similarity_top_k)
+            )
+            for result in results:
+                passages.setdefault(result.annotation.id, result.annotation.raw_text)
+    except Exception as e:
+        logger.warning(
+            f"Shared retrieval failed for document {document.id}; "
+            f"extracting without pre-fetched passages: {e}"
+        )
+    return passages
+
+
 @celery_task_with_async_to_sync()
 async def doc_extract_query_task(
     cell_id: int, similarity_top_k: int = 10, max_token_length: int = 64000
@@ -104,7 +241,6 @@ async def doc_extract_query_task(
     from typing import get_origin
 
     from django.utils import timezone
-    from pydantic import BaseModel
 
     from opencontractserver.llms import agents
     from opencontractserver.llms.types import AgentFramework
@@ -188,11 +324,7 @@ async def doc_extract_query_task(
             raise ValueError("Column must have either query or match_text!")
 
         # 4. Build system prompt with constraints
-        system_prompt_parts = [
-            "You are a precise data extraction agent.",
-            "Extract ONLY the requested information from the document.",
-            "If the information is not present, return None rather than guessing.",
-        ]
+        system_prompt_parts = list(EXTRACTION_SYSTEM_PROMPT)
 
         # Add must_contain_text constraint
         if column.must_contain_text:
@@ -253,17 +385,7 @@ async def doc_extract_query_task(
 
         # 7. Process and save results
         if result is not None:
-            # Convert result to saveable format
-            if isinstance(result, BaseModel):
-                data = {"data": result.model_dump()}
-            elif (
-                isinstance(result, list) and result and isinstance(result[0], BaseModel)
-            ):
-                data = {"data": [item.model_dump() for item in result]}
-            else:
-                data = {"data": result}
-
-            await sync_mark_completed(datacell, data)
+            await sync_mark_completed(datacell, _datacell_data(result))
             logger.info(f"Successfully extracted data for cell {cell_id}")
 
             # Note: The new API doesn't expose sources directly in structured_response
@@ -288,6 +410,150 @@ async def doc_extract_query_task(
         raise
 
 
+@celery_task_with_async_to_sync()
+async def doc_extract_fieldset_task(
+    cell_ids: list[int], similarity_top_k: int = 10
+) -> None:
+    """
+    Fill several datacells of one document with a single structured LLM call.
+
+    The columns' queries share one retrieval pass whose passages are given to
+    the model with their annotation IDs; each column's answer cites the IDs it
+    used, which become that datacell's sources. Columns missing from the
+    answer or failing validation fall back to ``doc_extract_query_task``.
+    """
+    import traceback
+
+    from opencontractserver.llms import agents
+
+    @sync_to_async
+    def sync_get_datacells():
+        return list(
+            Datacell.objects.select_related(
+                "extract", "column", "document", "creator"
+            ).filter(pk__in=cell_ids)
+        )
+
+    @sync_to_async
+    def sync_mark_started(cells):
+        Datacell.objects.filter(pk__in=[cell.pk for cell in cells]).update(
+            started=timezone.now()
+        )
+
+    @sync_to_async
+    def sync_get_corpus_id(document):
+        corpus = document.corpus_set.first()
+        return corpus.id if corpus else None
+
+    @sync_to_async
+    def sync_mark_completed(cell, data, source_ids):
+        cell.data = data
+        cell.completed = timezone.now()
+        cell.save()
+        if source_ids:
+            cell.sources.add(*source_ids)
+
+    @sync_to_async
+    def sync_mark_failed(cell, error, tb):
+        cell.stacktrace = f"Error: {error}\n\nTraceback:\n{tb}"
+        cell.failed = timezone.now()
+        cell.save()
+
+    datacells = await sync_get_datacells()
+    if not datacells:
+        return
+    await sync_mark_started(datacells)
+
+    document = datacells[0].document
+    user_id = datacells[0].creator.id
+    columns = [cell.column for cell in datacells]
+    retry_cells = []
+
+    try:
+        corpus_id = await sync_get_corpus_id(document)
+        passages = await _retrieve_shared_passages(
+            document,
+            corpus_id,
+            user_id,
+            [column.query or column.match_text for column in columns],
+            similarity_top_k,
+        )
+
+        output_model = build_fieldset_output_model(columns)
+        prompt = (
+            "Extract each of the following fields from the document. Set a "
+            "field's value to null if the document does not contain it, and "
+            "list the IDs of the passages you used in its sources.\n\n"
+            + "\n".join(
+                f"- {column.name}: {column.query or column.match_text}"
+                for column in columns
+            )
+        )
+        extra_context = None
+        if passages:
+            extra_context = "Relevant passages:\n\n" + "\n\n".join(
+                f"[{annotation_id}] {text}" for annotation_id, text in passages.items()
+            )
+
+        logger.info(
+            f"Extracting {len(columns)} columns from document {document.id} "
+            f"in one call ({len(passages)} shared passages)"
+        )
+        result = await agents.get_structured_response_from_document(
+            document=document.id,
+            corpus=corpus_id,
+            prompt=prompt,
+            target_type=output_model,
+            framework=AgentFramework.PYDANTIC_AI,
+            system_prompt="\n".join(EXTRACTION_SYSTEM_PROMPT),
+            extra_context=extra_context,
+            temperature=0.3,
+            similarity_top_k=similarity_top_k,
+            model="gpt-4o-mini",
+            user_id=user_id,
+        )
+
+        if result is None:
+            logger.warning(
+                f"Grouped extraction failed for document {document.id}; "
+                f"falling back to per-column extraction"
+            )
+            retry_cells = datacells
+        else:
+            for cell in datacells:
+                answer = getattr(result, _column_field_name(cell.column))
+                if answer is None or isinstance(answer, InvalidColumnValue):
+                    retry_cells.append(cell)
+                elif answer.value is None:
+                    await sync_mark_failed(
+                        cell,
+                        "Failed to extract requested data from document",
+                        "The grouped extraction returned None - the requested "
+                        "information may not be present in the document.",
+                    )
+                else:
+                    source_ids = [i for i in answer.sources if i in passages]
+                    await sync_mark_completed(
+                        cell, _datacell_data(answer.value), source_ids
+                    )
+
+    except Exception as e:
+        logger.exception(f"Grouped extraction error for cells {cell_ids}: {e}")
+        tb = traceback.format_exc()
+        for cell in datacells:
+            await sync_mark_failed(cell, e, tb)
+        raise
+
+    for cell in retry_cells:
+        try:
+            await doc_extract_query_task._async_func(
+                cell.pk, similarity_top_k=similarity_top_k
+            )
+        except Exception:
+            # Already recorded on the datacell by doc_extract_query_task
+            pass
+
+
 @shared_task
 def llama_index_react_agent_query(cell_id):
     """
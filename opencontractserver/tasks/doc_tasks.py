@@ -5,23 +5,29 @@ import json
 import logging
 from typing import Any
 
-from celery import shared_task
+from celery import chord, group, shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from pydantic import validate_arguments
 
 from config import celery_app
 from opencontractserver.annotations.models import TOKEN_LABEL, Annotation
+from opencontractserver.annotations.signals import (
+    defer_structural_annotation_embeddings,
+)
 from opencontractserver.documents.models import Document
 from opencontractserver.pipeline.base.thumbnailer import BaseThumbnailGenerator
 from opencontractserver.pipeline.utils import (
     get_component_by_name,
     get_components_by_mimetype,
 )
+from opencontractserver.tasks.embeddings_task import embed_structural_annotations
 from opencontractserver.types.dicts import (
     AnnotationLabelPythonType,
     FunsdAnnotationType,
@@ -31,8 +37,24 @@ from opencontractserver.types.dicts import (
     PawlsTokenPythonType,
 )
 from opencontractserver.types.enums import AnnotationFilterMode
+from opencontractserver.utils.document_dedup import (
+    copy_parse_artifacts,
+    find_reusable_document,
+)
 from opencontractserver.utils.etl import build_document_export, pawls_bbox_to_funsd_box
 from opencontractserver.utils.files import split_pdf_into_images
+from opencontractserver.utils.ingest_timings import (
+    record_ingest_stage,
+    store_ingest_stage_timing,
+)
+from opencontractserver.utils.page_index import build_page_index
+from opencontractserver.utils.pdf_shards import (
+    count_pdf_pages,
+    merge_parsed_shards,
+    plan_page_shards,
+    shard_path,
+    write_pdf_page_range,
+)
 
 logger = get_task_logger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -55,7 +77,112 @@ def set_doc_lock_state(*args, locked: bool, doc_id: int):
     document = Document.objects.get(pk=doc_id)
     document.backend_lock = locked
     document.processing_finished = timezone.now()
-    document.save()
+    document.save(update_fields=["backend_lock", "processing_finished", "modified"])
+
+    if not locked and document.processing_started:
+        store_ingest_stage_timing(
+            doc_id,
+            "total",
+            document.processing_started,
+            (
+                document.processing_finished - document.processing_started
+            ).total_seconds(),
+        )
+
+
+def build_ingest_graph(user_id: int, doc_id: int, source_doc_id: int | None = None):
+    """
+    Celery canvas that ingests a new document as a small dependency graph:
+
+        (thumbnail || parse) -> (embed structural annotations || page index) -> unlock
+
+    The thumbnail doesn't wait for the parser (nor the reverse), and the
+    structural annotations the parse creates are embedded before the document
+    is unlocked. With *source_doc_id*, that document's parse is copied in
+    place of the thumbnail and parse stages (see reuse_document_parse).
+    Each stage records its timing on Document.processing_timings.
+    """
+    if source_doc_id is not None:
+        parse_stage = [
+            reuse_document_parse.si(
+                user_id=user_id, doc_id=doc_id, source_doc_id=source_doc_id
+            )
+        ]
+    else:
+        parse_stage = [
+            extract_thumbnail.si(doc_id=doc_id),
+            ingest_doc.si(
+                user_id=user_id, doc_id=doc_id, defer_structural_embeddings=True
+            ),
+        ]
+
+    return chord(
+        group(parse_stage),
+        chord(
+            group(
+                embed_structural_annotations.si(doc_id=doc_id),
+                build_doc_page_index.si(doc_id=doc_id),
+            ),
+            set_doc_lock_state.si(locked=False, doc_id=doc_id),
+        ),
+    )
+
+
+def start_document_ingest(documents: list[Document]) -> None:
+    """
+    Marks new *documents* as processing and starts their ingest graphs once
+    the current transaction commits. Saving a new Document does this through
+    process_doc_on_create_atomic; code that bulk_creates documents (which sends
+    no post_save) calls it directly. A document whose creator can see an
+    identical, processed document reuses that parse unless it was created
+    with ``reuse_existing_parse = False``.
+    """
+    if not documents:
+        return
+
+    ingest_graphs = []
+    for document in documents:
+        reusable = None
+        if document.reuse_existing_parse:
+            reusable = find_reusable_document(
+                document.creator,
+                document.file_sha256,
+                document.file_type,
+                exclude_id=document.id,
+            )
+        ingest_graphs.append(
+            build_ingest_graph(
+                user_id=document.creator_id,
+                doc_id=document.id,
+                source_doc_id=reusable.id if reusable is not None else None,
+            )
+        )
+
+    processing_started = timezone.now()
+    for document in documents:
+        document.processing_started = processing_started
+    Document.objects.filter(pk__in=[document.pk for document in documents]).update(
+        processing_started=processing_started
+    )
+
+    def apply_ingest_graphs():
+        for ingest_graph in ingest_graphs:
+            ingest_graph.apply_async()
+
+    transaction.on_commit(apply_ingest_graphs)
+
+
+@shared_task()
+def build_doc_page_index(doc_id: int) -> None:
+    """
+    Page stage of the ingest graph: warms the viewer's per-page annotation
+    index now that the parse has written its annotations.
+    """
+    with record_ingest_stage(doc_id, "page_index"):
+        try:
+            build_page_index(document_id=doc_id)
+        except Exception as e:
+            logger.warning(f"Could not warm page index for doc {doc_id}: {e}")
 
 
 @shared_task(
@@ -63,13 +190,24 @@ def set_doc_lock_state(*args, locked: bool, doc_id: int):
     autoretry_for=(Exception,),
     retry_kwargs={"max_retries": 3, "countdown": 60},
 )
-def ingest_doc(self, user_id: int, doc_id: int) -> None:
+def ingest_doc(
+    self, user_id: int, doc_id: int, defer_structural_embeddings: bool = False
+) -> None:
     """
     Ingests a document using the appropriate parser based on the document's MIME type.
     The parser class is determined using get_component_by_name.
     If there is a dict in settings named <parser_name>_kwargs, it is passed to the parser
     as keyword arguments.
 
+    PDFs with more pages than the parser's page shard threshold (see
+    BaseParser.get_page_shard_settings) are split into page ranges that are
+    parsed in parallel (parse_doc_shard) and merged before saving
+    (merge_doc_shards); this task is replaced by that chord.
+
+    Inside the ingest graph (build_ingest_graph) defer_structural_embeddings
+    is set: the parsed structural annotations are then embedded by the graph's
+    embed stage instead of one post_save task per annotation.
+
     This Celery task will retry up to 3 times (with a 60-second wait between attempts)
     in case of transient errors or exceptions.
 
@@ -77,6 +215,8 @@ def ingest_doc(self, user_id: int, doc_id: int) -> None:
         self: Celery task instance (passed automatically when bind=True).
         user_id (int): The ID of the user.
         doc_id (int): The ID of the document to ingest.
+        defer_structural_embeddings (bool): Leave embedding the structural
+            annotations to the ingest graph's embed stage.
 
     Raises:
         ValueError: If no parser is defined for the document's MIME type.
@@ -112,9 +252,45 @@ def ingest_doc(self, user_id: int, doc_id: int) -> None:
         logger.error(f"Failed to load parser '{parser_name}': {e}")
         raise
 
+    # Large PDFs are parsed as page-range shards in parallel, then merged
+    # (unless process_document can replay a cached parse)
+    shards = []
+    if not parser_instance.has_cached_parse(doc_id, **parser_kwargs):
+        shards = _plan_doc_shards(document, parser_instance)
+    if shards:
+        logger.info(
+            f"[ingest_doc] Parsing doc {doc_id} in {len(shards)} page shards "
+            f"with '{parser_name}'"
+        )
+        return self.replace(
+            chord(
+                group(
+                    parse_doc_shard.si(
+                        user_id=user_id,
+                        doc_id=doc_id,
+                        parser_name=parser_name,
+                        start_page=start_page,
+                        end_page=end_page,
+                        parser_kwargs=parser_kwargs,
+                    )
+                    for start_page, end_page in shards
+                ),
+                merge_doc_shards.s(
+                    user_id=user_id,
+                    doc_id=doc_id,
+                    parser_name=parser_name,
+                    parser_kwargs=parser_kwargs,
+                    defer_structural_embeddings=defer_structural_embeddings,
+                ),
+            )
+        )
+
     # Call the parser's process_document method
     try:
-        parser_instance.process_document(user_id, doc_id, **parser_kwargs)
+        with record_ingest_stage(
+            doc_id, "parse"
+        ), defer_structural_annotation_embeddings(defer_structural_embeddings):
+            parser_instance.process_document(user_id, doc_id, **parser_kwargs)
         logger.info(
             f"[ingest_doc] Document {doc_id} ingested successfully with '{parser_name}'"
         )
@@ -124,6 +300,150 @@ def ingest_doc(self, user_id: int, doc_id: int) -> None:
         raise
 
 
+def _plan_doc_shards(document: Document, parser_instance) -> list[tuple[int, int]]:
+    """Page ranges to parse separately, or [] to parse the document whole."""
+    threshold, shard_size = parser_instance.get_page_shard_settings()
+    if threshold < 1 or document.file_type != "application/pdf":
+        return []
+    try:
+        page_count = count_pdf_pages(document.pdf_file.name)
+    except Exception as e:
+        logger.warning(
+            f"[ingest_doc] Could not count pages of doc {document.id}, "
+            f"parsing it whole: {e}"
+        )
+        return []
+    return plan_page_shards(page_count, threshold, shard_size)
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def parse_doc_shard(
+    self,
+    user_id: int,
+    doc_id: int,
+    parser_name: str,
+    start_page: int,
+    end_page: int,
+    parser_kwargs: dict,
+) -> dict | None:
+    """
+    Parses pages [start_page, end_page) of a document's PDF on their own. The
+    export is written to storage (keeping large parses out of the result
+    backend); returns where, or None if the parser returned nothing.
+    """
+    document = Document.objects.get(pk=doc_id)
+    parser_instance = get_component_by_name(parser_name)()
+
+    with record_ingest_stage(doc_id, f"parse_pages_{start_page}-{end_page}"):
+        pdf_path = write_pdf_page_range(
+            document.pdf_file.name,
+            start_page,
+            end_page,
+            shard_path(doc_id, start_page, end_page, "pdf"),
+        )
+        try:
+            parsed = parser_instance.parse_document(
+                user_id, doc_id, pdf_path=pdf_path, **parser_kwargs
+            )
+        finally:
+            default_storage.delete(pdf_path)
+
+    if parsed is None:
+        logger.warning(
+            f"[parse_doc_shard] Parsing pages {start_page}-{end_page} of doc "
+            f"{doc_id} failed."
+        )
+        return None
+
+    result_path = shard_path(doc_id, start_page, end_page, "json")
+    if default_storage.exists(result_path):
+        default_storage.delete(result_path)
+    result_path = default_storage.save(
+        result_path, ContentFile(json.dumps(parsed).encode("utf-8"))
+    )
+    return {"start_page": start_page, "path": result_path}
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def merge_doc_shards(
+    self,
+    shard_results: list[dict | None],
+    user_id: int,
+    doc_id: int,
+    parser_name: str,
+    parser_kwargs: dict | None = None,
+    defer_structural_embeddings: bool = False,
+) -> None:
+    """
+    Merges the shard exports of parse_doc_shard into one document export,
+    caches it like a whole-document parse and saves it with the parser's
+    save_parsed_data. If any shard failed nothing is saved, as when parsing a
+    whole document fails.
+    """
+    result_paths = [result["path"] for result in shard_results if result]
+    if len(result_paths) < len(shard_results):
+        logger.warning(
+            f"[merge_doc_shards] {len(shard_results) - len(result_paths)} of "
+            f"{len(shard_results)} shards of doc {doc_id} failed to parse."
+        )
+    else:
+        shards = []
+        for result in sorted(shard_results, key=lambda r: r["start_page"]):
+            with default_storage.open(result["path"], "rb") as result_file:
+                shards.append((result["start_page"], json.load(result_file)))
+
+        parser_instance = get_component_by_name(parser_name)()
+        with record_ingest_stage(
+            doc_id, "merge_shards"
+        ), defer_structural_annotation_embeddings(defer_structural_embeddings):
+            merged = merge_parsed_shards(shards)
+            parser_instance.cache_parse(doc_id, merged, **(parser_kwargs or {}))
+            parser_instance.save_parsed_data(user_id, doc_id, merged)
+        logger.info(
+            f"[merge_doc_shards] Document {doc_id} ingested from {len(shards)} "
+            f"shards with '{parser_name}'"
+        )
+
+    # Kept on errors above so a retry can still read them
+    for path in result_paths:
+        default_storage.delete(path)
+
+
+@shared_task(bind=True)
+def reuse_document_parse(self, user_id: int, doc_id: int, source_doc_id: int):
+    """
+    Stands in for extract_thumbnail + ingest_doc when an identical, already
+    processed document (source_doc_id) exists: copies its parse onto doc_id.
+    Falls back to the regular thumbnail + ingest tasks if the copy fails.
+    """
+    try:
+        with record_ingest_stage(doc_id, "reuse_parse"):
+            document = Document.objects.get(pk=doc_id)
+            source = Document.objects.get(pk=source_doc_id)
+            copy_parse_artifacts(source, document, user_id)
+    except Exception as e:
+        logger.warning(
+            f"[reuse_document_parse] Could not reuse parse of doc {source_doc_id} "
+            f"for doc {doc_id}, ingesting it instead: {e}"
+        )
+        return self.replace(
+            group(
+                extract_thumbnail.si(doc_id=doc_id),
+                ingest_doc.si(
+                    user_id=user_id, doc_id=doc_id, defer_structural_embeddings=True
+                ),
+            )
+        )
+
+
 @celery_app.task()
 @validate_arguments
 def burn_doc_annotations(
@@ -375,7 +695,8 @@ def extract_thumbnail(self, doc_id: int) -> None:
 
     try:
         thumbnailer: BaseThumbnailGenerator = thumbnailer_class()
-        thumbnail_file = thumbnailer.generate_thumbnail(doc_id)
+        with record_ingest_stage(doc_id, "thumbnail"):
+            thumbnail_file = thumbnailer.generate_thumbnail(doc_id)
         if thumbnail_file:
             logger.info(
                 f"[extract_thumbnail] Thumbnail extracted and saved for doc {doc_id}"
@@ -11,7 +11,11 @@ from opencontractserver.annotations.models import Annotation, Note
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.documents.models import Document
 from opencontractserver.pipeline.utils import get_default_embedder
-from opencontractserver.utils.embeddings import generate_embeddings_from_text
+from opencontractserver.utils.embeddings import (
+    generate_embeddings_from_text,
+    get_embedder,
+)
+from opencontractserver.utils.ingest_timings import record_ingest_stage
 
 User = get_user_model()
 
@@ -79,6 +83,105 @@ def calculate_embedding_for_annotation_text(
         logger.warning(f"Annotation {annotation_id} not found.")
         return
 
+    _embed_annotation(annotation, embedder_path)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def calculate_embeddings_for_annotations(
+    self, annotation_ids: list[Union[str, int]], embedder_path: str = None
+) -> None:
+    """
+    Calculate embeddings for a batch of annotations created together (e.g. by a
+    bulk_create, which skips the per-annotation post_save task). Annotations are
+    loaded in one query and a failure only retries the annotations that failed.
+
+    Args:
+        self: (Celery task instance, passed automatically when bind=True)
+        annotation_ids (list[str | int]): IDs of the annotations
+        embedder_path (str, optional): Optional explicit embedder path to use
+    """
+    annotations = Annotation.objects.in_bulk(annotation_ids)
+    logger.info(
+        f"Embedding {len(annotations)} of {len(annotation_ids)} requested annotations"
+    )
+
+    failed = []
+    for annotation in annotations.values():
+        try:
+            _embed_annotation(annotation, embedder_path)
+        except Exception as e:
+            logger.error(f"Failed to embed annotation {annotation.pk}: {e}")
+            failed.append(annotation.pk)
+
+    if failed:
+        raise self.retry(args=[failed, embedder_path])
+
+
+# Annotations per calculate_embeddings_for_annotations task
+ANNOTATION_EMBEDDING_BATCH_SIZE = 100
+
+
+def queue_annotation_embeddings(
+    annotation_ids: list[Union[str, int]],
+    batch_size: int = ANNOTATION_EMBEDDING_BATCH_SIZE,
+) -> None:
+    """
+    Queue calculate_embeddings_for_annotations for bulk-created annotations,
+    at most *batch_size* annotations per task. Call it from
+    transaction.on_commit so the workers can load the annotations.
+    """
+    for offset in range(0, len(annotation_ids), batch_size):
+        calculate_embeddings_for_annotations.delay(
+            annotation_ids[offset : offset + batch_size]
+        )
+
+
+@shared_task()
+def embed_structural_annotations(doc_id: Union[str, int]) -> None:
+    """
+    Embed stage of the ingest graph: embeds the document's structural
+    annotations that lack an embedding from the default embedder or from the
+    preferred embedder of a corpus the document is in. Failures don't hold
+    up the rest of the graph; those annotations are retried by a separate
+    calculate_embeddings_for_annotations task.
+
+    Args:
+        doc_id (str | int): ID of the document.
+    """
+    with record_ingest_stage(doc_id, "embed_structural_annotations") as stage:
+        embedder_paths = {get_embedder()[1]}
+        for preferred_embedder in Corpus.objects.filter(documents=doc_id).values_list(
+            "preferred_embedder", flat=True
+        ):
+            embedder_paths.add(
+                preferred_embedder or getattr(settings, "DEFAULT_EMBEDDER", None)
+            )
+        embedder_paths.discard(None)
+
+        embedded = 0
+        for embedder_path in sorted(embedder_paths):
+            annotations = Annotation.objects.filter(
+                document_id=doc_id, structural=True
+            ).exclude(embedding_set__embedder_path=embedder_path)
+
+            failed = []
+            for annotation in annotations.iterator():
+                try:
+                    _embed_annotation(annotation, embedder_path)
+                    embedded += 1
+                except Exception as e:
+                    logger.error(f"Failed to embed annotation {annotation.pk}: {e}")
+                    failed.append(annotation.pk)
+
+            if failed:
+                calculate_embeddings_for_annotations.delay(failed, embedder_path)
+
+        stage["annotations"] = embedded
+        logger.info(f"Embedded {embedded} structural annotations of doc {doc_id}")
+
+
+def _embed_annotation(annotation: Annotation, embedder_path: str = None) -> None:
+    annotation_id = annotation.pk
     corpus_id = annotation.corpus_id  # if your annotation references a corpus
     logger.info(f"Processing annotation {annotation_id} with corpus_id {corpus_id}")
 
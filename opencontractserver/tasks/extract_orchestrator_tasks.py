@@ -1,12 +1,21 @@
+import asyncio
 import logging
 from typing import Optional
 
+from asgiref.sync import sync_to_async
 from celery import chord, group, shared_task
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from opencontractserver.documents.models import DocumentAnalysisRow
 from opencontractserver.extracts.models import Datacell, Extract
+from opencontractserver.shared.decorators import celery_task_with_async_to_sync
+from opencontractserver.tasks.data_extract_tasks import (
+    column_can_be_grouped,
+    doc_extract_fieldset_task,
+    doc_extract_query_task,
+)
 from opencontractserver.types.enums import PermissionTypes
 from opencontractserver.utils.celery_tasks import get_task_by_name
 from opencontractserver.utils.permissioning import set_permissions_for_obj_to_user
@@ -21,6 +30,38 @@ def mark_extract_complete(extract_id):
     extract.save()
 
 
+@celery_task_with_async_to_sync()
+async def run_extract_batch(units: list[tuple[str, list]]) -> None:
+    """
+    Run a batch of extraction tasks concurrently inside this worker.
+
+    An LLM-bound cell spends nearly all its time waiting on the provider, so
+    instead of one Celery slot per cell we run up to
+    ``EXTRACT_ASYNC_CONCURRENCY`` of them on one event loop. Provider limits
+    are enforced by the shared LLM rate limiter, not by worker count.
+    """
+    semaphore = asyncio.Semaphore(
+        max(1, getattr(settings, "EXTRACT_ASYNC_CONCURRENCY", 16))
+    )
+
+    async def run(task_name: str, args: list) -> None:
+        task_func = get_task_by_name(task_name)
+        if task_func is None:
+            logger.error(f"Task {task_name} not found")
+            return
+        async with semaphore:
+            try:
+                if hasattr(task_func, "_async_func"):
+                    await task_func._async_func(*args)
+                else:
+                    await sync_to_async(task_func, thread_sensitive=False)(*args)
+            except Exception as e:
+                # The task records its own failure on the datacell(s)
+                logger.warning(f"{task_name}{tuple(args)} failed: {e}")
+
+    await asyncio.gather(*(run(task_name, args) for task_name, args in units))
+
+
 @shared_task
 def run_extract(extract_id: Optional[str | int], user_id: str | int):
     logger.info(f"Run extract for extract {extract_id}")
@@ -42,9 +83,14 @@ def run_extract(extract_id: Optional[str | int], user_id: str | int):
     document_ids = extract.documents.all().values_list("id", flat=True)
     logger.info(f"Found {len(document_ids)} documents to process: {list(document_ids)}")
 
-    tasks = []
+    # (task name, args) for every unit of work
+    units: list[tuple[str, list]] = []
     logger.info(f"Beginning document processing loop for extract {extract.id}")
 
+    columns = list(fieldset.columns.all())
+    # Columns answered together in one structured call per document
+    group_columns = getattr(settings, "EXTRACT_GROUP_FIELDSET_COLUMNS", False)
+
     for document_id in document_ids:
         logger.info(f"Processing document ID: {document_id} for extract {extract.id}")
 
@@ -53,7 +99,9 @@ def run_extract(extract_id: Optional[str | int], user_id: str | int):
         )
         row_results.save()
 
-        for column in fieldset.columns.all():
+        grouped_cell_ids = []
+
+        for column in columns:
 
             with transaction.atomic():
                 cell = Datacell.objects.create(
@@ -69,6 +117,10 @@ def run_extract(extract_id: Optional[str | int], user_id: str | int):
                 # Add data cell to tracking
                 row_results.data.add(cell)
 
+                if group_columns and column_can_be_grouped(column):
+                    grouped_cell_ids.append(cell.pk)
+                    continue
+
                 # Get the task function dynamically based on the column's task_name
                 task_func = get_task_by_name(column.task_name)
                 if task_func is None:
@@ -78,7 +130,22 @@ def run_extract(extract_id: Optional[str | int], user_id: str | int):
                     continue
 
                 # Add the task to the group
-                tasks.append(task_func.si(cell.pk))
+                units.append((column.task_name, [cell.pk]))
+
+        if len(grouped_cell_ids) > 1:
+            units.append((doc_extract_fieldset_task.name, [grouped_cell_ids]))
+        elif grouped_cell_ids:
+            units.append((doc_extract_query_task.name, [grouped_cell_ids[0]]))
+
+    if getattr(settings, "EXTRACT_ASYNC_EXECUTOR", False):
+        # Many cells per Celery task, run concurrently on one event loop
+        batch_size = max(1, getattr(settings, "EXTRACT_ASYNC_BATCH_SIZE", 50))
+        tasks = [
+            run_extract_batch.si(units[start : start + batch_size])
+            for start in range(0, len(units), batch_size)
+        ]
+    else:
+        tasks = [get_task_by_name(name).si(*args) for name, args in units]
 
     chord(group(*tasks))(mark_extract_complete.si(extract_id))
     logger.info(f"Extract processing initiated for extract {extract.id}")
@@ -1,14 +1,23 @@
 import base64
+import hashlib
 import json
 import logging
 import pathlib
+import uuid
 import zipfile
+from functools import partial
 from typing import Optional
 
 import filetype
+from celery import chord, group
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, FileField, TextField, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
 
 from config import celery_app
 from opencontractserver.annotations.models import (
@@ -16,21 +25,33 @@ from opencontractserver.annotations.models import (
     METADATA_LABEL,
     TOKEN_LABEL,
     Annotation,
+    AnnotationLabel,
 )
 from opencontractserver.corpuses.models import Corpus, TemporaryFileHandle
 from opencontractserver.documents.models import Document
+from opencontractserver.tasks.doc_tasks import extract_thumbnail, start_document_ingest
 from opencontractserver.types.dicts import (
+    OpenContractDocExport,
     OpenContractsAnnotatedDocumentImportType,
     OpenContractsExportDataJsonPythonType,
 )
 from opencontractserver.types.enums import PermissionTypes
+from opencontractserver.users.models import UserImport
 from opencontractserver.utils.files import is_plaintext_content
-from opencontractserver.utils.importing import import_annotations, load_or_create_labels
+from opencontractserver.utils.importing import (
+    bulk_import_annotations,
+    import_annotations,
+    load_or_create_labels,
+)
+from opencontractserver.utils.job_progress import add_job_progress, init_job_progress
 from opencontractserver.utils.packaging import (
     unpack_corpus_from_export,
     unpack_label_set_from_export,
 )
-from opencontractserver.utils.permissioning import set_permissions_for_obj_to_user
+from opencontractserver.utils.permissioning import (
+    grant_permissions_for_new_objs_to_user,
+    set_permissions_for_obj_to_user,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -38,10 +59,22 @@ logger.setLevel(logging.DEBUG)
 User = get_user_model()
 
 
-@celery_app.task()
+@celery_app.task(bind=True)
 def import_corpus(
-    temporary_file_handle_id: str | int, user_id: int, seed_corpus_id: Optional[int]
+    self,
+    temporary_file_handle_id: str | int,
+    user_id: int,
+    seed_corpus_id: Optional[int],
+    user_import_id: Optional[int] = None,
 ) -> Optional[str]:
+    """
+    Imports an OpenContracts export zip. The label set, corpus and labels are created
+    once here; the documents are then split into chunks of CORPUS_IMPORT_CHUNK_SIZE
+    that are imported in parallel (import_corpus_documents) and finish_corpus_import
+    closes the job. This task is replaced by that chord, so its Celery result is still
+    the corpus id. Progress and per-document errors are recorded on the UserImport
+    *user_import_id*, if given.
+    """
     try:
         logger.info(f"import_corpus() - for user_id: {user_id}")
 
@@ -55,177 +88,394 @@ def import_corpus(
         ) as import_zip:
             logger.info("import_corpus() - Data decoded successfully")
             files = import_zip.namelist()
-            logger.info(f"import_corpus() - Raw files: {files}")
+            logger.info(f"import_corpus() - Raw files: {len(files)}")
 
-            if "data.json" in files:
-                files.remove("data.json")
-                with import_zip.open("data.json") as corpus_data:
-                    data_json: OpenContractsExportDataJsonPythonType = json.loads(
-                        corpus_data.read().decode("UTF-8")
-                    )
+            if "data.json" not in files:
+                logger.error("import_corpus() - data.json not found in import zip.")
+                _record_corpus_import_progress(
+                    user_import_id, errors=["data.json not found in import zip"]
+                )
+                _finish_user_import(user_import_id)
+                return None
 
-                    text_labels = data_json["text_labels"]
-                    doc_labels = data_json["doc_labels"]
-                    label_set_data = {**data_json["label_set"]}
-                    label_set_data.pop("id", None)
-                    corpus_data_json = {**data_json["corpus"]}
-                    corpus_data_json.pop("id", None)
+            with import_zip.open("data.json") as corpus_data:
+                data_json: OpenContractsExportDataJsonPythonType = json.loads(
+                    corpus_data.read().decode("UTF-8")
+                )
 
-                    # Create LabelSet
-                    labelset_obj = unpack_label_set_from_export(
-                        label_set_data, user_obj
-                    )
-                    logger.info(f"LabelSet created: {labelset_obj}")
-
-                    # Create Corpus
-                    corpus_kwargs = {
-                        "data": corpus_data_json,
-                        "user": user_obj,
-                        "label_set_id": labelset_obj.id,
-                        "corpus_id": seed_corpus_id if seed_corpus_id else None,
-                    }
-                    corpus_obj = unpack_corpus_from_export(**corpus_kwargs)
-                    logger.info(f"Created corpus_obj: {corpus_obj}")
-
-                    # Prepare label data
-                    existing_text_labels = {}
-                    existing_doc_labels = {}
-                    text_label_data_dict = {
-                        label_name: label_info
-                        for label_name, label_info in text_labels.items()
-                    }
-                    doc_label_data_dict = {
-                        label_name: label_info
-                        for label_name, label_info in doc_labels.items()
-                    }
-
-                    # Load or create labels
-                    existing_text_labels = load_or_create_labels(
-                        user_id=user_id,
-                        labelset_obj=labelset_obj,
-                        label_data_dict=text_label_data_dict,
-                        existing_labels=existing_text_labels,
-                    )
-                    logger.info(
-                        f"import_corpus() - existing_text_labels: {existing_text_labels}"
+        text_labels = data_json["text_labels"]
+        doc_labels = data_json["doc_labels"]
+        label_set_data = {**data_json["label_set"]}
+        label_set_data.pop("id", None)
+        corpus_data_json = {**data_json["corpus"]}
+        corpus_data_json.pop("id", None)
+
+        # Create LabelSet
+        labelset_obj = unpack_label_set_from_export(label_set_data, user_obj)
+        logger.info(f"LabelSet created: {labelset_obj}")
+
+        # Create Corpus
+        corpus_kwargs = {
+            "data": corpus_data_json,
+            "user": user_obj,
+            "label_set_id": labelset_obj.id,
+            "corpus_id": seed_corpus_id if seed_corpus_id else None,
+        }
+        corpus_obj = unpack_corpus_from_export(**corpus_kwargs)
+        logger.info(f"Created corpus_obj: {corpus_obj}")
+
+        # Load or create labels
+        existing_text_labels = load_or_create_labels(
+            user_id=user_id,
+            labelset_obj=labelset_obj,
+            label_data_dict=dict(text_labels),
+            existing_labels={},
+        )
+        logger.info(f"import_corpus() - existing_text_labels: {existing_text_labels}")
+        # This is super hacky... need to rebuild entire import / export pipeline (one day)
+        existing_doc_labels = load_or_create_labels(
+            user_id=user_id,
+            labelset_obj=labelset_obj,
+            label_data_dict=dict(doc_labels),
+            existing_labels={},
+        )
+        logger.info(f"import_corpus() - existing_doc_labels: {existing_doc_labels}")
+
+        # The chunks get the labels' ids, keyed like the export refers to them
+        label_ids = {
+            label_name: label.id
+            for label_name, label in {
+                **existing_text_labels,
+                **existing_doc_labels,
+            }.items()
+        }
+        doc_label_ids = {label.text: label.id for label in existing_doc_labels.values()}
+
+        # Each chunk reads its documents' data from its own slice of data.json
+        annotated_docs = data_json["annotated_docs"]
+        doc_filenames = list(annotated_docs)
+        chunk_size = max(1, settings.CORPUS_IMPORT_CHUNK_SIZE)
+        chunk_dir = f"corpus_imports/{uuid.uuid4()}"
+        chunk_paths = []
+        for start in range(0, len(doc_filenames), chunk_size):
+            chunk_data = {
+                doc_filename: annotated_docs[doc_filename]
+                for doc_filename in doc_filenames[start : start + chunk_size]
+            }
+            chunk_paths.append(
+                default_storage.save(
+                    f"{chunk_dir}/chunk_{len(chunk_paths)}.json",
+                    ContentFile(json.dumps(chunk_data).encode("utf-8")),
+                )
+            )
+        del data_json, annotated_docs
+
+        if user_import_id is not None:
+            UserImport.objects.filter(id=user_import_id).update(
+                started=timezone.now(),
+                corpus=corpus_obj,
+                total_documents=len(doc_filenames),
+            )
+
+    except Exception as e:
+        logger.error(f"import_corpus() - Exception encountered in corpus import: {e}")
+        _record_corpus_import_progress(user_import_id, errors=[f"Import failed: {e}"])
+        _finish_user_import(user_import_id)
+        return None
+
+    chunk_tasks = [
+        import_corpus_documents.si(
+            temporary_file_handle_id,
+            user_id,
+            corpus_obj.id,
+            chunk_path,
+            label_ids,
+            doc_label_ids,
+            user_import_id=user_import_id,
+        )
+        for chunk_path in chunk_paths
+    ]
+    finish_task = finish_corpus_import.s(corpus_obj.id, chunk_paths, user_import_id)
+    logger.info(
+        f"import_corpus() - Importing {len(doc_filenames)} documents in {len(chunk_paths)} chunks"
+    )
+    if not chunk_tasks:
+        return finish_task([])
+
+    # Called directly or eagerly, the chunks run one after the other in-process
+    # (an eager task can't wait on a chord)
+    if self.request.called_directly or self.request.is_eager:
+        return finish_task([chunk_task() for chunk_task in chunk_tasks])
+    return self.replace(chord(group(chunk_tasks), finish_task))
+
+
+@celery_app.task()
+def import_corpus_documents(
+    temporary_file_handle_id: str | int,
+    user_id: int,
+    corpus_id: int,
+    chunk_path: str,
+    label_ids: dict[str, int],
+    doc_label_ids: dict[str, int],
+    user_import_id: Optional[int] = None,
+) -> dict:
+    """
+    Imports one chunk of an import_corpus job: the documents described in the data.json
+    slice at *chunk_path*. Their PDFs are streamed from the zip into storage, then the
+    documents, their annotations and permissions are written in bulk. A document whose
+    file or annotations can't be imported is left out and its error recorded.
+
+    Imported documents already carry their parse (PAWLS layers and text), so they are
+    not sent through the ingest pipeline again; only their thumbnails are extracted.
+
+    Returns:
+        Dictionary with the chunk's counts, document ids and errors
+    """
+    results = {
+        "processed_documents": 0,
+        "failed_documents": 0,
+        "document_ids": [],
+        "errors": [],
+    }
+    docs_data: dict[str, OpenContractDocExport] = {}
+    documents = []
+
+    try:
+        with default_storage.open(chunk_path, "rb") as chunk_file:
+            docs_data = json.loads(chunk_file.read().decode("utf-8"))
+
+        temporary_file_handle = TemporaryFileHandle.objects.get(
+            id=temporary_file_handle_id
+        )
+        user_obj = User.objects.get(id=user_id)
+        corpus_obj = Corpus.objects.get(id=corpus_id)
+
+        labels = AnnotationLabel.objects.in_bulk(
+            {*label_ids.values(), *doc_label_ids.values()}
+        )
+        label_lookup = {
+            label_name: labels[label_id] for label_name, label_id in label_ids.items()
+        }
+        doc_label_lookup = {
+            label_text: labels[label_id]
+            for label_text, label_id in doc_label_ids.items()
+        }
+
+        with temporary_file_handle.file.open("rb") as import_file, zipfile.ZipFile(
+            import_file, mode="r"
+        ) as import_zip:
+            for doc_filename, doc_data in docs_data.items():
+                try:
+                    documents.append(
+                        (
+                            _corpus_export_to_document(
+                                import_zip, doc_filename, doc_data, user_obj
+                            ),
+                            doc_filename,
+                            doc_data,
+                        )
                     )
-                    # This is super hacky... need to rebuild entire import / export pipeline (one day)
-                    existing_doc_labels = load_or_create_labels(
-                        user_id=user_id,
-                        labelset_obj=labelset_obj,
-                        label_data_dict=doc_label_data_dict,
-                        existing_labels=existing_doc_labels,
+                except Exception as e:
+                    logger.error(
+                        f"import_corpus_documents() - Error loading document {doc_filename}: {e}"
                     )
-                    doc_label_lookup = {
-                        label.text: label for label in existing_doc_labels.values()
-                    }
-                    logger.info(
-                        f"import_corpus() - existing_doc_labels: {existing_doc_labels}"
+                    results["failed_documents"] += 1
+                    results["errors"].append(f"{doc_filename}: {e}")
+
+        with transaction.atomic():
+            Document.objects.bulk_create([document for document, _, _ in documents])
+            grant_permissions_for_new_objs_to_user(
+                user_obj,
+                [document for document, _, _ in documents],
+                [PermissionTypes.ALL],
+            )
+
+            imported, failed = [], []
+            for doc_obj, doc_filename, doc_data in documents:
+                try:
+                    with transaction.atomic():
+                        _import_corpus_export_annotations(
+                            user_obj,
+                            doc_obj,
+                            corpus_obj,
+                            doc_data,
+                            label_lookup,
+                            doc_label_lookup,
+                        )
+                    imported.append(doc_obj)
+                except Exception as e:
+                    logger.error(
+                        f"import_corpus_documents() - Error loading annotations of {doc_filename}: {e}"
                     )
-                    label_lookup = {**existing_text_labels, **existing_doc_labels}
-
-                    # Iterate over documents
-                    for doc_filename in data_json["annotated_docs"]:
-                        logger.info(f"Start load for doc: {doc_filename}")
-                        doc_data = data_json["annotated_docs"][doc_filename]
-                        txt_content = doc_data["content"]
-                        pawls_layers = doc_data["pawls_file_content"]
-
-                        try:
-                            with import_zip.open(doc_filename) as pdf_file_handle:
-                                pdf_file = File(pdf_file_handle, doc_filename)
-                                logger.info("pdf_file obj created in memory")
-
-                                pawls_parse_file = ContentFile(
-                                    json.dumps(pawls_layers).encode("utf-8"),
-                                    name="pawls_tokens.json",
-                                )
-                                logger.info("Pawls parse file obj created in memory")
-
-                                txt_extract_file = ContentFile(
-                                    txt_content.encode("utf-8"),
-                                    name="extracted_text.txt",
-                                )
-                                logger.info("Text extract file obj created in memory")
-
-                                # Create Document instance
-                                doc_obj = Document.objects.create(
-                                    title=doc_data["title"],
-                                    description=f"Imported document with filename {doc_filename}",
-                                    pdf_file=pdf_file,
-                                    pawls_parse_file=pawls_parse_file,
-                                    txt_extract_file=txt_extract_file,
-                                    backend_lock=True,  # Prevent immediate processing
-                                    creator=user_obj,
-                                    page_count=len(pawls_layers),
-                                )
-                                logger.info(f"Doc created: {doc_obj}")
-
-                                set_permissions_for_obj_to_user(
-                                    user_obj, doc_obj, [PermissionTypes.ALL]
-                                )
-
-                                # Link Document to Corpus
-                                corpus_obj.documents.add(doc_obj)
-                                corpus_obj.save()
-
-                                # Import Document-level annotations
-                                doc_labels_list = doc_data.get("doc_labels", [])
-                                logger.info(
-                                    f"import_corpus() - Found {len(doc_labels_list)} doc labels to import"
-                                )
-
-                                for doc_label_name in doc_labels_list:
-                                    label_obj = doc_label_lookup.get(doc_label_name)
-                                    logger.info(
-                                        f"import_corpus() - Found doc label_obj: {label_obj}"
-                                    )
-                                    if label_obj:
-                                        annot_obj = Annotation.objects.create(
-                                            annotation_label=label_obj,
-                                            document=doc_obj,
-                                            corpus=corpus_obj,
-                                            creator=user_obj,
-                                        )
-                                        set_permissions_for_obj_to_user(
-                                            user_obj, annot_obj, [PermissionTypes.ALL]
-                                        )
-
-                                # Import Text annotations
-                                text_annotations_data = doc_data.get(
-                                    "labelled_text", []
-                                )
-                                logger.info(
-                                    f"import_corpus() - Found {len(text_annotations_data)} text annotations to import"
-                                )
-                                import_annotations(
-                                    user_id=user_id,
-                                    doc_obj=doc_obj,
-                                    corpus_obj=corpus_obj,
-                                    annotations_data=text_annotations_data,
-                                    label_lookup=label_lookup,
-                                    label_type=TOKEN_LABEL,
-                                )
-
-                                # Unlock the document
-                                doc_obj.backend_lock = False
-                                doc_obj.save()
-                                logger.info("Doc load complete.")
-
-                        except Exception as e:
-                            logger.error(
-                                f"import_corpus() - Error loading document {doc_filename}: {e}"
-                            )
-
-                    return corpus_obj.id
-
-            # If data.json is not found
-            logger.error("import_corpus() - data.json not found in import zip.")
-            return None
+                    failed.append(doc_obj)
+                    results["failed_documents"] += 1
+                    results["errors"].append(f"{doc_filename}: {e}")
+            if failed:
+                Document.objects.filter(
+                    id__in=[doc_obj.id for doc_obj in failed]
+                ).delete()
+                transaction.on_commit(partial(_delete_document_files, failed))
+
+            # Linked once annotated, so the corpus' embedder sees their annotations
+            if imported:
+                corpus_obj.documents.add(*imported)
+
+            imported_ids = [doc_obj.id for doc_obj in imported]
+            Document.objects.filter(id__in=imported_ids).update(backend_lock=False)
+            transaction.on_commit(
+                lambda: [
+                    extract_thumbnail.delay(doc_id=doc_id) for doc_id in imported_ids
+                ]
+            )
+
+        results["processed_documents"] = len(imported)
+        results["document_ids"] = [str(doc_id) for doc_id in imported_ids]
+        logger.info(
+            f"import_corpus_documents() - Imported {len(imported)} documents into corpus {corpus_id}"
+        )
 
     except Exception as e:
-        logger.error(f"import_corpus() - Exception encountered in corpus import: {e}")
-        return None
+        logger.error(
+            f"import_corpus_documents() - Chunk {chunk_path} failed with error: {e}"
+        )
+        results["processed_documents"] = 0
+        results["document_ids"] = []
+        results["failed_documents"] = len(docs_data)
+        results["errors"].append(f"Error importing {chunk_path}: {e}")
+        # The chunk's rows were rolled back; its files are already stored
+        _delete_document_files([document for document, _, _ in documents])
+
+    _record_corpus_import_progress(
+        user_import_id,
+        processed=results["processed_documents"],
+        failed=results["failed_documents"],
+        errors=results["errors"],
+    )
+    return results
+
+
+@celery_app.task()
+def finish_corpus_import(
+    chunk_results: list[dict],
+    corpus_id: int,
+    chunk_paths: list[str],
+    user_import_id: Optional[int] = None,
+) -> int:
+    """
+    Chord body of import_corpus: deletes the data.json slices of its chunks and marks
+    the job finished.
+    """
+    for chunk_path in chunk_paths:
+        default_storage.delete(chunk_path)
+
+    _finish_user_import(user_import_id)
+    logger.info(
+        f"finish_corpus_import() - Corpus {corpus_id} imported, documents: "
+        f"{sum(chunk_result['processed_documents'] for chunk_result in chunk_results)}"
+    )
+    return corpus_id
+
+
+def _corpus_export_to_document(
+    import_zip: zipfile.ZipFile,
+    doc_filename: str,
+    doc_data: OpenContractDocExport,
+    user_obj,
+) -> Document:
+    """
+    Unsaved Document for *doc_filename* of a corpus export, with its PDF streamed
+    into storage next to its PAWLS layers and text.
+    """
+    document = Document(
+        title=doc_data["title"],
+        description=f"Imported document with filename {doc_filename}",
+        backend_lock=True,  # Prevent processing until its annotations are in
+        creator=user_obj,
+        page_count=len(doc_data["pawls_file_content"]),
+    )
+    try:
+        with import_zip.open(doc_filename) as pdf_file_handle:
+            reader = _Sha256Reader(pdf_file_handle)
+            document.pdf_file.save(
+                doc_filename, File(reader, name=doc_filename), save=False
+            )
+        document.file_sha256 = reader.sha256.hexdigest()
+        document.pawls_parse_file.save(
+            "pawls_tokens.json",
+            ContentFile(json.dumps(doc_data["pawls_file_content"]).encode("utf-8")),
+            save=False,
+        )
+        document.txt_extract_file.save(
+            "extracted_text.txt",
+            ContentFile(doc_data["content"].encode("utf-8")),
+            save=False,
+        )
+    except Exception:
+        _delete_document_files([document])
+        raise
+    return document
+
+
+def _import_corpus_export_annotations(
+    user_obj,
+    doc_obj: Document,
+    corpus_obj: Corpus,
+    doc_data: OpenContractDocExport,
+    label_lookup: dict[str, AnnotationLabel],
+    doc_label_lookup: dict[str, AnnotationLabel],
+) -> None:
+    # Document-level annotations
+    doc_annotations = [
+        Annotation(
+            annotation_label=doc_label_lookup[doc_label_name],
+            document=doc_obj,
+            corpus=corpus_obj,
+            creator=user_obj,
+        )
+        for doc_label_name in doc_data.get("doc_labels", [])
+        if doc_label_name in doc_label_lookup
+    ]
+    Annotation.objects.bulk_create(doc_annotations)
+    grant_permissions_for_new_objs_to_user(
+        user_obj, doc_annotations, [PermissionTypes.ALL]
+    )
+
+    # Text annotations
+    bulk_import_annotations(
+        user_id=user_obj.id,
+        doc_obj=doc_obj,
+        corpus_obj=corpus_obj,
+        annotations_data=doc_data.get("labelled_text", []),
+        label_lookup=label_lookup,
+        label_type=TOKEN_LABEL,
+    )
+
+
+def _record_corpus_import_progress(
+    user_import_id: Optional[int],
+    processed: int = 0,
+    failed: int = 0,
+    errors: Optional[list[str]] = None,
+) -> None:
+    """Atomically adds to the counters and errors of UserImport *user_import_id*."""
+    if user_import_id is None:
+        return
+    updates = {
+        "processed_documents": F("processed_documents") + processed,
+        "failed_documents": F("failed_documents") + failed,
+    }
+    if errors:
+        updates["errors"] = Concat(
+            F("errors"),
+            Value("".join(f"{error}\n" for error in errors)),
+            output_field=TextField(),
+        )
+    UserImport.objects.filter(id=user_import_id).update(**updates)
+
+
+def _finish_user_import(user_import_id: Optional[int]) -> None:
+    if user_import_id is not None:
+        UserImport.objects.filter(id=user_import_id).update(finished=timezone.now())
 
 
 @celery_app.task()
@@ -357,8 +607,123 @@ def import_document_to_corpus(
         return None
 
 
-@celery_app.task()
+# Office documents are stored like PDFs, on Document.pdf_file
+PDF_FILE_MIMETYPES = [
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+]
+TEXT_FILE_MIMETYPES = ["text/plain", "application/txt"]
+
+# filetype never looks further than the first 8 KB of a file
+ZIP_MEMBER_SNIFF_BYTES = 8192
+
+USER_CAP_REACHED_ERROR = "User document limit reached during processing"
+
+
+class _Sha256Reader:
+    """Read-only file wrapper hashing the bytes read through it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
+
+    def seekable(self) -> bool:
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.sha256.update(data)
+        return data
+
+
+def _skip_zip_member(filename: str) -> bool:
+    # Directories, hidden files and macOS metadata
+    return (
+        filename.endswith("/") or filename.startswith(".") or "/__MACOSX/" in filename
+    )
+
+
+def _zip_member_mimetype(head: bytes) -> Optional[str]:
+    kind = filetype.guess(head)
+    if kind is not None:
+        return kind.mime
+    # Try to detect plaintext using the improved utility
+    if is_plaintext_content(head):
+        return "text/plain"
+    return None  # Truly unknown/binary
+
+
+def _zip_member_to_document(
+    import_zip: zipfile.ZipFile,
+    filename: str,
+    reuse_existing_parse: bool,
+    **document_kwargs,
+) -> Optional[Document]:
+    """
+    Unsaved Document for zip member *filename*, with the member streamed into
+    storage, or None for a file of an unsupported type.
+    """
+    with import_zip.open(filename) as member:
+        kind = _zip_member_mimetype(member.read(ZIP_MEMBER_SNIFF_BYTES))
+
+    if kind is None or kind not in settings.ALLOWED_DOCUMENT_MIMETYPES:
+        logger.info(
+            f"process_documents_zip_chunk() - Skipping file of unsupported type {kind}: {filename}"
+        )
+        return None
+
+    if kind in PDF_FILE_MIMETYPES:
+        file_field_name = "pdf_file"
+    elif kind in TEXT_FILE_MIMETYPES:
+        file_field_name = "txt_extract_file"
+    else:
+        return None
+
+    document = Document(backend_lock=True, file_type=kind, **document_kwargs)
+    document.reuse_existing_parse = reuse_existing_parse
+
+    with import_zip.open(filename) as member:
+        reader = _Sha256Reader(member)
+        getattr(document, file_field_name).save(
+            filename, File(reader, name=filename), save=False
+        )
+    document.file_sha256 = reader.sha256.hexdigest()
+
+    return document
+
+
+def _delete_document_files(documents: list[Document]) -> None:
+    """
+    Deletes the stored files of *documents* whose rows were rolled back or
+    deleted, so failed imports leave no orphaned blobs in storage.
+    """
+    file_fields = [
+        field
+        for field in Document._meta.concrete_fields
+        if isinstance(field, FileField)
+    ]
+    for document in documents:
+        for field in file_fields:
+            field_file = getattr(document, field.name)
+            if not field_file:
+                continue
+            try:
+                field_file.storage.delete(field_file.name)
+            except Exception as e:
+                logger.warning(
+                    f"Could not delete {field_file.name} of failed import: {e}"
+                )
+
+
+@celery_app.task(bind=True)
 def process_documents_zip(
+    self,
     temporary_file_handle_id: str | int,
     user_id: int,
     job_id: str,
@@ -367,11 +732,18 @@ def process_documents_zip(
     custom_meta: Optional[dict] = None,
     make_public: bool = False,
     corpus_id: Optional[int] = None,
+    reuse_existing_parse: bool = True,
 ) -> dict:
     """
     Process a zip file containing documents, extract each file, and create Document objects
     for files with allowed MIME types.
 
+    The zip's file list is split into chunks of ZIP_IMPORT_CHUNK_SIZE files that are
+    imported in parallel (process_documents_zip_chunk); finish_documents_zip_import then
+    merges their results and deletes the zip. This task is replaced by that chord, so the
+    job's Celery result (under the task id, which callers set to job_id) is the merged
+    summary. Until then, the job's counters can be read with get_job_progress(job_id).
+
     Args:
         temporary_file_handle_id: ID of the temporary file containing the zip
         user_id: ID of the user who uploaded the zip
@@ -381,6 +753,8 @@ def process_documents_zip(
         custom_meta: Optional metadata to apply to all documents
         make_public: Whether the documents should be public
         corpus_id: Optional ID of corpus to link documents to
+        reuse_existing_parse: Reuse the parse of identical, already processed documents
+            visible to the user instead of parsing those files again
 
     Returns:
         Dictionary with summary of processing results
@@ -407,11 +781,10 @@ def process_documents_zip(
         user_obj = User.objects.get(id=user_id)
 
         # Check for corpus if needed
-        corpus_obj = None
         if corpus_id:
-            corpus_obj = Corpus.objects.get(id=corpus_id)
+            Corpus.objects.get(id=corpus_id)
 
-        # Calculate user doc limit if capped
+        # Stop right away if a capped user has no quota left
         if user_obj.is_usage_capped:
             current_doc_count = user_obj.document_set.count()
             remaining_quota = (
@@ -425,155 +798,232 @@ def process_documents_zip(
                 )
                 return results
 
-        # Process the zip file
+        # Only the zip's central directory is read here
         with temporary_file_handle.file.open("rb") as import_file, zipfile.ZipFile(
             import_file, mode="r"
         ) as import_zip:
-            logger.info(f"process_documents_zip() - Opened zip file for job: {job_id}")
-
-            # Get list of files in the zip
             files = import_zip.namelist()
-            logger.info(f"process_documents_zip() - Found {len(files)} files in zip")
-            results["total_files"] = len(files)
-
-            # Process each file in the zip
-            for filename in files:
-                # Skip directories and hidden files
-                if (
-                    filename.endswith("/")
-                    or filename.startswith(".")
-                    or "/__MACOSX/" in filename
-                ):
-                    results["skipped_files"] += 1
-                    continue
 
-                try:
-                    # Check if we've hit the user cap
-                    if user_obj.is_usage_capped:
-                        current_doc_count = user_obj.document_set.count()
-                        if (
-                            current_doc_count
-                            >= settings.USAGE_CAPPED_USER_DOC_CAP_COUNT
-                        ):
-                            results["errors"].append(
-                                "User document limit reached during processing"
-                            )
-                            break
-
-                    # Extract the file from the zip
-                    with import_zip.open(filename) as file_handle:
-                        file_bytes = file_handle.read()
-
-                        # Check file type
-                        kind = filetype.guess(file_bytes)
-                        if kind is None:
-                            # Try to detect plaintext using the improved utility
-                            if is_plaintext_content(file_bytes):
-                                kind = "text/plain"
-                            else:  # Truly unknown/binary
-                                logger.info(
-                                    f"process_documents_zip() - Skipping file with unknown type: {filename}"
-                                )
-                                results["skipped_files"] += 1
-                                continue
-                        else:
-                            kind = kind.mime
-
-                        # Skip files with unsupported types
-                        if kind not in settings.ALLOWED_DOCUMENT_MIMETYPES:
-                            results["skipped_files"] += 1
-                            continue
-
-                        # Prepare document attributes
-                        # Use only the filename part, discarding the path within the zip
-                        base_filename = pathlib.Path(filename).name
-                        doc_title = base_filename
-                        if title_prefix:
-                            doc_title = f"{title_prefix} - {base_filename}"
-
-                        doc_description = (
-                            description
-                            or f"Uploaded as part of batch upload (job: {job_id})"
-                        )
+    except Exception as e:
+        logger.error(f"process_documents_zip() - Job failed with error: {str(e)}")
+        results["success"] = False
+        results["completed"] = True  # Task completed but failed
+        results["errors"].append(f"Job failed: {str(e)}")
+        return results
+
+    filenames = [filename for filename in files if not _skip_zip_member(filename)]
+    results["total_files"] = len(files)
+    results["skipped_files"] = len(files) - len(filenames)
+    logger.info(
+        f"process_documents_zip() - Found {len(files)} files in zip, {len(filenames)} to import"
+    )
+
+    init_job_progress(
+        job_id,
+        total_files=results["total_files"],
+        processed_files=0,
+        skipped_files=results["skipped_files"],
+        error_files=0,
+    )
+
+    chunk_size = max(1, settings.ZIP_IMPORT_CHUNK_SIZE)
+    chunks = [
+        filenames[start : start + chunk_size]
+        for start in range(0, len(filenames), chunk_size)
+    ]
+    if not chunks:
+        return finish_documents_zip_import([], temporary_file_handle_id, results)
+
+    chunk_tasks = [
+        process_documents_zip_chunk.si(
+            temporary_file_handle_id,
+            user_id,
+            job_id,
+            chunk,
+            title_prefix=title_prefix,
+            description=description,
+            custom_meta=custom_meta,
+            make_public=make_public,
+            corpus_id=corpus_id,
+            reuse_existing_parse=reuse_existing_parse,
+        )
+        for chunk in chunks
+    ]
+    finish_task = finish_documents_zip_import.s(temporary_file_handle_id, results)
+    logger.info(
+        f"process_documents_zip() - Importing job {job_id} in {len(chunks)} chunks"
+    )
 
-                        # Create the document based on file type
-                        document = None
-
-                        if kind in [
-                            "application/pdf",
-                            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                            "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        ]:
-                            pdf_file = ContentFile(file_bytes, name=filename)
-                            document = Document(
-                                creator=user_obj,
-                                title=doc_title,
-                                description=doc_description,
-                                custom_meta=custom_meta,
-                                pdf_file=pdf_file,
-                                backend_lock=True,
-                                is_public=make_public,
-                                file_type=kind,
-                            )
-                            document.save()
-                        elif kind in ["text/plain", "application/txt"]:
-                            txt_extract_file = ContentFile(file_bytes, name=filename)
-                            document = Document(
-                                creator=user_obj,
-                                title=doc_title,
-                                description=doc_description,
-                                custom_meta=custom_meta,
-                                txt_extract_file=txt_extract_file,
-                                backend_lock=True,
-                                is_public=make_public,
-                                file_type=kind,
-                            )
-                            document.save()
-
-                        if document:
-                            # Set permissions for the document
-                            set_permissions_for_obj_to_user(
-                                user_obj, document, [PermissionTypes.CRUD]
-                            )
-
-                            # Add to corpus if needed
-                            if corpus_obj:
-                                corpus_obj.documents.add(document)
-
-                            # Update results
-                            results["processed_files"] += 1
-                            results["document_ids"].append(str(document.id))
-                            logger.info(
-                                f"process_documents_zip() - Created document: {document.id} for file: {filename}"
-                            )
+    # Called directly or eagerly, the chunks run one after the other in-process
+    # (an eager task can't wait on a chord)
+    if self.request.called_directly or self.request.is_eager:
+        return finish_task([chunk_task() for chunk_task in chunk_tasks])
+    return self.replace(chord(group(chunk_tasks), finish_task))
 
-                except Exception as e:
-                    logger.error(
-                        f"process_documents_zip() - Error processing file {filename}: {str(e)}"
-                    )
-                    results["error_files"] += 1
-                    results["errors"].append(f"Error processing {filename}: {str(e)}")
 
-        # Check if processing was stopped early due to user cap
-        user_cap_reached_mid_processing = any(
-            "User document limit reached during processing" in error
-            for error in results["errors"]
+@celery_app.task()
+def process_documents_zip_chunk(
+    temporary_file_handle_id: str | int,
+    user_id: int,
+    job_id: str,
+    filenames: list[str],
+    title_prefix: Optional[str] = None,
+    description: Optional[str] = None,
+    custom_meta: Optional[dict] = None,
+    make_public: bool = False,
+    corpus_id: Optional[int] = None,
+    reuse_existing_parse: bool = True,
+) -> dict:
+    """
+    Imports *filenames* from the zip of a process_documents_zip job. Each file's type is
+    sniffed from its first bytes and supported files are streamed into storage (hashing
+    them on the way); their documents, permissions and corpus links are then written in
+    bulk and their ingest is started. A usage-capped user's quota is checked once for the
+    whole chunk, with the user row locked so parallel chunks can't overshoot it.
+
+    Returns:
+        Dictionary with the chunk's counts, document ids and errors, and whether the
+        user's document cap cut it short
+    """
+    results = {
+        "processed_files": 0,
+        "skipped_files": 0,
+        "error_files": 0,
+        "document_ids": [],
+        "errors": [],
+        "user_cap_reached": False,
+    }
+    documents = []
+
+    try:
+        temporary_file_handle = TemporaryFileHandle.objects.get(
+            id=temporary_file_handle_id
         )
+        user_obj = User.objects.get(id=user_id)
+        corpus_obj = Corpus.objects.get(id=corpus_id) if corpus_id else None
 
-        # Clean up the temporary file
-        temporary_file_handle.delete()
+        doc_description = (
+            description or f"Uploaded as part of batch upload (job: {job_id})"
+        )
 
-        results["success"] = not user_cap_reached_mid_processing
-        results["completed"] = True  # Task completed, success depends on errors/cap
+        with transaction.atomic():
+            remaining_quota = None
+            if user_obj.is_usage_capped:
+                User.objects.select_for_update().get(id=user_id)
+                remaining_quota = (
+                    settings.USAGE_CAPPED_USER_DOC_CAP_COUNT
+                    - user_obj.document_set.count()
+                )
+
+            with temporary_file_handle.file.open("rb") as import_file, zipfile.ZipFile(
+                import_file, mode="r"
+            ) as import_zip:
+                for filename in filenames:
+                    if (
+                        remaining_quota is not None
+                        and len(documents) >= remaining_quota
+                    ):
+                        results["user_cap_reached"] = True
+                        break
+
+                    # Use only the filename part, discarding the path within the zip
+                    base_filename = pathlib.Path(filename).name
+                    doc_title = base_filename
+                    if title_prefix:
+                        doc_title = f"{title_prefix} - {base_filename}"
+
+                    try:
+                        document = _zip_member_to_document(
+                            import_zip,
+                            filename,
+                            reuse_existing_parse,
+                            creator=user_obj,
+                            title=doc_title,
+                            description=doc_description,
+                            custom_meta=custom_meta,
+                            is_public=make_public,
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"process_documents_zip_chunk() - Error processing file {filename}: {str(e)}"
+                        )
+                        results["error_files"] += 1
+                        results["errors"].append(
+                            f"Error processing {filename}: {str(e)}"
+                        )
+                        continue
+
+                    if document is None:
+                        results["skipped_files"] += 1
+                    else:
+                        documents.append(document)
+
+            Document.objects.bulk_create(documents)
+            grant_permissions_for_new_objs_to_user(
+                user_obj, documents, [PermissionTypes.CRUD]
+            )
+            if corpus_obj and documents:
+                corpus_obj.documents.add(*documents)
+            start_document_ingest(documents)
+
+        results["processed_files"] = len(documents)
+        results["document_ids"] = [str(document.id) for document in documents]
         logger.info(
-            f"process_documents_zip() - Completed job: {job_id}, processed: {results['processed_files']}"
+            f"process_documents_zip_chunk() - Created {len(documents)} documents for job: {job_id}"
         )
 
     except Exception as e:
-        logger.error(f"process_documents_zip() - Job failed with error: {str(e)}")
-        results["success"] = False
-        results["completed"] = True  # Task completed but failed
-        results["errors"].append(f"Job failed: {str(e)}")
+        logger.error(
+            f"process_documents_zip_chunk() - Chunk of job {job_id} failed with error: {str(e)}"
+        )
+        # The chunk's rows were rolled back; its files are already stored
+        _delete_document_files(documents)
+        results["processed_files"] = 0
+        results["document_ids"] = []
+        results["error_files"] = len(filenames) - results["skipped_files"]
+        results["errors"].append(
+            f"Error processing {filenames[0]} to {filenames[-1]}: {str(e)}"
+        )
+
+    add_job_progress(
+        job_id,
+        processed_files=results["processed_files"],
+        skipped_files=results["skipped_files"],
+        error_files=results["error_files"],
+    )
+    return results
+
+
+@celery_app.task()
+def finish_documents_zip_import(
+    chunk_results: list[dict], temporary_file_handle_id: str | int, results: dict
+) -> dict:
+    """
+    Chord body of process_documents_zip: adds the results of its chunks to the job's
+    *results* and deletes the uploaded zip.
+    """
+    user_cap_reached = False
+    for chunk_result in chunk_results:
+        for count in ["processed_files", "skipped_files", "error_files"]:
+            results[count] += chunk_result[count]
+        results["document_ids"].extend(chunk_result["document_ids"])
+        results["errors"].extend(chunk_result["errors"])
+        user_cap_reached = user_cap_reached or chunk_result["user_cap_reached"]
+
+    if user_cap_reached:
+        results["errors"].append(USER_CAP_REACHED_ERROR)
+
+    # Clean up the temporary file
+    try:
+        TemporaryFileHandle.objects.get(id=temporary_file_handle_id).delete()
+    except TemporaryFileHandle.DoesNotExist:
+        logger.warning(
+            f"finish_documents_zip_import() - Temporary file {temporary_file_handle_id} is gone"
+        )
 
+    results["success"] = not user_cap_reached
+    results["completed"] = True  # Task completed, success depends on errors/cap
+    logger.info(
+        f"finish_documents_zip_import() - Completed job: {results['job_id']}, processed: {results['processed_files']}"
+    )
     return results
@@ -0,0 +1,50 @@
+"""
+Celery task router (``CELERY_TASK_ROUTES``).
+
+Tasks go to the queue of the first ``TASK_QUEUE_ROUTES`` pattern matching
+their name (``fnmatch`` patterns, e.g. ``opencontractserver.tasks.export_tasks.*``)
+and to ``CELERY_TASK_DEFAULT_QUEUE`` when nothing matches.
+
+Bulk operations (zip / corpus imports, forks) are routed to a bulk queue
+themselves, and everything a worker sends while running a task taken from a
+bulk queue goes to the ``BULK_TASK_QUEUES`` variant of its queue. The
+documents a 5,000-file import creates are thus ingested and embedded on
+``ingest_bulk`` / ``embeddings_bulk`` and never queue in front of an
+interactive upload. Queues are plain Redis lists, so this needs no broker
+besides Redis.
+"""
+
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+
+from celery import current_task
+from django.conf import settings
+
+
+def queue_for_task(name: str) -> Optional[str]:
+    for pattern, queue in getattr(settings, "TASK_QUEUE_ROUTES", {}).items():
+        if fnmatchcase(name, pattern):
+            return queue
+    return None
+
+
+def running_bulk_task() -> bool:
+    """True while this worker executes a task it took from a bulk queue."""
+    if not current_task or current_task.request.called_directly:
+        return False
+    delivery_info = current_task.request.delivery_info or {}
+    queue = delivery_info.get("routing_key")
+    return queue in getattr(settings, "BULK_TASK_QUEUES", {}).values()
+
+
+def route_task(
+    name: str, args, kwargs, options, task=None, **kw
+) -> Optional[dict[str, Any]]:
+    queue = queue_for_task(name)
+    if queue is None:
+        return None
+    if running_bulk_task():
+        queue = getattr(settings, "BULK_TASK_QUEUES", {}).get(queue, queue)
+    return {"queue": queue}
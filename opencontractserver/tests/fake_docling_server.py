@@ -0,0 +1,186 @@
+"""
+Local stand-in for the Docling parser service, for tests and benchmarks.
+
+Accepts the parser's JSON (``pdf_base64``) and ``multipart/form-data``
+uploads, with or without chunked transfer encoding, sleeps ``delay`` seconds
+to imitate parsing and answers with a canned OpenContracts export (gzipped when
+the client accepts it). It records every upload, the connections it accepted
+and the peak number of requests in flight.
+
+Run it standalone to benchmark a worker against it::
+
+    python -m opencontractserver.tests.fake_docling_server --port 8765 --delay 2
+
+and point ``DOCLING_PARSER_SERVICE_URL`` at ``http://localhost:8765/parse/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_EXPORT = {
+    "title": "Fake Docling Document",
+    "content": "Sample document content",
+    "description": "Parsed by the fake Docling server",
+    "pawlsFileContent": [
+        {
+            "page": {"width": 612, "height": 792, "index": 0},
+            "tokens": [
+                {"x": 100, "y": 100, "width": 50, "height": 20, "text": "Sample"}
+            ],
+        }
+    ],
+    "pageCount": 1,
+    "docLabels": [],
+    "labelledText": [],
+    "relationships": [],
+}
+
+
+class FakeDoclingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, delay: float = 0.0, response: dict = None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.delay = delay
+        self.response = response or SAMPLE_EXPORT
+        self.uploads: list[dict] = []
+        self.connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/parse/"
+
+    def __enter__(self) -> FakeDoclingServer:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def _enter_request(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit_request(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep test output quiet
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(parts)
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _parse_upload(self, body: bytes) -> dict:
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            fields, pdf, filename = {}, b"", None
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if name == "file":
+                    pdf = part.get_payload(decode=True)
+                    filename = part.get_filename()
+                else:
+                    fields[name] = part.get_content().strip()
+            return {
+                "mode": "multipart",
+                "filename": filename,
+                "fields": fields,
+                "pdf": pdf,
+            }
+
+        payload = json.loads(body)
+        pdf = base64.b64decode(payload.pop("pdf_base64"))
+        return {
+            "mode": "json",
+            "filename": payload.pop("filename", None),
+            "fields": payload,
+            "pdf": pdf,
+        }
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        server: FakeDoclingServer = self.server
+        server._enter_request()
+        try:
+            upload = self._parse_upload(self._read_body())
+            upload["sha256"] = hashlib.sha256(upload["pdf"]).hexdigest()
+            upload["size"] = len(upload.pop("pdf"))
+            upload["chunked"] = "Transfer-Encoding" in self.headers
+            with server._lock:
+                server.uploads.append(upload)
+            time.sleep(server.delay)
+
+            body = json.dumps(server.response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except Exception as e:
+            message = str(e).encode()
+            self.send_response(400)
+            self.send_header("Content-Length", str(len(message)))
+            self.end_headers()
+            self.wfile.write(message)
+        finally:
+            server._exit_request()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeDoclingServer(port=args.port, delay=args.delay)
+    print(f"Fake Docling parser listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{len(server.uploads)} uploads, peak {server.peak_in_flight} in flight")
+        server.server_close()
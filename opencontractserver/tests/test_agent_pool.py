@@ -0,0 +1,168 @@
+"""
+Tests for the per-process agent skeleton pool used by ``AgentAPI``.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from opencontractserver.conversations.models import Conversation
+from opencontractserver.corpuses.models import Corpus
+from opencontractserver.documents.models import Document
+from opencontractserver.llms import agents
+from opencontractserver.llms.agents import agent_pool as pool
+from opencontractserver.llms.agents.core_agents import (
+    CoreConversationManager,
+    DocumentAgentContext,
+    get_default_config,
+)
+
+User = get_user_model()
+
+CREATE_DOCUMENT_AGENT = (
+    "opencontractserver.llms.agents.agent_factory."
+    "UnifiedAgentFactory.create_document_agent"
+)
+
+
+class FakeDocumentAgent:
+    """Stands in for a framework agent: just the attributes the pool rebinds."""
+
+    def __init__(self, document, corpus, user_id):
+        self.config = get_default_config(
+            user_id=user_id, embedder_path="test/embedder", system_prompt="x"
+        )
+        self.context = DocumentAgentContext(
+            corpus=corpus, document=document, config=self.config
+        )
+        self.conversation_manager = CoreConversationManager(None, None, self.config)
+        self.agent_deps = SimpleNamespace(
+            user_id=user_id,
+            vector_store=SimpleNamespace(
+                user_id=user_id, core_store=SimpleNamespace(user_id=user_id)
+            ),
+        )
+
+
+@override_settings(LLMS_AGENT_POOL_ENABLED=True, LLMS_AGENT_POOL_TTL=600)
+class AgentPoolTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="pool_user", password="x")
+        cls.other_user = User.objects.create_user(username="pool_other", password="x")
+        cls.corpus = Corpus.objects.create(title="Pool Corpus", creator=cls.user)
+        cls.document = Document.objects.create(title="Pool Doc", creator=cls.user)
+        cls.corpus.documents.add(cls.document)
+
+    def setUp(self):
+        cache.clear()
+        pool.agent_pool.clear()
+        self.built = []
+
+    async def _build(self, document, corpus, **kwargs):
+        agent = FakeDocumentAgent(self.document, self.corpus, kwargs["user_id"])
+        self.built.append(agent)
+        return agent
+
+    async def test_released_agent_is_rebound_instead_of_rebuilt(self):
+        with patch(CREATE_DOCUMENT_AGENT, side_effect=self._build):
+            first = await agents.for_document(
+                self.document.id, self.corpus.id, user_id=self.user.id
+            )
+            # Still leased: a concurrent request gets its own agent
+            second = await agents.for_document(
+                self.document.id, self.corpus.id, user_id=self.user.id
+            )
+            self.assertIsNot(first, second)
+            self.assertTrue(agents.release(first))
+            self.assertIsNone(first.config.user_id)
+
+            conversation = await Conversation.objects.acreate(
+                title="Existing", creator=self.other_user
+            )
+            reused = await agents.for_document(
+                self.document.id,
+                self.corpus.id,
+                user_id=self.other_user.id,
+                conversation=conversation,
+            )
+
+        self.assertIs(reused, first)
+        self.assertEqual(len(self.built), 2)
+        self.assertEqual(reused.config.user_id, self.other_user.id)
+        self.assertEqual(reused.conversation_manager.conversation, conversation)
+        self.assertEqual(
+            reused.agent_deps.vector_store.core_store.user_id, self.other_user.id
+        )
+        self.assertEqual(reused.context.vector_store.user_id, self.other_user.id)
+        self.assertEqual(pool.agent_pool.stats["hit"], 1)
+
+    async def test_different_configuration_is_not_shared(self):
+        with patch(CREATE_DOCUMENT_AGENT, side_effect=self._build):
+            agent = await agents.for_document(self.document.id, self.corpus.id)
+            agents.release(agent)
+            other = await agents.for_document(
+                self.document.id, self.corpus.id, model="gpt-4o"
+            )
+        self.assertIsNot(other, agent)
+        self.assertEqual(len(self.built), 2)
+
+    async def test_document_change_invalidates(self):
+        with patch(CREATE_DOCUMENT_AGENT, side_effect=self._build):
+            agent = await agents.for_document(self.document.id, self.corpus.id)
+            agents.release(agent)
+            self.assertEqual(len(pool.agent_pool), 1)
+
+            self.document.title = "Renamed"
+            await self.document.asave()
+            self.assertEqual(len(pool.agent_pool), 0)
+
+            agents.release(await agents.for_document(self.document.id, self.corpus.id))
+            self.assertEqual(len(self.built), 2)
+
+            # A change recorded by another process only shows up as a new
+            # version in the shared cache; the stale skeleton is skipped.
+            pool.bump_version(pool.CORPUS_AGENT, self.corpus.id)
+            await agents.for_document(self.document.id, self.corpus.id)
+        self.assertEqual(len(self.built), 3)
+        self.assertEqual(pool.agent_pool.stats["stale"], 1)
+
+    async def test_idle_agents_expire(self):
+        with patch(CREATE_DOCUMENT_AGENT, side_effect=self._build):
+            agent = await agents.for_document(self.document.id, self.corpus.id)
+            with override_settings(LLMS_AGENT_POOL_TTL=0):
+                agents.release(agent)
+            await agents.for_document(self.document.id, self.corpus.id)
+        self.assertEqual(len(self.built), 2)
+        self.assertEqual(pool.agent_pool.stats["expired"], 1)
+
+    def test_unpoolable_requests(self):
+        def local_tool(query: str) -> str:
+            return query
+
+        self.assertIsNone(
+            pool.build_pool_key(
+                pool.DOCUMENT_AGENT, "pydantic_ai", self.document, tools=[local_tool]
+            )
+        )
+        with override_settings(LLMS_AGENT_POOL_ENABLED=False):
+            self.assertIsNone(
+                pool.build_pool_key(pool.DOCUMENT_AGENT, "pydantic_ai", self.document)
+            )
+        key = pool.build_pool_key(
+            pool.DOCUMENT_AGENT,
+            "pydantic_ai",
+            self.document,
+            self.corpus,
+            user_id=self.user.id,
+            stream_observer=object(),
+        )
+        self.assertEqual(
+            key,
+            pool.build_pool_key(
+                pool.DOCUMENT_AGENT, "pydantic_ai", self.document.id, self.corpus.id
+            ),
+        )
@@ -1,6 +1,7 @@
 # Create your tests here.
 import json
 import logging
+from unittest.mock import patch
 
 import factory.django
 import responses
@@ -11,6 +12,7 @@ from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.db import transaction
 from django.db.models.signals import post_save
+from django.test import TestCase
 from django.test.testcases import TransactionTestCase
 from rest_framework.test import APIClient
 
@@ -32,6 +34,7 @@ from opencontractserver.tests.fixtures import (
     create_mock_submission_response,
     generate_random_analyzer_return_values,
 )
+from opencontractserver.utils.analyzer import import_annotations_from_analysis
 
 logger = logging.getLogger(__name__)
 
@@ -291,3 +294,76 @@ class TestOpenContractsAnalyzers(TransactionTestCase):
         self.__test_submit_analysis()
         self.__test_receive_callback_with_gremlin_results()
         self.__test_analysis_import_logic()
+
+
+class TestImportAnnotationsFromAnalysis(TestCase):
+    @factory.django.mute_signals(post_save)
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="12345678")
+        self.corpus = Corpus.objects.create(
+            title="Test Analysis Corpus", creator=self.user, backend_lock=False
+        )
+        analyzer = Analyzer.objects.create(
+            id="test.analyzer",
+            description="Test Analyzer",
+            task_name="opencontractserver.tasks.data_extract_tasks.doc_extract_query_task",
+            creator=self.user,
+            manifest={},
+        )
+        self.analysis = Analysis.objects.create(
+            analyzer=analyzer, analyzed_corpus=self.corpus, creator=self.user
+        )
+        self.docs = [
+            Document.objects.create(
+                title=f"TestDoc{index}", creator=self.user, page_count=1
+            )
+            for index in range(2)
+        ]
+
+    def test_import_validates_then_bulk_inserts_per_document(self):
+        results = generate_random_analyzer_return_values(doc_ids=[self.docs[0].id])
+        [span] = [
+            span
+            for doc_data in results["annotated_docs"].values()
+            for span in doc_data["labelled_text"]
+            if span["rawText"] == "June 12, 2019"
+        ]
+        doc_data = {"doc_labels": [], "labelled_text": [span] * 3}
+
+        # Invalid labels on the second document, and a document that doesn't exist
+        bad_span = {**span, "annotationLabel": "not-a-label"}
+        results["annotated_docs"] = {
+            self.docs[0].id: doc_data,
+            self.docs[1].id: {
+                "doc_labels": ["not-a-doc-label"],
+                "labelled_text": [span] * 3 + [bad_span],
+            },
+            999999: doc_data,
+        }
+
+        with patch(
+            "opencontractserver.tasks.embeddings_task.calculate_embeddings_for_annotations.delay"
+        ) as mock_delay, self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(
+                import_annotations_from_analysis(
+                    self.analysis.id, self.user.id, results
+                )
+            )
+
+        annotations = Annotation.objects.filter(analysis=self.analysis)
+        self.assertEqual(annotations.filter(document=self.docs[0]).count(), 3)
+        self.assertEqual(annotations.filter(document=self.docs[1]).count(), 3)
+
+        queued_ids = [
+            annotation_id
+            for call in mock_delay.call_args_list
+            for annotation_id in call.args[0]
+        ]
+        self.assertCountEqual(queued_ids, annotations.values_list("id", flat=True))
+
+        self.analysis.refresh_from_db()
+        self.assertIn("doc 999999 does not exist", self.analysis.import_log)
+        self.assertIn(
+            f"for doc {self.docs[1].id} skipped 2 invalid annotations",
+            self.analysis.import_log,
+        )
@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from graphene.test import Client
+from graphql_relay import to_global_id
+
+from config.graphql.schema import schema
+from opencontractserver.annotations.models import Annotation, AnnotationLabel
+from opencontractserver.corpuses.models import Corpus
+from opencontractserver.documents.models import Document
+from opencontractserver.utils.page_index import (
+    get_page_entries,
+    pack_annotation_json,
+)
+
+User = get_user_model()
+
+
+class TestContext:
+    def __init__(self, user):
+        self.user = user
+
+
+def _token_json(page: int, token_indices: list[int]) -> dict:
+    return {
+        str(page): {
+            "bounds": {"top": 1, "bottom": 2, "left": 3, "right": 4},
+            "tokensJsons": [
+                {"pageIndex": page, "tokenIndex": idx} for idx in token_indices
+            ],
+            "rawText": "text",
+        }
+    }
+
+
+class AnnotationPageIndexTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="page_index_user", password="x")
+        self.other_user = User.objects.create_user(
+            username="page_index_other", password="x"
+        )
+        self.corpus = Corpus.objects.create(title="Paged Corpus", creator=self.user)
+        self.document = Document.objects.create(
+            title="Paged Doc", creator=self.user, page_count=3
+        )
+        self.corpus.documents.add(self.document)
+        self.label = AnnotationLabel.objects.create(text="Clause", creator=self.user)
+
+        self.page_0 = Annotation.objects.create(
+            document=self.document,
+            corpus=self.corpus,
+            annotation_label=self.label,
+            page=0,
+            json=_token_json(0, [1, 2, 3]),
+            creator=self.user,
+        )
+        self.page_1_private = Annotation.objects.create(
+            document=self.document,
+            corpus=self.corpus,
+            annotation_label=self.label,
+            page=1,
+            json=_token_json(1, [7]),
+            creator=self.other_user,
+        )
+        self.page_1_public = Annotation.objects.create(
+            document=self.document,
+            corpus=self.corpus,
+            annotation_label=self.label,
+            page=1,
+            json=_token_json(1, [8]),
+            creator=self.other_user,
+            is_public=True,
+        )
+
+        self.client = Client(schema, context_value=TestContext(self.user))
+        self.doc_gid = to_global_id("DocumentType", self.document.id)
+        self.corpus_gid = to_global_id("CorpusType", self.corpus.id)
+
+    def test_pack_annotation_json(self):
+        packed = pack_annotation_json(_token_json(4, [10, 11]))
+        self.assertEqual(packed["tokens"], [4, 10, 4, 11])
+        self.assertIn("4", packed["bounds"])
+        self.assertEqual(pack_annotation_json({"start": 3, "end": 9}), {"span": [3, 9]})
+
+    def test_entries_respect_visibility(self):
+        owner_ids = {
+            e["id"]
+            for e in get_page_entries(
+                self.document.id, [1], user=self.user, corpus_id=self.corpus.id
+            )
+        }
+        self.assertEqual(owner_ids, {self.page_1_public.id})
+
+        other_ids = {
+            e["id"]
+            for e in get_page_entries(
+                self.document.id, [1], user=self.other_user, corpus_id=self.corpus.id
+            )
+        }
+        self.assertEqual(other_ids, {self.page_1_private.id, self.page_1_public.id})
+
+        anon_ids = {
+            e["id"]
+            for e in get_page_entries(
+                self.document.id, [0, 1], user=AnonymousUser(), corpus_id=self.corpus.id
+            )
+        }
+        self.assertEqual(anon_ids, {self.page_1_public.id})
+
+    def test_index_is_cached_and_invalidated_on_change(self):
+        get_page_entries(self.document.id, [0], user=self.user)
+
+        with self.assertNumQueries(0):
+            entries = get_page_entries(self.document.id, [0], user=self.user)
+        self.assertEqual([e["id"] for e in entries], [self.page_0.id])
+
+        new_annotation = Annotation.objects.create(
+            document=self.document,
+            annotation_label=self.label,
+            page=0,
+            json=_token_json(0, [5]),
+            creator=self.user,
+        )
+        entries = get_page_entries(self.document.id, [0], user=self.user)
+        self.assertEqual(
+            [e["id"] for e in entries], [self.page_0.id, new_annotation.id]
+        )
+
+        new_annotation.delete()
+        entries = get_page_entries(self.document.id, [0], user=self.user)
+        self.assertEqual([e["id"] for e in entries], [self.page_0.id])
+
+    def test_page_annotations_full_and_compact(self):
+        query = """
+            query PageAnnotations($docId: ID!, $corpusId: ID, $compact: Boolean) {
+              pageAnnotations(
+                documentId: $docId, corpusId: $corpusId, currentPage: 1, compact: $compact
+              ) {
+                pdfPageInfo { pageCount currentPage hasNextPage }
+                pageAnnotations { id }
+                compactAnnotations { id labelId page bounds tokens }
+              }
+            }
+        """
+        variables = {"docId": self.doc_gid, "corpusId": self.corpus_gid}
+
+        result = self.client.execute(query, variables=variables)
+        self.assertIsNone(result.get("errors"))
+        data = result["data"]["pageAnnotations"]
+        self.assertEqual(
+            [a["id"] for a in data["pageAnnotations"]],
+            [to_global_id("AnnotationType", self.page_0.id)],
+        )
+        self.assertIsNone(data["compactAnnotations"])
+        self.assertTrue(data["pdfPageInfo"]["hasNextPage"])
+
+        result = self.client.execute(query, variables={**variables, "compact": True})
+        self.assertIsNone(result.get("errors"))
+        data = result["data"]["pageAnnotations"]
+        self.assertIsNone(data["pageAnnotations"])
+        compact = data["compactAnnotations"]
+        self.assertEqual(len(compact), 1)
+        self.assertEqual(
+            compact[0]["id"], to_global_id("AnnotationType", self.page_0.id)
+        )
+        self.assertEqual(
+            compact[0]["labelId"], to_global_id("AnnotationLabelType", self.label.id)
+        )
+        self.assertEqual(compact[0]["tokens"], [0, 1, 0, 2, 0, 3])
@@ -0,0 +1,134 @@
+import gzip
+import io
+import json
+
+import msgpack
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from graphql_relay import to_global_id
+
+from opencontractserver.annotations.models import (
+    Annotation,
+    AnnotationLabel,
+    Relationship,
+)
+from opencontractserver.corpuses.models import Corpus
+from opencontractserver.documents.models import Document
+
+User = get_user_model()
+
+
+def _read_body(response) -> bytes:
+    async def consume():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(consume)()
+
+
+@override_settings(ANNOTATION_STREAM_BATCH_SIZE=2)
+class AnnotationStreamViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="stream_user", password="x")
+        self.other_user = User.objects.create_user(
+            username="stream_other", password="x"
+        )
+        self.corpus = Corpus.objects.create(title="Stream Corpus", creator=self.user)
+        self.document = Document.objects.create(title="Stream Doc", creator=self.user)
+        self.corpus.documents.add(self.document)
+        self.label = AnnotationLabel.objects.create(text="Clause", creator=self.user)
+
+        # Five visible annotations across pages (more than one batch) ...
+        self.visible = [
+            Annotation.objects.create(
+                document=self.document,
+                corpus=self.corpus,
+                annotation_label=self.label,
+                page=page,
+                raw_text=f"annotation {page}",
+                creator=self.user,
+            )
+            for page in (2, 0, 1, 0, 3)
+        ]
+        # ... and one private annotation belonging to someone else.
+        self.hidden = Annotation.objects.create(
+            document=self.document,
+            corpus=self.corpus,
+            annotation_label=self.label,
+            page=0,
+            creator=self.other_user,
+        )
+        self.relationship = Relationship.objects.create(
+            document=self.document,
+            corpus=self.corpus,
+            relationship_label=self.label,
+            creator=self.user,
+        )
+        self.relationship.source_annotations.add(self.visible[0])
+        self.relationship.target_annotations.add(self.visible[1], self.visible[2])
+
+        self.url = reverse(
+            "stream_document_annotations",
+            kwargs={"document_id": to_global_id("DocumentType", self.document.id)},
+        )
+        self.params = {"corpus_id": to_global_id("CorpusType", self.corpus.id)}
+        self.client.force_login(self.user)
+
+    def test_ndjson_stream(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        frames = [json.loads(line) for line in _read_body(response).splitlines()]
+        self.assertEqual(frames[0]["type"], "meta")
+        self.assertEqual(frames[-1]["type"], "end")
+
+        annotation_frames = [f["data"] for f in frames if f["type"] == "annotation"]
+        self.assertEqual(
+            {a["id"] for a in annotation_frames},
+            {to_global_id("AnnotationType", a.id) for a in self.visible},
+        )
+        # Annotations arrive in page order for progressive rendering
+        pages = [a["page"] for a in annotation_frames]
+        self.assertEqual(pages, sorted(pages))
+
+        relationship_frames = [f["data"] for f in frames if f["type"] == "relationship"]
+        self.assertEqual(len(relationship_frames), 1)
+        self.assertEqual(len(relationship_frames[0]["targetAnnotationIds"]), 2)
+        self.assertEqual(frames[-1]["annotationCount"], 5)
+        self.assertEqual(frames[-1]["relationshipCount"], 1)
+
+    def test_gzip_msgpack_stream(self):
+        response = self.client.get(
+            self.url,
+            {**self.params, "format": "msgpack", "relationships": "false"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        frames = list(
+            msgpack.Unpacker(
+                io.BytesIO(gzip.decompress(_read_body(response))),
+                raw=False,
+            )
+        )
+        self.assertEqual(
+            len([f for f in frames if f["type"] == "annotation"]), len(self.visible)
+        )
+        self.assertFalse([f for f in frames if f["type"] == "relationship"])
+
+    def test_invisible_document_is_404(self):
+        self.client.force_login(self.other_user)
+        private_doc = Document.objects.create(title="Private", creator=self.user)
+        url = reverse(
+            "stream_document_annotations",
+            kwargs={"document_id": to_global_id("DocumentType", private_doc.id)},
+        )
+        response = self.client.get(url, self.params)
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_corpus_is_400(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
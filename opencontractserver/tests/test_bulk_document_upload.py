@@ -495,17 +495,18 @@ class BulkDocumentUploadTests(TestCase):
         temp_file = TemporaryFileHandle.objects.create()
         temp_file.file.save("test_error.zip", io.BytesIO(base64.b64decode(base64_zip)))
 
-        # Mock the ContentFile constructor to raise an exception for one specific file
-        original_content_file = django.core.files.base.ContentFile
+        # Mock the File constructor (files are streamed from the zip through it)
+        # to raise an exception for one specific file
+        original_file = django.core.files.base.File
 
-        def mock_content_file(content, name=None):
+        def mock_file(file, name=None):
             if name and name.endswith(".pdf"):
                 raise OSError("Simulated error processing PDF file")
-            return original_content_file(content, name)
+            return original_file(file, name)
 
         with patch(
-            "opencontractserver.tasks.import_tasks.ContentFile",
-            side_effect=mock_content_file,
+            "opencontractserver.tasks.import_tasks.File",
+            side_effect=mock_file,
         ):
             job_id = str(uuid.uuid4())
             results = process_documents_zip(
@@ -551,3 +552,176 @@ class BulkDocumentUploadTests(TestCase):
         self.assertFalse(results["success"])
         self.assertEqual(results["processed_files"], 0)
         self.assertTrue(any("Job failed" in error for error in results["errors"]))
+
+    def _save_zip(self, files: dict):
+        from opencontractserver.corpuses.models import TemporaryFileHandle
+
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+            for name, content in files.items():
+                zip_file.writestr(name, content)
+        zip_buffer.seek(0)
+
+        temp_file = TemporaryFileHandle.objects.create()
+        temp_file.file.save("chunked.zip", zip_buffer)
+        return temp_file
+
+    def test_failed_chunk_deletes_stored_files(self):
+        """A chunk whose writes roll back deletes the files it already stored."""
+        from django.core.files.storage import default_storage
+
+        from opencontractserver.tasks import import_tasks
+
+        temp_file = self._save_zip(
+            {"a.pdf": self.pdf_content, "b.txt": self.txt_content}
+        )
+
+        with patch.object(
+            import_tasks,
+            "grant_permissions_for_new_objs_to_user",
+            side_effect=Exception("Simulated write error"),
+        ), patch.object(
+            import_tasks,
+            "_delete_document_files",
+            wraps=import_tasks._delete_document_files,
+        ) as delete_files:
+            results = process_documents_zip(
+                temporary_file_handle_id=temp_file.id,
+                user_id=self.user.id,
+                job_id=str(uuid.uuid4()),
+            )
+
+        self.assertEqual(results["processed_files"], 0)
+        self.assertEqual(results["error_files"], 2)
+        self.assertFalse(Document.objects.exists())
+
+        [documents] = delete_files.call_args.args
+        stored = [
+            document.pdf_file or document.txt_extract_file for document in documents
+        ]
+        self.assertEqual(len(stored), 2)
+        for field_file in stored:
+            self.assertFalse(default_storage.exists(field_file.name))
+
+    @override_settings(
+        CELERY_TASK_ALWAYS_EAGER=True,
+        CELERY_TASK_STORE_EAGER_RESULT=True,
+        ZIP_IMPORT_CHUNK_SIZE=2,
+    )
+    def test_zip_imported_in_chunks_with_progress(self):
+        """Files are imported by chunk tasks writing documents in bulk."""
+        from opencontractserver.corpuses.models import TemporaryFileHandle
+        from opencontractserver.utils.document_dedup import file_sha256
+        from opencontractserver.utils.job_progress import get_job_progress
+        from opencontractserver.utils.permissioning import (
+            user_has_permission_for_obj,
+        )
+
+        temp_file = self._save_zip(
+            {
+                "a.pdf": self.pdf_content,
+                "b.pdf": self.pdf_content,
+                "c.txt": self.txt_content,
+                "d.bin": b"\x00\x01\x02\x03\xde\xad\xbe\xef",
+                "e.pdf": self.pdf_content,
+                "folder/": b"",
+            }
+        )
+
+        job_id = str(uuid.uuid4())
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            results = process_documents_zip(
+                temporary_file_handle_id=temp_file.id,
+                user_id=self.user.id,
+                job_id=job_id,
+                corpus_id=self.corpus.id,
+            )
+
+        self.assertTrue(results["completed"])
+        self.assertTrue(results["success"])
+        self.assertEqual(results["total_files"], 6)
+        self.assertEqual(results["processed_files"], 4)
+        self.assertEqual(results["skipped_files"], 2)
+        self.assertEqual(results["error_files"], 0)
+        self.assertFalse(TemporaryFileHandle.objects.filter(id=temp_file.id).exists())
+
+        documents = Document.objects.filter(id__in=results["document_ids"])
+        self.assertEqual(
+            sorted(documents.values_list("title", flat=True)),
+            ["a.pdf", "b.pdf", "c.txt", "e.pdf"],
+        )
+        for document in documents:
+            self.assertTrue(document.backend_lock)
+            self.assertIsNotNone(document.processing_started)
+            self.assertIn(self.corpus, document.corpus_set.all())
+            self.assertTrue(
+                user_has_permission_for_obj(self.user, document, PermissionTypes.UPDATE)
+            )
+        pdf = documents.get(title="a.pdf")
+        self.assertEqual(pdf.file_sha256, file_sha256(self.pdf_content))
+        self.assertEqual(pdf.pdf_file.read(), self.pdf_content)
+        self.assertEqual(documents.get(title="c.txt").file_type, "text/plain")
+
+        # Ingest is started for every document once the chunks commit
+        self.assertTrue(callbacks)
+
+        self.assertEqual(
+            get_job_progress(job_id),
+            {
+                "total_files": 6,
+                "processed_files": 4,
+                "skipped_files": 2,
+                "error_files": 0,
+            },
+        )
+
+    @override_settings(
+        CELERY_TASK_ALWAYS_EAGER=True,
+        CELERY_TASK_STORE_EAGER_RESULT=True,
+        ZIP_IMPORT_CHUNK_SIZE=2,
+        USAGE_CAPPED_USER_DOC_CAP_COUNT=3,
+    )
+    def test_user_cap_checked_per_chunk(self):
+        """A capped user's quota is shared by all chunks of the job."""
+        capped_user = User.objects.create_user(
+            username="capped_user_chunks",
+            password="testpass",
+            is_usage_capped=True,
+        )
+        temp_file = self._save_zip(
+            {f"doc{index}.pdf": self.pdf_content for index in range(5)}
+        )
+
+        results = process_documents_zip(
+            temporary_file_handle_id=temp_file.id,
+            user_id=capped_user.id,
+            job_id=str(uuid.uuid4()),
+        )
+
+        self.assertFalse(results["success"])
+        self.assertEqual(results["processed_files"], 3)
+        self.assertEqual(capped_user.document_set.count(), 3)
+        self.assertEqual(
+            results["errors"], ["User document limit reached during processing"]
+        )
+
+    def test_status_query_reports_progress_of_running_job(self):
+        from opencontractserver.utils.job_progress import (
+            add_job_progress,
+            init_job_progress,
+        )
+
+        job_id = str(uuid.uuid4())
+        init_job_progress(
+            job_id, total_files=10, processed_files=0, skipped_files=1, error_files=0
+        )
+        add_job_progress(job_id, processed_files=4)
+        add_job_progress(job_id, processed_files=2, error_files=1)
+
+        response = self.execute_status_query(job_id)
+
+        self.assertFalse(response["completed"])
+        self.assertEqual(response["totalFiles"], 10)
+        self.assertEqual(response["processedFiles"], 6)
+        self.assertEqual(response["skippedFiles"], 1)
+        self.assertEqual(response["errorFiles"], 1)
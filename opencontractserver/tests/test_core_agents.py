@@ -263,6 +263,43 @@ class TestCoreConversationManager(TestCoreAgentComponentsSetup):
         self.assertEqual(message.content, "Updated content")
         self.assertEqual(message.data["status"], "edited")
 
+    async def test_history_window_folds_old_messages_into_summary(self):
+        conversation = await Conversation.objects.acreate(
+            title="Long Convo", creator=self.user
+        )
+        config = AgentConfig(
+            user_id=self.user.id,
+            history_token_budget=20,
+            history_summary_token_budget=1000,
+        )
+        manager = CoreConversationManager(
+            conversation=conversation, user_id=self.user.id, config=config
+        )
+        for turn in range(6):
+            await manager.store_user_message(f"question {turn} " + "word " * 3)
+            await manager.store_llm_message(f"answer {turn} " + "word " * 3)
+
+        window = await manager.get_history_window()
+        # 5 tokens per message → the last four fit in a budget of 20
+        self.assertEqual(
+            [m.content.split()[:2] for m in window.messages],
+            [["question", "4"], ["answer", "4"], ["question", "5"], ["answer", "5"]],
+        )
+        self.assertIn("User: question 0", window.summary)
+        self.assertIn("Assistant: answer 3", window.summary)
+
+        await conversation.arefresh_from_db()
+        self.assertEqual(conversation.history_summary, window.summary)
+        self.assertEqual(
+            conversation.history_summary_through_id, window.messages[0].id - 1
+        )
+
+        # Next turn only reads messages after the summary pointer
+        await manager.store_user_message("question 6")
+        window = await manager.get_history_window()
+        self.assertEqual(window.messages[-1].content, "question 6")
+        self.assertNotIn("question 6", window.summary)
+
 
 class TestCoreAgentFactoriesDefaults(TestCoreAgentComponentsSetup):
     # These test the default prompt generation, not full context creation
@@ -1,10 +1,16 @@
 import base64
+import io
+import json
 import pathlib
 import uuid
+import zipfile
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.test import TestCase, override_settings
 
 from opencontractserver.annotations.models import Annotation, AnnotationLabel
 from opencontractserver.corpuses.models import Corpus, TemporaryFileHandle
@@ -12,7 +18,11 @@ from opencontractserver.documents.models import Document
 from opencontractserver.tasks import import_corpus
 from opencontractserver.tasks.utils import package_zip_into_base64
 from opencontractserver.types.enums import PermissionTypes
-from opencontractserver.utils.permissioning import set_permissions_for_obj_to_user
+from opencontractserver.users.models import UserImport
+from opencontractserver.utils.permissioning import (
+    set_permissions_for_obj_to_user,
+    user_has_permission_for_obj,
+)
 
 User = get_user_model()
 
@@ -72,3 +82,123 @@ class ImportCorpusTestCase:
         assert documents.count() == 2
 
         # TODO - check the integrity of the corpus itself
+
+
+class ChunkedCorpusImportTestCase(TestCase):
+
+    fixtures_path = pathlib.Path(__file__).parent / "fixtures"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="12345678")
+
+    def _build_export_zip(self) -> bytes:
+        """
+        The fixture export with its document copied three times (the second
+        annotation of each copy made a child of the first) and a fourth
+        document whose PDF is missing from the zip.
+        """
+        with zipfile.ZipFile(self.fixtures_path / "Test_Corpus_EXPORT.zip") as source:
+            data = json.loads(source.read("data.json"))
+            [(pdf_name, doc_data)] = data["annotated_docs"].items()
+            pdf_bytes = source.read(pdf_name)
+
+        doc_data["labelled_text"][1]["parent_id"] = doc_data["labelled_text"][0]["id"]
+        data["annotated_docs"] = {
+            filename: doc_data
+            for filename in ["doc_1.pdf", "doc_2.pdf", "doc_3.pdf", "missing.pdf"]
+        }
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, mode="w") as export_zip:
+            for filename in ["doc_1.pdf", "doc_2.pdf", "doc_3.pdf"]:
+                export_zip.writestr(filename, pdf_bytes)
+            export_zip.writestr("data.json", json.dumps(data))
+        return buffer.getvalue()
+
+    @override_settings(CORPUS_IMPORT_CHUNK_SIZE=2)
+    def test_import_in_chunks_records_progress(self):
+        corpus_obj = Corpus.objects.create(
+            title="New Import", creator=self.user, backend_lock=False
+        )
+        temporary_file = TemporaryFileHandle.objects.create()
+        temporary_file.file.save(
+            f"corpus_import_{uuid.uuid4()}.zip", ContentFile(self._build_export_zip())
+        )
+        user_import = UserImport.objects.create(
+            name="Corpus import", creator=self.user, corpus=corpus_obj
+        )
+
+        result = import_corpus.s(
+            temporary_file.id, self.user.id, corpus_obj.id, user_import.id
+        ).apply()
+        self.assertEqual(result.get(), corpus_obj.id)
+
+        documents = Document.objects.filter(creator=self.user)
+        self.assertEqual(documents.count(), 3)
+        self.assertEqual(corpus_obj.documents.count(), 3)
+        for document in documents:
+            self.assertFalse(document.backend_lock)
+            self.assertEqual(document.doc_annotations.count(), 6)
+            self.assertEqual(
+                document.doc_annotations.filter(parent__isnull=False).count(), 1
+            )
+            self.assertTrue(
+                user_has_permission_for_obj(self.user, document, PermissionTypes.UPDATE)
+            )
+
+        user_import.refresh_from_db()
+        self.assertEqual(user_import.total_documents, 4)
+        self.assertEqual(user_import.processed_documents, 3)
+        self.assertEqual(user_import.failed_documents, 1)
+        self.assertIn("missing.pdf", user_import.errors)
+        self.assertIsNotNone(user_import.started)
+        self.assertIsNotNone(user_import.finished)
+
+    def test_failed_chunk_deletes_stored_files(self):
+        from opencontractserver.tasks import import_tasks
+
+        corpus_obj = Corpus.objects.create(
+            title="New Import", creator=self.user, backend_lock=False
+        )
+        temporary_file = TemporaryFileHandle.objects.create()
+        temporary_file.file.save(
+            f"corpus_import_{uuid.uuid4()}.zip", ContentFile(self._build_export_zip())
+        )
+        user_import = UserImport.objects.create(
+            name="Corpus import", creator=self.user, corpus=corpus_obj
+        )
+
+        with patch.object(
+            import_tasks,
+            "grant_permissions_for_new_objs_to_user",
+            side_effect=Exception("Simulated write error"),
+        ), patch.object(
+            import_tasks,
+            "_delete_document_files",
+            wraps=import_tasks._delete_document_files,
+        ) as delete_files:
+            import_corpus.s(
+                temporary_file.id, self.user.id, corpus_obj.id, user_import.id
+            ).apply()
+
+        self.assertFalse(Document.objects.filter(creator=self.user).exists())
+        # missing.pdf never got as far as storing files
+        deleted = [
+            document
+            for call in delete_files.call_args_list
+            for document in call.args[0]
+            if document.pdf_file
+        ]
+        self.assertEqual(len(deleted), 3)
+        for document in deleted:
+            for field_file in (
+                document.pdf_file,
+                document.pawls_parse_file,
+                document.txt_extract_file,
+            ):
+                self.assertTrue(field_file.name)
+                self.assertFalse(default_storage.exists(field_file.name))
+
+        user_import.refresh_from_db()
+        self.assertEqual(user_import.processed_documents, 0)
+        self.assertEqual(user_import.failed_documents, 4)
@@ -1,4 +1,9 @@
+import base64
+import hashlib
+import io
 import json
+import os
+import threading
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
@@ -8,7 +13,13 @@ from django.test import TestCase, override_settings
 from requests.exceptions import ConnectionError, RequestException, Timeout
 
 from opencontractserver.documents.models import Document
-from opencontractserver.pipeline.parsers.docling_parser_rest import DoclingParser
+from opencontractserver.pipeline.parsers import docling_parser_rest
+from opencontractserver.pipeline.parsers.docling_parser_rest import (
+    UPLOAD_CHUNK_SIZE,
+    DoclingParser,
+    stream_json_body,
+)
+from opencontractserver.tests.fake_docling_server import FakeDoclingServer
 
 User = get_user_model()
 
@@ -20,10 +31,14 @@ class MockResponse:
         self.status_code = status_code
         self.json_data = json_data
         self.text = json.dumps(json_data)
+        self.raw = io.BytesIO(self.text.encode())
 
     def json(self):
         return self.json_data
 
+    def close(self):
+        pass
+
     def raise_for_status(self):
         if self.status_code >= 400:
             raise Exception(f"HTTP Error: {self.status_code}")
@@ -99,7 +114,9 @@ class TestDoclingParser(TestCase):
             "relationships": [],
         }
 
-    @patch("opencontractserver.pipeline.parsers.docling_parser_rest.requests.post")
+    @patch(
+        "opencontractserver.pipeline.parsers.docling_parser_rest.requests.Session.post"
+    )
     @patch(
         "opencontractserver.pipeline.parsers.docling_parser_rest.default_storage.open"
     )
@@ -107,7 +124,7 @@ class TestDoclingParser(TestCase):
         """Test successful document parsing."""
         # Mock the file reading
         mock_file = MagicMock()
-        mock_file.read.return_value = b"mock pdf content"
+        mock_file.read.side_effect = [b"mock pdf content", b""]
         mock_open.return_value.__enter__.return_value = mock_file
 
         # Mock the HTTP response
@@ -133,17 +150,17 @@ class TestDoclingParser(TestCase):
         call_kwargs = mock_post.call_args.kwargs
         self.assertEqual(call_kwargs["headers"]["Content-Type"], "application/json")
 
-        # Verify payload has the correct structure
-        payload = call_kwargs[
-            "json"
-        ]  # In requests.post, the json parameter is already a dict
+        # Verify payload has the correct structure (the body is streamed)
+        payload = json.loads(b"".join(call_kwargs["data"]))
         self.assertTrue(payload["filename"].endswith(".pdf"))
-        self.assertIn("pdf_base64", payload)
+        self.assertEqual(payload["pdf_base64"], "bW9jayBwZGYgY29udGVudA==")
         self.assertFalse(payload["force_ocr"])
         self.assertTrue(payload["roll_up_groups"])
         self.assertFalse(payload["llm_enhanced_hierarchy"])
 
-    @patch("opencontractserver.pipeline.parsers.docling_parser_rest.requests.post")
+    @patch(
+        "opencontractserver.pipeline.parsers.docling_parser_rest.requests.Session.post"
+    )
     @patch(
         "opencontractserver.pipeline.parsers.docling_parser_rest.default_storage.open"
     )
@@ -200,7 +217,9 @@ class TestDoclingParser(TestCase):
         self.assertEqual(normalized["page_count"], 2)
         self.assertEqual(normalized["pawls_file_content"][0]["page"]["width"], 100)
 
-    @patch("opencontractserver.pipeline.parsers.docling_parser_rest.requests.post")
+    @patch(
+        "opencontractserver.pipeline.parsers.docling_parser_rest.requests.Session.post"
+    )
     @patch(
         "opencontractserver.pipeline.parsers.docling_parser_rest.default_storage.open"
     )
@@ -218,7 +237,9 @@ class TestDoclingParser(TestCase):
         self.assertIsNone(result)
         mock_post.assert_called_once()  # Ensure we attempted a single request
 
-    @patch("opencontractserver.pipeline.parsers.docling_parser_rest.requests.post")
+    @patch(
+        "opencontractserver.pipeline.parsers.docling_parser_rest.requests.Session.post"
+    )
     @patch(
         "opencontractserver.pipeline.parsers.docling_parser_rest.default_storage.open"
     )
@@ -236,7 +257,9 @@ class TestDoclingParser(TestCase):
         self.assertIsNone(result)
         mock_post.assert_called_once()
 
-    @patch("opencontractserver.pipeline.parsers.docling_parser_rest.requests.post")
+    @patch(
+        "opencontractserver.pipeline.parsers.docling_parser_rest.requests.Session.post"
+    )
     @patch(
         "opencontractserver.pipeline.parsers.docling_parser_rest.default_storage.open"
     )
@@ -262,3 +285,82 @@ class TestDoclingParser(TestCase):
 
         self.assertIsNone(result)
         mock_post.assert_called_once()
+
+
+@override_settings(CONCURRENCY_LIMIT_BACKEND="local")
+class TestDoclingParserStreaming(TestCase):
+    """Uploads against the local fake Docling service."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="streamer", password="x")
+        cls.pdf_bytes = b"%PDF-1.7\n" + os.urandom(3 * UPLOAD_CHUNK_SIZE + 1234)
+
+    def setUp(self):
+        self.doc = Document.objects.create(
+            title="Big scan", file_type="application/pdf", creator=self.user
+        )
+        self.doc.pdf_file.save("scan.pdf", ContentFile(self.pdf_bytes))
+
+    def _parse(self, server, **settings):
+        with override_settings(DOCLING_PARSER_SERVICE_URL=server.url, **settings):
+            return DoclingParser().parse_document(user_id=1, doc_id=self.doc.id)
+
+    def test_json_and_multipart_uploads_arrive_intact(self):
+        expected = hashlib.sha256(self.pdf_bytes).hexdigest()
+        with FakeDoclingServer() as server:
+            json_result = self._parse(server, DOCLING_PARSER_UPLOAD_MODE="json")
+            multipart_result = self._parse(
+                server, DOCLING_PARSER_UPLOAD_MODE="multipart"
+            )
+
+        for result in (json_result, multipart_result):
+            self.assertEqual(result["page_count"], 1)
+            self.assertEqual(result["title"], "Fake Docling Document")
+
+        json_upload, multipart_upload = server.uploads
+        self.assertEqual(
+            [json_upload["mode"], multipart_upload["mode"]], ["json", "multipart"]
+        )
+        for upload in server.uploads:
+            self.assertEqual(upload["sha256"], expected)
+            self.assertTrue(upload["chunked"])
+            self.assertTrue(upload["filename"].endswith(".pdf"))
+        self.assertEqual(json_upload["fields"]["roll_up_groups"], True)
+        self.assertEqual(multipart_upload["fields"]["roll_up_groups"], "true")
+
+    def test_json_body_is_generated_in_bounded_chunks(self):
+        fields = {"filename": "scan.pdf", "force_ocr": False}
+        chunks = list(stream_json_body(io.BytesIO(self.pdf_bytes), fields))
+
+        self.assertLessEqual(max(len(c) for c in chunks), UPLOAD_CHUNK_SIZE * 4 // 3)
+        payload = json.loads(b"".join(chunks))
+        self.assertEqual(base64.b64decode(payload.pop("pdf_base64")), self.pdf_bytes)
+        self.assertEqual(payload, fields)
+
+    def test_in_flight_requests_are_capped(self):
+        results = []
+
+        def parse(server):
+            results.append(self._parse(server, DOCLING_PARSER_MAX_IN_FLIGHT=2))
+
+        with FakeDoclingServer(delay=0.1) as server, patch.object(
+            docling_parser_rest.Document.objects, "get", return_value=self.doc
+        ):
+            threads = [threading.Thread(target=parse, args=(server,)) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(server.uploads), 6)
+        self.assertEqual(server.peak_in_flight, 2)
+        self.assertTrue(all(result is not None for result in results))
+
+    def test_connections_are_reused(self):
+        with FakeDoclingServer() as server:
+            for _ in range(3):
+                self.assertIsNotNone(self._parse(server))
+
+        self.assertEqual(len(server.uploads), 3)
+        self.assertEqual(server.connections, 1)
@@ -1,4 +1,5 @@
 # Copyright (C) 2024 - John Scrudato
+import io
 import json
 import logging
 
@@ -9,6 +10,7 @@ from django.core.files.base import ContentFile
 from django.db import transaction
 from django.test import TestCase
 from django.test.utils import override_settings
+from PyPDF2 import PdfReader, PdfWriter
 
 from opencontractserver.corpuses.models import Corpus
 from opencontractserver.documents.models import Document
@@ -16,6 +18,7 @@ from opencontractserver.pipeline.parsers.nlm_ingest_parser import NLMIngestParse
 from opencontractserver.tests.fixtures import (
     NLM_INGESTOR_EXPECTED_JSON,
     NLM_INGESTOR_SAMPLE_PDF,
+    NLM_INGESTOR_SAMPLE_PDF_NEEDS_OCR,
     SAMPLE_PAWLS_FILE_ONE_PATH,
 )
 from opencontractserver.types.dicts import OpenContractDocExport
@@ -95,3 +98,43 @@ class ParseWithNLMTestCase(TestCase):
         self.assertIn("labelled_text", open_contracts_data)
         self.assertEqual(len(open_contracts_data["labelled_text"]), 27)
         self.assertEqual(open_contracts_data["title"], "Grab title from parser")
+
+    @responses.activate
+    def test_parse_with_nlm_ocrs_mixed_pdf(self) -> None:
+        """
+        A PDF with a text layer but a scanned page is only sent for OCR when
+        ocr_mixed_pages is set.
+        """
+        writer = PdfWriter()
+        for pdf in [NLM_INGESTOR_SAMPLE_PDF, NLM_INGESTOR_SAMPLE_PDF_NEEDS_OCR]:
+            writer.add_page(PdfReader(io.BytesIO(pdf.read_bytes())).pages[0])
+        mixed_pdf = io.BytesIO()
+        writer.write(mixed_pdf)
+        self.doc.pdf_file.save("mixed.pdf", ContentFile(mixed_pdf.getvalue()))
+
+        nlm_hostname = settings.PARSER_KWARGS[
+            "opencontractserver.pipeline.parsers.nlm_ingest_parser.NLMIngestParser"
+        ]["endpoint"]
+        for apply_ocr in ["no", "yes"]:
+            responses.add(
+                responses.Response(
+                    method="POST",
+                    url=nlm_hostname
+                    + "/api/parseDocument?calculate_opencontracts_data=yes"
+                    + f"&applyOcr={apply_ocr}",
+                    json=json.loads(NLM_INGESTOR_EXPECTED_JSON.read_text()),
+                )
+            )
+
+        parser = NLMIngestParser()
+        parser.parse_document(
+            user_id=self.user.id, doc_id=self.doc.id, ocr_mixed_pages=False
+        )
+        parser.parse_document(
+            user_id=self.user.id, doc_id=self.doc.id, ocr_mixed_pages=True
+        )
+
+        self.assertEqual(
+            [call.request.params["applyOcr"] for call in responses.calls],
+            ["no", "yes"],
+        )
@@ -0,0 +1,222 @@
+import hashlib
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.utils import timezone
+from graphene.test import Client
+
+from config.graphql.schema import schema
+from opencontractserver.annotations.models import (
+    TOKEN_LABEL,
+    Annotation,
+    AnnotationLabel,
+    Embedding,
+    Relationship,
+)
+from opencontractserver.documents.models import Document
+from opencontractserver.tasks.doc_tasks import build_ingest_graph
+from opencontractserver.types.enums import PermissionTypes
+from opencontractserver.utils.document_dedup import (
+    copy_parse_artifacts,
+    find_reusable_document,
+)
+from opencontractserver.utils.files import base_64_encode_bytes
+from opencontractserver.utils.permissioning import (
+    set_permissions_for_obj_to_user,
+    user_has_permission_for_obj,
+)
+
+User = get_user_model()
+
+FILE_BYTES = b"The same text, uploaded twice."
+FILE_SHA256 = hashlib.sha256(FILE_BYTES).hexdigest()
+
+
+class TestContext:
+    def __init__(self, user):
+        self.user = user
+
+
+class TestDocumentDedup(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="uploader", password="12345678")
+        self.other_user = User.objects.create_user(
+            username="stranger", password="12345678"
+        )
+        self.source = self._processed_doc(self.user)
+
+        label = AnnotationLabel.objects.create(
+            text="Section", label_type=TOKEN_LABEL, creator=self.user
+        )
+        self.parent = Annotation.objects.create(
+            document=self.source,
+            annotation_label=label,
+            raw_text="Heading",
+            structural=True,
+            creator=self.user,
+        )
+        self.child = Annotation.objects.create(
+            document=self.source,
+            annotation_label=label,
+            raw_text="Body",
+            parent=self.parent,
+            structural=True,
+            creator=self.user,
+        )
+        # Not structural: belongs to the user's own work on the source
+        Annotation.objects.create(
+            document=self.source,
+            annotation_label=label,
+            raw_text="User note",
+            creator=self.user,
+        )
+        relationship = Relationship.objects.create(
+            document=self.source,
+            relationship_label=label,
+            structural=True,
+            creator=self.user,
+        )
+        relationship.source_annotations.add(self.parent)
+        relationship.target_annotations.add(self.child)
+        Embedding.objects.create(
+            annotation=self.child,
+            embedder_path="test/embedder",
+            vector_384=[0.5] * 384,
+            creator=self.user,
+        )
+
+    def _processed_doc(self, creator, sha256=FILE_SHA256):
+        document = Document.objects.create(
+            title="Processed",
+            file_type="text/plain",
+            file_sha256=sha256,
+            processing_started=timezone.now(),
+            processing_finished=timezone.now(),
+            creator=creator,
+        )
+        document.txt_extract_file.save("source.txt", ContentFile(FILE_BYTES))
+        set_permissions_for_obj_to_user(creator, document, [PermissionTypes.CRUD])
+        return document
+
+    def _new_doc(self):
+        return Document.objects.create(
+            title="Duplicate",
+            file_type="text/plain",
+            file_sha256=FILE_SHA256,
+            processing_started=timezone.now(),
+            backend_lock=True,
+            creator=self.user,
+        )
+
+    def test_find_reusable_document(self):
+        self.assertEqual(
+            find_reusable_document(self.user, FILE_SHA256, "text/plain"), self.source
+        )
+        # Not visible to other users, other hashes or other types
+        self.assertIsNone(
+            find_reusable_document(self.other_user, FILE_SHA256, "text/plain")
+        )
+        self.assertIsNone(find_reusable_document(self.user, "0" * 64, "text/plain"))
+        self.assertIsNone(
+            find_reusable_document(self.user, FILE_SHA256, "application/pdf")
+        )
+        with self.settings(DOCUMENT_DEDUP_ENABLED=False):
+            self.assertIsNone(
+                find_reusable_document(self.user, FILE_SHA256, "text/plain")
+            )
+
+        # Still being processed
+        self.source.backend_lock = True
+        self.source.save()
+        self.assertIsNone(find_reusable_document(self.user, FILE_SHA256, "text/plain"))
+
+    def test_copy_parse_artifacts(self):
+        target = self._new_doc()
+
+        copied = copy_parse_artifacts(self.source, target, self.user.id)
+
+        self.assertEqual(copied, 2)
+        target.refresh_from_db()
+        with target.txt_extract_file.open("rb") as txt_file:
+            self.assertEqual(txt_file.read(), FILE_BYTES)
+        self.assertNotEqual(target.txt_extract_file.name, "")
+
+        annotations = Annotation.objects.filter(document=target)
+        self.assertEqual(annotations.count(), 2)
+        child = annotations.get(raw_text="Body")
+        self.assertEqual(child.parent.document, target)
+        self.assertEqual(child.parent.raw_text, "Heading")
+        self.assertTrue(
+            user_has_permission_for_obj(self.user, child, PermissionTypes.ALL)
+        )
+
+        relationship = Relationship.objects.get(document=target)
+        self.assertEqual(list(relationship.source_annotations.all()), [child.parent])
+        self.assertEqual(list(relationship.target_annotations.all()), [child])
+
+        embedding = Embedding.objects.get(annotation=child)
+        self.assertEqual(embedding.embedder_path, "test/embedder")
+
+        # The source is left untouched
+        self.assertEqual(Annotation.objects.filter(document=self.source).count(), 3)
+
+    def test_create_signal_reuses_identical_processed_document(self):
+        with patch(
+            "opencontractserver.tasks.doc_tasks.build_ingest_graph"
+        ) as mock_graph:
+            with self.captureOnCommitCallbacks(execute=True):
+                opted_out = Document(
+                    title="Opted out",
+                    file_type="text/plain",
+                    file_sha256=FILE_SHA256,
+                    creator=self.user,
+                )
+                opted_out.reuse_existing_parse = False
+                opted_out.save()
+        self.assertIsNone(mock_graph.call_args.kwargs["source_doc_id"])
+        mock_graph.return_value.apply_async.assert_called_once()
+
+        with patch(
+            "opencontractserver.tasks.doc_tasks.build_ingest_graph"
+        ) as mock_graph:
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.create(
+                    title="Duplicate",
+                    file_type="text/plain",
+                    file_sha256=FILE_SHA256,
+                    creator=self.user,
+                )
+        self.assertEqual(mock_graph.call_args.kwargs["source_doc_id"], self.source.id)
+
+        reuse_stage = build_ingest_graph(
+            user_id=self.user.id, doc_id=self.source.id, source_doc_id=self.source.id
+        ).tasks
+        self.assertEqual(
+            [task.task for task in reuse_stage],
+            ["opencontractserver.tasks.doc_tasks.reuse_document_parse"],
+        )
+
+    def test_upload_mutation_stores_file_hash(self):
+        client = Client(schema, context_value=TestContext(self.user))
+        result = client.execute(
+            """
+            mutation {
+                uploadDocument(
+                    base64FileString: "%s",
+                    filename: "again.txt",
+                    title: "Again",
+                    description: "Same bytes",
+                    customMeta: {},
+                    makePublic: false,
+                    reuseExistingParse: false
+                ) { ok message document { id } }
+            }
+            """
+            % base_64_encode_bytes(FILE_BYTES)
+        )
+        self.assertIsNone(result.get("errors"))
+        self.assertTrue(result["data"]["uploadDocument"]["ok"])
+        uploaded = Document.objects.get(title="Again")
+        self.assertEqual(uploaded.file_sha256, FILE_SHA256)
@@ -0,0 +1,89 @@
+"""
+Tests for the two-tier document text cache used by the agent text tools.
+"""
+
+import tempfile
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from opencontractserver.llms.tools import document_text_cache as text_cache
+from opencontractserver.llms.tools.document_text_cache import DocumentTextCache
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def fake_document(pk, text, modified=NOW):
+    return SimpleNamespace(
+        pk=pk,
+        modified=modified,
+        txt_extract_file=MagicMock(read=MagicMock(return_value=text.encode("utf-8"))),
+    )
+
+
+class DocumentTextCacheTestCase(SimpleTestCase):
+    @override_settings(LLM_DOC_TEXT_CACHE_MAX_BYTES=10, LLM_DOC_TEXT_CACHE_SHARED="")
+    def test_in_process_tier_is_bounded_by_bytes(self):
+        cache = DocumentTextCache()
+        first, second = fake_document(1, "aaaaaa"), fake_document(2, "bbbbbb")
+
+        self.assertEqual(cache.get_text(first), "aaaaaa")
+        self.assertEqual(cache.get_slice(first, 1, 3), "aa")
+        self.assertEqual(first.txt_extract_file.read.call_count, 1)
+
+        cache.get_text(second)
+        stats = cache.get_stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertLessEqual(stats["bytes"], 10)
+
+        # A newer version of a document replaces the cached one
+        updated = fake_document(2, "cccc", modified=NOW + timedelta(seconds=1))
+        self.assertEqual(cache.get_text(updated), "cccc")
+        self.assertEqual(cache.get_stats()["bytes"], 4)
+
+        # Evicted and invalidated documents leave no version mapping behind
+        self.assertEqual(list(cache._document_keys), [2])
+        cache.invalidate(updated)
+        self.assertEqual(cache._document_keys, {})
+
+    def test_disk_tier_serves_ranges_without_reading_storage(self):
+        text = "§1. Définitions — " * 50 + "fin"
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            LLM_DOC_TEXT_CACHE_SHARED="disk",
+            LLM_DOC_TEXT_CACHE_DIR=directory,
+            LLM_DOC_TEXT_CACHE_MAX_BYTES=0,
+        ), patch.object(text_cache, "OFFSET_INDEX_STRIDE", 7):
+            writer = DocumentTextCache()
+            writer.get_text(fake_document(5, text))
+
+            # Another worker: nothing in process, nothing read from storage
+            document = fake_document(5, "should not be read")
+            reader = DocumentTextCache()
+            for start, end in [(0, 5), (3, 40), (100, 101), (850, None), (10, 10)]:
+                self.assertEqual(
+                    reader.get_slice(document, start, end), text[start:end]
+                )
+            document.txt_extract_file.read.assert_not_called()
+            self.assertEqual(reader.get_stats()["shared_range_hits"], 5)
+
+            self.assertEqual(reader.get_text(document), text)
+            self.assertEqual(reader.get_stats()["shared_hits"], 1)
+
+            reader.invalidate(document)
+            self.assertEqual(reader.get_text(document), "should not be read")
+
+    def test_disk_tier_keeps_other_writers_temp_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tier = text_cache.DiskTextTier(directory)
+            tier.set("doc_txt:5:1.0", "old")
+            in_flight = tier.directory / "doc_txt-5-2.0.txt.4242.tmp"
+            in_flight.write_text("new")
+
+            tier.set("doc_txt:5:3.0", "newer")
+
+            self.assertIsNone(tier.get("doc_txt:5:1.0"))
+            self.assertEqual(tier.get("doc_txt:5:3.0"), "newer")
+            self.assertTrue(in_flight.exists())
@@ -619,5 +619,26 @@ class TestEmbeddingTask(unittest.TestCase):
         mock_annot.add_embedding.assert_called_with(default_path, test_vector)
 
 
+class TestQueueAnnotationEmbeddings(unittest.TestCase):
+    @patch(
+        "opencontractserver.tasks.embeddings_task.calculate_embeddings_for_annotations"
+    )
+    def test_queues_one_task_per_batch(self, mock_task):
+        from opencontractserver.tasks.embeddings_task import (
+            queue_annotation_embeddings,
+        )
+
+        queue_annotation_embeddings(list(range(250)), batch_size=100)
+
+        self.assertEqual(
+            [call.args[0] for call in mock_task.delay.call_args_list],
+            [list(range(100)), list(range(100, 200)), list(range(200, 250))],
+        )
+
+        mock_task.delay.reset_mock()
+        queue_annotation_embeddings([])
+        mock_task.delay.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,180 @@
+"""
+Tests for fieldset-level (one call per document) extraction.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from opencontractserver.annotations.models import Annotation
+from opencontractserver.corpuses.models import Corpus
+from opencontractserver.documents.models import Document
+from opencontractserver.extracts.models import Column, Datacell, Extract, Fieldset
+from opencontractserver.llms import agents
+from opencontractserver.tasks import data_extract_tasks
+from opencontractserver.tasks.data_extract_tasks import (
+    InvalidColumnValue,
+    build_fieldset_output_model,
+    doc_extract_fieldset_task,
+)
+from opencontractserver.tasks.extract_orchestrator_tasks import run_extract
+
+User = get_user_model()
+
+
+class FieldsetExtractionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="fieldset_user", password="x")
+        cls.corpus = Corpus.objects.create(title="Contracts", creator=cls.user)
+        cls.document = Document.objects.create(
+            title="MSA", creator=cls.user, file_type="text/plain"
+        )
+        cls.corpus.documents.add(cls.document)
+        cls.passage = Annotation.objects.create(
+            document=cls.document,
+            corpus=cls.corpus,
+            creator=cls.user,
+            raw_text="This agreement is between Acme Corp and Widgets LLC.",
+        )
+
+        cls.fieldset = Fieldset.objects.create(
+            name="Contract terms", description="Key terms", creator=cls.user
+        )
+        cls.parties = Column.objects.create(
+            name="Parties",
+            fieldset=cls.fieldset,
+            query="Who are the parties?",
+            output_type="str",
+            extract_is_list=True,
+            creator=cls.user,
+        )
+        cls.term = Column.objects.create(
+            name="Term (months)",
+            fieldset=cls.fieldset,
+            query="How many months does the agreement last?",
+            output_type="int",
+            creator=cls.user,
+        )
+        cls.governing_law = Column.objects.create(
+            name="Governing law",
+            fieldset=cls.fieldset,
+            query="Which law governs the agreement?",
+            output_type="str",
+            creator=cls.user,
+        )
+        cls.extract = Extract.objects.create(
+            name="Terms", fieldset=cls.fieldset, creator=cls.user
+        )
+        cls.extract.documents.add(cls.document)
+
+    def _cell(self, column):
+        return Datacell.objects.create(
+            extract=self.extract,
+            column=column,
+            document=self.document,
+            data_definition=column.output_type,
+            creator=self.user,
+        )
+
+    def test_invalid_columns_do_not_fail_the_whole_answer(self):
+        model = build_fieldset_output_model(
+            [self.parties, self.term, self.governing_law]
+        )
+        answer = model.model_validate(
+            {
+                f"column_{self.parties.id}": {"value": ["Acme"], "sources": [1]},
+                f"column_{self.term.id}": {"value": "about a year"},
+            }
+        )
+        self.assertEqual(getattr(answer, f"column_{self.parties.id}").value, ["Acme"])
+        self.assertIsInstance(
+            getattr(answer, f"column_{self.term.id}"), InvalidColumnValue
+        )
+        self.assertIsNone(getattr(answer, f"column_{self.governing_law.id}"))
+
+        schema = model.model_json_schema()
+        self.assertEqual(
+            schema["properties"][f"column_{self.term.id}"]["title"], "Term (months)"
+        )
+
+    def test_one_call_fills_cells_with_sources_and_retries_invalid_ones(self):
+        parties, term, law = (
+            self._cell(self.parties),
+            self._cell(self.term),
+            self._cell(self.governing_law),
+        )
+        calls = []
+
+        async def structured_response(**kwargs):
+            calls.append(kwargs)
+            return kwargs["target_type"].model_validate(
+                {
+                    f"column_{self.parties.id}": {
+                        "value": ["Acme Corp", "Widgets LLC"],
+                        "sources": [self.passage.id, 999999],
+                    },
+                    f"column_{self.term.id}": {"value": "twelve-ish"},
+                    f"column_{self.governing_law.id}": {"value": None},
+                }
+            )
+
+        with patch.object(
+            data_extract_tasks,
+            "_retrieve_shared_passages",
+            AsyncMock(return_value={self.passage.id: self.passage.raw_text}),
+        ) as retrieval, patch.object(
+            agents,
+            "get_structured_response_from_document",
+            side_effect=structured_response,
+        ), patch.object(
+            data_extract_tasks.doc_extract_query_task, "_async_func", AsyncMock()
+        ) as per_column:
+            doc_extract_fieldset_task.si([parties.id, term.id, law.id]).apply()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(retrieval.await_count, 1)
+        self.assertIn(f"[{self.passage.id}] This agreement", calls[0]["extra_context"])
+
+        parties.refresh_from_db()
+        self.assertEqual(parties.data, {"data": ["Acme Corp", "Widgets LLC"]})
+        self.assertIsNotNone(parties.completed)
+        self.assertEqual(list(parties.sources.all()), [self.passage])
+
+        per_column.assert_awaited_once_with(term.id, similarity_top_k=10)
+
+        law.refresh_from_db()
+        self.assertIsNotNone(law.failed)
+        self.assertIsNone(law.completed)
+
+    @override_settings(EXTRACT_GROUP_FIELDSET_COLUMNS=True)
+    def test_run_extract_queues_one_task_per_document(self):
+        Column.objects.create(
+            name="Custom",
+            fieldset=self.fieldset,
+            query="Anything",
+            output_type="str",
+            task_name="opencontractserver.tasks.data_extract_tasks."
+            "llama_index_react_agent_query",
+            creator=self.user,
+        )
+        with patch(
+            "opencontractserver.tasks.extract_orchestrator_tasks.chord"
+        ) as chord:
+            run_extract(self.extract.id, self.user.id)
+
+        tasks = chord.call_args.args[0].tasks
+        self.assertEqual(
+            sorted(task.task.rsplit(".", 1)[-1] for task in tasks),
+            ["doc_extract_fieldset_task", "llama_index_react_agent_query"],
+        )
+        grouped = next(t for t in tasks if t.task.endswith("fieldset_task"))
+        self.assertEqual(
+            set(
+                Datacell.objects.filter(pk__in=grouped.args[0]).values_list(
+                    "column_id", flat=True
+                )
+            ),
+            {self.parties.id, self.term.id, self.governing_law.id},
+        )
@@ -0,0 +1,83 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from graphql import parse
+
+from config.graphql.query_cost import analyze_query_cost
+from config.graphql.schema import schema
+from opencontractserver.corpuses.models import Corpus
+from opencontractserver.documents.models import Document
+
+User = get_user_model()
+
+NESTED_QUERY = """
+    query Nested {
+      corpuses(first: 5) {
+        edges {
+          node {
+            id
+            documents(first: 2) { edges { node { id title } } }
+          }
+        }
+      }
+    }
+"""
+
+
+class GraphQLQueryCostTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cost_user", password="x")
+        for index in range(3):
+            corpus = Corpus.objects.create(title=f"Corpus {index}", creator=self.user)
+            corpus.documents.add(
+                Document.objects.create(title=f"Doc {index}", creator=self.user)
+            )
+        self.client.force_login(self.user)
+
+    def _post(self, query):
+        return self.client.post(
+            "/graphql/",
+            data=json.dumps({"query": query}),
+            content_type="application/json",
+        ).json()
+
+    def test_static_analysis(self):
+        document = parse(NESTED_QUERY)
+        cost = analyze_query_cost(
+            document.definitions[0], schema.graphql_schema, fragments={}
+        )
+        # corpuses -> documents -> title (edges / node wrappers don't count)
+        self.assertEqual(cost.depth, 3)
+        # 1 (corpuses) + 5 * (id + documents) + 5 * 2 * (id + title)
+        self.assertEqual(cost.cost, 1 + 5 * 2 + 5 * 2 * 2)
+
+    @override_settings(GRAPHQL_MAX_QUERY_DEPTH=2)
+    def test_over_limit_operations_are_rejected(self):
+        result = self._post(NESTED_QUERY)
+        self.assertIsNone(result["data"]["corpuses"])
+        self.assertIn(
+            "depth 3 exceeds the maximum of 2", result["errors"][0]["message"]
+        )
+
+    @override_settings(GRAPHQL_SQL_QUERY_BUDGET=1, GRAPHQL_SQL_BUDGET_ACTION="abort")
+    def test_sql_budget_abort(self):
+        with self.assertLogs("config.graphql.views", level="WARNING"):
+            result = self._post(NESTED_QUERY)
+        self.assertIn("SQL budget", result["errors"][0]["message"])
+
+    @override_settings(GRAPHQL_QUERY_COST_DEBUG=True)
+    def test_debug_extensions(self):
+        result = self._post(NESTED_QUERY)
+        self.assertEqual(len(result["data"]["corpuses"]["edges"]), 3)
+
+        extensions = result["extensions"]
+        self.assertEqual(extensions["cost"]["depth"], 3)
+        self.assertGreater(extensions["sql"]["queries"], 0)
+        fields = {entry["field"] for entry in extensions["resolvers"]}
+        self.assertIn("Query.corpuses", fields)
+        self.assertIn("CorpusType.documents", fields)
+
+    @override_settings(GRAPHQL_QUERY_COST_DEBUG=False)
+    def test_no_extensions_without_debug(self):
+        self.assertNotIn("extensions", self._post(NESTED_QUERY))
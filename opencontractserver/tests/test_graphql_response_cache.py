@@ -0,0 +1,121 @@
+import hashlib
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from config.graphql.response_cache import (
+    get_cacheable_tags,
+    get_response_cache_stats,
+)
+from opencontractserver.corpuses.models import Corpus
+
+User = get_user_model()
+
+CORPUSES_QUERY = "query PublicCorpuses { corpuses { edges { node { id title } } } }"
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE_ENABLED=True)
+class GraphQLResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cache_user", password="x")
+        self.public_corpus = Corpus.objects.create(
+            title="Public Corpus", creator=self.user, is_public=True
+        )
+        self.private_corpus = Corpus.objects.create(
+            title="Private Corpus", creator=self.user
+        )
+
+    def _post(self, payload, **extra):
+        return self.client.post(
+            "/graphql/",
+            data=json.dumps(payload),
+            content_type="application/json",
+            **extra,
+        )
+
+    def _titles(self, response):
+        edges = response.json()["data"]["corpuses"]["edges"]
+        return [edge["node"]["title"] for edge in edges]
+
+    def test_cacheable_query_detection(self):
+        self.assertIsNotNone(get_cacheable_tags(CORPUSES_QUERY))
+        self.assertIsNone(get_cacheable_tags("{ __schema { types { name } } }"))
+        self.assertIsNone(
+            get_cacheable_tags("mutation { logout { ok } }"),
+        )
+        self.assertIsNone(
+            get_cacheable_tags("{ corpuses { edges { node { id } } } me { id } }")
+        )
+
+    def test_anonymous_hit_and_invalidation(self):
+        first = self._post({"query": CORPUSES_QUERY})
+        self.assertEqual(first["X-GraphQL-Cache"], "MISS")
+        self.assertEqual(self._titles(first), ["Public Corpus"])
+
+        second = self._post({"query": CORPUSES_QUERY})
+        self.assertEqual(second["X-GraphQL-Cache"], "HIT")
+        self.assertEqual(self._titles(second), ["Public Corpus"])
+
+        # Private changes can't affect anonymous responses, so the entry survives
+        self.private_corpus.title = "Still Private"
+        self.private_corpus.save()
+        self.assertEqual(
+            self._post({"query": CORPUSES_QUERY})["X-GraphQL-Cache"], "HIT"
+        )
+
+        # ... but editing a public corpus invalidates it
+        self.public_corpus.title = "Renamed Public Corpus"
+        self.public_corpus.save()
+        third = self._post({"query": CORPUSES_QUERY})
+        self.assertEqual(third["X-GraphQL-Cache"], "MISS")
+        self.assertEqual(self._titles(third), ["Renamed Public Corpus"])
+
+        # ... as does making a public corpus private
+        self.public_corpus.is_public = False
+        self.public_corpus.save()
+        fourth = self._post({"query": CORPUSES_QUERY})
+        self.assertEqual(fourth["X-GraphQL-Cache"], "MISS")
+        self.assertEqual(self._titles(fourth), [])
+
+        stats = get_response_cache_stats()
+        self.assertEqual(stats["hit"], 2)
+        self.assertEqual(stats["miss"], 3)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_login(self.user)
+        response = self._post({"query": CORPUSES_QUERY})
+        self.assertNotIn("X-GraphQL-Cache", response)
+        self.assertEqual(
+            sorted(self._titles(response)), ["Private Corpus", "Public Corpus"]
+        )
+        self.assertEqual(get_response_cache_stats()["bypass"], 1)
+
+    def test_automatic_persisted_queries(self):
+        query_hash = hashlib.sha256(CORPUSES_QUERY.encode("utf-8")).hexdigest()
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+
+        # Unknown hash: client is told to resend with the full query
+        response = self._post({"extensions": extensions})
+        self.assertEqual(
+            response.json()["errors"][0]["message"], "PersistedQueryNotFound"
+        )
+
+        # Mismatched hash is rejected
+        response = self._post(
+            {
+                "query": "{ corpuses { edges { node { id } } } }",
+                "extensions": extensions,
+            }
+        )
+        self.assertIn("errors", response.json())
+
+        response = self._post({"query": CORPUSES_QUERY, "extensions": extensions})
+        self.assertEqual(self._titles(response), ["Public Corpus"])
+
+        # Hash alone now resolves to the registered query (and hits the cache)
+        response = self.client.get("/graphql/", {"extensions": json.dumps(extensions)})
+        self.assertEqual(self._titles(response), ["Public Corpus"])
+        self.assertEqual(response["X-GraphQL-Cache"], "HIT")
@@ -0,0 +1,202 @@
+from typing import Optional
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from opencontractserver.annotations.models import Annotation, Embedding
+from opencontractserver.documents.models import Document
+from opencontractserver.pipeline.base.parser import BaseParser
+from opencontractserver.pipeline.base.thumbnailer import BaseThumbnailGenerator
+from opencontractserver.tasks.doc_tasks import (
+    build_ingest_graph,
+    extract_thumbnail,
+    ingest_doc,
+)
+from opencontractserver.types.dicts import OpenContractDocExport
+
+User = get_user_model()
+
+PARSER_PATH = f"{__name__}.StructuralParser"
+EMBEDDER_PATH = "test/embedder"
+
+
+class StructuralParser(BaseParser):
+    title = "Structural Parser"
+
+    def _parse_document_impl(
+        self, user_id: int, doc_id: int, **all_kwargs
+    ) -> Optional[OpenContractDocExport]:
+        return {
+            "title": "Parsed",
+            "content": "Heading Body",
+            "description": "",
+            "page_count": 1,
+            "pawls_file_content": [],
+            "doc_labels": [],
+            "labelled_text": [
+                {
+                    "id": str(index),
+                    "annotationLabel": "Heading",
+                    "rawText": raw_text,
+                    "page": 0,
+                    "annotation_json": {"start": 0, "end": len(raw_text)},
+                    "parent_id": None,
+                    "annotation_type": "SPAN_LABEL",
+                    "structural": True,
+                }
+                for index, raw_text in enumerate(["Heading", "Body"])
+            ],
+            "relationships": [],
+        }
+
+
+class StubThumbnailer(BaseThumbnailGenerator):
+    title = "Stub Thumbnailer"
+
+    def _generate_thumbnail_impl(
+        self, txt_content: Optional[str], pdf_bytes: Optional[bytes], **all_kwargs
+    ) -> Optional[tuple[bytes, str]]:
+        return b"thumbnail", "png"
+
+
+class TestIngestGraph(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ingester", password="12345678")
+
+    def test_graph_shape(self):
+        graph = build_ingest_graph(user_id=self.user.id, doc_id=1)
+
+        self.assertEqual(
+            [task.task for task in graph.tasks],
+            [
+                "opencontractserver.tasks.doc_tasks.extract_thumbnail",
+                "opencontractserver.tasks.doc_tasks.ingest_doc",
+            ],
+        )
+        self.assertTrue(graph.tasks[1].kwargs["defer_structural_embeddings"])
+        self.assertEqual(
+            [task.task for task in graph.body.tasks],
+            [
+                "opencontractserver.tasks.embeddings_task.embed_structural_annotations",
+                "opencontractserver.tasks.doc_tasks.build_doc_page_index",
+            ],
+        )
+        self.assertEqual(
+            graph.body.body.task,
+            "opencontractserver.tasks.doc_tasks.set_doc_lock_state",
+        )
+
+    @override_settings(PREFERRED_PARSERS={"text/plain": PARSER_PATH}, PARSER_KWARGS={})
+    def test_ingest_embeds_structural_annotations_in_one_stage_and_records_timings(
+        self,
+    ):
+        with patch(
+            "opencontractserver.tasks.embeddings_task.generate_embeddings_from_text",
+            return_value=(EMBEDDER_PATH, [0.1] * 384),
+        ), patch(
+            "opencontractserver.tasks.embeddings_task.get_embedder",
+            return_value=(None, EMBEDDER_PATH),
+        ), patch(
+            "opencontractserver.tasks.doc_tasks.get_components_by_mimetype",
+            return_value={"thumbnailers": []},
+        ), patch(
+            "opencontractserver.annotations.signals.calculate_embedding_for_annotation_text"
+        ) as per_annotation_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                document = Document(
+                    title="Doc", file_type="text/plain", creator=self.user
+                )
+                document.txt_extract_file.save("doc.txt", ContentFile(b"Heading Body"))
+
+        per_annotation_task.si.assert_not_called()
+
+        annotations = Annotation.objects.filter(document=document, structural=True)
+        self.assertEqual(annotations.count(), 2)
+        self.assertEqual(
+            Embedding.objects.filter(
+                annotation__in=annotations, embedder_path=EMBEDDER_PATH
+            ).count(),
+            2,
+        )
+
+        document.refresh_from_db()
+        self.assertFalse(document.backend_lock)
+        self.assertIsNotNone(document.processing_finished)
+        timings = document.processing_timings
+        for stage in [
+            "parse",
+            "embed_structural_annotations",
+            "page_index",
+            "total",
+        ]:
+            self.assertEqual(timings[stage]["status"], "ok", stage)
+            self.assertGreaterEqual(timings[stage]["seconds"], 0)
+        self.assertEqual(timings["embed_structural_annotations"]["annotations"], 2)
+
+    @override_settings(PREFERRED_PARSERS={"text/plain": PARSER_PATH}, PARSER_KWARGS={})
+    def test_concurrent_thumbnail_and_parse_keep_each_others_fields(self):
+        """
+        The thumbnail and parse stages run concurrently, each on its own copy of
+        the document. Whichever saves last must not write back the other's
+        fields or the stage timings stored in between.
+        """
+
+        def parse(*args, **kwargs):
+            ingest_doc(
+                user_id=self.user.id,
+                doc_id=document.id,
+                defer_structural_embeddings=True,
+            )
+            return b"thumbnail", "png"
+
+        def check_stages_kept():
+            document.refresh_from_db()
+            self.assertTrue(document.icon.name)
+            self.assertEqual(document.page_count, 1)
+            with document.txt_extract_file.open("r") as txt_file:
+                self.assertEqual(txt_file.read(), "Heading Body")
+            self.assertEqual(set(document.processing_timings), {"thumbnail", "parse"})
+
+        real_content_file = ContentFile
+        thumbnail_taken = []
+
+        def thumbnail_during_parse(content, *args, **kwargs):
+            if not thumbnail_taken:
+                thumbnail_taken.append(True)
+                extract_thumbnail(doc_id=document.id)
+            return real_content_file(content, *args, **kwargs)
+
+        with patch(
+            "opencontractserver.tasks.doc_tasks.get_components_by_mimetype",
+            return_value={"thumbnailers": [StubThumbnailer]},
+        ), patch(
+            "opencontractserver.annotations.signals.calculate_embedding_for_annotation_text"
+        ):
+            # The parse finishes while the thumbnail stage holds the document.
+            document = Document.objects.create(
+                title="Doc", file_type="text/plain", creator=self.user
+            )
+            document.txt_extract_file.save("doc.txt", ContentFile(b"Unparsed"))
+            with patch.object(
+                StubThumbnailer, "_generate_thumbnail_impl", side_effect=parse
+            ):
+                extract_thumbnail(doc_id=document.id)
+            check_stages_kept()
+
+            # The thumbnail is saved while the parse stage holds the document.
+            document = Document.objects.create(
+                title="Doc", file_type="text/plain", creator=self.user
+            )
+            document.txt_extract_file.save("doc.txt", ContentFile(b"Unparsed"))
+            with patch(
+                "opencontractserver.pipeline.base.parser.ContentFile",
+                side_effect=thumbnail_during_parse,
+            ):
+                ingest_doc(
+                    user_id=self.user.id,
+                    doc_id=document.id,
+                    defer_structural_embeddings=True,
+                )
+            check_stages_kept()
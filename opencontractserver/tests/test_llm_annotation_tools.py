@@ -5,7 +5,11 @@ import logging
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import connection
 from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from plasmapdf.models.PdfDataLayer import build_translation_layer
+from plasmapdf.models.types import SpanAnnotation, TextSpan
 
 from opencontractserver.annotations.models import SPAN_LABEL, TOKEN_LABEL, Annotation
 from opencontractserver.corpuses.models import Corpus
@@ -18,6 +22,8 @@ from opencontractserver.tests.fixtures import (
     SAMPLE_PAWLS_FILE_ONE_PATH,
     SAMPLE_TXT_FILE_ONE_PATH,
 )
+from opencontractserver.utils.permissioning import get_users_permissions_for_obj
+from opencontractserver.utils.text_search import MultiPatternMatcher
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -114,6 +120,71 @@ class TestLLMAnnotationTools(TestCase):
             self.assertEqual(ann.document_id, doc.id)
             self.assertIn("Agreement", ann.raw_text)
 
+    def test_multi_pattern_pdf_matches_plasmapdf_in_bulk(self):
+        """Many strings are matched in one pass and written in a few queries."""
+
+        terms = ["Agreement", "Company", "shall", "the", "Section"]
+        tuples = [("Term", term, self.doc.id, self.corpus.id) for term in terms]
+
+        with CaptureQueriesContext(connection) as queries:
+            new_ids = add_annotations_from_exact_strings(
+                tuples, creator_id=self.user.id
+            )
+        self.assertGreater(len(new_ids), 100)
+        # Constant: lookups, label setup, batched annotation + permission inserts
+        self.assertLess(len(queries), 30)
+
+        # Same spans and token JSON as the per-match PlasmaPDF path
+        layer = build_translation_layer(
+            json.loads(SAMPLE_PAWLS_FILE_ONE_PATH.read_text())
+        )
+        expected = []
+        for term in terms:
+            start = layer.doc_text.find(term)
+            while start != -1:
+                end = start + len(term)
+                oc_ann = layer.create_opencontract_annotation_from_span(
+                    SpanAnnotation(
+                        span=TextSpan(id="x", start=start, end=end, text=term),
+                        annotation_label="Term",
+                    )
+                )
+                expected.append(
+                    (
+                        oc_ann["rawText"],
+                        oc_ann["page"],
+                        json.loads(json.dumps(oc_ann["annotation_json"])),
+                    )
+                )
+                start = layer.doc_text.find(term, end)
+
+        annotations = Annotation.objects.in_bulk(new_ids)
+        self.assertEqual(
+            [
+                (annotations[pk].raw_text, annotations[pk].page, annotations[pk].json)
+                for pk in new_ids
+            ],
+            expected,
+        )
+
+        annotation = annotations[new_ids[0]]
+        self.assertIn(
+            "update_annotation", get_users_permissions_for_obj(self.user, annotation)
+        )
+
+    def test_matcher_keeps_per_string_find_semantics(self):
+        text = "aaaa Agreement greement ab"
+        patterns = ["aa", "a", "greement", "Agreement", "missing"]
+        found = MultiPatternMatcher(patterns + ["", "aa"]).find_all(text)
+
+        for pattern in patterns:
+            spans, start = [], text.find(pattern)
+            while start != -1:
+                spans.append((start, start + len(pattern)))
+                start = text.find(pattern, start + len(pattern))
+            self.assertEqual(found[pattern], spans)
+        self.assertNotIn("", found)
+
     def setUp(self):  # noqa: D401 – simple helper, not public API
         """Ensure pawls_parse_file exists in the active MEDIA_ROOT."""
         # After pytest-django swaps MEDIA_ROOT between tests, the file saved in
@@ -0,0 +1,196 @@
+"""
+Tests for the shared LLM rate limiter and the batched async extract executor.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from pydantic_ai.agent import Agent as PydanticAIAgent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from pydantic_ai.usage import Usage
+
+from opencontractserver.llms import rate_limiter as limiter_module
+from opencontractserver.llms.rate_limiter import (
+    LLMRateLimiter,
+    LocalBucketBackend,
+    RateLimitedModel,
+)
+from opencontractserver.llms.response_cache import get_pydantic_ai_model
+from opencontractserver.tasks.extract_orchestrator_tasks import run_extract_batch
+
+LOCAL_LIMITS = {
+    "LLM_RATE_LIMIT_BACKEND": "local",
+    "LLM_RATE_LIMIT_BACKOFF_BASE": 0,
+}
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.limiter = LLMRateLimiter()
+        patcher = patch.object(limiter_module, "rate_limiter", self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_buckets_take_all_or_nothing(self):
+        backend = LocalBucketBackend()
+        requests = ("requests", 2, 2 / 60, 1)
+        tokens = ("tokens", 100, 100 / 60, 80)
+
+        self.assertEqual(backend.take([requests, tokens]), 0)
+        # Not enough tokens left: nothing is taken, the wait covers the shortfall
+        self.assertAlmostEqual(backend.take([requests, tokens]), 36, places=2)
+        self.assertEqual(backend.take([requests, ("tokens", 100, 100 / 60, 20)]), 0)
+        self.assertGreater(backend.take([requests]), 0)
+
+        # Forced debits may refund
+        backend.take([("tokens", 100, 100 / 60, -50)], force=True)
+        self.assertEqual(backend.take([("tokens", 100, 100 / 60, 50)]), 0)
+
+    @override_settings(
+        LLM_RATE_LIMITS={"openai": {"requests_per_minute": 2}}, **LOCAL_LIMITS
+    )
+    def test_acquire_waits_for_the_provider_bucket(self):
+        clock = FakeClock()
+        with patch.object(limiter_module, "time", clock), patch.object(
+            limiter_module.asyncio, "sleep", clock.sleep
+        ):
+
+            async def three_requests():
+                return [
+                    await self.limiter.acquire("openai:gpt-4o-mini"),
+                    await self.limiter.acquire("openai:gpt-4o"),
+                    await self.limiter.acquire("openai:gpt-4o-mini"),
+                ]
+
+            waits = asyncio.run(three_requests())
+
+        self.assertEqual(waits[:2], [0, 0])
+        # One request per 30s refills; jitter adds at most 25%
+        self.assertGreaterEqual(waits[2], 30)
+        self.assertLessEqual(waits[2], 30 * 1.25 + 1e-6)
+        self.assertEqual(
+            asyncio.run(self.limiter.acquire("anthropic:claude-3-haiku")), 0
+        )
+
+    @override_settings(
+        LLM_RATE_LIMITS={"openai": {"requests_per_minute": 1}}, **LOCAL_LIMITS
+    )
+    def test_provider_limits_cover_bare_model_names(self):
+        clock = FakeClock()
+        with patch.object(limiter_module, "time", clock), patch.object(
+            limiter_module.asyncio, "sleep", clock.sleep
+        ):
+
+            async def two_requests():
+                return [
+                    await self.limiter.acquire("gpt-4o-mini"),
+                    await self.limiter.acquire("openai:gpt-4o"),
+                ]
+
+            waits = asyncio.run(two_requests())
+
+        self.assertEqual(waits[0], 0)
+        self.assertGreaterEqual(waits[1], 60)
+        self.assertIsInstance(get_pydantic_ai_model("gpt-4o-mini"), RateLimitedModel)
+        self.assertEqual(
+            limiter_module.rate_limit_for("gpt-4o-mini")[0],
+            limiter_module.rate_limit_for("o3-mini")[0],
+        )
+        self.assertIsNone(limiter_module.rate_limit_for("claude-3-haiku")[1])
+
+    @override_settings(
+        LLM_RATE_LIMITS={"default": {"requests_per_minute": 1000}}, **LOCAL_LIMITS
+    )
+    def test_429s_are_retried_and_agents_use_the_limiter(self):
+        attempts = []
+
+        def respond(messages, info: AgentInfo) -> ModelResponse:
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ModelHTTPError(429, "function:respond", {"error": "slow down"})
+            return ModelResponse(parts=[TextPart("ok")], usage=Usage(total_tokens=42))
+
+        model = get_pydantic_ai_model(FunctionModel(respond))
+        self.assertIsInstance(model, RateLimitedModel)
+
+        with patch.object(
+            self.limiter, "adjust_tokens", wraps=self.limiter.adjust_tokens
+        ) as adjust:
+            result = PydanticAIAgent(model).run_sync("hello")
+
+        self.assertEqual(result.output, "ok")
+        self.assertEqual(len(attempts), 3)
+        adjust.assert_called_once()
+
+    @override_settings(
+        LLM_RATE_LIMITS={"default": {"requests_per_minute": 1000}},
+        LLM_RATE_LIMIT_MAX_RETRIES=1,
+        **LOCAL_LIMITS,
+    )
+    def test_other_errors_and_exhausted_retries_propagate(self):
+        def overloaded(messages, info):
+            raise ModelHTTPError(429, "function:overloaded")
+
+        def broken(messages, info):
+            raise ModelHTTPError(500, "function:broken")
+
+        for respond, expected_calls in ((overloaded, 2), (broken, 1)):
+            calls = []
+
+            def counted(messages, info, respond=respond, calls=calls):
+                calls.append(1)
+                return respond(messages, info)
+
+            with self.assertRaises(ModelHTTPError):
+                PydanticAIAgent(RateLimitedModel(FunctionModel(counted))).run_sync("hi")
+            self.assertEqual(len(calls), expected_calls)
+
+    @override_settings(LLM_RATE_LIMITS={})
+    def test_models_are_left_alone_without_limits(self):
+        self.assertEqual(get_pydantic_ai_model("openai:gpt-4o"), "openai:gpt-4o")
+
+
+class ExtractBatchTestCase(SimpleTestCase):
+    @override_settings(EXTRACT_ASYNC_CONCURRENCY=3)
+    def test_batch_runs_cells_concurrently_and_isolates_failures(self):
+        running = []
+        peak = []
+        done = []
+
+        async def extract_cell(cell_id):
+            running.append(cell_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(cell_id)
+            if cell_id == 3:
+                raise RuntimeError("provider exploded")
+            done.append(cell_id)
+
+        task = SimpleNamespace(_async_func=extract_cell)
+        with patch(
+            "opencontractserver.tasks.extract_orchestrator_tasks.get_task_by_name",
+            return_value=task,
+        ):
+            run_extract_batch.si([("extract", [i]) for i in range(10)]).apply()
+
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(sorted(done), [0, 1, 2, 4, 5, 6, 7, 8, 9])
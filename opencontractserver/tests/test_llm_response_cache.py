@@ -0,0 +1,113 @@
+"""
+Tests for the record / replay LLM response cache.
+"""
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from pydantic import BaseModel
+from pydantic_ai.agent import Agent as PydanticAIAgent
+from pydantic_ai.messages import ModelRequest, UserPromptPart
+from pydantic_ai.models import ModelRequestParameters
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from opencontractserver.llms.response_cache import (
+    RECORD,
+    CachedModel,
+    build_request_key,
+    get_pydantic_ai_model,
+)
+
+
+class Parties(BaseModel):
+    names: list[str]
+
+
+class LLMResponseCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def _function_model(self):
+        def answer(messages, info: AgentInfo):
+            from pydantic_ai.messages import ModelResponse, TextPart
+
+            self.calls += 1
+            return ModelResponse(parts=[TextPart(f"answer #{self.calls}")])
+
+        async def stream_answer(messages, info: AgentInfo):
+            self.calls += 1
+            for chunk in ("streamed ", f"answer #{self.calls}"):
+                yield chunk
+
+        return FunctionModel(answer, stream_function=stream_answer)
+
+    def test_cache_is_off_by_default(self):
+        self.assertEqual(get_pydantic_ai_model("gpt-4o-mini"), "gpt-4o-mini")
+
+    def test_request_key_ignores_timestamps(self):
+        parameters = ModelRequestParameters(
+            function_tools=[], allow_text_output=True, output_tools=[]
+        )
+        first = build_request_key(
+            "m", [ModelRequest(parts=[UserPromptPart("hi")])], None, parameters
+        )
+        second = build_request_key(
+            "m", [ModelRequest(parts=[UserPromptPart("hi")])], None, parameters
+        )
+        other = build_request_key(
+            "m", [ModelRequest(parts=[UserPromptPart("bye")])], None, parameters
+        )
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    async def test_record_mode_serves_repeat_requests_from_cache(self):
+        agent = PydanticAIAgent(
+            model=CachedModel(self._function_model(), mode=RECORD),
+            system_prompt="Be brief.",
+        )
+        first = await agent.run("Who are the parties?")
+        second = await agent.run("Who are the parties?")
+        self.assertEqual(first.output, "answer #1")
+        self.assertEqual(second.output, "answer #1")
+        self.assertEqual(self.calls, 1)
+
+        await agent.run("Something else")
+        self.assertEqual(self.calls, 2)
+
+    async def test_record_mode_streams(self):
+        agent = PydanticAIAgent(model=CachedModel(self._function_model(), mode=RECORD))
+        outputs = []
+        for _ in range(2):
+            async with agent.run_stream("Stream it") as result:
+                outputs.append(await result.get_output())
+        self.assertEqual(outputs, ["streamed answer #1", "streamed answer #1"])
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(LLM_RESPONSE_CACHE_MODE="replay", LLM_STUB_RESPONSE_TEXT="stub")
+    async def test_replay_mode_never_calls_the_real_model(self):
+        # No API key needed: misses are answered by the stub model
+        model = get_pydantic_ai_model("openai:gpt-4o-mini")
+        self.assertIsInstance(model, CachedModel)
+
+        text = await PydanticAIAgent(model=model).run("Anything")
+        self.assertEqual(text.output, "stub")
+
+        structured = await PydanticAIAgent(model=model, output_type=Parties).run(
+            "List the parties"
+        )
+        self.assertIsInstance(structured.output, Parties)
+
+    @override_settings(LLM_RESPONSE_CACHE_MODE="replay")
+    async def test_replay_mode_serves_recorded_responses(self):
+        recorder = PydanticAIAgent(
+            model=CachedModel(self._function_model(), mode=RECORD)
+        )
+        await recorder.run("Recorded question")
+
+        # Same model name, so the replaying model finds the recorded entry
+        replayer = PydanticAIAgent(
+            model=get_pydantic_ai_model(recorder.model._model.model_name)
+        )
+        result = await replayer.run("Recorded question")
+        self.assertEqual(result.output, "answer #1")
+        self.assertEqual(self.calls, 1)
@@ -0,0 +1,86 @@
+"""
+Tests for the pluggable token counter used by the LLM tools.
+"""
+
+import base64
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from opencontractserver.llms.tokenizers import (
+    TiktokenTokenizer,
+    WhitespaceTokenizer,
+    count_tokens,
+    get_tokenizer,
+    reset_tokenizer_caches,
+)
+from opencontractserver.llms.tools.core_tools import _token_count
+
+# Byte-level BPE ranks with no merges: one token per byte
+BYTE_RANKS = b"\n".join(
+    base64.b64encode(bytes([i])) + b" " + str(i).encode() for i in range(256)
+)
+
+
+class TokenizerTestCase(SimpleTestCase):
+    def setUp(self):
+        reset_tokenizer_caches()
+        self.addCleanup(reset_tokenizer_caches)
+        tokenizer_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tokenizer_dir.cleanup)
+        self.tokenizer_dir = Path(tokenizer_dir.name)
+        # Loading must never fall through to tiktoken's downloader
+        downloader = patch("tiktoken.load.read_file", side_effect=AssertionError)
+        downloader.start()
+        self.addCleanup(downloader.stop)
+
+    def write_encoding(self, name: str) -> None:
+        (self.tokenizer_dir / f"{name}.tiktoken").write_bytes(BYTE_RANKS)
+
+    @override_settings(LLM_TOKENIZER_DIR=None)
+    def test_whitespace_fallback_without_local_files(self):
+        self.assertIsInstance(get_tokenizer(), WhitespaceTokenizer)
+        self.assertEqual(_token_count("Section 1.2(a), clause (iv)."), 4)
+        self.assertEqual(_token_count("   \n\t   "), 0)
+
+    def test_bpe_tokenizer_keyed_by_model(self):
+        self.write_encoding("o200k_base")
+        self.write_encoding("cl100k_base")
+
+        with override_settings(LLM_TOKENIZER_DIR=str(self.tokenizer_dir)):
+            tokenizer = get_tokenizer("openai:gpt-4o-mini")
+            self.assertIsInstance(tokenizer, TiktokenTokenizer)
+            self.assertEqual(tokenizer.name, "tiktoken:o200k_base")
+            self.assertEqual(get_tokenizer("gpt-4").name, "tiktoken:cl100k_base")
+            # Unknown models get the default encoding
+            self.assertEqual(get_tokenizer("claude-3-haiku").name, tokenizer.name)
+
+            self.assertEqual(count_tokens("a,b c", "openai:gpt-4o-mini"), 5)
+
+    @override_settings(LLM_TOKENIZER_RETRY_SECONDS=60)
+    def test_missing_encoding_file_falls_back_until_retry(self):
+        with override_settings(LLM_TOKENIZER_DIR=str(self.tokenizer_dir)):
+            with self.assertLogs("opencontractserver.llms.tokenizers", "WARNING"):
+                self.assertIsInstance(get_tokenizer("gpt-4o"), WhitespaceTokenizer)
+
+            # The fallback is not cached for good: the load is retried later
+            self.write_encoding("o200k_base")
+            self.assertIsInstance(get_tokenizer("gpt-4o"), WhitespaceTokenizer)
+            with patch(
+                "opencontractserver.llms.tokenizers.time.monotonic",
+                return_value=time.monotonic() + 61,
+            ):
+                self.assertIsInstance(get_tokenizer("gpt-4o"), TiktokenTokenizer)
+
+    @override_settings(LLM_TOKENIZER_DIR=None)
+    def test_counts_are_memoised(self):
+        with patch.object(
+            WhitespaceTokenizer, "count", autospec=True, return_value=7
+        ) as counter:
+            self.assertEqual(count_tokens("same text"), 7)
+            self.assertEqual(count_tokens("same text"), 7)
+            self.assertEqual(count_tokens("other text"), 7)
+        self.assertEqual(counter.call_count, 2)
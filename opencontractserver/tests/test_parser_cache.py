@@ -0,0 +1,160 @@
+import datetime
+import io
+from typing import Optional
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from opencontractserver.annotations.models import Annotation
+from opencontractserver.documents.models import Document
+from opencontractserver.pipeline.base.parser import BaseParser
+from opencontractserver.types.dicts import OpenContractDocExport
+from opencontractserver.utils.parser_cache import (
+    evict_parser_cache,
+    iter_cache_entries,
+    purge_parser_cache,
+)
+
+User = get_user_model()
+
+PARSER_PATH = f"{__name__}.CountingParser"
+
+
+class CountingParser(BaseParser):
+    title = "Counting Parser"
+    calls = 0
+
+    def _parse_document_impl(
+        self, user_id: int, doc_id: int, **all_kwargs
+    ) -> Optional[OpenContractDocExport]:
+        CountingParser.calls += 1
+        return {
+            "title": "Parsed",
+            "content": "Parsed text",
+            "description": "",
+            "page_count": 1,
+            "pawls_file_content": [],
+            "doc_labels": [],
+            "labelled_text": [
+                {
+                    "id": "1",
+                    "annotationLabel": "Heading",
+                    "rawText": "Parsed",
+                    "page": 0,
+                    "annotation_json": {"start": 0, "end": 6},
+                    "parent_id": None,
+                    "annotation_type": "SPAN_LABEL",
+                    "structural": True,
+                }
+            ],
+            "relationships": [],
+        }
+
+
+@override_settings(PARSER_CACHE_ENABLED=True, PIPELINE_SETTINGS={})
+class TestParserOutputCache(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cacher", password="12345678")
+        purge_parser_cache(PARSER_PATH)
+        CountingParser.calls = 0
+
+    def tearDown(self):
+        purge_parser_cache(PARSER_PATH)
+
+    def _doc(self, content=b"Identical bytes"):
+        document = Document.objects.create(
+            title="Doc", file_type="text/plain", creator=self.user
+        )
+        document.txt_extract_file.save("doc.txt", ContentFile(content))
+        return document
+
+    def test_same_file_and_settings_replay_the_cached_export(self):
+        first, second = self._doc(), self._doc()
+
+        CountingParser().process_document(self.user.id, first.id, mode="fast")
+        CountingParser().process_document(self.user.id, second.id, mode="fast")
+
+        self.assertEqual(CountingParser.calls, 1)
+        self.assertEqual(
+            Annotation.objects.get(document=second).raw_text,
+            Annotation.objects.get(document=first).raw_text,
+        )
+        second.refresh_from_db()
+        self.assertIsNotNone(second.file_sha256)
+        self.assertEqual(len(list(iter_cache_entries(PARSER_PATH))), 1)
+
+    def test_key_covers_file_kwargs_and_parser_version(self):
+        document = self._doc()
+        CountingParser().process_document(self.user.id, document.id, mode="fast")
+
+        # Different parser settings
+        CountingParser().process_document(self.user.id, document.id, mode="slow")
+        # Different file
+        CountingParser().process_document(
+            self.user.id, self._doc(b"Other bytes").id, mode="fast"
+        )
+        # New parser version
+        with patch.object(CountingParser, "parser_version", "2"):
+            CountingParser().process_document(self.user.id, document.id, mode="fast")
+        # Kwargs that don't affect output are ignored
+        CountingParser().process_document(
+            self.user.id, document.id, mode="fast", api_key="rotated"
+        )
+
+        self.assertEqual(CountingParser.calls, 4)
+
+    def test_disabled_cache_always_parses(self):
+        document = self._doc()
+        with self.settings(PARSER_CACHE_ENABLED=False):
+            CountingParser().process_document(self.user.id, document.id)
+            CountingParser().process_document(self.user.id, document.id)
+        self.assertEqual(CountingParser.calls, 2)
+        self.assertEqual(list(iter_cache_entries(PARSER_PATH)), [])
+
+    def test_eviction_by_age_and_size(self):
+        for index in range(3):
+            CountingParser().process_document(
+                self.user.id, self._doc(f"File {index}".encode()).id
+            )
+        entries = list(iter_cache_entries(PARSER_PATH))
+        self.assertEqual(len(entries), 3)
+
+        # Keep only what fits in the two newest entries
+        newest_two = sorted(entries, key=lambda entry: entry.modified)[1:]
+        with patch(
+            "opencontractserver.utils.parser_cache.iter_cache_entries",
+            return_value=iter(entries),
+        ):
+            deleted = evict_parser_cache(
+                max_age_days=0, max_bytes=sum(entry.size for entry in newest_two)
+            )
+        self.assertEqual(deleted, 1)
+        self.assertEqual(len(list(iter_cache_entries(PARSER_PATH))), 2)
+
+        self.assertEqual(
+            purge_parser_cache(PARSER_PATH, older_than=datetime.timedelta(days=1)), 0
+        )
+
+    def test_management_command_warms_and_purges(self):
+        document = self._doc()
+        out = io.StringIO()
+        with self.settings(
+            PREFERRED_PARSERS={"text/plain": PARSER_PATH}, PARSER_KWARGS={}
+        ):
+            call_command(
+                "parser_cache", "warm", "--document-ids", str(document.id), stdout=out
+            )
+            call_command(
+                "parser_cache", "warm", "--document-ids", str(document.id), stdout=out
+            )
+        self.assertEqual(CountingParser.calls, 1)
+        self.assertIn("already cached 1", out.getvalue())
+        # Warming leaves the document itself alone
+        self.assertFalse(Annotation.objects.filter(document=document).exists())
+
+        call_command("parser_cache", "purge", "--parser", PARSER_PATH, stdout=out)
+        self.assertIn("Purged 1 cache entries", out.getvalue())
+        self.assertEqual(list(iter_cache_entries(PARSER_PATH)), [])
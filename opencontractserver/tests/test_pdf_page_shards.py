@@ -0,0 +1,234 @@
+import json
+import pathlib
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from PyPDF2 import PdfReader
+
+from opencontractserver.annotations.models import Annotation, Relationship
+from opencontractserver.documents.models import Document
+from opencontractserver.pipeline.base.parser import BaseParser
+from opencontractserver.pipeline.parsers.docling_parser_rest import DoclingParser
+from opencontractserver.tasks.doc_tasks import ingest_doc
+from opencontractserver.utils.pdf_shards import (
+    SHARD_STORAGE_PREFIX,
+    merge_parsed_shards,
+    plan_page_shards,
+)
+
+User = get_user_model()
+
+FIXTURE_PDF = pathlib.Path(__file__).parent / "fixtures" / "USC Title 1 - CHAPTER 1.pdf"
+DOCLING_PARSER = "opencontractserver.pipeline.parsers.docling_parser_rest.DoclingParser"
+
+
+def _token_annotation(annot_id, label, page, token_index, parent_id=None):
+    return {
+        "id": annot_id,
+        "annotationLabel": label,
+        "rawText": f"token {token_index}",
+        "page": page,
+        "annotation_json": {
+            str(page): {
+                "bounds": {"top": 0, "bottom": 10, "left": 0, "right": 10},
+                "tokensJsons": [{"pageIndex": page, "tokenIndex": token_index}],
+                "rawText": f"token {token_index}",
+            }
+        },
+        "parent_id": parent_id,
+        "annotation_type": "TOKEN_LABEL",
+        "structural": True,
+    }
+
+
+def _shard_export(page_count: int, content: str) -> dict:
+    """What a parser returns for a shard: pages and annotations from 0."""
+    return {
+        "title": "Shard",
+        "description": "",
+        "content": content,
+        "page_count": page_count,
+        "pawls_file_content": [
+            {
+                "page": {"width": 612, "height": 792, "index": index},
+                "tokens": [
+                    {"x": 0, "y": 0, "width": 10, "height": 10, "text": f"p{index}"}
+                ],
+            }
+            for index in range(page_count)
+        ],
+        "doc_labels": ["Contract"],
+        "labelled_text": [
+            _token_annotation("1", "Section", 0, 0),
+            _token_annotation("2", "Paragraph", page_count - 1, 0, parent_id="1"),
+        ],
+        "relationships": [
+            {
+                "id": "r1",
+                "relationshipLabel": "Contains",
+                "source_annotation_ids": ["1"],
+                "target_annotation_ids": ["2"],
+                "structural": True,
+            }
+        ],
+    }
+
+
+class TestPdfShardMerge(TestCase):
+    def test_plan_page_shards(self):
+        self.assertEqual(plan_page_shards(9, 4, 4), [(0, 4), (4, 8), (8, 9)])
+        self.assertEqual(plan_page_shards(4, 4, 4), [])
+        self.assertEqual(plan_page_shards(900, 0, 100), [])
+
+    def test_merge_shifts_pages_offsets_and_ids(self):
+        first = _shard_export(2, "abc")
+        first["labelled_text"].append(
+            {
+                "id": "s",
+                "annotationLabel": "Span",
+                "rawText": "b",
+                "page": 0,
+                "annotation_json": {"start": 1, "end": 2},
+            }
+        )
+        second = _shard_export(3, "defg")
+        second["labelled_text"].append(
+            {
+                "id": "s",
+                "annotationLabel": "Span",
+                "rawText": "e",
+                "page": 0,
+                "annotation_json": {"start": 1, "end": 2},
+            }
+        )
+
+        merged = merge_parsed_shards([(0, first), (2, second)])
+
+        self.assertEqual(merged["page_count"], 5)
+        self.assertEqual(
+            [page["page"]["index"] for page in merged["pawls_file_content"]],
+            [0, 1, 2, 3, 4],
+        )
+        self.assertEqual(merged["content"], "abc\ndefg")
+        self.assertEqual(merged["doc_labels"], ["Contract"])
+
+        by_id = {annot["id"]: annot for annot in merged["labelled_text"]}
+        self.assertEqual(len(by_id), 6)
+        paragraph = by_id["shard1-2"]
+        self.assertEqual(paragraph["page"], 4)
+        self.assertEqual(paragraph["parent_id"], "shard1-1")
+        self.assertEqual(list(paragraph["annotation_json"]), ["4"])
+        self.assertEqual(
+            paragraph["annotation_json"]["4"]["tokensJsons"],
+            [{"pageIndex": 4, "tokenIndex": 0}],
+        )
+
+        for shard_id in ("shard0-s", "shard1-s"):
+            span = by_id[shard_id]["annotation_json"]
+            self.assertEqual(
+                merged["content"][span["start"] : span["end"]],
+                by_id[shard_id]["rawText"],
+            )
+
+        self.assertEqual(
+            [
+                (rel["id"], rel["source_annotation_ids"], rel["target_annotation_ids"])
+                for rel in merged["relationships"]
+            ],
+            [
+                ("shard0-r1", ["shard0-1"], ["shard0-2"]),
+                ("shard1-r1", ["shard1-1"], ["shard1-2"]),
+            ],
+        )
+
+
+class TestShardedIngest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sharder", password="12345678")
+        self.doc = Document.objects.create(
+            title="Long PDF",
+            file_type="application/pdf",
+            creator=self.user,
+        )
+        self.doc.pdf_file.save("long.pdf", ContentFile(FIXTURE_PDF.read_bytes()))
+        self.shard_page_counts = []
+
+    def _fake_parse(self, parser, user_id, doc_id, **all_kwargs):
+        pdf_path = (
+            all_kwargs.get("pdf_path") or Document.objects.get(pk=doc_id).pdf_file.name
+        )
+        with default_storage.open(pdf_path, "rb") as pdf_file:
+            page_count = len(PdfReader(pdf_file).pages)
+        self.shard_page_counts.append(page_count)
+        return _shard_export(page_count, f"{page_count} pages")
+
+    def _ingest(self, threshold):
+        with self.settings(
+            PREFERRED_PARSERS={"application/pdf": DOCLING_PARSER},
+            PARSER_KWARGS={},
+            PIPELINE_SETTINGS={
+                "DoclingParser": {
+                    "page_shard_threshold": threshold,
+                    "page_shard_size": 4,
+                }
+            },
+        ), patch.object(
+            DoclingParser,
+            "_parse_document_impl",
+            lambda parser, user_id, doc_id, **kw: self._fake_parse(
+                parser, user_id, doc_id, **kw
+            ),
+        ):
+            ingest_doc.si(user_id=self.user.id, doc_id=self.doc.id).apply().get()
+
+    def test_large_pdf_is_parsed_in_shards_and_merged(self):
+        self._ingest(threshold=4)
+
+        self.assertEqual(sorted(self.shard_page_counts), [1, 4, 4])
+
+        self.doc.refresh_from_db()
+        self.assertEqual(self.doc.page_count, 9)
+        with self.doc.pawls_parse_file.open("r") as pawls_file:
+            pawls = json.load(pawls_file)
+        self.assertEqual([page["page"]["index"] for page in pawls], list(range(9)))
+
+        annotations = Annotation.objects.filter(document=self.doc)
+        self.assertEqual(annotations.count(), 6)
+        paragraph_pages = sorted(
+            annotations.filter(annotation_label__text="Paragraph").values_list(
+                "page", flat=True
+            )
+        )
+        self.assertEqual(paragraph_pages, [3, 7, 8])
+        for paragraph in annotations.filter(annotation_label__text="Paragraph"):
+            self.assertEqual(list(paragraph.json), [str(paragraph.page)])
+            self.assertEqual(paragraph.parent.page, paragraph.page // 4 * 4)
+        self.assertEqual(Relationship.objects.filter(document=self.doc).count(), 3)
+
+        _, leftovers = default_storage.listdir(
+            f"{SHARD_STORAGE_PREFIX}/doc_{self.doc.id}"
+        )
+        self.assertEqual(leftovers, [])
+
+    def test_pdf_under_threshold_is_parsed_whole(self):
+        self._ingest(threshold=20)
+
+        self.assertEqual(self.shard_page_counts, [9])
+        self.doc.refresh_from_db()
+        self.assertEqual(self.doc.page_count, 9)
+
+    def test_parsers_without_shard_support_never_shard(self):
+        class WholeDocParser(BaseParser):
+            def _parse_document_impl(self, user_id, doc_id, **all_kwargs):
+                return None
+
+        with self.settings(
+            PARSER_PAGE_SHARD_THRESHOLD=50,
+            PARSER_PAGE_SHARD_SIZE=25,
+            PIPELINE_SETTINGS={},
+        ):
+            self.assertEqual(WholeDocParser().get_page_shard_settings(), (0, 0))
+            self.assertEqual(DoclingParser().get_page_shard_settings(), (50, 25))
@@ -4,7 +4,7 @@ import tempfile
 from unittest import mock
 
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from opencontractserver.tests.fixtures import (
     NLM_INGESTOR_SAMPLE_PDF,
@@ -15,6 +15,7 @@ from opencontractserver.utils.files import (
     check_if_pdf_needs_ocr,
     convert_hex_to_rgb_tuple,
     createHighlight,
+    get_pdf_text_layer_status,
     split_pdf_into_images,
 )
 
@@ -34,6 +35,43 @@ class PDFUtilsTestCase(TestCase):
         needs_ocr = check_if_pdf_needs_ocr(io.BytesIO(self.need_ocr_pdf_content))
         self.assertTrue(needs_ocr)
 
+    def test_check_if_pdf_needs_ocr_stops_at_threshold(self):
+        pages = [mock.Mock(**{"extract_text.return_value": "Plenty of text"})] + [
+            mock.Mock() for _ in range(9)
+        ]
+        with mock.patch(
+            "opencontractserver.utils.files.PdfReader",
+            return_value=mock.Mock(pages=pages),
+        ):
+            self.assertFalse(check_if_pdf_needs_ocr(io.BytesIO(b"%PDF")))
+
+        for page in pages[1:]:
+            page.extract_text.assert_not_called()
+
+    def test_check_if_pdf_needs_ocr_samples_long_documents(self):
+        pages = [mock.Mock(**{"extract_text.return_value": ""}) for _ in range(100)]
+        with mock.patch(
+            "opencontractserver.utils.files.PdfReader",
+            return_value=mock.Mock(pages=pages),
+        ):
+            self.assertTrue(check_if_pdf_needs_ocr(io.BytesIO(b"%PDF"), max_pages=5))
+
+        self.assertEqual(
+            [index for index, page in enumerate(pages) if page.extract_text.called],
+            [0, 25, 50, 74, 99],
+        )
+
+    def test_get_pdf_text_layer_status(self):
+        text_layers = get_pdf_text_layer_status(io.BytesIO(self.sample_pdf_content))
+        self.assertTrue(text_layers)
+        self.assertTrue(any(text_layers))
+
+        scanned_layers = get_pdf_text_layer_status(
+            io.BytesIO(self.need_ocr_pdf_content)
+        )
+        self.assertTrue(scanned_layers)
+        self.assertFalse(any(scanned_layers))
+
     def test_base_64_encode_bytes(self):
         test_bytes = b"Hello, World!"
         encoded = base_64_encode_bytes(test_bytes)
@@ -113,3 +151,33 @@ class PDFUtilsTestCase(TestCase):
                     self.assertIn("Body", kwargs)
                     self.assertIn("ContentType", kwargs)
                     self.assertEqual(kwargs["Bucket"], settings.AWS_STORAGE_BUCKET_NAME)
+
+    @override_settings(PDF_IMAGE_RENDER_BATCH_SIZE=2)
+    def test_split_pdf_into_images_renders_page_batches(self) -> None:
+        """
+        Pages are rendered a batch at a time to files and stored in page order.
+        """
+        render_calls = []
+
+        def render(pdf_path, first_page, last_page, output_folder, output_file, **kw):
+            render_calls.append((first_page, last_page))
+            paths = []
+            for page in range(first_page, last_page + 1):
+                path = os.path.join(output_folder, f"{output_file}{page}.png")
+                with open(path, "wb") as image_file:
+                    image_file.write(f"page {page}".encode())
+                paths.append(path)
+            return paths
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch(
+            "pdf2image.pdfinfo_from_path", return_value={"Pages": 5}
+        ), mock.patch("pdf2image.convert_from_path", side_effect=render):
+            result = split_pdf_into_images(
+                self.sample_pdf_content, temp_dir, force_local=True
+            )
+
+            self.assertEqual(render_calls, [(1, 2), (3, 4), (5, 5)])
+            self.assertEqual(len(result), 5)
+            for page, path in enumerate(result, start=1):
+                with open(path, "rb") as image_file:
+                    self.assertEqual(image_file.read(), f"page {page}".encode())
@@ -653,3 +653,84 @@ class TestPydanticAIAgents(TestCase):
 
         self.assertIsNone(embedding_request.query_text)
         self.assertEqual(len(embedding_request.query_embedding), 384)
+
+    @patch("opencontractserver.llms.api.agents.for_document")
+    @patch("opencontractserver.llms.agents.pydantic_ai_agents.PydanticAIAgent")
+    async def test_corpus_agent_ask_documents_runs_concurrently(
+        self,
+        mock_pyd_ai_cls: MagicMock,
+        mock_for_document: AsyncMock,
+    ) -> None:
+        """ask_documents fans out under the semaphore and merges in input order."""
+        import asyncio
+
+        from opencontractserver.llms.agents.core_agents import (
+            ContentEvent,
+            FinalEvent,
+            SourceNode,
+        )
+
+        running = 0
+        peak = 0
+
+        class _FakeDocAgent:
+            def __init__(self, document_id: int):
+                self.document_id = document_id
+
+            async def stream(self, question: str):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                # The first document finishes last
+                await asyncio.sleep(0.05 if self.document_id == first_id else 0.01)
+                running -= 1
+                yield ContentEvent(content=f"answer {self.document_id}")
+                yield FinalEvent(
+                    sources=[
+                        SourceNode(
+                            annotation_id=self.document_id, content="quoted text"
+                        )
+                    ],
+                    metadata={"timeline": [{"type": "thought", "thought": "done"}]},
+                )
+
+        async def _fake_for_document(document, **kwargs):
+            return _FakeDocAgent(document)
+
+        mock_for_document.side_effect = _fake_for_document
+
+        observed = []
+
+        async def observer(event):
+            observed.append(event.metadata.get("document_id"))
+
+        await UnifiedAgentFactory.create_corpus_agent(
+            self.corpus,
+            framework=AgentFramework.PYDANTIC_AI,
+            user_id=self.user.id,
+            stream_observer=observer,
+            max_concurrent_document_agents=2,
+        )
+        tools = mock_pyd_ai_cls.call_args.kwargs["tools"]
+        ask_documents = next(t for t in tools if t.__name__ == "ask_documents")
+
+        first_id, second_id = self.doc1.id, self.doc2.id
+        result = await ask_documents(
+            MagicMock(), document_ids=[first_id, second_id], question="Why?"
+        )
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(
+            [r["document_id"] for r in result["results"]], [first_id, second_id]
+        )
+        self.assertEqual(result["results"][0]["answer"], f"answer {first_id}")
+        self.assertEqual(
+            [s["document_id"] for s in result["sources"]], [first_id, second_id]
+        )
+        self.assertEqual(
+            [t["document_id"] for t in result["timeline"]], [first_id, second_id]
+        )
+        self.assertEqual(set(observed), {first_id, second_id})
+
+        with self.assertRaises(ValueError):
+            await ask_documents(MagicMock(), document_ids=[-1], question="Why?")
@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from config.celery_app import app as celery_app
+
+
+def _route(task_name: str) -> str:
+    return celery_app.amqp.router.route({}, task_name, (), {})["queue"].name
+
+
+def _running_from(queue: str) -> MagicMock:
+    task = MagicMock()
+    task.request.called_directly = False
+    task.request.delivery_info = {"routing_key": queue}
+    return task
+
+
+class TestTaskRouting(SimpleTestCase):
+    def test_tasks_route_to_named_queues(self):
+        self.assertEqual(
+            _route("opencontractserver.tasks.doc_tasks.ingest_doc"), "ingest"
+        )
+        self.assertEqual(
+            _route(
+                "opencontractserver.tasks.embeddings_task.embed_structural_annotations"
+            ),
+            "embeddings",
+        )
+        self.assertEqual(
+            _route("opencontractserver.tasks.import_tasks.process_documents_zip"),
+            "ingest_bulk",
+        )
+        self.assertEqual(
+            _route("opencontractserver.tasks.export_tasks.package_annotated_docs"),
+            "export",
+        )
+        self.assertEqual(
+            _route("opencontractserver.tasks.extract_orchestrator_tasks.run_extract"),
+            "llm",
+        )
+        self.assertEqual(
+            _route("opencontractserver.users.tasks.get_users_count"), "celery"
+        )
+
+    def test_tasks_sent_from_bulk_queue_use_bulk_variants(self):
+        with patch(
+            "opencontractserver.tasks.routing.current_task",
+            _running_from("ingest_bulk"),
+        ):
+            self.assertEqual(
+                _route("opencontractserver.tasks.doc_tasks.ingest_doc"), "ingest_bulk"
+            )
+            self.assertEqual(
+                _route(
+                    "opencontractserver.tasks.embeddings_task.calculate_embeddings_for_annotations"
+                ),
+                "embeddings_bulk",
+            )
+            # Queues without a bulk variant are kept
+            self.assertEqual(
+                _route("opencontractserver.tasks.export_tasks.package_annotated_docs"),
+                "export",
+            )
+
+        with patch(
+            "opencontractserver.tasks.routing.current_task", _running_from("ingest")
+        ):
+            self.assertEqual(
+                _route(
+                    "opencontractserver.tasks.embeddings_task.embed_structural_annotations"
+                ),
+                "embeddings",
+            )
+
+    def test_explicit_queue_wins(self):
+        options = celery_app.amqp.router.route(
+            {"queue": "celery"}, "opencontractserver.tasks.doc_tasks.ingest_doc", (), {}
+        )
+        self.assertEqual(options["queue"].name, "celery")
@@ -0,0 +1,170 @@
+"""
+Tests (and a small load test) for coalesced websocket streaming of agent answers.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from config.websocket.utils.stream_coalescer import StreamCoalescer
+from opencontractserver.conversations.models import ChatMessage, Conversation
+from opencontractserver.llms.agents.core_agents import (
+    ContentEvent,
+    CoreAgentBase,
+    CoreConversationManager,
+    FinalEvent,
+    ThoughtEvent,
+    get_default_config,
+)
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+TOKENS = 2000
+
+
+class FrameRecorder:
+    """Fake ``send_standard_message`` that records frames, optionally slowly."""
+
+    def __init__(self, delay: float = 0.0):
+        self.frames = []
+        self.delay = delay
+
+    async def __call__(self, msg_type, content="", data=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append((msg_type, content, data))
+
+    def content(self) -> str:
+        return "".join(c for t, c, _ in self.frames if t == "ASYNC_CONTENT")
+
+
+class StreamCoalescerTestCase(SimpleTestCase):
+    async def test_deltas_merge_and_other_frames_keep_their_order(self):
+        recorder = FrameRecorder()
+        async with StreamCoalescer(recorder, window_ms=1000) as stream:
+            for token in ["Hel", "lo", " "]:
+                await stream.send("ASYNC_CONTENT", token, {"message_id": 1})
+            await stream.send("ASYNC_THOUGHT", "searching", {"message_id": 1})
+            await stream.send("ASYNC_CONTENT", "world", {"message_id": 1})
+            await stream.send("ASYNC_CONTENT", "!", {"message_id": 2})
+            await stream.send("ASYNC_FINISH", "done", {"message_id": 2})
+
+        self.assertEqual(
+            [(t, c) for t, c, _ in recorder.frames],
+            [
+                ("ASYNC_CONTENT", "Hello "),
+                ("ASYNC_THOUGHT", "searching"),
+                ("ASYNC_CONTENT", "world"),
+                ("ASYNC_CONTENT", "!"),
+                ("ASYNC_FINISH", "done"),
+            ],
+        )
+        self.assertEqual(recorder.frames[3][2], {"message_id": 2})
+
+    async def test_window_flushes_when_the_model_pauses(self):
+        recorder = FrameRecorder()
+        async with StreamCoalescer(recorder, window_ms=10) as stream:
+            await stream.send("ASYNC_CONTENT", "partial", {"message_id": 1})
+            await asyncio.sleep(0.05)
+            self.assertEqual(recorder.content(), "partial")
+
+    async def test_slow_client_gets_bigger_frames_and_bounded_queue(self):
+        recorder = FrameRecorder(delay=0.005)
+        tokens = [f"t{i} " for i in range(300)]
+        stream = StreamCoalescer(recorder, window_ms=1, max_chars=64, max_pending=2)
+        async with stream:
+            for token in tokens:
+                await stream.send("ASYNC_CONTENT", token, {"message_id": 1})
+                self.assertLessEqual(stream._queue.qsize(), 2)
+                await asyncio.sleep(0)
+
+        self.assertEqual(recorder.content(), "".join(tokens))
+        self.assertLess(len(recorder.frames), len(tokens) / 4)
+
+    async def test_zero_window_sends_every_frame(self):
+        recorder = FrameRecorder()
+        async with StreamCoalescer(recorder, window_ms=0) as stream:
+            for token in ["a", "b", "c"]:
+                await stream.send("ASYNC_CONTENT", token, {"message_id": 1})
+        self.assertEqual(len(recorder.frames), 3)
+
+
+class TokenStreamAgent(CoreAgentBase):
+    """Agent whose model emits one ContentEvent per token, as fast as possible."""
+
+    async def _chat_raw(self, message, **kwargs):  # pragma: no cover - unused
+        raise NotImplementedError
+
+    async def _stream_raw(self, message, **kwargs):
+        yield ThoughtEvent(thought="thinking")
+        accumulated = ""
+        for i in range(TOKENS):
+            accumulated += f"tok{i} "
+            yield ContentEvent(content=f"tok{i} ", accumulated_content=accumulated)
+            await asyncio.sleep(0)
+        yield FinalEvent(accumulated_content=accumulated)
+
+
+class StreamingLoadTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="stream_user", password="x")
+
+    @staticmethod
+    async def _stream_answer(agent, recorder, window_ms):
+        async with StreamCoalescer(recorder, window_ms=window_ms) as stream:
+            async for event in agent.stream("question"):
+                if isinstance(event, ContentEvent):
+                    await stream.send(
+                        "ASYNC_CONTENT",
+                        event.content,
+                        {"message_id": event.llm_message_id},
+                    )
+                elif isinstance(event, FinalEvent):
+                    await stream.send(
+                        "ASYNC_FINISH",
+                        event.accumulated_content,
+                        {"message_id": event.llm_message_id},
+                    )
+
+    def _answer(self, window_ms: int, persist_interval_ms: int):
+        conversation = Conversation.objects.create(
+            title="Streaming load", creator=self.user
+        )
+        config = get_default_config(
+            user_id=self.user.id, stream_update_interval_ms=persist_interval_ms
+        )
+        agent = TokenStreamAgent(
+            config, CoreConversationManager(conversation, self.user.id, config)
+        )
+        recorder = FrameRecorder()
+        with CaptureQueriesContext(connection) as queries:
+            async_to_sync(self._stream_answer)(agent, recorder, window_ms)
+        message = ChatMessage.objects.get(conversation=conversation, msg_type="LLM")
+        return recorder, len(queries), message
+
+    def test_frames_and_queries_per_answer(self):
+        # Before: one frame per token, a DB write every 50 tokens
+        before_frames, before_queries, before_msg = self._answer(0, 0)
+        # After: coalesced frames, DB writes throttled to once a second
+        after_frames, after_queries, after_msg = self._answer(50, 1000)
+
+        logger.info(
+            f"{TOKENS}-token answer: websocket frames {len(before_frames.frames)} -> "
+            f"{len(after_frames.frames)}, DB queries {before_queries} -> "
+            f"{after_queries}"
+        )
+        self.assertEqual(len(before_frames.frames), TOKENS + 1)
+        self.assertLessEqual(len(after_frames.frames), 10)
+        self.assertGreaterEqual(before_queries - after_queries, TOKENS // 50 - 1)
+
+        # Same text reaches the client and the database either way
+        self.assertEqual(after_frames.content(), before_frames.content())
+        self.assertEqual(after_msg.content, before_msg.content)
+        self.assertEqual(after_msg.content, after_frames.content())
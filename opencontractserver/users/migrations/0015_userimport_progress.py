@@ -0,0 +1,41 @@
+# Generated by Django 4.2.20 on 2026-10-18 23:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corpuses", "0018_corpus_md_description_corpusdescriptionrevision"),
+        ("users", "0014_auto_20250224_0600"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userimport",
+            name="corpus",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="imports",
+                to="corpuses.corpus",
+            ),
+        ),
+        migrations.AddField(
+            model_name="userimport",
+            name="failed_documents",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userimport",
+            name="processed_documents",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userimport",
+            name="total_documents",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -274,6 +274,18 @@ class UserImport(django.db.models.Model):
     finished = django.db.models.DateTimeField(null=True)
     errors = django.db.models.TextField(blank=True)
 
+    # Progress of a corpus import (import_corpus), updated by its parallel chunks
+    corpus = django.db.models.ForeignKey(
+        "corpuses.Corpus",
+        on_delete=django.db.models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="imports",
+    )
+    total_documents = django.db.models.IntegerField(default=0)
+    processed_documents = django.db.models.IntegerField(default=0)
+    failed_documents = django.db.models.IntegerField(default=0)
+
     # Sharing
     is_public = django.db.models.BooleanField(default=False)
     creator = django.db.models.ForeignKey(
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
 
 import django.db.models
 import requests
@@ -15,6 +16,7 @@ from opencontractserver.documents.models import Document
 from opencontractserver.types.dicts import (
     AnalyzerManifest,
     AnnotationLabelPythonType,
+    OpenContractsDocAnnotations,
     OpenContractsGeneratedCorpusPythonType,
     OpenContractsLabelSetType,
 )
@@ -22,7 +24,11 @@ from opencontractserver.types.enums import PermissionTypes
 from opencontractserver.utils.packaging import (
     turn_base64_encoded_file_to_django_content_file,
 )
-from opencontractserver.utils.permissioning import set_permissions_for_obj_to_user
+from opencontractserver.utils.page_index import invalidate_page_index
+from opencontractserver.utils.permissioning import (
+    grant_permissions_for_new_objs_to_user,
+    set_permissions_for_obj_to_user,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -292,6 +298,77 @@ def run_analysis(
         return -1
 
 
+# Annotations per INSERT when importing analysis results
+ANALYSIS_IMPORT_BATCH_SIZE = 1000
+
+
+def _append_to_import_log(analysis: Analysis, messages: list[str]) -> None:
+    analysis.import_log = "\n".join(
+        [analysis.import_log, *messages] if analysis.import_log else messages
+    )
+    analysis.save(update_fields=["import_log"])
+
+
+def _build_analysis_doc_annotations(
+    analysis: Analysis,
+    creator_id: str | int,
+    doc_id: int,
+    doc_annotation_data: OpenContractsDocAnnotations,
+    label_id_map: dict[str | int, str | int],
+) -> tuple[list[Annotation], list[str]]:
+    """
+    Unsaved Annotations for one document of an analyzer's results, and the problems
+    of the annotations that failed validation (and were left out).
+    """
+    annotations = []
+    problems = []
+
+    for doc_label_data in doc_annotation_data.get("doc_labels", []):
+        label_id = label_id_map.get(doc_label_data)
+        if label_id is None:
+            problems.append(f"unknown doc label {doc_label_data}")
+            continue
+        annotations.append(
+            Annotation(
+                annotation_label_id=label_id,
+                document_id=doc_id,
+                analysis=analysis,
+                creator_id=creator_id,
+                corpus=analysis.analyzed_corpus,
+            )
+        )
+
+    for span_label_data in doc_annotation_data.get("labelled_text", []):
+        label_id = label_id_map.get(span_label_data.get("annotationLabel"))
+        if label_id is None:
+            problems.append(
+                f"unknown span label {span_label_data.get('annotationLabel')}"
+            )
+            continue
+        missing = [
+            key
+            for key in ["rawText", "page", "annotation_json"]
+            if key not in span_label_data
+        ]
+        if missing:
+            problems.append(f"span annotation without {', '.join(missing)}")
+            continue
+        annotations.append(
+            Annotation(
+                annotation_label_id=label_id,
+                document_id=doc_id,
+                analysis=analysis,
+                creator_id=creator_id,
+                raw_text=span_label_data["rawText"],
+                page=span_label_data["page"],
+                json=span_label_data["annotation_json"],
+                corpus=analysis.analyzed_corpus,
+            )
+        )
+
+    return annotations, problems
+
+
 def import_annotations_from_analysis(
     analysis_id: str | int,
     creator_id: str | int,
@@ -299,11 +376,21 @@ def import_annotations_from_analysis(
 ) -> bool:
     """
     Import the actual annotations and link them to proper analyzers, analysis, labels, etc.
+
+    All results are validated before anything is written: a document must exist and
+    each of its annotations must use an installed label (and, for spans, carry text,
+    page and json); invalid annotations are left out. Each document's annotations are
+    then inserted with one bulk_create, all in one transaction with a savepoint per
+    document, so a document that fails leaves no partial results. Problems are logged
+    to the analysis' import_log once per document, and the embeddings of the new
+    annotations are queued in batches once the import commits.
     """
+    from opencontractserver.tasks.embeddings_task import queue_annotation_embeddings
+
     logger.info(
         f"import_annotations_from_analysis - start(analysis_id: {analysis_id}, creator_id: {creator_id})..."
     )
-    analysis = Analysis.objects.get(id=analysis_id)
+    analysis = Analysis.objects.select_related("analyzed_corpus").get(id=analysis_id)
     logger.info(f"import_annotations_from_analysis - analysis: {analysis}")
 
     try:
@@ -322,89 +409,76 @@ def import_annotations_from_analysis(
             f" {e}"
         )
         logger.error(message)
+        _append_to_import_log(analysis, [message])
+        return False
 
-        with transaction.atomic():
-            analysis.import_log = (
-                analysis.import_log + "\n" + message
-                if (analysis and len(analysis.import_log) > 0)
-                else message
-            )
-            analysis.save()
+    messages = []
 
-        return False
+    # Validate everything before writing anything
+    annotated_docs = analysis_results["annotated_docs"]
+    doc_ids = {}
+    for doc_id in annotated_docs:
+        try:
+            doc_ids[doc_id] = int(doc_id)
+        except (TypeError, ValueError):
+            pass
+    existing_doc_ids = set(
+        Document.objects.filter(id__in=doc_ids.values()).values_list("id", flat=True)
+    )
 
-    for doc_id, doc_annotation_data in list(analysis_results["annotated_docs"].items()):
+    doc_annotations = []
+    for doc_id, doc_annotation_data in annotated_docs.items():
+        if doc_ids.get(doc_id) not in existing_doc_ids:
+            messages.append(
+                f"import_annotations_from_analysis() - doc {doc_id} does not exist, skipped its annotations"
+            )
+            continue
 
-        # Create doc labels for the doc
-        for doc_label_data in doc_annotation_data["doc_labels"]:
+        annotations, problems = _build_analysis_doc_annotations(
+            analysis, creator_id, doc_ids[doc_id], doc_annotation_data, label_id_map
+        )
+        if problems:
+            messages.append(
+                f"import_annotations_from_analysis() - for doc {doc_id} skipped {len(problems)} invalid "
+                f"annotations: {'; '.join(problems[:10])}"
+            )
+        if annotations:
+            doc_annotations.append((doc_ids[doc_id], annotations))
 
+    annotation_ids = []
+    imported_doc_ids = []
+    with transaction.atomic():
+        for doc_id, annotations in doc_annotations:
             try:
-                # logger.info(f"import_annotations_from_analysis() - create doc label {doc_label_data} for doc {
-                # doc_id}")
-
                 with transaction.atomic():
-                    annotation = Annotation.objects.create(
-                        annotation_label_id=label_id_map[doc_label_data],
-                        document_id=doc_id,
-                        analysis_id=analysis_id,
-                        creator_id=creator_id,
-                        corpus=analysis.analyzed_corpus,
+                    Annotation.objects.bulk_create(
+                        annotations, batch_size=ANALYSIS_IMPORT_BATCH_SIZE
                     )
-                    set_permissions_for_obj_to_user(
-                        creator_id, annotation, [PermissionTypes.CRUD]
+                    grant_permissions_for_new_objs_to_user(
+                        creator_id, annotations, [PermissionTypes.CRUD]
                     )
-
-                    # logger.info(f"import_annotations_from_analysis() - Successfully created doc label {annotation}")
             except Exception as e:
-                message = (
-                    f"import_annotations_from_analysis() - for doc {doc_id} failed to import doc annotation "
-                    f"{doc_label_data} due to error: {e}"
+                messages.append(
+                    f"import_annotations_from_analysis() - for doc {doc_id} failed to import "
+                    f"{len(annotations)} annotations due to error: {e}"
                 )
+                continue
+            annotation_ids.extend(annotation.id for annotation in annotations)
+            imported_doc_ids.append(doc_id)
+
+        if messages:
+            for message in messages:
                 logger.error(message)
-                with transaction.atomic():
-                    analysis.import_log = (
-                        analysis.import_log + "\n" + message
-                        if len(analysis.import_log) > 0
-                        else message
-                    )
-                    analysis.save()
+            _append_to_import_log(analysis, messages)
 
-        # Create span labels for the doc
-        for span_label_data in doc_annotation_data["labelled_text"]:
+        # bulk_create skips post_save, so embeddings and the page index are
+        # handled here for the whole import.
+        transaction.on_commit(partial(queue_annotation_embeddings, annotation_ids))
 
-            try:
-                # logger.info(f"import_annotations_from_analysis() - create span label {span_label_data} for doc
-                # {doc_id}")
-                with transaction.atomic():
-                    annotation = Annotation.objects.create(
-                        annotation_label_id=label_id_map[
-                            span_label_data["annotationLabel"]
-                        ],
-                        document_id=doc_id,
-                        analysis_id=analysis_id,
-                        creator_id=creator_id,
-                        raw_text=span_label_data["rawText"],
-                        page=span_label_data["page"],
-                        json=span_label_data["annotation_json"],
-                        corpus=analysis.analyzed_corpus,
-                    )
-                    set_permissions_for_obj_to_user(
-                        creator_id, annotation, [PermissionTypes.CRUD]
-                    )
-                    # logger.info(f"import_annotations_from_analysis() - Successfully created span label {annotation}")
-
-            except Exception as e:
-                message = (
-                    f"import_annotations_from_analysis() - for doc {doc_id} failed to import span annotation "
-                    f"{span_label_data} due to error: {e}"
-                )
-                logger.error(message)
-                with transaction.atomic():
-                    analysis.import_log = (
-                        analysis.import_log + "\n" + message
-                        if (analysis.import_log and len(analysis.import_log) > 0)
-                        else message
-                    )
-                    analysis.save()
+    invalidate_page_index(imported_doc_ids)
 
+    logger.info(
+        f"import_annotations_from_analysis() - imported {len(annotation_ids)} annotations "
+        f"on {len(imported_doc_ids)} docs for analysis {analysis_id}"
+    )
     return True
@@ -0,0 +1,172 @@
+"""
+Cross-process cap on concurrent work against a shared resource.
+
+``DistributedSemaphore`` hands out at most ``limit`` slots for a name. Slots
+are leases in a Redis sorted set (member = slot token, score = lease expiry),
+so every Celery worker shares the same cap and a worker that dies mid-request
+only holds its slot until the lease runs out. Without Redis (or with
+``CONCURRENCY_LIMIT_BACKEND = "local"``) the cap is enforced per process.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Protocol
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "concurrency_slots"
+
+# Drops expired leases, then takes a slot if one is free.
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease) + 60)
+    return 1
+end
+return 0
+"""
+
+
+class SlotBackend(Protocol):
+    def try_acquire(self, name: str, limit: int, lease: float, token: str) -> bool: ...
+
+    def release(self, name: str, token: str) -> None: ...
+
+
+class LocalSlotBackend:
+    """Slots held in this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: dict[str, dict[str, float]] = {}
+
+    def try_acquire(self, name: str, limit: int, lease: float, token: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            leases = self._leases.setdefault(name, {})
+            for held, expires in list(leases.items()):
+                if expires <= now:
+                    del leases[held]
+            if len(leases) >= limit:
+                return False
+            leases[token] = now + lease
+            return True
+
+    def release(self, name: str, token: str) -> None:
+        with self._lock:
+            self._leases.get(name, {}).pop(token, None)
+
+    def held(self, name: str) -> int:
+        with self._lock:
+            return len(self._leases.get(name, {}))
+
+
+class RedisSlotBackend:
+    """Slots shared by every process using the same Redis."""
+
+    def __init__(self, alias: str):
+        from django_redis import get_redis_connection
+
+        self.client = get_redis_connection(alias)
+        self.script = self.client.register_script(ACQUIRE_SCRIPT)
+
+    def try_acquire(self, name: str, limit: int, lease: float, token: str) -> bool:
+        return bool(self.script(keys=[name], args=[limit, lease, token]))
+
+    def release(self, name: str, token: str) -> None:
+        self.client.zrem(name, token)
+
+
+_backend: Optional[SlotBackend] = None
+_backend_config = None
+_backend_lock = threading.Lock()
+
+
+def get_slot_backend() -> SlotBackend:
+    """Backend for the configured ``CONCURRENCY_LIMIT_BACKEND`` (rebuilt on change)."""
+    global _backend, _backend_config
+
+    config = (
+        getattr(settings, "CONCURRENCY_LIMIT_BACKEND", "redis"),
+        getattr(settings, "CONCURRENCY_LIMIT_REDIS_ALIAS", "default"),
+    )
+    with _backend_lock:
+        if config != _backend_config:
+            _backend_config = config
+            _backend = None
+            if config[0] == "redis":
+                try:
+                    _backend = RedisSlotBackend(config[1])
+                except Exception as e:
+                    logger.warning(
+                        f"Redis concurrency slots unavailable, limiting per process: {e}"
+                    )
+            if _backend is None:
+                _backend = LocalSlotBackend()
+        return _backend
+
+
+class SlotUnavailable(TimeoutError):
+    """No slot became free within the wait timeout."""
+
+
+class DistributedSemaphore:
+    def __init__(self, name: str, limit: int, lease_seconds: float = 1800):
+        self.name = f"{KEY_PREFIX}:{name}"
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None, poll_interval: float = 0.5):
+        """
+        Hold one slot for the duration of the block, waiting up to *timeout*
+        seconds (forever if ``None``) for one to free up. A limit below 1
+        disables the cap.
+        """
+        if self.limit < 1:
+            yield
+            return
+
+        backend = get_slot_backend()
+        token = uuid.uuid4().hex
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not self._try_acquire(backend, token):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SlotUnavailable(
+                    f"No {self.name} slot free after {timeout}s (limit {self.limit})"
+                )
+            if not waited:
+                logger.info(f"Waiting for a {self.name} slot (limit {self.limit})")
+                waited = True
+            time.sleep(poll_interval * random.uniform(0.5, 1.5))
+
+        try:
+            yield
+        finally:
+            try:
+                backend.release(self.name, token)
+            except Exception as e:
+                # The lease expires on its own
+                logger.warning(f"Failed to release {self.name} slot: {e}")
+
+    def _try_acquire(self, backend: SlotBackend, token: str) -> bool:
+        try:
+            return backend.try_acquire(self.name, self.limit, self.lease_seconds, token)
+        except Exception as e:
+            # Never block parsing on an unreachable Redis
+            logger.warning(f"Concurrency slot backend failed, not limiting: {e}")
+            return True
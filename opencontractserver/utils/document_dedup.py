@@ -0,0 +1,184 @@
+"""
+Content-addressed reuse of document parses.
+
+Uploads store the sha256 of their source file on ``Document.file_sha256``.
+When an identical file was already fully processed and the uploader can see
+that document, the new document copies its parse (thumbnail, text layer,
+PAWLS layer, structural annotations / relationships and their embeddings)
+instead of running the thumbnail, parser and embedder pipeline again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import pathlib
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from opencontractserver.annotations.models import Annotation, Embedding, Relationship
+from opencontractserver.documents.models import Document
+from opencontractserver.types.enums import PermissionTypes
+from opencontractserver.utils.permissioning import (
+    grant_permissions_for_new_objs_to_user,
+)
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def find_reusable_document(
+    user: User,
+    sha256: Optional[str],
+    file_type: str,
+    exclude_id: Optional[int] = None,
+) -> Optional[Document]:
+    """
+    Most recently processed document visible to *user* with the same source
+    file hash and type whose ingest completed, or None.
+    """
+    if not sha256 or not getattr(settings, "DOCUMENT_DEDUP_ENABLED", True):
+        return None
+
+    candidates = (
+        Document.objects.visible_to_user(user)
+        .filter(
+            file_sha256=sha256,
+            file_type=file_type,
+            backend_lock=False,
+            processing_finished__isnull=False,
+        )
+        .exclude(txt_extract_file__isnull=True)
+        .exclude(txt_extract_file="")
+    )
+    if file_type == "application/pdf":
+        candidates = candidates.exclude(pawls_parse_file__isnull=True).exclude(
+            pawls_parse_file=""
+        )
+    if exclude_id is not None:
+        candidates = candidates.exclude(pk=exclude_id)
+    return candidates.order_by("-processing_finished").first()
+
+
+def _copy_file(source_field, target_field) -> None:
+    if not source_field:
+        return
+    with source_field.open("rb") as source_file:
+        content = ContentFile(source_file.read())
+    target_field.save(pathlib.Path(source_field.name).name, content, save=False)
+
+
+def copy_parse_artifacts(source: Document, target: Document, user_id: int) -> int:
+    """
+    Copies the parse of *source* onto *target* (created by *user_id*) and
+    returns the number of structural annotations copied.
+    """
+    with transaction.atomic():
+        _copy_file(source.icon, target.icon)
+        _copy_file(source.txt_extract_file, target.txt_extract_file)
+        _copy_file(source.pawls_parse_file, target.pawls_parse_file)
+        target.page_count = source.page_count
+        target.embedding = source.embedding
+        target.save()
+
+        # Structural annotations, re-linked to their copied parents
+        source_annotations = list(
+            Annotation.objects.filter(
+                document=source, structural=True, analysis__isnull=True
+            ).order_by("id")
+        )
+        old_parent_ids = {}
+        copies = []
+        for annotation in source_annotations:
+            old_parent_ids[annotation.id] = annotation.parent_id
+            annotation.old_id = annotation.id
+            annotation.pk = None
+            annotation.document = target
+            annotation.creator_id = user_id
+            annotation.parent_id = None
+            annotation.embeddings_id = None
+            copies.append(annotation)
+        Annotation.objects.bulk_create(copies, batch_size=500)
+
+        new_ids = {copy.old_id: copy.id for copy in copies}
+        with_parents = []
+        for copy in copies:
+            old_parent_id = old_parent_ids[copy.old_id]
+            if old_parent_id in new_ids:
+                copy.parent_id = new_ids[old_parent_id]
+                with_parents.append(copy)
+        Annotation.objects.bulk_update(with_parents, ["parent"], batch_size=500)
+        grant_permissions_for_new_objs_to_user(user_id, copies, [PermissionTypes.ALL])
+
+        # Structural relationships between the copied annotations
+        source_relationships = list(
+            Relationship.objects.filter(
+                document=source, structural=True, analysis__isnull=True
+            ).prefetch_related("source_annotations", "target_annotations")
+        )
+        relationship_copies = []
+        for relationship in source_relationships:
+            relationship.old_sources = [
+                a.id for a in relationship.source_annotations.all()
+            ]
+            relationship.old_targets = [
+                a.id for a in relationship.target_annotations.all()
+            ]
+            relationship.pk = None
+            relationship.document = target
+            relationship.creator_id = user_id
+            relationship_copies.append(relationship)
+        Relationship.objects.bulk_create(relationship_copies, batch_size=500)
+
+        SourceThrough = Relationship.source_annotations.through
+        TargetThrough = Relationship.target_annotations.through
+        SourceThrough.objects.bulk_create(
+            [
+                SourceThrough(relationship_id=copy.id, annotation_id=new_ids[old_id])
+                for copy in relationship_copies
+                for old_id in copy.old_sources
+                if old_id in new_ids
+            ],
+            batch_size=1000,
+        )
+        TargetThrough.objects.bulk_create(
+            [
+                TargetThrough(relationship_id=copy.id, annotation_id=new_ids[old_id])
+                for copy in relationship_copies
+                for old_id in copy.old_targets
+                if old_id in new_ids
+            ],
+            batch_size=1000,
+        )
+        grant_permissions_for_new_objs_to_user(
+            user_id, relationship_copies, [PermissionTypes.ALL]
+        )
+
+        # Embeddings of the document and of the copied annotations
+        embedding_copies = []
+        for embedding in Embedding.objects.filter(document=source):
+            embedding.pk = None
+            embedding.document = target
+            embedding.creator_id = user_id
+            embedding_copies.append(embedding)
+        for embedding in Embedding.objects.filter(annotation_id__in=new_ids):
+            embedding.pk = None
+            embedding.annotation_id = new_ids[embedding.annotation_id]
+            embedding.creator_id = user_id
+            embedding_copies.append(embedding)
+        Embedding.objects.bulk_create(embedding_copies, batch_size=500)
+
+    logger.info(
+        f"Reused parse of doc {source.id} for doc {target.id}: {len(copies)} "
+        f"annotations, {len(relationship_copies)} relationships, "
+        f"{len(embedding_copies)} embeddings"
+    )
+    return len(copies)
@@ -2,11 +2,14 @@ import base64
 import logging
 import os
 import pathlib
+import shutil
 import string
+import tempfile
 import textwrap
 import typing
 import uuid
-from io import BytesIO
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 from django.conf import settings
@@ -119,6 +122,10 @@ def split_pdf_into_images(
     Storage path should be like this user_{user_id}/fragments for S3 or f"/tmp/user_{user_id}/pdf_fragments" for
     local storage.
 
+    Pages are rendered PDF_IMAGE_RENDER_BATCH_SIZE at a time (first_page / last_page) straight
+    to files in a temporary directory, and a pool of PDF_IMAGE_UPLOAD_WORKERS threads stores
+    each batch while the next one renders. Memory use thus doesn't grow with the page count.
+
     Args:
         pdf_bytes (bytes): The bytes of the PDF file to split.
         storage_path (str): The path to store the image fragments.
@@ -129,7 +136,7 @@ def split_pdf_into_images(
         list[str]: A list of file paths to the stored images in page order.
     """
 
-    from pdf2image import convert_from_bytes
+    from pdf2image import convert_from_path, pdfinfo_from_path
 
     page_paths: list[str] = []
 
@@ -153,10 +160,6 @@ def split_pdf_into_images(
         )
         # TODO: make sure target image resolution is compatible with PAWLS x,y coord system
 
-        logger.debug("Converting PDF bytes to images")
-        images = convert_from_bytes(pdf_bytes, size=(754, 1000))
-        logger.debug(f"Number of images extracted: {len(images)}")
-
         # Determine file extension and content type
         file_extension = ".png" if target_format == "PNG" else ".jpg"
         content_type = f"image/{target_format.lower()}"
@@ -172,53 +175,76 @@ def split_pdf_into_images(
             )
             import boto3
 
+            # boto3 clients are thread-safe, so the upload threads share this one
             s3 = boto3.client("s3")
             logger.debug("S3 client initialized")
         else:
             logger.debug("Proceeding with local storage")
-
-        for index, img in enumerate(images):
-            logger.debug(f"Processing image {index + 1} of {len(images)}")
-
-            # images is a list of Pillow Image objs.
-            img_bytes_stream = BytesIO()
+            pdf_fragment_folder_path = pathlib.Path(storage_path)
             logger.debug(
-                f"Saving image {index + 1} to bytes stream in format {target_format}"
+                f"Ensuring local directory exists at: {pdf_fragment_folder_path}"
             )
-            img.save(img_bytes_stream, target_format)
-            img_bytes = img_bytes_stream.getvalue()
-            logger.debug(f"Image {index + 1} bytes size: {len(img_bytes)} bytes")
+            pdf_fragment_folder_path.mkdir(parents=True, exist_ok=True)
 
+        def store_page_image(image_path: str) -> str:
             if use_aws:
-                logger.debug("Uploading image to AWS S3")
                 page_path = f"{storage_path}/{uuid.uuid4()}{file_extension}"
-                logger.debug(f"Generated S3 page path: {page_path}")
-                s3.put_object(
-                    Key=page_path,
-                    Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                    Body=img_bytes,
-                    ContentType=content_type,
-                )
-                logger.debug(f"Image {index + 1} uploaded to S3 with key: {page_path}")
+                with open(image_path, "rb") as image_file:
+                    s3.put_object(
+                        Key=page_path,
+                        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                        Body=image_file,
+                        ContentType=content_type,
+                    )
+                os.remove(image_path)
+                logger.debug(f"Page image uploaded to S3 with key: {page_path}")
             else:
-                logger.debug("Saving image locally")
-                pdf_fragment_folder_path = pathlib.Path(storage_path)
-                logger.debug(
-                    f"Ensuring local directory exists at: {pdf_fragment_folder_path}"
-                )
-                pdf_fragment_folder_path.mkdir(parents=True, exist_ok=True)
                 pdf_fragment_path = (
                     pdf_fragment_folder_path / f"{uuid.uuid4()}{file_extension}"
                 )
-                logger.debug(f"Generated local page path: {pdf_fragment_path}")
-                with pdf_fragment_path.open("wb") as f:
-                    logger.debug(f"Writing image {index + 1} bytes to file")
-                    f.write(img_bytes)
+                shutil.move(image_path, pdf_fragment_path)
                 page_path = str(pdf_fragment_path.resolve())
-                logger.debug(f"Image {index + 1} saved locally at: {page_path}")
+                logger.debug(f"Page image saved locally at: {page_path}")
+            return page_path
+
+        batch_size = max(1, getattr(settings, "PDF_IMAGE_RENDER_BATCH_SIZE", 8))
+        upload_workers = max(1, getattr(settings, "PDF_IMAGE_UPLOAD_WORKERS", 4))
+
+        with tempfile.TemporaryDirectory() as render_dir, ThreadPoolExecutor(
+            max_workers=upload_workers
+        ) as executor:
+            # Written once, rather than by every convert_from_bytes call
+            pdf_path = os.path.join(render_dir, "source.pdf")
+            with open(pdf_path, "wb") as pdf_file:
+                pdf_file.write(pdf_bytes)
+
+            page_count = pdfinfo_from_path(pdf_path)["Pages"]
+            logger.debug(f"Number of pages to render: {page_count}")
+
+            uploads = []
+            for first_page in range(1, page_count + 1, batch_size):
+                last_page = min(first_page + batch_size - 1, page_count)
+                logger.debug(f"Rendering pages {first_page} to {last_page}")
+                rendered_paths = convert_from_path(
+                    pdf_path,
+                    size=(754, 1000),
+                    first_page=first_page,
+                    last_page=last_page,
+                    output_folder=render_dir,
+                    output_file=f"pages_{first_page:06d}_",
+                    fmt=target_format.lower(),
+                    paths_only=True,
+                )
 
-            page_paths.append(page_path)
-            logger.debug(f"Page path added to list: {page_path}")
+                # The previous batch was stored while this one rendered; waiting
+                # for it here keeps at most two batches on disk
+                page_paths.extend(upload.result() for upload in uploads)
+                uploads = [
+                    executor.submit(store_page_image, rendered_path)
+                    for rendered_path in rendered_paths
+                ]
+
+            page_paths.extend(upload.result() for upload in uploads)
 
     except Exception as e:
         logger.error(f"split_pdf_into_images() failed due to unexpected error: {e}")
@@ -230,18 +256,72 @@ def split_pdf_into_images(
     return page_paths
 
 
-def check_if_pdf_needs_ocr(file_object, threshold=10):
-    pdf_reader = PdfReader(file_object)
-    total_text = ""
+def _sample_page_indices(page_count: int, max_pages: int) -> list[int]:
+    """
+    Indices of at most *max_pages* pages spread evenly over the document
+    (first and last included); all pages when max_pages <= 0.
+    """
+    if max_pages <= 0 or page_count <= max_pages:
+        return list(range(page_count))
+    if max_pages == 1:
+        return [0]
+    step = (page_count - 1) / (max_pages - 1)
+    return sorted({round(index * step) for index in range(max_pages)})
 
-    for page in pdf_reader.pages:
-        total_text += page.extract_text()
+
+def _page_text_lengths(pages, indices: Iterable[int]) -> Iterator[int]:
+    """
+    Characters of extractable text on the pages at *indices*, extracted lazily
+    so callers can stop early.
+    """
+    for index in indices:
+        yield len((pages[index].extract_text() or "").strip())
+
+
+def check_if_pdf_needs_ocr(file_object, threshold=10, max_pages=None):
+    """
+    True if the PDF looks scanned, i.e. its pages hold fewer than *threshold*
+    characters of extractable text. Extraction stops as soon as the threshold
+    is met, and documents longer than *max_pages* (default OCR_CHECK_MAX_PAGES)
+    are judged on that many evenly spaced pages.
+    """
+    if max_pages is None:
+        max_pages = getattr(settings, "OCR_CHECK_MAX_PAGES", 50)
+
+    pages = PdfReader(file_object).pages
+    needs_ocr = True
+    text_length = 0
+
+    for page_length in _page_text_lengths(
+        pages, _sample_page_indices(len(pages), max_pages)
+    ):
+        text_length += page_length
+        if text_length >= threshold:
+            needs_ocr = False
+            break
+
+    # Reset file pointer to the beginning for subsequent use
+    file_object.seek(0)
+
+    return needs_ocr
+
+
+def get_pdf_text_layer_status(file_object, threshold=10) -> list[bool]:
+    """
+    For each page of the PDF, in order, whether it has a text layer (at least
+    *threshold* characters of extractable text). Pages without one are the
+    scanned pages of a mixed document that still need OCR.
+    """
+    pages = PdfReader(file_object).pages
+    text_layers = [
+        page_length >= threshold
+        for page_length in _page_text_lengths(pages, range(len(pages)))
+    ]
 
     # Reset file pointer to the beginning for subsequent use
     file_object.seek(0)
 
-    # If the total extracted text is less than the threshold, it likely needs OCR
-    return len(total_text.strip()) < threshold
+    return text_layers
 
 
 def is_plaintext_content(
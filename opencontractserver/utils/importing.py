@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 from typing import Union
 
+from django.db import transaction
+
 from config.graphql.annotation_serializers import AnnotationLabelSerializer
 from opencontractserver.annotations.models import (
     TOKEN_LABEL,
@@ -13,7 +16,10 @@ from opencontractserver.types.dicts import (
     OpenContractsRelationshipPythonType,
 )
 from opencontractserver.types.enums import PermissionTypes
-from opencontractserver.utils.permissioning import set_permissions_for_obj_to_user
+from opencontractserver.utils.permissioning import (
+    grant_permissions_for_new_objs_to_user,
+    set_permissions_for_obj_to_user,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -126,6 +132,71 @@ def import_annotations(
     return old_id_to_new_pk
 
 
+def bulk_import_annotations(
+    user_id: int,
+    doc_obj,
+    corpus_obj,
+    annotations_data: list[OpenContractsAnnotationPythonType],
+    label_lookup: dict[str, AnnotationLabel],
+    label_type: str = TOKEN_LABEL,
+) -> dict[Union[str, int], int]:
+    """
+    Bulk variant of import_annotations for bulk loads (e.g. corpus imports): the
+    annotations are written with one bulk_create, their parents with one
+    bulk_update and their permissions with one INSERT. bulk_create sends no
+    post_save, so their embeddings are queued in batches once the transaction
+    commits.
+
+    Returns:
+        Dict[Union[str, int], int]: Same mapping of incoming annotation "id" to new
+        Annotation primary key as import_annotations.
+    """
+    from opencontractserver.tasks.embeddings_task import queue_annotation_embeddings
+
+    annotations = [
+        Annotation(
+            raw_text=annotation_data["rawText"],
+            page=annotation_data.get("page", 1),
+            json=annotation_data["annotation_json"],
+            annotation_label=label_lookup[annotation_data["annotationLabel"]],
+            document=doc_obj,
+            corpus=corpus_obj,
+            creator_id=user_id,
+            annotation_type=annotation_data.get("annotation_type") or label_type,
+            structural=annotation_data.get("structural", False),
+        )
+        for annotation_data in annotations_data
+    ]
+    if not annotations:
+        return {}
+
+    Annotation.objects.bulk_create(annotations, batch_size=500)
+
+    old_id_to_new_pk: dict[Union[str, int], int] = {
+        annotation_data["id"]: annot_obj.pk
+        for annotation_data, annot_obj in zip(annotations_data, annotations)
+        if annotation_data.get("id") is not None
+    }
+
+    children = []
+    for annotation_data, annot_obj in zip(annotations_data, annotations):
+        parent_old_id = annotation_data.get("parent_id")
+        if parent_old_id is not None and annotation_data.get("id") is not None:
+            parent_pk = old_id_to_new_pk.get(parent_old_id)
+            if parent_pk:
+                annot_obj.parent_id = parent_pk
+                children.append(annot_obj)
+    if children:
+        Annotation.objects.bulk_update(children, ["parent"], batch_size=500)
+
+    grant_permissions_for_new_objs_to_user(user_id, annotations, [PermissionTypes.ALL])
+
+    annotation_ids = [annot_obj.pk for annot_obj in annotations]
+    transaction.on_commit(partial(queue_annotation_embeddings, annotation_ids))
+
+    return old_id_to_new_pk
+
+
 def import_relationships(
     user_id: int,
     doc_obj,
@@ -0,0 +1,80 @@
+"""
+Per-stage timings of the document ingest graph.
+
+Each stage of the ingest graph (see ``opencontractserver.tasks.doc_tasks.
+build_ingest_graph``) runs inside :func:`record_ingest_stage`, which stores
+when the stage started, how long it ran and whether it failed on
+``Document.processing_timings``::
+
+    {
+        "thumbnail": {"started": "...", "seconds": 0.41, "status": "ok"},
+        "parse": {"started": "...", "seconds": 12.9, "status": "ok"},
+        ...
+        "total": {"started": "...", "seconds": 15.2, "status": "ok"},
+    }
+
+Stages run concurrently on different workers, so every write locks the
+document row and merges its stage into the stored dict.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from django.db import transaction
+from django.utils import timezone
+
+from opencontractserver.documents.models import Document
+
+logger = logging.getLogger(__name__)
+
+
+def store_ingest_stage_timing(
+    doc_id: int,
+    stage: str,
+    started: datetime.datetime,
+    seconds: float,
+    status: str = "ok",
+    **extra: Any,
+) -> None:
+    timing = {
+        "started": started.isoformat(),
+        "seconds": round(seconds, 3),
+        "status": status,
+        **extra,
+    }
+    try:
+        with transaction.atomic():
+            timings = (
+                Document.objects.select_for_update()
+                .values_list("processing_timings", flat=True)
+                .get(pk=doc_id)
+            ) or {}
+            timings[stage] = timing
+            Document.objects.filter(pk=doc_id).update(processing_timings=timings)
+    except Document.DoesNotExist:
+        logger.warning(f"Cannot record '{stage}' timing: document {doc_id} is gone")
+
+
+@contextmanager
+def record_ingest_stage(doc_id: int, stage: str) -> Iterator[dict[str, Any]]:
+    """
+    Times the enclosed block as ingest *stage* of document *doc_id*. Values put
+    in the yielded dict (e.g. counts) are stored with the timing.
+    """
+    started = timezone.now()
+    start = time.perf_counter()
+    extra: dict[str, Any] = {}
+    status = "error"
+    try:
+        yield extra
+        status = "ok"
+    finally:
+        store_ingest_stage_timing(
+            doc_id, stage, started, time.perf_counter() - start, status, **extra
+        )
@@ -0,0 +1,71 @@
+"""
+Progress counters of long-running, fanned-out jobs (e.g. document zip imports).
+
+A job registers its counters once with :func:`init_job_progress`; the parallel
+tasks doing the work then bump them with :func:`add_job_progress`, and API
+resolvers read them back with :func:`get_job_progress` while the job's Celery
+result is still pending::
+
+    init_job_progress(job_id, total_files=10000, processed_files=0)
+    add_job_progress(job_id, processed_files=250)
+    get_job_progress(job_id)  # {"total_files": 10000, "processed_files": 250}
+
+Counters live in the Django cache (Redis in production) and are incremented
+atomically, so concurrent tasks never lose each other's updates. They expire
+after ``JOB_PROGRESS_TIMEOUT`` seconds.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+JOB_PROGRESS_CACHE_PREFIX = "job_progress"
+
+
+def _counters_key(job_id: str) -> str:
+    return f"{JOB_PROGRESS_CACHE_PREFIX}:{job_id}"
+
+
+def _counter_key(job_id: str, name: str) -> str:
+    return f"{JOB_PROGRESS_CACHE_PREFIX}:{job_id}:{name}"
+
+
+def _timeout() -> int:
+    return getattr(settings, "JOB_PROGRESS_TIMEOUT", 60 * 60 * 24)
+
+
+def init_job_progress(job_id: str, **counters: int) -> None:
+    """Registers (and resets) the counters of job *job_id*."""
+    timeout = _timeout()
+    cache.set_many(
+        {_counter_key(job_id, name): value for name, value in counters.items()},
+        timeout,
+    )
+    cache.set(_counters_key(job_id), list(counters), timeout)
+
+
+def add_job_progress(job_id: str, **increments: int) -> None:
+    """Atomically adds *increments* to the counters of job *job_id*."""
+    timeout = _timeout()
+    for name, amount in increments.items():
+        if not amount:
+            continue
+        key = _counter_key(job_id, name)
+        cache.add(key, 0, timeout)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, amount, timeout)
+
+
+def get_job_progress(job_id: str) -> Optional[dict[str, int]]:
+    """Current counters of job *job_id*, or None for an unknown / expired job."""
+    names = cache.get(_counters_key(job_id))
+    if names is None:
+        return None
+    values = cache.get_many([_counter_key(job_id, name) for name in names])
+    return {name: values.get(_counter_key(job_id, name), 0) for name in names}
@@ -0,0 +1,229 @@
+"""
+Per-page annotation index used by the document viewer.
+
+Paging through a large PDF used to re-run the full permission + analysis filter
+over *every* annotation in the document on each page turn. Instead we build,
+once per (document, corpus, analysis selection), a compact index mapping each
+page to the annotations that start on it and keep it in the Django cache.
+
+Entries carry ``creator_id`` and ``is_public`` so the (cheap) visibility check
+can be applied per request in Python while the index itself stays user
+independent. Any annotation save / delete for a document bumps that document's
+index *version*, which orphans every cached index for the document at once.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PAGE_INDEX_CACHE_PREFIX = "annotation_page_index"
+
+
+def _page_index_timeout() -> int:
+    return getattr(settings, "ANNOTATION_PAGE_INDEX_TIMEOUT", 60 * 60 * 24)
+
+
+def _version_key(document_id: int | str) -> str:
+    return f"{PAGE_INDEX_CACHE_PREFIX}:version:{document_id}"
+
+
+def _get_document_version(document_id: int | str) -> str:
+    version = cache.get(_version_key(document_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so two concurrent readers don't clobber each other's version
+        if not cache.add(_version_key(document_id), version, timeout=None):
+            version = cache.get(_version_key(document_id), version)
+    return version
+
+
+def _analysis_key(analysis_ids: Optional[Sequence[int]]) -> str:
+    if analysis_ids is None:
+        return "human"
+    return "a" + "-".join(str(pk) for pk in sorted(set(analysis_ids)))
+
+
+def _index_key_base(
+    document_id: int | str,
+    corpus_id: Optional[int | str],
+    analysis_ids: Optional[Sequence[int]],
+    label_type: Optional[str],
+) -> str:
+    return ":".join(
+        [
+            PAGE_INDEX_CACHE_PREFIX,
+            str(document_id),
+            _get_document_version(document_id),
+            str(corpus_id) if corpus_id is not None else "any",
+            _analysis_key(analysis_ids),
+            label_type or "all",
+        ]
+    )
+
+
+def pack_annotation_json(annotation_json: Any) -> dict[str, Any]:
+    """
+    Reduce an annotation's ``json`` payload to bounds plus packed token refs.
+
+    Token-based annotations store ``{page: {bounds, tokensJsons, rawText}}``
+    where ``tokensJsons`` is a list of ``{"pageIndex": p, "tokenIndex": t}``
+    dicts. We keep per-page bounds and collapse tokens into a flat list of
+    ``[pageIndex, tokenIndex, pageIndex, tokenIndex, ...]`` ints. Span
+    annotations (``{start, end}``) are returned as ``{"span": [start, end]}``.
+    """
+    if not isinstance(annotation_json, dict):
+        return {}
+
+    if "start" in annotation_json and "end" in annotation_json:
+        return {"span": [annotation_json["start"], annotation_json["end"]]}
+
+    bounds: dict[str, Any] = {}
+    tokens: list[int] = []
+    for page_key, page_obj in annotation_json.items():
+        if not isinstance(page_obj, dict):
+            continue
+        bounds[str(page_key)] = page_obj.get("bounds")
+        for token in page_obj.get("tokensJsons") or []:
+            try:
+                tokens.append(int(token["pageIndex"]))
+                tokens.append(int(token["tokenIndex"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return {"bounds": bounds, "tokens": tokens}
+
+
+def build_page_index(
+    document_id: int | str,
+    corpus_id: Optional[int | str] = None,
+    analysis_ids: Optional[Sequence[int]] = None,
+    label_type: Optional[str] = None,
+) -> dict[int, list[dict[str, Any]]]:
+    """
+    Build (and cache) the page index for a document / corpus / analysis selection.
+
+    Args:
+        document_id: Document pk.
+        corpus_id: Corpus pk, or None to include annotations from any corpus.
+        analysis_ids: Analysis pks to include, or None for human annotations only.
+        label_type: Optional annotation label type filter.
+
+    Returns:
+        Mapping of 0-indexed page number to the compact entries on that page,
+        ordered by creation time.
+    """
+    from opencontractserver.annotations.models import Annotation
+
+    # Resolve the key *before* querying so an invalidation that lands mid-build
+    # orphans what we are about to write instead of being masked by it.
+    key_base = _index_key_base(document_id, corpus_id, analysis_ids, label_type)
+
+    queryset = Annotation.objects.filter(document_id=document_id)
+    if corpus_id is not None:
+        queryset = queryset.filter(corpus_id=corpus_id)
+    if analysis_ids is None:
+        queryset = queryset.filter(analysis__isnull=True)
+    elif analysis_ids:
+        queryset = queryset.filter(analysis_id__in=analysis_ids)
+    if label_type is not None:
+        queryset = queryset.filter(annotation_label__label_type=label_type)
+
+    index: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    for row in queryset.order_by("page", "created").values(
+        "id",
+        "page",
+        "annotation_label_id",
+        "annotation_type",
+        "structural",
+        "creator_id",
+        "is_public",
+        "json",
+    ):
+        index[row["page"]].append(
+            {
+                "id": row["id"],
+                "page": row["page"],
+                "label_id": row["annotation_label_id"],
+                "annotation_type": row["annotation_type"],
+                "structural": row["structural"],
+                "creator_id": row["creator_id"],
+                "is_public": row["is_public"],
+                **pack_annotation_json(row["json"]),
+            }
+        )
+
+    timeout = _page_index_timeout()
+    cache.set_many(
+        {f"{key_base}:page:{page}": entries for page, entries in index.items()},
+        timeout=timeout,
+    )
+    cache.set(f"{key_base}:pages", set(index.keys()), timeout=timeout)
+
+    logger.debug(
+        f"build_page_index - doc {document_id}, corpus {corpus_id}, "
+        f"analyses {analysis_ids}: {len(index)} pages indexed"
+    )
+    return dict(index)
+
+
+def get_page_entries(
+    document_id: int | str,
+    pages: Iterable[int],
+    user,
+    corpus_id: Optional[int | str] = None,
+    analysis_ids: Optional[Sequence[int]] = None,
+    label_type: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Return the compact index entries on ``pages`` that ``user`` may see.
+
+    The index is built on first use and served from cache afterwards. Only the
+    requested pages are fetched from the cache.
+    """
+    pages = list(pages)
+    key_base = _index_key_base(document_id, corpus_id, analysis_ids, label_type)
+    page_keys = [f"{key_base}:page:{page}" for page in pages]
+    cached = cache.get_many([f"{key_base}:pages", *page_keys])
+
+    indexed_pages = cached.get(f"{key_base}:pages")
+    # A page that should be indexed but is missing was evicted; rebuild.
+    if indexed_pages is not None and all(
+        key in cached for page, key in zip(pages, page_keys) if page in indexed_pages
+    ):
+        entries = [entry for key in page_keys for entry in cached.get(key, [])]
+    else:
+        index = build_page_index(document_id, corpus_id, analysis_ids, label_type)
+        entries = [entry for page in pages for entry in index.get(page, [])]
+
+    return filter_visible_entries(entries, user)
+
+
+def filter_visible_entries(entries: list[dict[str, Any]], user) -> list[dict[str, Any]]:
+    """Apply the same creator / is_public visibility rule as the resolvers."""
+    if user.is_superuser:
+        return entries
+    if user.is_anonymous:
+        return [entry for entry in entries if entry["is_public"]]
+    return [
+        entry
+        for entry in entries
+        if entry["is_public"] or entry["creator_id"] == user.id
+    ]
+
+
+def invalidate_page_index(document_ids: int | str | Iterable[int | str]) -> None:
+    """Drop every cached page index for the given document(s)."""
+    if isinstance(document_ids, (int, str)):
+        document_ids = [document_ids]
+    cache.set_many(
+        {_version_key(doc_id): uuid.uuid4().hex for doc_id in set(document_ids)},
+        timeout=None,
+    )
@@ -0,0 +1,224 @@
+"""
+Storage-backed cache of parser output.
+
+A parser's ``OpenContractDocExport`` for a document only depends on the
+document's source file, the parser and the settings it ran with, so
+``BaseParser.process_document`` keys it on (source file sha256, parser class
+path, normalized parser kwargs, ``parser_version``) and stores it as gzipped
+JSON under ``PARSER_CACHE_PREFIX`` in the default storage. Re-ingesting the
+same bytes with the same configuration replays the stored export through
+``save_parsed_data`` instead of calling the parser service again.
+
+Entries older than ``PARSER_CACHE_MAX_AGE_DAYS`` or beyond
+``PARSER_CACHE_MAX_BYTES`` in total (oldest first) are removed by
+:func:`evict_parser_cache` (``manage.py parser_cache evict`` or the
+``evict_parser_cache_task`` Celery task).
+"""
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from opencontractserver.documents.models import Document
+from opencontractserver.types.dicts import OpenContractDocExport
+
+logger = logging.getLogger(__name__)
+
+PARSER_CACHE_PREFIX = "parser_cache"
+CACHE_FORMAT_VERSION = 1
+
+# Call-time kwargs that don't change what a parser returns
+IGNORED_KWARGS = {"pdf_path", "api_key"}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    path: str
+    parser: str
+    size: int
+    modified: datetime.datetime
+
+
+def parser_cache_enabled() -> bool:
+    return getattr(settings, "PARSER_CACHE_ENABLED", False)
+
+
+def normalize_parser_kwargs(kwargs: dict[str, Any]) -> str:
+    return json.dumps(
+        {k: v for k, v in kwargs.items() if k not in IGNORED_KWARGS},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+def parser_cache_key(
+    parser_path: str, parser_version: str, file_sha256: str, kwargs: dict[str, Any]
+) -> str:
+    payload = "\n".join(
+        [
+            str(CACHE_FORMAT_VERSION),
+            parser_path,
+            str(parser_version),
+            file_sha256,
+            normalize_parser_kwargs(kwargs),
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def document_source_sha256(document: Document) -> Optional[str]:
+    """
+    sha256 of the file a parser reads for *document* (its pdf_file, or the
+    txt_extract_file of text documents). Computed once and stored on
+    ``Document.file_sha256`` for documents that didn't record it at upload.
+    """
+    if document.file_sha256:
+        return document.file_sha256
+
+    source = document.pdf_file or document.txt_extract_file
+    if not source:
+        return None
+
+    digest = hashlib.sha256()
+    with source.open("rb") as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    document.file_sha256 = digest.hexdigest()
+    Document.objects.filter(pk=document.pk).update(file_sha256=document.file_sha256)
+    return document.file_sha256
+
+
+def _parser_dir(parser_path: str) -> str:
+    return f"{PARSER_CACHE_PREFIX}/{parser_path.rsplit('.', 1)[-1]}"
+
+
+def cache_entry_path(parser_path: str, key: str) -> str:
+    return f"{_parser_dir(parser_path)}/{key}.json.gz"
+
+
+def has_cached_export(parser_path: str, key: str) -> bool:
+    try:
+        return default_storage.exists(cache_entry_path(parser_path, key))
+    except Exception as e:
+        logger.warning(f"Parser cache lookup failed: {e}")
+        return False
+
+
+def load_cached_export(parser_path: str, key: str) -> Optional[OpenContractDocExport]:
+    path = cache_entry_path(parser_path, key)
+    try:
+        if not default_storage.exists(path):
+            return None
+        with default_storage.open(path, "rb") as entry_file:
+            entry = json.loads(gzip.decompress(entry_file.read()))
+    except Exception as e:
+        # A broken entry is a miss; it gets overwritten by the fresh parse
+        logger.warning(f"Could not read parser cache entry {path}: {e}")
+        return None
+    return entry["export"]
+
+
+def store_cached_export(
+    parser_path: str,
+    parser_version: str,
+    key: str,
+    export: OpenContractDocExport,
+) -> None:
+    path = cache_entry_path(parser_path, key)
+    entry = {
+        "format": CACHE_FORMAT_VERSION,
+        "parser": parser_path,
+        "parser_version": parser_version,
+        "created": timezone.now().isoformat(),
+        "export": export,
+    }
+    try:
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        default_storage.save(
+            path, ContentFile(gzip.compress(json.dumps(entry).encode("utf-8")))
+        )
+    except Exception as e:
+        logger.warning(f"Could not write parser cache entry {path}: {e}")
+
+
+def iter_cache_entries(parser_path: Optional[str] = None) -> Iterator[CacheEntry]:
+    if parser_path:
+        parser_dirs = [_parser_dir(parser_path)]
+    else:
+        if not default_storage.exists(PARSER_CACHE_PREFIX):
+            return
+        dir_names, _ = default_storage.listdir(PARSER_CACHE_PREFIX)
+        parser_dirs = [f"{PARSER_CACHE_PREFIX}/{name}" for name in dir_names]
+
+    for parser_dir in parser_dirs:
+        if not default_storage.exists(parser_dir):
+            continue
+        _, file_names = default_storage.listdir(parser_dir)
+        for file_name in file_names:
+            path = f"{parser_dir}/{file_name}"
+            yield CacheEntry(
+                path=path,
+                parser=parser_dir.rsplit("/", 1)[-1],
+                size=default_storage.size(path),
+                modified=default_storage.get_modified_time(path),
+            )
+
+
+def purge_parser_cache(
+    parser_path: Optional[str] = None, older_than: Optional[datetime.timedelta] = None
+) -> int:
+    """Deletes entries (of one parser / older than a cutoff); returns how many."""
+    cutoff = timezone.now() - older_than if older_than is not None else None
+    deleted = 0
+    for entry in list(iter_cache_entries(parser_path)):
+        if cutoff is None or entry.modified < cutoff:
+            default_storage.delete(entry.path)
+            deleted += 1
+    return deleted
+
+
+def evict_parser_cache(
+    max_age_days: Optional[int] = None, max_bytes: Optional[int] = None
+) -> int:
+    """
+    Deletes entries older than *max_age_days*, then the oldest entries until
+    the cache fits in *max_bytes* (defaults from settings; 0 = no limit).
+    Returns the number of entries deleted.
+    """
+    if max_age_days is None:
+        max_age_days = getattr(settings, "PARSER_CACHE_MAX_AGE_DAYS", 0)
+    if max_bytes is None:
+        max_bytes = getattr(settings, "PARSER_CACHE_MAX_BYTES", 0)
+
+    entries = sorted(iter_cache_entries(), key=lambda entry: entry.modified)
+    cutoff = timezone.now() - datetime.timedelta(days=max_age_days)
+    total = sum(entry.size for entry in entries)
+    deleted = 0
+    for entry in entries:
+        expired = max_age_days > 0 and entry.modified < cutoff
+        over_size = max_bytes > 0 and total > max_bytes
+        if not (expired or over_size):
+            # Entries are oldest first: nothing after this one is due either
+            break
+        default_storage.delete(entry.path)
+        total -= entry.size
+        deleted += 1
+
+    logger.info(f"Evicted {deleted} parser cache entries ({total} bytes remain)")
+    return deleted
@@ -0,0 +1,186 @@
+"""
+Page-range sharding of large PDFs for parsing.
+
+``ingest_doc`` splits PDFs with more pages than a parser's shard threshold
+into page ranges, parses each range as its own small PDF in parallel and then
+merges the per-shard exports with :func:`merge_parsed_shards` into the export
+the parser would have produced for the whole document.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+from typing import Any, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from opencontractserver.types.dicts import OpenContractDocExport
+
+logger = logging.getLogger(__name__)
+
+SHARD_STORAGE_PREFIX = "pdf_shards"
+
+
+def plan_page_shards(
+    page_count: int, threshold: int, shard_pages: int
+) -> list[tuple[int, int]]:
+    """
+    Page ranges ``[start, end)`` to parse separately, or ``[]`` when the
+    document has no more than *threshold* pages (or sharding is off).
+    """
+    if threshold < 1 or shard_pages < 1 or page_count <= threshold:
+        return []
+    return [
+        (start, min(start + shard_pages, page_count))
+        for start in range(0, page_count, shard_pages)
+    ]
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    from PyPDF2 import PdfReader
+
+    with default_storage.open(pdf_path, "rb") as pdf_file:
+        return len(PdfReader(pdf_file).pages)
+
+
+def shard_path(doc_id: int, start_page: int, end_page: int, extension: str) -> str:
+    return (
+        f"{SHARD_STORAGE_PREFIX}/doc_{doc_id}/pages_{start_page}-{end_page}.{extension}"
+    )
+
+
+def write_pdf_page_range(
+    pdf_path: str, start_page: int, end_page: int, target_path: str
+) -> str:
+    """Save pages ``[start_page, end_page)`` of *pdf_path* as a new PDF; return its path."""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    with default_storage.open(pdf_path, "rb") as pdf_file:
+        reader = PdfReader(pdf_file)
+        writer = PdfWriter()
+        for page_index in range(start_page, end_page):
+            writer.add_page(reader.pages[page_index])
+        output = io.BytesIO()
+        writer.write(output)
+
+    if default_storage.exists(target_path):
+        default_storage.delete(target_path)
+    return default_storage.save(target_path, ContentFile(output.getvalue()))
+
+
+def _shift_annotation_json(
+    annotation_json: Any, page_offset: int, char_offset: int
+) -> Any:
+    if not isinstance(annotation_json, dict):
+        return annotation_json
+
+    # Span annotations: character offsets into the document text
+    if "start" in annotation_json and "end" in annotation_json:
+        return {
+            **annotation_json,
+            "start": annotation_json["start"] + char_offset,
+            "end": annotation_json["end"] + char_offset,
+        }
+
+    # Token annotations: keyed by page index, tokens reference their page
+    shifted = {}
+    for page_key, page_json in annotation_json.items():
+        new_page = int(page_key) + page_offset
+        new_key = str(new_page) if isinstance(page_key, str) else new_page
+        if isinstance(page_json, dict):
+            page_json = {
+                **page_json,
+                "tokensJsons": [
+                    {**token, "pageIndex": token["pageIndex"] + page_offset}
+                    for token in page_json.get("tokensJsons", [])
+                ],
+            }
+        shifted[new_key] = page_json
+    return shifted
+
+
+def _shard_id(shard_index: int, old_id: Optional[str | int]) -> Optional[str]:
+    return None if old_id is None else f"shard{shard_index}-{old_id}"
+
+
+def merge_parsed_shards(
+    shards: list[tuple[int, OpenContractDocExport]],
+) -> OpenContractDocExport:
+    """
+    Merge per-shard parser exports, given as ``(first page of the shard,
+    export)`` in page order, into one document export.
+
+    PAWLS pages, annotation pages and token references are moved to their page
+    in the whole document, span offsets are moved to their place in the
+    concatenated text (shard texts joined by a newline) and annotation /
+    relationship ids are prefixed per shard so they stay unique.
+    """
+    merged: OpenContractDocExport = {
+        "title": "",
+        "description": "",
+        "content": "",
+        "page_count": 0,
+        "pawls_file_content": [],
+        "doc_labels": [],
+        "labelled_text": [],
+        "relationships": [],
+    }
+    contents = []
+    char_offset = 0
+
+    for shard_index, (page_offset, shard) in enumerate(shards):
+        if shard_index == 0:
+            merged["title"] = shard.get("title", "")
+            merged["description"] = shard.get("description", "")
+
+        pawls_pages = shard.get("pawls_file_content") or []
+        for local_index, pawls_page in enumerate(pawls_pages):
+            merged["pawls_file_content"].append(
+                {
+                    **pawls_page,
+                    "page": {**pawls_page["page"], "index": page_offset + local_index},
+                }
+            )
+        merged["page_count"] += len(pawls_pages) or shard.get("page_count", 0)
+
+        for label in shard.get("doc_labels", []):
+            if label not in merged["doc_labels"]:
+                merged["doc_labels"].append(label)
+
+        for annotation in shard.get("labelled_text", []):
+            merged["labelled_text"].append(
+                {
+                    **annotation,
+                    "id": _shard_id(shard_index, annotation.get("id")),
+                    "parent_id": _shard_id(shard_index, annotation.get("parent_id")),
+                    "page": annotation.get("page", 0) + page_offset,
+                    "annotation_json": _shift_annotation_json(
+                        annotation.get("annotation_json"), page_offset, char_offset
+                    ),
+                }
+            )
+
+        for relationship in shard.get("relationships", []) or []:
+            merged["relationships"].append(
+                {
+                    **relationship,
+                    "id": _shard_id(shard_index, relationship.get("id")),
+                    "source_annotation_ids": [
+                        _shard_id(shard_index, old_id)
+                        for old_id in relationship.get("source_annotation_ids", [])
+                    ],
+                    "target_annotation_ids": [
+                        _shard_id(shard_index, old_id)
+                        for old_id in relationship.get("target_annotation_ids", [])
+                    ],
+                }
+            )
+
+        content = shard.get("content", "") or ""
+        contents.append(content)
+        char_offset += len(content) + 1
+
+    merged["content"] = "\n".join(contents)
+    return merged
@@ -9,6 +9,7 @@ from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from guardian.shortcuts import assign_perm
+from guardian.utils import get_user_obj_perms_model
 
 from config.graphql.permissioning.permission_annotator.middleware import combine
 from opencontractserver.types.enums import PermissionTypes
@@ -137,6 +138,69 @@ def set_permissions_for_obj_to_user(
             assign_perm(f"{app_name}.publish_{model_name}", user, instance)
 
 
+# Permission codename prefix -> permission types that grant it
+PERMISSION_PREFIXES_BY_TYPE = {
+    "create": {PermissionTypes.CREATE, PermissionTypes.CRUD, PermissionTypes.ALL},
+    "read": {PermissionTypes.READ, PermissionTypes.CRUD, PermissionTypes.ALL},
+    "update": {PermissionTypes.UPDATE, PermissionTypes.CRUD, PermissionTypes.ALL},
+    "remove": {PermissionTypes.DELETE, PermissionTypes.CRUD, PermissionTypes.ALL},
+    "permission": {PermissionTypes.PERMISSION, PermissionTypes.ALL},
+    "publish": {PermissionTypes.PUBLISH, PermissionTypes.ALL},
+}
+
+
+def grant_permissions_for_new_objs_to_user(
+    user_val: int | str | type[User],
+    instances: list[django.db.models.Model],
+    permissions: list[PermissionTypes],
+) -> None:
+    """
+    Bulk variant of set_permissions_for_obj_to_user for freshly created objects of
+    one model (e.g. the result of a bulk_create): writes every object permission
+    row in one INSERT instead of a few queries per object and permission.
+    Existing object permissions are NOT cleared, as new objects have none.
+    """
+    if not instances:
+        return
+
+    if isinstance(user_val, str) or isinstance(user_val, int):
+        user = User.objects.get(id=user_val)
+    else:
+        user = user_val
+
+    model_name = instances[0]._meta.model_name
+    requested_permission_set = set(permissions)
+    codenames = [
+        f"{prefix}_{model_name}"
+        for prefix, granting_types in PERMISSION_PREFIXES_BY_TYPE.items()
+        if granting_types.intersection(requested_permission_set)
+    ]
+    content_type = ContentType.objects.get_for_model(instances[0])
+    permission_objs = Permission.objects.filter(
+        content_type=content_type, codename__in=codenames
+    )
+
+    perm_model = get_user_obj_perms_model(instances[0])
+    if perm_model.objects.is_generic():
+        rows = [
+            perm_model(
+                permission=permission,
+                user=user,
+                content_type=content_type,
+                object_pk=str(instance.pk),
+            )
+            for permission in permission_objs
+            for instance in instances
+        ]
+    else:
+        rows = [
+            perm_model(permission=permission, user=user, content_object=instance)
+            for permission in permission_objs
+            for instance in instances
+        ]
+    perm_model.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
 def get_users_group_ids(user_instance=User) -> list[str | int]:
     """
     For a given user, return list of group ids it belongs to.
@@ -7,6 +7,13 @@ from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.db.models import Q
 
+from config.graphql.response_cache import (
+    ANNOTATION_TAG,
+    CORPUS_TAG,
+    DOCUMENT_TAG,
+    LABELSET_TAG,
+    invalidate_response_cache_tags,
+)
 from opencontractserver.analyzer.models import Analysis, Analyzer
 from opencontractserver.annotations.models import (
     Annotation,
@@ -16,6 +23,7 @@ from opencontractserver.annotations.models import (
 from opencontractserver.corpuses.models import Corpus, CorpusQuery
 from opencontractserver.documents.models import Document, DocumentAnalysisRow
 from opencontractserver.extracts.models import Datacell, Extract, Fieldset
+from opencontractserver.utils.page_index import invalidate_page_index
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -65,6 +73,11 @@ def make_analysis_public(analysis_id: int | str) -> MakePublicReturnType:
         Annotation.objects.bulk_update(
             analyzer_annotations, ["is_public"], batch_size=100
         )
+        # bulk_update skips post_save, so drop the cached page indexes by hand
+        invalidate_page_index(
+            {annotation.document_id for annotation in analyzer_annotations}
+        )
+        invalidate_response_cache_tags(ANNOTATION_TAG, LABELSET_TAG)
 
         with transaction.atomic():
             analysis.backend_lock = False
@@ -121,6 +134,11 @@ def make_corpus_public(corpus_id: int | str) -> MakePublicReturnType:
             is_public=True
         )
         logger.info(f"Made {updated_annotations} human annotations public")
+        invalidate_page_index(
+            Annotation.objects.filter(corpus=corpus)
+            .values_list("document_id", flat=True)
+            .distinct()
+        )
 
         # Make extracts public
         updated_extracts = Extract.objects.filter(corpus=corpus).update(is_public=True)
@@ -183,6 +201,11 @@ def make_corpus_public(corpus_id: int | str) -> MakePublicReturnType:
         corpus.refresh_from_db()
         logger.info(f"Refreshed corpus {corpus_id} from database")
 
+        # The .update() calls above bypass the save signals
+        invalidate_response_cache_tags(
+            CORPUS_TAG, DOCUMENT_TAG, ANNOTATION_TAG, LABELSET_TAG
+        )
+
         message = "SUCCESS - Corpus and related objects are now public"
         ok = True
 
@@ -0,0 +1,91 @@
+"""
+Multi-pattern exact string search.
+
+``MultiPatternMatcher`` is an Aho–Corasick automaton: it finds every
+occurrence of any number of patterns in a single pass over the text, instead
+of one ``str.find`` scan of the whole text per pattern.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+
+
+class MultiPatternMatcher:
+    """Aho–Corasick automaton over a fixed set of (non-empty) patterns."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: list[str] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Pattern indexes ending at each state, including via failure links
+        self._output: list[list[int]] = [[]]
+
+        seen: set[str] = set()
+        for pattern in patterns:
+            if pattern and pattern not in seen:
+                seen.add(pattern)
+                self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """Yield ``(start, end, pattern)`` for every occurrence, overlaps included."""
+        if not self.patterns:
+            return
+        goto, fail, output, patterns = (
+            self._goto,
+            self._fail,
+            self._output,
+            self.patterns,
+        )
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_index in output[state]:
+                pattern = patterns[pattern_index]
+                yield index + 1 - len(pattern), index + 1, pattern
+
+    def find_all(self, text: str) -> dict[str, list[tuple[int, int]]]:
+        """
+        Map each pattern to its non-overlapping occurrences, scanning left to
+        right - the same spans a ``str.find`` loop that resumes after each
+        match would return. Different patterns may overlap each other.
+        """
+        found: dict[str, list[tuple[int, int]]] = {p: [] for p in self.patterns}
+        # Matches are reported by end offset; each pattern's starts still
+        # ascend, so the greedy overlap check per pattern stays correct.
+        for start, end, pattern in self.iter_matches(text):
+            spans = found[pattern]
+            if not spans or start >= spans[-1][1]:
+                spans.append((start, end))
+        return found